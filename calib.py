@@ -14,7 +14,6 @@ import os
 import pwd
 import numpy as np
 import datetime
-import time
 
 # Set the Python path to include package specific functions.
 prPath = os.path.realpath(__file__)
@@ -30,10 +29,13 @@ import warnings
 warnings.filterwarnings("ignore")
 
 import statusMod
+import schedMod
 import dbMod
 import errMod
+import telemMod
 import configMod
 import calibMod
+import poolMod
 import pandas as pd
 
 def main(argv):
@@ -45,7 +47,7 @@ def main(argv):
     parser.add_argument('--optDbPath',type=str,nargs='?',
                         help='Optional alternative path to SQLite DB file.')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # If the SQLite file does not exist, throw an error.
     if args.optDbPath is not None:
@@ -159,6 +161,24 @@ def main(argv):
         
     # Assign the SQL command from the config file into the jobData structure
     jobData.gSQL = staticData.gSQL
+    
+    # Assign the scheduler snapshot lifetime from the config file.
+    jobData.schedCacheTTL = staticData.schedCacheTTL
+    jobData.maxSubmitRate = staticData.maxSubmitRate
+    jobData.maxJobsInFlight = staticData.maxJobsInFlight
+    jobData.idleWait = staticData.idleWait
+    jobData.nBasinThreads = staticData.nBasinThreads
+    jobData.ddsCandidates = staticData.ddsCandidates
+    jobData.boundInterval = staticData.boundInterval
+    jobData.streamCollect = staticData.streamCollect
+    jobData.autoSize = staticData.autoSize
+    jobData.cellsPerCore = staticData.cellsPerCore
+    jobData.wallTimeModel = staticData.wallTimeModel
+    jobData.taskFarm = staticData.taskFarm
+    jobData.farmNodes = staticData.farmNodes
+    jobData.farmCoresPerNode = staticData.farmCoresPerNode
+    jobData.farmWallTime = staticData.farmWallTime
+    jobData.chainJobs = staticData.chainJobs
         
     # Check gages in directory to match what's in the database
     try:
@@ -302,7 +322,7 @@ def main(argv):
     # for all the iterations. 
     entryValue = float(len(jobData.gages)*int(jobData.nIter))
     
-    # Pull all the status values into the keySlot array. 
+    # Ensure each basin has a valid domainID before pulling status values.
     for basin in range(0,len(jobData.gages)):
         domainID = jobData.gageIDs[basin]
             
@@ -310,17 +330,27 @@ def main(argv):
             jobData.errMsg = "ERROR: Unable to locate domainID for gage: " + str(jobData.gages[basin])
             errMod.errOut(jobData)
             
-        # We are going to pull all values for one basin, then place them into the array.
-        # This is faster then looping over each iteration at a time. 
-        statusData = db.iterationStatus(jobData,domainID,str(jobData.gages[basin]))
-        statusData = [list(item) for item in statusData]
-        for iteration in range(0,int(jobData.nIter)):
-            for iteration2 in range(0,int(jobData.nIter)):
-                if statusData[iteration2][0] == iteration+1:
-                    keySlot[basin,iteration] = float(statusData[iteration2][1])
+    # Pull all the status values into the keySlot array with a single query.
+    try:
+        keySlot[:,:] = db.calibStatusMatrix(jobData)
+    except:
+        errMod.errOut(jobData)
                     
                 
+    # The database object is shared by the threads advancing each basin.
+    dbShared = poolMod.lockedProxy(db)
+    
     while not completeStatus:
+        # When ran through the orchestrator, the job may be asked to stop.
+        if statusMod.stopRequested():
+            print "STOP REQUESTED FOR JOB ID: " + str(jobData.jobID)
+            break
+            
+        # Mark the beginning of a new sweep through the basins. One snapshot of the
+        # scheduler is shared by all job status checks made during the sweep.
+        statusMod.markSchedSweep()
+        keySlotPrev = keySlot.copy()
+        
         # Walk through calibration directories for each basin. Determine the status of
         # the model runs by the files available. If restarting, modify the 
         # namelist files appropriately. Then, restart the model. If anything goes wrong, notifications
@@ -348,56 +378,14 @@ def main(argv):
         # If the status goes to -0.75, a LOCK file is created and needs to be removed
         # manually by the user before the workflow can continue. 
 
-        for basin in range(0,len(jobData.gages)):
-            for iteration in range(0,int(jobData.nIter)):
-                # Holding onto the status value before the workflow iterates for checking below.
-                keyStatusCheck1 = keySlot[basin,iteration]
-                # If the status is already 1.0, then continue the loop as now work needs to be done.
-                if keyStatusCheck1 == 1.0:
-                    continue
-                else:
-                    try:
-                        calibMod.runModel(jobData,staticData,db,jobData.gageIDs[basin],
-                                          jobData.gages[basin],keySlot,basin,iteration,pbsJobId)
-                    except:
-                        errMod.errOut(jobData)
-                # Temporary for Cheyenne to slow down the strain on PBS. 
-                keyStatusCheck2 = keySlot[basin,iteration]
-                # Put some spacing between launching model simulations to slow down que geting 
-                # overloaded.
-                if keyStatusCheck1 == 0.25 and keyStatusCheck2 == 0.5:
-                    time.sleep(15)
-                if keyStatusCheck1 == 0.0 and keyStatusCheck2 == 0.5:
-                    time.sleep(15)
-                if keyStatusCheck1 == 0.5 and keyStatusCheck2 == 0.5:
-                    time.sleep(15)
-                if keyStatusCheck1 == 0.0 and keyStatusCheck2 == 0.25:
-                    time.sleep(15)
-                if keyStatusCheck1 == 0.5 and keyStatusCheck2 == 0.75:
-                    time.sleep(15)
-                if keyStatusCheck1 == 0.75 and keyStatusCheck2 == 0.9:
-                    time.sleep(15)
-                if keyStatusCheck1 == 0.5 and keyStatusCheck2 == 0.9:
-                    time.sleep(15)
-                if keyStatusCheck1 == 0.9 and keyStatusCheck2 == 0.9:
-                    time.sleep(15)
-                if keyStatusCheck1 == 0.9 and keyStatusCheck2 == 1.0:
-                    time.sleep(15)
-                    
-                # TEMPORARY FOR CHEYENNE
-                # Check to make sure program hasn't passed a prescribed time limit. If it has,
-                # exit gracefully.
-                #timeCheckStamp = datetime.datetime.now()
-                #programDtCheck = timeCheckStamp - begTimeStamp
-                #if programDtCheck.seconds/60.0 > 90.0: 
-                #    # 90-minutes)
-                #    try:
-                #        fileObj = open(lockPath,'a')
-                #        fileObj.write('WORKFLOW HAS HIT TIME LIMIT - EXITING....\n')
-                #        fileObj.close()
-                #    except:
-                #        jobData.errMsg = "ERROR: Unable to update workflow LOCK file: " + lockPath
-                #        errMod.errOut(jobData)
+        # Basins are independent of each other, so they are advanced concurrently
+        # through a pool of threads. Iterations within a basin are always handled
+        # in order by a single thread.
+        basinArgs = [(staticData,dbShared,basin,keySlot,pbsJobId) for basin in range(0,len(jobData.gages))]
+        try:
+            poolMod.runBasinPool(jobData,jobData.nBasinThreads,sweepBasin,basinArgs)
+        except:
+            errMod.errOut(jobData)
                     
         # Check to see if program requirements have been met.
         if keySlot.sum() == entryValue:
@@ -420,9 +408,39 @@ def main(argv):
         except:
             jobData.errMsg = "ERROR: Unable to update workflow LOCK file: " + lockPath
             errMod.errOut(jobData)
+
+        # Enter the telemetry of jobs submitted, started, or finished during
+        # this sweep into the database.
+        try:
+            telemMod.ingestTelemetry(jobData,db)
+        except:
+            errMod.errOut(jobData)
+
+        # If nothing changed during this sweep, wait on the scheduler instead
+        # of immediately sweeping through the basins again.
+        if not completeStatus and (keySlot == keySlotPrev).all():
+            try:
+                statusMod.waitSchedEvent(jobData,[schedMod.modelRunType(jobData),jobData.analysisRunType])
+            except:
+                errMod.errOut(jobData)
             
     # Remove LOCK file
     os.remove(lockPath)
     
+def sweepBasin(jobData,staticData,db,basin,keySlot,pbsJobId):
+    """
+    Generic function to advance the state of all calibration iterations for 
+    a single basin by one step. 
+    """
+    for iteration in range(0,int(jobData.nIter)):
+        # If the status is already 1.0, then continue the loop as no work needs to be done.
+        if keySlot[basin,iteration] == 1.0:
+            continue
+        try:
+            calibMod.runModel(jobData,staticData,db,jobData.gageIDs[basin],
+                              jobData.gages[basin],keySlot,basin,iteration,pbsJobId)
+        except:
+            raise
+            
 if __name__ == "__main__":
     main(sys.argv[1:])
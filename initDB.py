@@ -26,12 +26,39 @@ sys.path.insert(0,libPath)
 import warnings
 warnings.filterwarnings("ignore")
 
+import telemMod
+
+# Indices placed on the tables. Each entry contains the name of the index, the
+# table, the columns making up the key, and a flag indicating if the key must be
+# unique. Lookups made by the workflow are of the form jobID/domainID/iteration,
+# so without these every lookup is a scan of all jobs ever placed in the DB file.
+schemaIndices = [['Calib_Params_Key','Calib_Params',['jobID','domainID','iteration','paramName'],True],
+                 ['Sens_Params_Key','Sens_Params',['jobID','domainID','iteration','paramName'],True],
+                 ['Calib_Stats_Key','Calib_Stats',['jobID','domainID','iteration'],True],
+                 ['Sens_Stats_Key','Sens_Stats',['jobID','domainID','iteration','timestep'],True],
+                 ['Job_Params_Key','Job_Params',['jobID','param'],False],
+                 ['Valid_Stats_Key','Valid_Stats',['jobID','domainID'],False],
+                 ['Job_Telemetry_Key','Job_Telemetry',['jobID','script','task'],False]]
+
 def main(argv):
     # Optional hostname for the user to pass.
     parser = argparse.ArgumentParser(description='Main program to initialize the wrfHydroCalib_DB')
     parser.add_argument('--optDbPath',type=str,nargs='?',
                         help='Optional alternative path to SQLite DB file.')
+    parser.add_argument('--upgrade',action='store_true',
+                        help='Upgrade the indices and journal mode of an existing SQLite DB file in place.')
     args = parser.parse_args()
+    
+    if args.upgrade:
+        if args.optDbPath is not None:
+            dbPath = args.optDbPath
+        else:
+            dbPath = topDir + "wrfHydroCalib.db"
+        if not os.path.isfile(dbPath):
+            print "ERROR: SQLite3 DB file: " + dbPath + " not found."
+            sys.exit(1)
+        upgradeDB(dbPath)
+        return
                     
     # If the optional SQLite file already exists, throw an error.
     if args.optDbPath is not None:
@@ -137,6 +164,26 @@ def main(argv):
                         msof real, hyperResMultiObj real)''')
     except:
         errOut(dbConn,"Unable to create table: Valid_Stats.",dbPath)
+        
+    try:
+        dbConn.execute('CREATE TABLE Job_Telemetry ' + telemMod.tableSchema)
+    except:
+        errOut(dbConn,"Unable to create table: Job_Telemetry.",dbPath)
+        
+    # Create the table indices.
+    for indexTmp in schemaIndices:
+        try:
+            createIndex(dbConn,indexTmp)
+        except:
+            errOut(dbConn,"Unable to create index: " + indexTmp[0],dbPath)
+            
+    # Use write-ahead logging so reporting utilities can read from the DB file
+    # while the workflow is writing to it. This setting persists in the file.
+    try:
+        dbConn.execute('PRAGMA journal_mode=WAL')
+        dbConn.commit()
+    except:
+        errOut(dbConn,"Unable to set WAL journal mode.",dbPath)
     
     # Close the database file
     try:
@@ -144,6 +191,70 @@ def main(argv):
     except:
         errOut(dbConn,'Unable to close file: ' + dbPath,dbPath)
                         
+def createIndex(dbConn,indexTmp):
+    """
+    Generic function to create a single table index if it does not already exist.
+    """
+    if indexTmp[3]:
+        sqlCmd = 'CREATE UNIQUE INDEX IF NOT EXISTS '
+    else:
+        sqlCmd = 'CREATE INDEX IF NOT EXISTS '
+    sqlCmd = sqlCmd + indexTmp[0] + ' ON ' + indexTmp[1] + ' (' + ','.join(indexTmp[2]) + ')'
+    dbConn.execute(sqlCmd)
+    
+def upgradeDB(dbPath):
+    """
+    Generic function to upgrade an existing DB file in place. Missing tables
+    are created, duplicate rows that would violate the unique table keys are
+    removed (the first row entered is kept), the table indices are created,
+    and the journal mode is switched to write-ahead logging. The tables and
+    indices are upgraded inside a single transaction, so nothing is changed
+    if any of those steps fail. The workflow should not be running on the
+    DB file while it is upgraded.
+    """
+    # Transactions are handled explicitly, as the sqlite3 module otherwise
+    # commits any open transaction before each CREATE statement.
+    try:
+        dbConn = sqlite3.connect(dbPath,isolation_level=None)
+    except:
+        print "ERROR: Unable to open SQLite3 DB file: " + dbPath
+        sys.exit(1)
+        
+    try:
+        dbConn.execute('BEGIN')
+        # Tables added since the DB file was created.
+        dbConn.execute('CREATE TABLE IF NOT EXISTS Job_Telemetry ' + telemMod.tableSchema)
+        for indexTmp in schemaIndices:
+            if indexTmp[3]:
+                keyStr = ','.join(indexTmp[2])
+                sqlCmd = 'DELETE FROM ' + indexTmp[1] + ' WHERE rowid NOT IN ' + \
+                         '(SELECT min(rowid) FROM ' + indexTmp[1] + ' GROUP BY ' + keyStr + ')'
+                nDel = dbConn.execute(sqlCmd).rowcount
+                if nDel > 0:
+                    print "Removed " + str(nDel) + " duplicate rows from: " + indexTmp[1]
+            createIndex(dbConn,indexTmp)
+            print "Created index: " + indexTmp[0]
+        dbConn.execute('COMMIT')
+    except:
+        print "ERROR: Unable to upgrade indices in SQLite3 DB file: " + dbPath
+        try:
+            dbConn.execute('ROLLBACK')
+        except:
+            pass
+        dbConn.close()
+        sys.exit(1)
+        
+    # The journal mode cannot be changed inside of a transaction.
+    try:
+        modeTmp = dbConn.execute('PRAGMA journal_mode=WAL').fetchone()[0]
+    except:
+        print "ERROR: Unable to set WAL journal mode on SQLite3 DB file: " + dbPath
+        dbConn.close()
+        sys.exit(1)
+    print "Journal mode: " + str(modeTmp)
+        
+    dbConn.close()
+    
 def errOut(dbConn,errMsg,dbPath):
     """"
     Quick function to close out the DB file and report an error to the user on the screen.
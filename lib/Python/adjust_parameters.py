@@ -25,6 +25,36 @@ import pandas as pd
 import time
 import subprocess
 
+# Table of adjustment rules. Each entry contains the parameter name from
+# params_new.txt, the parameter file it applies to, the NetCDF variable
+# being adjusted, and the type of adjustment. A "mult" adjustment multiplies
+# the baseline values by the parameter value, a "set" adjustment replaces
+# the baseline values with the parameter value.
+adjRules = [['bexp','soil','bexp','mult'],
+            ['smcmax','soil','smcmax','mult'],
+            ['slope','soil','slope','set'],
+            ['lksatfac','fulldom','LKSATFAC','set'],
+            ['zmax','gw','Zmax','set'],
+            ['expon','gw','Expon','set'],
+            ['cwpvt','soil','cwpvt','mult'],
+            ['vcmx25','soil','vcmx25','mult'],
+            ['mp','soil','mp','mult'],
+            ['hvt','soil','hvt','mult'],
+            ['mfsno','soil','mfsno','mult'],
+            ['refkdt','soil','refkdt','set'],
+            ['dksat','soil','dksat','mult'],
+            ['retdeprtfac','fulldom','RETDEPRTFAC','set'],
+            ['ovroughrtfac','fulldom','OVROUGHRTFAC','set'],
+            ['dksat','hydro','LKSAT','mult'],
+            ['smcmax','hydro','SMCMAX1','mult'],
+            ['rsurfexp','soil','rsurfexp','set']]
+
+# Directory within a run directory holding the adjusted parameter files. The
+# workflow removes the parameter files from the run directory before each
+# model simulation, so the adjusted files are kept here between iterations
+# and hard linked into the run directory.
+adjDir = "ADJUSTED_PARAMETERS"
+
 def main(argv):
     # Parse arguments. Only input necessary is the run directory.
     parser = argparse.ArgumentParser(description='Main program to adjust input ' + \
@@ -44,20 +74,10 @@ def main(argv):
     runDir = str(args.runDir[0])
     
     # Compose input file paths.
-    fullDomOrig = workDir + "/BASELINE_PARAMETERS/Fulldom.nc"
-    hydroOrig = workDir + "/BASELINE_PARAMETERS/HYDRO_TBL_2D.nc"
-    soilOrig = workDir + "/BASELINE_PARAMETERS/soil_properties.nc"
-    gwOrig = workDir + "/BASELINE_PARAMETERS/GWBUCKPARM.nc"
-    chanParmOrig = workDir + "/BASELINE_PARAMETERS/CHANPARM.TBL"
     rCompletePath = workDir + "/R_COMPLETE"
     adjTbl = workDir + "/params_new.txt"
     
     # Compose output file paths.
-    fullDomOut = runDir + "/Fulldom.nc"
-    hydroOut = runDir + "/HYDRO_TBL_2D.nc"
-    soilOut = runDir + "/soil_properties.nc"
-    gwOut = runDir + '/GWBUCKPARM.nc'
-    chanParmOut = runDir + "/CHANPARM.TBL"
     outFlag = workDir + "/CALIB_ITER.COMPLETE"
     
     # If R COMPLETE flag not present, this implies the R code didn't run
@@ -83,28 +103,74 @@ def main(argv):
         except:
             sys.exit(2)
     
-    try:
-        shutil.copy(fullDomOrig,fullDomOut)
-        shutil.copy(hydroOrig,hydroOut)
-        shutil.copy(soilOrig,soilOut)
-        if args.gwFlag[0] == 1:
-            shutil.copy(gwOrig,gwOut)
-        if args.chRtFlag[0] == 3:
-            # Gridded routing
-            shutil.copy(chanParmOrig,chanParmOut)
-    except:
-        sys.exit(3)
-        
     # Read in new parameters table.
     newParams = pd.read_csv(adjTbl,sep=' ')
+    
+    # Each row of the table holds the parameters for one DDS candidate. The first
+    # candidate is ran in the run directory, the others in run directories 
+    # suffixed with the candidate number.
+    for candNum in range(0,len(newParams)):
+        if candNum == 0:
+            candDir = runDir
+        else:
+            candDir = runDir + "_" + str(candNum)
+        candParams = newParams.iloc[[candNum]].reset_index(drop=True)
+        adjustCandidate(workDir,candDir,candParams,args.gwFlag[0],args.chRtFlag[0])
+        
+    # Touch empty COMPLETE flag file. This will be seen by workflow, demonstrating
+    # calibration iteration is complete.
+    try:
+        open(outFlag,'a').close()
+    except:
+        sys.exit(6)
+            
+def adjustCandidate(workDir,runDir,newParams,gwFlag,chRtFlag):
+    """
+    Generic function to write the adjusted parameter files for one parameter
+    set into a run directory, and remove old restart files from it.
+    """
     paramNames = list(newParams.columns.values)
     
-    if args.chRtFlag[0] == 3:
+    # Compose input file paths.
+    fullDomOrig = workDir + "/BASELINE_PARAMETERS/Fulldom.nc"
+    hydroOrig = workDir + "/BASELINE_PARAMETERS/HYDRO_TBL_2D.nc"
+    soilOrig = workDir + "/BASELINE_PARAMETERS/soil_properties.nc"
+    gwOrig = workDir + "/BASELINE_PARAMETERS/GWBUCKPARM.nc"
+    chanParmOrig = workDir + "/BASELINE_PARAMETERS/CHANPARM.TBL"
+    
+    # Compose output file paths.
+    fullDomOut = runDir + "/Fulldom.nc"
+    hydroOut = runDir + "/HYDRO_TBL_2D.nc"
+    soilOut = runDir + "/soil_properties.nc"
+    gwOut = runDir + '/GWBUCKPARM.nc'
+    chanParmOut = runDir + "/CHANPARM.TBL"
+    
+    # Parameter files that may be adjusted, with their baseline and output paths.
+    parmFiles = {'fulldom':[fullDomOrig,fullDomOut],
+                 'hydro':[hydroOrig,hydroOut],
+                 'soil':[soilOrig,soilOut]}
+    if gwFlag == 1:
+        parmFiles['gw'] = [gwOrig,gwOut]
+        
+    # Only variables with a rule are written. Parameter files without any 
+    # adjustments are hard linked to the baseline files instead of copied.
+    for fileKey in parmFiles.keys():
+        try:
+            reuseFlag = adjustFile(parmFiles[fileKey][0],parmFiles[fileKey][1],fileKey,newParams)
+        except:
+            sys.exit(3)
+        if reuseFlag:
+            print "Re-used adjusted parameter file from previous iteration: " + parmFiles[fileKey][1]
+    
+    if chRtFlag == 3:
         # Open the original CHANPARM.TBL
         chanParmTblDataOrig = file(chanParmOrig)
         
         # Open the new CHANPARM.TBL for writing
-        chanParmOutObj = open(chanParmOut,'w')
+        try:
+            chanParmOutObj = open(chanParmOut,'w')
+        except:
+            sys.exit(3)
         countTmp = 1
         for line in chanParmTblDataOrig:
             if countTmp < 4:
@@ -134,78 +200,6 @@ def main(argv):
             countTmp = countTmp + 1
         chanParmOutObj.close()
         
-    # Open NetCDF parameter files for adjustment.
-    idFullDom = Dataset(fullDomOut,'a')
-    idSoil2D = Dataset(soilOut,'a')
-    if args.gwFlag[0] == 1:
-        idGw = Dataset(gwOut,'a')
-    idHydroTbl = Dataset(hydroOut,'a')
-    
-    # Loop through and adjust each parameter accordingly.
-    for param in paramNames:
-        if param == "bexp":
-            idSoil2D.variables['bexp'][:,:,:,:] = idSoil2D.variables['bexp'][:,:,:,:]*float(newParams.bexp[0])
-        
-        if param == "smcmax":
-            idSoil2D.variables['smcmax'][:,:,:,:] = idSoil2D.variables['smcmax'][:,:,:,:]*float(newParams.smcmax[0])
-        
-        if param == "slope":
-            idSoil2D.variables['slope'][:,:,:] = float(newParams.slope[0])
-        
-        if param == "lksatfac":
-            idFullDom.variables['LKSATFAC'][:,:] = float(newParams.lksatfac[0])
-        
-        if args.gwFlag[0] == 1:
-            if param == "zmax":
-                idGw.variables['Zmax'][:] = float(newParams.zmax[0])
-        
-            if param == "expon":
-                idGw.variables['Expon'][:] = float(newParams.expon[0])
-        
-        if param == "cwpvt":
-            idSoil2D.variables['cwpvt'][:,:,:] = idSoil2D.variables['cwpvt'][:,:,:]*float(newParams.cwpvt[0])
-        
-        if param == "vcmx25":
-            idSoil2D.variables['vcmx25'][:,:,:] = idSoil2D.variables['vcmx25'][:,:,:]*float(newParams.vcmx25[0])
-        
-        if param == "mp":
-            idSoil2D.variables['mp'][:,:,:] = idSoil2D.variables['mp'][:,:,:]*float(newParams.mp[0])
-        
-        if param == "hvt":
-            idSoil2D.variables['hvt'][:,:,:] = idSoil2D.variables['hvt'][:,:,:]*float(newParams.hvt[0])
-        
-        if param == "mfsno":
-            idSoil2D.variables['mfsno'][:,:,:] = idSoil2D.variables['mfsno'][:,:,:]*float(newParams.mfsno[0])
-        
-        if param == "refkdt":
-            idSoil2D.variables['refkdt'][:,:,:] = float(newParams.refkdt[0])
-        
-        if param == "dksat":
-            idSoil2D.variables['dksat'][:,:,:,:] = idSoil2D.variables['dksat'][:,:,:,:]*float(newParams.dksat[0])
-        
-        if param == "retdeprtfac":
-            idFullDom.variables['RETDEPRTFAC'][:,:] = float(newParams.retdeprtfac[0])
-        
-        if param == "ovroughrtfac":
-            idFullDom.variables['OVROUGHRTFAC'][:,:] = float(newParams.ovroughrtfac[0])
-            
-        if param == "dksat":
-            idHydroTbl.variables['LKSAT'][:,:] = idHydroTbl.variables['LKSAT'][:,:]*float(newParams.dksat[0])
-            
-        if param == "smcmax":
-            idHydroTbl.variables['SMCMAX1'][:,:] = idHydroTbl.variables['SMCMAX1'][:,:]*float(newParams.smcmax[0])
-            
-        if param == "rsurfexp":
-            idSoil2D.variables['rsurfexp'][:,:,:] = float(newParams.rsurfexp[0])
-        
-            
-    # Close NetCDF files
-    idFullDom.close()
-    idSoil2D.close()
-    if args.gwFlag[0] == 1:
-        idGw.close()
-    idHydroTbl.close()
-    
     # Remove restart files. All other files will be overwritten by the next
     # model iteration. 
     cmd = 'rm -rf ' + runDir + '/*.err'
@@ -228,13 +222,96 @@ def main(argv):
         subprocess.call(cmd,shell=True)
     except:
         sys.exit(5)
-
-    # Touch empty COMPLETE flag file. This will be seen by workflow, demonstrating
-    # calibration iteration is complete.
+    cmd = 'rm -rf ' + runDir + '/RUN.KILLED'
     try:
-        open(outFlag,'a').close()
+        subprocess.call(cmd,shell=True)
     except:
-        sys.exit(6)
+        sys.exit(5)
+            
+def adjustFile(inPath,outPath,fileKey,newParams):
+    """
+    Generic function to produce an adjusted parameter file from a baseline
+    parameter file. If no rules apply to the file, the output is a hard link
+    to the baseline file. Otherwise, the adjusted file left in the adjDir
+    directory by a previous iteration is re-used, and only the variables with
+    a rule in adjRules are re-written from the baseline values. A full copy
+    is only made when no usable adjusted file exists. The output is a hard
+    link to the adjusted file. Returns True if the adjusted file from a
+    previous iteration was re-used.
+    """
+    paramNames = list(newParams.columns.values)
+    fileRules = [rule for rule in adjRules if rule[1] == fileKey]
+    activeRules = [rule for rule in fileRules if rule[0] in paramNames]
+    
+    if len(activeRules) == 0:
+        linkFile(inPath,outPath)
+        return False
+        
+    adjPath = os.path.dirname(outPath) + "/" + adjDir
+    workPath = adjPath + "/" + os.path.basename(outPath)
+    if not os.path.isdir(adjPath):
+        os.mkdir(adjPath)
+        
+    # An existing adjusted file can be re-used if it is a separate file (not
+    # a link to the baseline file) written after the baseline file.
+    reuseFlag = False
+    if os.path.isfile(workPath) and not os.path.islink(workPath):
+        if not os.path.samefile(inPath,workPath):
+            if os.path.getmtime(workPath) >= os.path.getmtime(inPath):
+                reuseFlag = True
+                
+    if not reuseFlag:
+        if os.path.lexists(workPath):
+            os.remove(workPath)
+        shutil.copy(inPath,workPath)
+        
+    idIn = Dataset(inPath,'r')
+    try:
+        idOut = Dataset(workPath,'a')
+    except:
+        # The file left from the previous iteration is not usable.
+        idIn.close()
+        if not reuseFlag:
+            raise
+        os.remove(workPath)
+        shutil.copy(inPath,workPath)
+        idIn = Dataset(inPath,'r')
+        idOut = Dataset(workPath,'a')
+        reuseFlag = False
+        
+    for rule in fileRules:
+        varName = rule[2]
+        if rule in activeRules:
+            value = float(newParams[rule[0]][0])
+            if rule[3] == 'mult':
+                idOut.variables[varName][:] = idIn.variables[varName][:]*value
+            else:
+                idOut.variables[varName][:] = value
+        elif reuseFlag and varName in idOut.variables:
+            # Restore any variable that may have been adjusted previously.
+            idOut.variables[varName][:] = idIn.variables[varName][:]
+            
+    idOut.close()
+    idIn.close()
+    
+    linkFile(workPath,outPath)
+    return reuseFlag
+    
+def linkFile(inPath,outPath):
+    """
+    Generic function to place a hard link to a baseline parameter file into
+    the run directory. A copy is made if the link cannot be created, such as
+    when the run directory is on a different file system.
+    """
+    if os.path.lexists(outPath):
+        if not os.path.islink(outPath) and os.path.samefile(inPath,outPath):
+            return
+        os.remove(outPath)
+        
+    try:
+        os.link(inPath,outPath)
+    except OSError:
+        shutil.copy(inPath,outPath)
             
 if __name__ == "__main__":
     main(sys.argv[1:])
\ No newline at end of file
@@ -0,0 +1,163 @@
+# Module file containing functions for archiving the simulated streamflow of
+# every model run of a job. For each phase of the workflow (CALIB, SENS, VALID),
+# the streamflow at the gage of each run is placed into a single array of
+# basins x runs x hourly time steps over the evaluation period of the phase.
+# The array is memory-mapped to <PHASE>_FLOW.npy in the job directory, with
+# the values of each basin contiguous on disk, so all runs of one basin are
+# read with a single sequential read. The time axis (seconds since 1970) is
+# held in <PHASE>_FLOW_TIME.npy, <PHASE>_FLOW_RUNS.npy flags which
+# basin/run slots hold archived streamflow, and <PHASE>_FLOW_GAGES.txt lists
+# the gage of each basin. Reporting tools open the archive read-only through
+# loadArchive.
+
+# Logan Karsten
+# National Center for Atmospheric Research
+# Research Applications Laboratory
+
+import os
+import threading
+import numpy as np
+import chanobsMod
+
+import warnings
+warnings.filterwarnings("ignore")
+
+# Archives already opened by the workflow, keyed by job directory and phase.
+archiveCache = {}
+archiveLock = threading.Lock()
+
+def archiveTimes(bDate,eDate):
+    """
+    Generic function to return the hourly time axis of an archive, in
+    seconds since 1970, from bDate through eDate.
+    """
+    nSteps = int((eDate - bDate).total_seconds()/3600.0) + 1
+    return (bDate - chanobsMod.epoch).total_seconds() + 3600.0*np.arange(nSteps,dtype=np.float64)
+
+def openArchive(jobData,phase,nRuns,bDate,eDate):
+    """
+    Generic function to return the archive of a workflow phase as a dictionary
+    holding the memory-mapped streamflow array ('flow'), the array of archived
+    run flags ('runs') and the time axis ('times'). The archive is created if
+    it does not exist, or does not match the job. New streamflow arrays are
+    not initialized, slots are only valid once flagged in the runs array.
+    """
+    archivePath = str(jobData.jobDir) + "/" + phase + "_FLOW.npy"
+    runsPath = str(jobData.jobDir) + "/" + phase + "_FLOW_RUNS.npy"
+    timePath = str(jobData.jobDir) + "/" + phase + "_FLOW_TIME.npy"
+    gagePath = str(jobData.jobDir) + "/" + phase + "_FLOW_GAGES.txt"
+    cacheKey = (str(jobData.jobDir),phase)
+
+    archiveLock.acquire()
+    try:
+        if cacheKey in archiveCache:
+            return archiveCache[cacheKey]
+
+        times = archiveTimes(bDate,eDate)
+        shape = (len(jobData.gages),int(nRuns),len(times))
+
+        try:
+            fileObj = open(gagePath,'w')
+            for gage in jobData.gages:
+                fileObj.write(str(gage) + "\n")
+            fileObj.close()
+        except:
+            jobData.errMsg = "ERROR: Unable to create: " + gagePath
+            raise
+
+        if os.path.isfile(archivePath) and os.path.isfile(runsPath) and os.path.isfile(timePath):
+            try:
+                flow = np.lib.format.open_memmap(archivePath,mode='r+')
+                runs = np.lib.format.open_memmap(runsPath,mode='r+')
+                timesOld = np.load(timePath)
+            except:
+                jobData.errMsg = "ERROR: Unable to open flow archive: " + archivePath
+                raise
+            if flow.shape == shape and flow.dtype == np.float32 and runs.shape == shape[0:2] \
+               and np.array_equal(timesOld,times):
+                archiveCache[cacheKey] = {'flow':flow,'runs':runs,'times':times}
+                return archiveCache[cacheKey]
+            print "FLOW ARCHIVE: " + archivePath + " DOES NOT MATCH THE JOB. RE-CREATING."
+            del flow
+            del runs
+
+        try:
+            np.save(timePath,times)
+            runs = np.lib.format.open_memmap(runsPath,mode='w+',dtype=np.int8,shape=shape[0:2])
+            runs[...] = 0
+            runs.flush()
+            flow = np.lib.format.open_memmap(archivePath,mode='w+',dtype=np.float32,shape=shape)
+        except:
+            jobData.errMsg = "ERROR: Unable to create flow archive: " + archivePath
+            raise
+
+        archiveCache[cacheKey] = {'flow':flow,'runs':runs,'times':times}
+        return archiveCache[cacheKey]
+    finally:
+        archiveLock.release()
+
+def archiveRun(jobData,phase,nRuns,bDate,eDate,basinNum,runNum,outDir,linkId):
+    """
+    Generic function to place the streamflow of a completed model run into the
+    archive of a workflow phase. The streamflow is read from the time series
+    file of the run directory, which is extracted from the CHANOBS output if
+    it does not exist. Time steps missing from the output are archived as
+    NaN. Returns False if the run produced no streamflow to archive.
+    """
+    try:
+        values = chanobsMod.readChrt(outDir)
+        if len(values) == 0:
+            chanobsMod.extractStreamflow(outDir,linkId,bDate)
+            values = chanobsMod.readChrt(outDir)
+    except:
+        print "WARNING: Unable to read streamflow from: " + outDir + " FOR FLOW ARCHIVE."
+        return False
+
+    try:
+        archive = openArchive(jobData,phase,nRuns,bDate,eDate)
+    except:
+        raise
+
+    times = archive['times']
+    flowTmp = np.empty(len(times),dtype=np.float32)
+    flowTmp[:] = np.nan
+    for dTmp in values.keys():
+        indTmp = ((dTmp - chanobsMod.epoch).total_seconds() - times[0])/3600.0
+        if indTmp >= 0 and indTmp < len(times) and indTmp == int(indTmp):
+            flowTmp[int(indTmp)] = values[dTmp]
+
+    archiveLock.acquire()
+    try:
+        archive['flow'][basinNum,runNum,:] = flowTmp
+        archive['flow'].flush()
+        archive['runs'][basinNum,runNum] = 1
+        archive['runs'].flush()
+    except:
+        jobData.errMsg = "ERROR: Unable to archive streamflow from: " + outDir
+        raise
+    finally:
+        archiveLock.release()
+
+    return True
+
+def loadArchive(jobDir,phase):
+    """
+    Generic function to open the archive of a workflow phase read-only,
+    such as from reporting tools and analysis jobs. Returns a dictionary
+    holding the streamflow array ('flow'), the archived run flags ('runs'),
+    the time axis ('times') and the list of gages ('gages'), or None if the
+    archive does not exist.
+    """
+    archivePath = str(jobDir) + "/" + phase + "_FLOW.npy"
+    gagePath = str(jobDir) + "/" + phase + "_FLOW_GAGES.txt"
+    if not os.path.isfile(archivePath) or not os.path.isfile(gagePath):
+        return None
+
+    archive = {}
+    archive['flow'] = np.load(archivePath,mmap_mode='r')
+    archive['runs'] = np.load(str(jobDir) + "/" + phase + "_FLOW_RUNS.npy",mmap_mode='r')
+    archive['times'] = np.load(str(jobDir) + "/" + phase + "_FLOW_TIME.npy")
+    fileObj = open(gagePath,'r')
+    archive['gages'] = [line.strip() for line in fileObj if len(line.strip()) > 0]
+    fileObj.close()
+    return archive
@@ -0,0 +1,257 @@
+# Module file containing functions for bounding the objective function of
+# calibration model runs while they are still in flight. The CHANOBS output
+# produced so far by a run is matched against the observations exported by
+# the R calibration code. For the Rmse, Nse and NseLog objective functions,
+# the squared error accumulated over the output produced so far can only grow
+# as the run continues, giving a lower bound on the objective function of the
+# complete run. Runs that can no longer beat the best run are cancelled
+# through the scheduler.
+
+# Logan Karsten
+# National Center for Atmospheric Research
+# Research Applications Laboratory
+
+import os
+import time
+import datetime
+import threading
+import numpy as np
+import pandas as pd
+from netCDF4 import Dataset
+import schedMod
+import statusMod
+import chanobsMod
+
+import warnings
+warnings.filterwarnings("ignore")
+
+# Streamflow values already read from the CHANOBS files of each run directory,
+# keyed by run directory. An entry is reset once the run directory holds a
+# new model run.
+chanobsCache = {}
+# Time of the last check of the runs for each basin, keyed by basin directory.
+boundChecks = {}
+boundLock = threading.Lock()
+
+def checkRuns(statusData,workDir,candDirs,linkId,basinNum,pbsJobId):
+    """
+    Generic function to bound the objective function of the model runs in
+    flight for a basin. If none of the runs still in flight can beat the best
+    run, each of them is flagged with a RUN.KILLED file holding the bound,
+    and the model job is cancelled. Returns True if the job was cancelled.
+    """
+    if float(statusData.boundInterval) <= 0.0:
+        return False
+
+    boundLock.acquire()
+    try:
+        if time.time() - boundChecks.get(workDir,0.0) < float(statusData.boundInterval):
+            return False
+        boundChecks[workDir] = time.time()
+    finally:
+        boundLock.release()
+
+    try:
+        boundInfo = readBoundInfo(statusData,workDir)
+    except:
+        raise
+    if boundInfo is None:
+        return False
+
+    killed = []
+    killFlag = False
+    for candDir in candDirs:
+        killFile = candDir + "/RUN.KILLED"
+        if os.path.isfile(killFile):
+            killFlag = True
+            continue
+        runStatus = statusMod.walkMod(statusData.bCalibDate,statusData.eCalibDate,candDir)
+        if not runStatus[2]:
+            # This run has already completed.
+            continue
+        bound = runBound(candDir,linkId,boundInfo)
+        if bound is None or not bound > boundInfo['fBest']:
+            return False
+        killed.append([killFile,bound])
+
+    # Nothing to cancel if all runs have completed on their own.
+    if len(killed) == 0 and not killFlag:
+        return False
+
+    for killFile,bound in killed:
+        print "RUN IN " + os.path.dirname(killFile) + " CAN NOT BEAT BEST RUN. OBJECTIVE FUNCTION BOUND: " + \
+              str(bound) + " BEST: " + str(boundInfo['fBest'])
+        try:
+            fileObj = open(killFile,'w')
+            fileObj.write(str(bound) + "\n")
+            fileObj.close()
+        except:
+            statusData.errMsg = "ERROR: Unable to create: " + killFile
+            raise
+
+    try:
+        cancelRuns(statusData,basinNum,pbsJobId)
+    except:
+        raise
+
+    return True
+
+def readBoundInfo(statusData,workDir):
+    """
+    Generic function to read the best objective function value, and the
+    observations used to bound the objective function of a run, exported
+    by the R calibration code. None is returned if the R code has not
+    exported them, such as before the first calibration run is evaluated,
+    or for objective functions that can not be bounded.
+    """
+    infoPath = workDir + "/obj_bound.txt"
+    obsPath = workDir + "/obs_bound.txt"
+
+    if not os.path.isfile(infoPath) or not os.path.isfile(obsPath):
+        return None
+
+    try:
+        infoTbl = pd.read_csv(infoPath,sep=' ')
+        obsTbl = pd.read_csv(obsPath,sep=' ')
+    except:
+        statusData.errMsg = "ERROR: Unable to read objective function bound information from: " + workDir
+        raise
+
+    if len(infoTbl) == 0 or len(obsTbl) == 0:
+        return None
+
+    boundInfo = {'objFn':str(infoTbl.objFn[0]),
+                 'fBest':float(infoTbl.fBest[0]),
+                 'denom':float(infoTbl.denom[0]),
+                 'daily':int(infoTbl.daily[0]) == 1}
+    if boundInfo['denom'] <= 0.0 or not np.isfinite(boundInfo['fBest']):
+        return None
+    boundInfo['obs'] = pd.Series(obsTbl.obs.values,
+                                 index=pd.to_datetime(obsTbl.time.values,unit='s'))
+
+    return boundInfo
+
+def runBound(candDir,linkId,boundInfo):
+    """
+    Generic function to compute a lower bound on the objective function of a
+    run from the CHANOBS output produced so far, along with any streamflow
+    already collected into the time series file of the run while the model
+    is running. When daily statistics are calculated, only days the model 
+    has moved beyond are used. None is returned if no output can be matched
+    to observations yet.
+    """
+    values = readChanobs(candDir,linkId)
+    if values is None:
+        return None
+
+    # A time series file written before the current model run was set up is
+    # left from the previous iteration.
+    flowDict = {}
+    try:
+        if os.path.getmtime(candDir + "/" + chanobsMod.chrtFile) >= os.path.getmtime(candDir + "/namelist.hrldas"):
+            flowDict = chanobsMod.readChrt(candDir)
+    except:
+        # The collector may be replacing the time series file.
+        flowDict = {}
+    for fileName in values.keys():
+        flowDict[datetime.datetime.strptime(fileName.split('.')[0],'%Y%m%d%H%M')] = values[fileName]
+    if len(flowDict) == 0:
+        return None
+    flow = pd.Series(flowDict.values(),index=pd.DatetimeIndex(flowDict.keys())).sort_index()
+
+    if boundInfo['daily']:
+        flow = flow[flow.index < flow.index[-1].normalize()]
+        if len(flow) == 0:
+            return None
+        flow = flow.groupby(flow.index.normalize()).mean()
+
+    pairs = flow.to_frame('q').join(boundInfo['obs'].to_frame('obs'),how='inner').dropna()
+    if len(pairs) == 0:
+        return None
+
+    if boundInfo['objFn'] == 'NseLog':
+        err = np.log(pairs.q.values + 1e-04) - np.log(pairs.obs.values + 1e-04)
+    else:
+        err = pairs.q.values - pairs.obs.values
+    sse = float(np.sum(err**2))
+
+    if boundInfo['objFn'] == 'Rmse':
+        return np.sqrt(sse/boundInfo['denom'])
+    else:
+        return sse/boundInfo['denom']
+
+def readChanobs(candDir,linkId):
+    """
+    Generic function to read the streamflow at the gage link from the CHANOBS
+    files produced so far in a run directory. Files already read for the
+    current model run are not read again. The latest file is skipped, as the
+    model may still be writing it, along with files written before the
+    current model run was set up. Returns a dictionary of streamflow values
+    keyed by file name, or None if the gage link is not in the output.
+    """
+    try:
+        stamp = os.path.getmtime(candDir + "/namelist.hrldas")
+    except OSError:
+        return None
+
+    boundLock.acquire()
+    try:
+        entry = chanobsCache.get(candDir)
+        if entry is None or entry['stamp'] != stamp:
+            entry = {'stamp':stamp,'index':None,'values':{}}
+            chanobsCache[candDir] = entry
+    finally:
+        boundLock.release()
+
+    fileNames = sorted([fileName for fileName in os.listdir(candDir) if '.CHANOBS_DOMAIN' in fileName])
+    for fileName in fileNames[:-1]:
+        if fileName in entry['values']:
+            continue
+        try:
+            if os.path.getmtime(candDir + "/" + fileName) < stamp:
+                continue
+            idTmp = Dataset(candDir + "/" + fileName,'r')
+        except:
+            continue
+        try:
+            if entry['index'] is None:
+                indTmp = np.where(idTmp.variables['feature_id'][:] == int(linkId))[0]
+                if len(indTmp) == 0:
+                    return None
+                entry['index'] = int(indTmp[0])
+            valTmp = idTmp.variables['streamflow'][entry['index']]
+            if np.ma.is_masked(valTmp):
+                entry['values'][fileName] = np.nan
+            else:
+                entry['values'][fileName] = float(valTmp)
+        except:
+            # Try this file again during the next check.
+            pass
+        finally:
+            idTmp.close()
+
+    return entry['values']
+
+def cancelRuns(statusData,basinNum,pbsJobId):
+    """
+    Generic function to cancel the model job of a basin through the scheduler.
+    """
+    sched = schedMod.getScheduler(schedMod.modelRunType(statusData))
+    expName = statusMod.basJobName(statusData,basinNum)
+
+    if sched.trackIds and pbsJobId[basinNum] != -9999:
+        jobId = pbsJobId[basinNum]
+    else:
+        try:
+            snapshot = statusMod.getSchedSnapshot(statusData,schedMod.modelRunType(statusData),force=True)
+        except:
+            raise
+        if expName not in snapshot['names']:
+            return
+        jobId = snapshot['names'][expName]
+
+    try:
+        sched.cancel(statusData,jobId)
+    except:
+        raise
+    print "CANCELLED MODEL JOB: " + str(jobId) + " FOR: " + expName
@@ -0,0 +1,165 @@
+# Program to calculate the objective function and streamflow metrics for
+# many model runs of a basin at once, at both the hourly and daily time
+# steps. The simulated streamflow is taken from the flow archive of the job
+# when available, and otherwise read from the time series file (chrt.nc)
+# of each run directory. Observations are read from a text table of times
+# (seconds since 1970) and streamflow exported by the R code. The output
+# table holds one row per run and time step, with the same columns as the
+# statistics tables written by the R code.
+
+# Logan Karsten
+# National Center for Atmospheric Research
+# Research Applications Laboratory
+# karsten@ucar.edu
+# 303-497-2693
+
+import argparse
+import sys
+import os
+import datetime
+import numpy as np
+import pandas as pd
+
+# Set the Python path to include package specific functions.
+sys.path.insert(0,os.path.dirname(os.path.realpath(__file__)))
+
+import chanobsMod
+import archiveMod
+import metricsMod
+
+def main(argv):
+    # Parse arguments.
+    parser = argparse.ArgumentParser(description='Program to calculate streamflow ' + \
+             'metrics for model runs of a basin.')
+    parser.add_argument('obsFile',metavar='obsFile',type=str,nargs='+',
+                        help='Table of observation times and streamflow.')
+    parser.add_argument('outFile',metavar='outFile',type=str,nargs='+',
+                        help='Output table of metrics.')
+    parser.add_argument('objFn',metavar='objFn',type=str,nargs='+',
+                        help='Objective function.')
+    parser.add_argument('startDate',metavar='startDate',type=str,nargs='+',
+                        help='Beginning of the evaluation period (YYYYMMDDHHMM).')
+    parser.add_argument('--runDirs',type=str,nargs='+',required=True,
+                        help='Run directories, in the order of the runs.')
+    parser.add_argument('--jobDir',type=str,nargs='?',default=None,
+                        help='Job directory holding the flow archive.')
+    parser.add_argument('--phase',type=str,nargs='?',default='SENS',
+                        help='Workflow phase of the flow archive.')
+    parser.add_argument('--gage',type=str,nargs='?',default=None,
+                        help='Gage of the basin in the flow archive.')
+    parser.add_argument('--dailyOut',type=str,nargs='?',default=None,
+                        help='Output table of daily simulated streamflow.')
+
+    args = parser.parse_args(argv)
+    objFn = str(args.objFn[0])
+
+    try:
+        startDate = datetime.datetime.strptime(str(args.startDate[0]),'%Y%m%d%H%M')
+    except ValueError:
+        print "ERROR: Invalid start date: " + str(args.startDate[0])
+        sys.exit(1)
+
+    if objFn not in metricsMod.objFunctions:
+        print "ERROR: Unknown objective function: " + objFn
+        sys.exit(1)
+
+    try:
+        times,sim = readRuns(args.runDirs,args.jobDir,args.phase,args.gage)
+    except Exception as e:
+        print "ERROR: Unable to read simulated streamflow: " + str(e)
+        sys.exit(2)
+
+    keep = times >= (startDate - chanobsMod.epoch).total_seconds()
+    times = times[keep]
+    sim = sim[:,keep]
+
+    try:
+        obsTbl = pd.read_csv(str(args.obsFile[0]),sep=' ')
+    except:
+        print "ERROR: Unable to read observations: " + str(args.obsFile[0])
+        sys.exit(3)
+    obs = np.empty(len(times))
+    obs[:] = np.nan
+    obsTimes = obsTbl.time.values.astype(np.float64)
+    indTmp = np.minimum(np.searchsorted(times,obsTimes),len(times) - 1)
+    match = times[indTmp] == obsTimes
+    obs[indTmp[match]] = obsTbl.obs.values[match]
+
+    if np.sum(~np.isnan(obs)) == 0:
+        print "ERROR: No observations found in the evaluation period."
+        sys.exit(4)
+
+    # Calculate all metrics for the hourly and daily time steps.
+    dayTimes,simDaily = metricsMod.dailyMeans(times,sim)
+    obsDaily = metricsMod.dailyMeans(times,obs)[1]
+    tables = []
+    for timeStep,simTmp,obsTmp in [['daily',simDaily,obsDaily],['hourly',sim,obs]]:
+        stats = metricsMod.calcMetrics(objFn,simTmp,obsTmp)
+        tblTmp = pd.DataFrame({'id':np.arange(1,sim.shape[0]+1)})
+        for metric in metricsMod.metricNames:
+            tblTmp[metric] = stats[metric]
+        tblTmp['timeStep'] = timeStep
+        tables.append(tblTmp)
+    try:
+        pd.concat(tables).to_csv(str(args.outFile[0]),sep=' ',index=False,na_rep='NA')
+    except:
+        print "ERROR: Unable to write: " + str(args.outFile[0])
+        sys.exit(5)
+
+    if args.dailyOut is not None:
+        tblTmp = pd.DataFrame({'id':np.repeat(np.arange(1,sim.shape[0]+1),len(dayTimes)),
+                               'time':np.tile(dayTimes,sim.shape[0]),
+                               'q_cms':simDaily.ravel()})
+        try:
+            tblTmp[['id','time','q_cms']].to_csv(args.dailyOut,sep=' ',index=False,na_rep='NA')
+        except:
+            print "ERROR: Unable to write: " + args.dailyOut
+            sys.exit(5)
+
+def readRuns(runDirs,jobDir,phase,gage):
+    """
+    Generic function to return the time axis, and the simulated streamflow
+    (runs x time steps) of the runs. Runs held in the flow archive are read
+    from it with one read, the remaining runs are read from the time series
+    file of their run directory.
+    """
+    nRuns = len(runDirs)
+    times = None
+    flags = np.zeros(nRuns,dtype=np.int8)
+
+    archive = None
+    if jobDir is not None and gage is not None:
+        archive = archiveMod.loadArchive(jobDir,phase)
+    if archive is not None and gage in archive['gages'] and archive['flow'].shape[1] >= nRuns:
+        basinNum = archive['gages'].index(gage)
+        times = archive['times']
+        sim = np.array(archive['flow'][basinNum,0:nRuns,:],dtype=np.float64)
+        flags[:] = archive['runs'][basinNum,0:nRuns]
+
+    values = {}
+    for runNum in np.where(flags == 0)[0]:
+        valTmp = chanobsMod.readChrt(runDirs[runNum])
+        if len(valTmp) == 0:
+            raise Exception("No streamflow time series found in: " + runDirs[runNum])
+        values[runNum] = valTmp
+
+    if times is None:
+        secTmp = set()
+        for runNum in values.keys():
+            secTmp.update([(dTmp - chanobsMod.epoch).total_seconds() for dTmp in values[runNum].keys()])
+        times = np.array(sorted(secTmp))
+        sim = np.empty((nRuns,len(times)))
+        sim[:] = np.nan
+
+    for runNum in values.keys():
+        sim[runNum,:] = np.nan
+        secTmp = np.array([(dTmp - chanobsMod.epoch).total_seconds() for dTmp in values[runNum].keys()])
+        qTmp = np.array(values[runNum].values())
+        indTmp = np.minimum(np.searchsorted(times,secTmp),len(times) - 1)
+        match = times[indTmp] == secTmp
+        sim[runNum,indTmp[match]] = qTmp[match]
+
+    return times,sim
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
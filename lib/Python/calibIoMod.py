@@ -33,6 +33,10 @@ class gageMeta:
         self.obsFile = []
         self.dxHydro = []
         self.aggFact = []
+        self.hydE = []
+        self.hydW = []
+        self.hydS = []
+        self.hydN = []
         self.optLandRstFile = []
         self.optHydroRstFile = []
         self.chanParmFile = []
@@ -44,7 +48,8 @@ class gageMeta:
                    'wrfInput':'','soilFile':'','hydroSpatial':'','forceDir':'',\
                    'obsFile':'','gageID':'','comID':'','nCoresMod':'','dxHydro':'',\
                    'aggFactor':'','domainID':domainID,'optLandRstFile':'',\
-                   'optHydroRstFile':'','chanParmFile':''}
+                   'optHydroRstFile':'','chanParmFile':'','hydE':'','hydW':'',\
+                   'hydS':'','hydN':''}
         try:
             db.queryGageMeta(jobData,tmpMeta)
         except:
@@ -68,6 +73,10 @@ class gageMeta:
         self.comID = tmpMeta['comID']
         self.dxHydro = tmpMeta['dxHydro']
         self.aggFact = tmpMeta['aggFactor']
+        self.hydE = tmpMeta['hydE']
+        self.hydW = tmpMeta['hydW']
+        self.hydS = tmpMeta['hydS']
+        self.hydN = tmpMeta['hydN']
         self.optLandRstFile = tmpMeta['optLandRstFile']
         self.optHydroRstFile = tmpMeta['optHydroRstFile']
         self.chanParmFile = tmpMeta['chanParmFile']
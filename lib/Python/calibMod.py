@@ -8,9 +8,13 @@ import os
 import calibIoMod
 import namelistMod
 import statusMod
+import schedMod
+import sizeMod
 import errMod
+import boundMod
+import chanobsMod
+import archiveMod
 import subprocess
-import time
 
 import warnings
 warnings.filterwarnings("ignore")
@@ -28,12 +32,20 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
     model to restart. This function will also check to see if parameter estimation
     /generation code needs to executed on Yellowstone compute nodes. 
     """
+    # When DDS candidates are evaluated concurrently, each generation of candidates
+    # occupies consecutive iterations, and is advanced through the first of them.
+    if iteration % int(statusData.ddsCandidates) != 0:
+        return
+        
     # First check to make sure previous iteration's status is 1.0 (unless iteration 0).
     # This is to prevent the program from doing unecessary work. 
     if iteration > 0:
         if keySlot[basinNum,iteration-1] < 1.0:
             return
             
+    # Number of candidates in this generation.
+    nCand = candidateCount(statusData,iteration)
+    
     # Compose directory paths for calibration/model simulations.
     runDir = statusData.jobDir + "/" + gage + "/RUN.CALIB/OUTPUT"
     workDir = statusData.jobDir + "/" + gage + "/RUN.CALIB"
@@ -43,6 +55,10 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
     if not os.path.isdir(runDir):
         statusData.errMsg = "ERROR: " + runDir + " not found."
         raise Exception()
+    try:
+        setupCandidates(statusData,runDir,nCand)
+    except:
+        raise
         
     # Pull gage metadata for this particular basin.
     gageMeta = calibIoMod.gageMeta()
@@ -51,118 +67,33 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
     except:
         raise
 
-    if statusData.analysisRunType == 1:
-        # Generate BSUB file necessary for running R calibration/analysis
-        # code.
-        try:
-            generateBsubCalibScript(statusData,int(gageID),runDir,workDir,staticData)
-        except:
-            raise
-            
-    if statusData.jobRunType == 1:
-        
-        # If BSUB run script doesn't exist, create it here.
-        bsubFile = runDir + "/run_WH.sh"
-        bsubFileRst = runDir + "/run_WH_Restart.sh"
-        if os.path.isfile(bsubFile):
-            # Going to override for now. 
-            os.remove(bsubFile)
-        if os.path.isfile(bsubFileRst):
-            # Going to override for now. 
-            os.remove(bsubFileRst)
-        
-        # Create new BSUB files
-        try:
-            generateBsubScript(statusData,int(gageID),runDir)
-        except:
-            raise
-        try:
-            generateRestartBsubScript(statusData,int(gageID),runDir)
-        except:
-            raise
-            
-    if statusData.analysisRunType == 2:
-        # Generate PBS file necessary to running R calibration/analysis code.
-        try:
-            generatePbsCalibScript(statusData,int(gageID),runDir,workDir,staticData)
-        except:
-            raise
-            
-    if statusData.jobRunType == 2:
-            
-        # If PBS run script doesn't exist, create it here.
-        pbsFile = runDir + "/run_WH.sh"
-        pbsFileRst = runDir + "/run_WH_Restart.sh"
-        if os.path.isfile(pbsFile):
-            os.remove(pbsFile)
-        if os.path.isfile(pbsFileRst):
-            os.remove(pbsFileRst)
-            
-        # Create new PBS files
-        try:
-            generatePbsScript(statusData,int(gageID),runDir)
-        except:
-            raise
-            
-        try:
-            generateRestartPbsScript(statusData,int(gageID),runDir)
-        except:
-            raise
-            
-    if statusData.analysisRunType == 3 or statusData.analysisRunType == 6:
-        # Generate Slurm file necessary to run R calibration/analysis code.
-        try:
-            generateSlurmCalibScript(statusData,int(gageID),runDir,workDir,staticData)
-        except:
-            raise
-            
-    if statusData.jobRunType == 3 or statusData.jobRunType == 6:
-            
-        # If PBS run script doesn't exist, create it here.
-        pbsFile = runDir + "/run_WH.sh"
-        pbsFileRst = runDir + "/run_WH_Restart.sh"
-        if os.path.isfile(pbsFile):
-            os.remove(pbsFile)
-        if os.path.isfile(pbsFileRst):
-            os.remove(pbsFileRst)
-            
-        # Create new Slurm files
-        try:
-            generateSlurmScript(statusData,int(gageID),runDir)
-        except:
-            raise
-            
-        try:
-            generateRestartSlurmScript(statusData,int(gageID),runDir)
-        except:
-            raise
-            
-    if statusData.analysisRunType == 4 or statusData.analysisRunType == 5:
-        # Generate mpiexec/mpirun run script and R submission script for running
-        # calibration/analysis code.
-        try:
-            generateMpiCalibScript(statusData,int(gageID),runDir,workDir,staticData)
-        except:
-            raise
-            
-    if statusData.jobRunType == 4 or statusData.jobRunType == 5:
-        # If run script doesn't exist, create it here.
-        runFile = runDir + "/run_WH.sh"
-        rstFile = runDir + "/run_WH_Restart.sh"
-        if os.path.isfile(runFile):
-            os.remove(runFile)
-        if os.path.isfile(rstFile):
-            os.remove(rstFile)
-            
-        try:
-            generateMpiScript(statusData,int(gageID),runDir)
-        except:
-            raise
-        try:
-            generateMpiRstScript(statusData,int(gageID),runDir)
-        except:
-            raise
-    
+    # Pull the scheduler backend used for the calibration code.
+    schedAnalysis = schedMod.getScheduler(statusData.analysisRunType)
+
+    # Generate the script necessary for running R calibration/analysis code.
+    try:
+        generateCalibScript(statusData,int(gageID),runDir,workDir,staticData,gageMeta)
+    except:
+        raise
+
+    # If the model run scripts exist, remove them. Going to override for now.
+    runFile = runDir + "/run_WH.sh"
+    rstFile = runDir + "/run_WH_Restart.sh"
+    if os.path.isfile(runFile):
+        os.remove(runFile)
+    if os.path.isfile(rstFile):
+        os.remove(rstFile)
+
+    # Create new model run scripts.
+    try:
+        generateRunScript(statusData,int(gageID),runDir,False,gageMeta,nCand)
+    except:
+        raise
+    try:
+        generateRunScript(statusData,int(gageID),runDir,True,gageMeta,nCand)
+    except:
+        raise
+
     # Calculate datetime objects
     begDate = statusData.bCalibDate
     endDate = statusData.eCalibDate
@@ -187,6 +118,7 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
     calibLockPath = workDir + "/CALIB.LOCK"
     calibCompleteFlag = workDir + "/CALIB_ITER.COMPLETE"
     missingFlag = workDir + "/CALC_STATS_MISSING"
+    convergedFlag = workDir + "/CALIB_CONVERGED"
     calibTbl = workDir + "/params_new.txt"
     statsTbl = workDir + "/params_stats.txt"
     rDataFile = workDir + "/proj_data.Rdata"
@@ -204,6 +136,14 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
     if keyStatus == 0.5:
         # If a model is running for this basin, continue and set keyStatus to 0.5
         if basinStatus:
+            # Bound the objective function of the runs in flight from their output 
+            # so far, and cancel them if they can no longer beat the best run. 
+            # Cancelled runs are treated as complete once they leave the scheduler.
+            candDirs = [candidateDir(runDir,candNum) for candNum in range(0,nCand)]
+            try:
+                boundMod.checkRuns(statusData,workDir,candDirs,gageMeta.comID,basinNum,pbsJobId)
+            except:
+                raise
             keySlot[basinNum,iteration] = 0.5
             keyStatus = 0.5
             runFlag = False
@@ -211,7 +151,7 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
         else:
             # Either simulation has completed, or potentially crashed. Walk the run
             # run directory and see where the model is at based on RESTART files. 
-            runStatus = statusMod.walkMod(begDate,endDate,runDir)
+            runStatus = walkCandidates(begDate,endDate,runDir,nCand)
             begDate = runStatus[0]
             endDate = runStatus[1]
             runFlag = runStatus[2]
@@ -224,24 +164,43 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
                 #print statusData.genMsg
                 #errMod.sendMsg(statusData)
                 #print "MODEL HAS CRASHED ONCE"
+                try:
+                    pickupChain(statusData,workDir,runDir,nCand,basinNum,pbsJobId,False)
+                except:
+                    raise
                 keySlot[basinNum,iteration] = -0.25
                 keyStatus = -0.25
                 runFlag = True
                 runCalib = False
             else:
-                # Model has completed. Set to 0.75, which indicates calibration code
-                # needs to be ran.
-                # Clean up any previous iteration calib files if they are around.
                 try:
-                    errMod.cleanCalib(statusData,workDir,runDir)
-                    errMod.scrubParams(statusData,workDir,staticData)
+                    chainFlag = pickupChain(statusData,workDir,runDir,nCand,basinNum,pbsJobId,True)
                 except:
                     raise
-                print "MODEL HAS COMPLETED AND IS READY FOR PARAMETER GENERATION"
-                keySlot[basinNum,iteration] = 0.75
-                keyStatus = 0.75
-                runFlag = False
-                runCalib = True
+                if chainFlag:
+                    # The calibration code chained to the model is underway.
+                    try:
+                        calibStatus = statusMod.checkCalibJob(statusData,basinNum,pbsJobId)
+                    except:
+                        raise
+                    keySlot[basinNum,iteration] = 0.90
+                    keyStatus = 0.90
+                    runFlag = False
+                    runCalib = False
+                else:
+                    # Model has completed. Set to 0.75, which indicates calibration code
+                    # needs to be ran.
+                    # Clean up any previous iteration calib files if they are around.
+                    try:
+                        errMod.cleanCalib(statusData,workDir,runDir)
+                        errMod.scrubParams(statusData,workDir,staticData)
+                    except:
+                        raise
+                    print "MODEL HAS COMPLETED AND IS READY FOR PARAMETER GENERATION"
+                    keySlot[basinNum,iteration] = 0.75
+                    keyStatus = 0.75
+                    runFlag = False
+                    runCalib = True
                 
     # For when the model simulation has completed, but the calibration is still 
     # listed as running.
@@ -258,16 +217,30 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
             # database as this iteration being completed.
             # Also scrub calib-related files (minus new parameters).
             if os.path.isfile(calibCompleteFlag):
+                # If the basin has converged, no new parameters are created.
+                convergedStatus = os.path.isfile(convergedFlag)
                 try:
                     # If we are on the last iteration, no new parameters are created.
-                    if int(iteration+1) < int(statusData.nIter):
+                    if int(iteration+nCand) < int(statusData.nIter) and not convergedStatus:
                         # The if statment is to handle the last iteration where no 
                         # new parameters are generated at the end. 
                         try:
-                            db.logCalibParams(statusData,int(statusData.jobID),int(gageID),calibTbl,int(iteration)+1)
+                            for candNum in range(0,candidateCount(statusData,iteration+nCand)):
+                                db.logCalibParams(statusData,int(statusData.jobID),int(gageID),calibTbl,
+                                                  int(iteration)+nCand,candNum)
                         except:
                             raise
-                    db.logCalibStats(statusData,int(statusData.jobID),int(gageID),str(gage),int(iteration),statsTbl,staticData)
+                    for candNum in range(0,nCand):
+                        db.logCalibStats(statusData,int(statusData.jobID),int(gageID),str(gage),int(iteration),
+                                         statsTbl,staticData,candNum)
+                        archiveMod.archiveRun(statusData,"CALIB",int(statusData.nIter),statusData.bCalibEvalDate,
+                                              statusData.eCalibDate,basinNum,int(iteration)+candNum,
+                                              candidateDir(runDir,candNum),gageMeta.comID)
+                    if convergedStatus:
+                        # Release the remaining iterations of this basin.
+                        db.fillConvergedBasin(statusData,int(statusData.jobID),int(gageID),int(iteration)+nCand)
+                        keySlot[basinNum,iteration+nCand:] = 1.0
+                        print "BASIN HAS CONVERGED"
                     errMod.cleanCalib(statusData,workDir,runDir)
                 except:
                     raise
@@ -338,7 +311,8 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
                     raise
                 # Enter in parameters for iteration update.
                 try:
-                    db.logCalibParams(statusData,int(statusData.jobID),int(gageID),calibTbl,int(iteration))
+                    for candNum in range(0,nCand):
+                        db.logCalibParams(statusData,int(statusData.jobID),int(gageID),calibTbl,int(iteration),candNum)
                 except:
                     raise
                 print "FIRST CALIB/PARAM CODE DONE, READY TO RUN THE MODEL"
@@ -421,7 +395,7 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
                 else:
                     # Model is not running. Walk the model run directory and determine where
                     # it's at based on RESTART files. 
-                    runStatus = statusMod.walkMod(begDate,endDate,runDir)
+                    runStatus = walkCandidates(begDate,endDate,runDir,nCand)
                     begDate = runStatus[0]
                     endDate = runStatus[1]
                     runFlag = runStatus[2]
@@ -476,7 +450,7 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
                 # Double check to make sure this is not the first calib that 
                 # failed.
                 if not basinStatus:
-                    runStatus = statusMod.walkMod(begDate,endDate,runDir)
+                    runStatus = walkCandidates(begDate,endDate,runDir,nCand)
                     begDate = runStatus[0]
                     endDate = runStatus[1]
                     runFlag = runStatus[2]
@@ -506,7 +480,7 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
                     runFlag = False
                     runCalib = False
                 else:
-                    runStatus = statusMod.walkMod(begDate,endDate,runDir)
+                    runStatus = walkCandidates(begDate,endDate,runDir,nCand)
                     begDate = runStatus[0]
                     endDate = runStatus[1]
                     runFlag = runStatus[2]
@@ -611,7 +585,7 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
             keyStatus = -1.0
         else:
             # LOCK file was removed, upgrade status to 0.0 temporarily
-            runStatus = statusMod.walkMod(begDate,endDate,runDir)
+            runStatus = walkCandidates(begDate,endDate,runDir,nCand)
             begDate = runStatus[0]
             endDate = runStatus[1]
             runFlag = runStatus[2]
@@ -700,12 +674,16 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
             runFlag = False
             runCalib = False
         else:
-            runStatus = statusMod.walkMod(begDate,endDate,runDir)
+            runStatus = walkCandidates(begDate,endDate,runDir,nCand)
             begDate = runStatus[0]
             endDate = runStatus[1]
             runFlag = runStatus[2]
             if runFlag:
                 # Model has crashed again, time to lock it up and send a message out.
+                try:
+                    pickupChain(statusData,workDir,runDir,nCand,basinNum,pbsJobId,False)
+                except:
+                    raise
                 statusData.genMsg = "ERROR: SIMULATION FOR GAGE: " + statusData.gages[basinNum] + \
                                     " HAS FAILED A SECOND TIME. PLEASE FIX ISSUE AND " + \
                                     "MANUALLY REMOVE LOCK FILE: " + lockPath
@@ -716,63 +694,87 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
                 runFlag = False
                 runCalib = False
             else:
-                # Model sucessfully completed from first failed attempt. Ready for
-                # calibration R code.
-                # Cleanup any previous calib files.
                 try:
-                    errMod.cleanCalib(statusData,workDir,runDir)
-                    errMod.scrubParams(statusMod,runDir,staticData)
+                    chainFlag = pickupChain(statusData,workDir,runDir,nCand,basinNum,pbsJobId,True)
                 except:
                     raise
-                print "MODEL COMPLETE, READY TO RUN CALIB CODE"
-                keySlot[basinNum,iteration] = 0.75
-                keyStatus = 0.75
-                runFlag = False
-                runCalib = True
+                if chainFlag:
+                    # The calibration code chained to the model is underway.
+                    try:
+                        calibStatus = statusMod.checkCalibJob(statusData,basinNum,pbsJobId)
+                    except:
+                        raise
+                    keySlot[basinNum,iteration] = 0.90
+                    keyStatus = 0.90
+                    runFlag = False
+                    runCalib = False
+                else:
+                    # Model sucessfully completed from first failed attempt. Ready for
+                    # calibration R code.
+                    # Cleanup any previous calib files.
+                    try:
+                        errMod.cleanCalib(statusData,workDir,runDir)
+                        errMod.scrubParams(statusMod,runDir,staticData)
+                    except:
+                        raise
+                    print "MODEL COMPLETE, READY TO RUN CALIB CODE"
+                    keySlot[basinNum,iteration] = 0.75
+                    keyStatus = 0.75
+                    runFlag = False
+                    runCalib = True
                 
     if keyStatus == -0.25:
         # Restarting model from one crash
-        # First delete namelist files if they exist.
-        check = runDir + "/namelist.hrldas"
-        check2 = runDir + "/hydro.namelist"
-        if os.path.isfile(check):
-            os.remove(check)
-        if os.path.isfile(check2):
-            os.remove(check2)
+        # Only candidates that did not complete, and were not cancelled, are
+        # restarted. The namelists of the others are left in place, which the
+        # restart script checks for to skip them.
+        if not candidateDone(statusData,runDir):
+            # First delete namelist files if they exist.
+            check = runDir + "/namelist.hrldas"
+            check2 = runDir + "/hydro.namelist"
+            if os.path.isfile(check):
+                os.remove(check)
+            if os.path.isfile(check2):
+                os.remove(check2)
             
-        if staticData.coldStart == 0:
-            # Make symbolic links as necssary.
-            try:
-                linkToRst(statusData,gage,runDir,gageMeta,staticData)
-            except:
-                raise
+            if staticData.coldStart == 0:
+                # Make symbolic links as necssary.
+                try:
+                    linkToRst(statusData,gage,runDir,gageMeta,staticData)
+                except:
+                    raise
             
-        # Since these are calibration simulations, we are always going to be 
-        # starting the model rom an existing RESTART file. startType = 1 is for
-        # when we have cold starts. Note 2 indicates we are restarting the model. 
-        startType = 2
+            # Since these are calibration simulations, we are always going to be 
+            # starting the model rom an existing RESTART file. startType = 1 is for
+            # when we have cold starts. Note 2 indicates we are restarting the model. 
+            startType = 2
             
-        if startType == 2:
-            # Clean run directory of any old diagnostics files
+            if startType == 2:
+                # Clean run directory of any old diagnostics files
+                try:
+                    errMod.cleanRunDir(statusData,runDir)
+                except:
+                    raise
+                
+            if begDate == staticData.bCalibDate:
+                if staticData.coldStart == 1:
+                    # We are cold-starting this simulation for the beginning of the iteration.
+                    # This is per user request. 
+                    startType = 1
+                else:
+                    # This is a unique situtation where the model failed right away, so treat it
+                    # as a new simulation. 
+                    startType = 3
+            
+            # Create new namelist files. 
             try:
-                errMod.cleanRunDir(statusData,runDir)
+                namelistMod.createHrldasNL(statusData,gageMeta,staticData,runDir,startType,begDate,endDate,1)
+                namelistMod.createHydroNL(statusData,gageMeta,staticData,runDir,startType,begDate,endDate,1)
             except:
                 raise
                 
-        if begDate == staticData.bCalibDate:
-            if staticData.coldStart == 1:
-                # We are cold-starting this simulation for the beginning of the iteration.
-                # This is per user request. 
-                startType = 1
-            else:
-                # This is a unique situtation where the model failed right away, so treat it
-                # as a new simulation. 
-                startType = 3
-            
-        # Create new namelist files. 
         try:
-            namelistMod.createHrldasNL(statusData,gageMeta,staticData,runDir,startType,begDate,endDate,1)
-            namelistMod.createHydroNL(statusData,gageMeta,staticData,runDir,startType,begDate,endDate,1)
+            prepCandidates(statusData,gage,gageMeta,staticData,runDir,nCand,2)
         except:
             raise
             
@@ -784,37 +786,12 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
             raise
         print "RESTARTING MODEL"
         # Fire off model.
-        if statusData.jobRunType == 1:
-            cmd = "bsub < " + runDir + "/run_WH_Restart.sh"
-            try:
-                subprocess.call(cmd,shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.jobRunType == 2:
-            try:
-                jobTmp = subprocess.check_output(['qsub',runDir + '/run_WH_Restart.sh'])
-                pbsJobId[basinNum] = int(jobTmp.split('.')[0])
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-                
-        if statusData.jobRunType == 3 or statusData.jobRunType == 6:
-            cmd = "sbatch " + runDir + "/run_WH_Restart.sh"
-            try:
-                subprocess.call(cmd,shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.jobRunType == 4 or statusData.jobRunType == 5:
-            cmd = runDir + "/run_WH_Restart.sh 1>" + runDir + "/WH_" + \
-                  str(statusData.jobID) + "_" + str(gageID) + ".out" + \
-                  ' 2>' + runDir + "/WH_" + str(statusData.jobID) + "_" + str(gageID) + ".err"
-            try:
-                p = subprocess.Popen([cmd],shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
+        try:
+            submitModel(statusData,staticData,gageMeta,gage,gageID,basinNum,iteration,runDir,workDir,
+                        runDir + "/run_WH_Restart.sh",nCand,pbsJobId)
+        except:
+            statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
+            raise
             
         # Revert statuses to -0.5 for next loop to convey the model crashed once. 
         keyStatus = -0.5
@@ -854,6 +831,7 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
         try:
             namelistMod.createHrldasNL(statusData,gageMeta,staticData,runDir,startType,begDate,endDate,1)
             namelistMod.createHydroNL(statusData,gageMeta,staticData,runDir,startType,begDate,endDate,1)
+            prepCandidates(statusData,gage,gageMeta,staticData,runDir,nCand,3)
         except:
             raise
             
@@ -872,36 +850,12 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
             
         print "FIRING OFF MODEL SIMULATION"
         # Fire off model.
-        if statusData.jobRunType == 1:
-            cmd = "bsub < " + runDir + "/run_WH.sh"
-            try:
-                subprocess.call(cmd,shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.jobRunType == 2:
-            try:
-                jobTmp = subprocess.check_output(['qsub',runDir + '/run_WH.sh'])
-                pbsJobId[basinNum] = int(jobTmp.split('.')[0])
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.jobRunType == 3 or statusData.jobRunType == 6:
-            cmd = "sbatch " + runDir + "/run_WH.sh"
-            try:
-                subprocess.call(cmd,shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.jobRunType == 4 or statusData.jobRunType == 5:
-            cmd = runDir + "/run_WH.sh 1>" + runDir + "/WH_" + \
-                  str(statusData.jobID) + "_" + str(gageID) + ".out" + \
-                  ' 2>' + runDir + "/WH_" + str(statusData.jobID) + "_" + str(gageID) + ".err"
-            try:
-                p = subprocess.Popen([cmd],shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
+        try:
+            submitModel(statusData,staticData,gageMeta,gage,gageID,basinNum,iteration,runDir,workDir,
+                        runDir + "/run_WH.sh",nCand,pbsJobId)
+        except:
+            statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
+            raise
             
         keyStatus = 0.5
         keySlot[basinNum,iteration] = 0.5
@@ -914,7 +868,8 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
         # First cleanup any old model output or calibration output that 
         # is from previous iterations.
         try:
-            errMod.removeOutput(statusData,runDir)
+            for candNum in range(0,nCand):
+                errMod.removeOutput(statusData,candidateDir(runDir,candNum))
             errMod.cleanCalib(statusData,workDir,runDir)
             errMod.scrubParams(statusData,runDir,staticData)
         except:
@@ -936,37 +891,16 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
             
         print "FIRING OFF FIRST CALIBRATION CODE"
         # Fire off calibration programs.
-        if statusData.analysisRunType == 1:
-            cmd = "bsub < " + workDir + "/run_WH_CALIB.sh"
-            try:
-                subprocess.call(cmd,shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro Calib job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.analysisRunType == 2:
-            try:
-                jobTmp = subprocess.check_output(['qsub',workDir + '/run_WH_CALIB.sh'])
-                pbsJobId[basinNum] = int(jobTmp.split('.')[0])
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro Calib job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.analysisRunType == 3 or statusData.analysisRunType == 6:
-            cmd = "sbatch " + workDir + "/run_WH_CALIB.sh"
-            try:
-                subprocess.call(cmd,shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro Calib job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.analysisRunType == 4 or statusData.analysisRunType == 5:
-            cmd = workDir + "/run_WH_CALIB.sh 1>" + runDir + "/WH_CALIB_" + \
-                  str(statusData.jobID) + "_" + str(gageID) + ".out" + \
-                  ' 2>' + runDir + "/WH_CALIB_" + str(statusData.jobID) + "_" + str(gageID) + ".err"
-            try:
-                p2 = subprocess.Popen([str(cmd)],shell=True)
-                time.sleep(5)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro Calib job for gage: " + str(gageMeta.gage[basinNum])
-                raise
+        statusName = schedAnalysis.statusName("WH_CALIB_" + str(statusData.jobID) + "_" + str(gageID),\
+                                              "C" + str(statusData.jobID) + str(gageID))
+        try:
+            jobTmp = schedAnalysis.submit(statusData,workDir + "/run_WH_CALIB.sh",runDir + "/WH_CALIB_" + \
+                                          str(statusData.jobID) + "_" + str(gageID),statusData.queNameAnalysis,statusName,
+                                          iteration=iteration)
+            schedAnalysis.trackJob(pbsJobId,basinNum,jobTmp)
+        except:
+            statusData.errMsg = "ERROR: Unable to launch WRF-Hydro Calib job for gage: " + str(gageMeta.gage[basinNum])
+            raise
             
         keyStatus = 0.25
         keySlot[basinNum,iteration] = 0.25
@@ -990,452 +924,147 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
             
         print "FIRING OFF CALIB CODE"
         # Fire off calibration program.
-        if statusData.analysisRunType == 1:
-            cmd = "bsub < " + workDir + "/run_WH_CALIB.sh"
-            try:
-                subprocess.call(cmd,shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro Calib job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.analysisRunType == 2:
-            try:
-                jobTmp = subprocess.check_output(['qsub',workDir + '/run_WH_CALIB.sh'])
-                pbsJobId[basinNum] = int(jobTmp.split('.')[0])
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro Calib job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.analysisRunType == 3 or statusData.analysisRunType == 6:
-            cmd = "sbatch " + workDir + "/run_WH_CALIB.sh"
-            try:
-                subprocess.call(cmd,shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro Calib job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.analysisRunType == 4 or statusData.analysisRunType == 5:
-            cmd = workDir + "/run_WH_CALIB.sh 1>" + runDir + "/WH_CALIB_" + \
-                  str(statusData.jobID) + "_" + str(gageID) + ".out" + \
-                  ' 2>' + runDir + "/WH_CALIB_" + str(statusData.jobID) + "_" + str(gageID) + ".err"
-            try:
-                p3 = subprocess.Popen([cmd],shell=True)
-                time.sleep(5)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro Calib job for gage: " + str(gageMeta.gage[basinNum])
-                raise
+        statusName = schedAnalysis.statusName("WH_CALIB_" + str(statusData.jobID) + "_" + str(gageID),\
+                                              "C" + str(statusData.jobID) + str(gageID))
+        try:
+            jobTmp = schedAnalysis.submit(statusData,workDir + "/run_WH_CALIB.sh",runDir + "/WH_CALIB_" + \
+                                          str(statusData.jobID) + "_" + str(gageID),statusData.queNameAnalysis,statusName,
+                                          iteration=iteration)
+            schedAnalysis.trackJob(pbsJobId,basinNum,jobTmp)
+        except:
+            statusData.errMsg = "ERROR: Unable to launch WRF-Hydro Calib job for gage: " + str(gageMeta.gage[basinNum])
+            raise
             
         keyStatus = 0.90
         keySlot[basinNum,iteration] = 0.90
         
+    # The remaining candidates of the generation share the status of the first.
+    keySlot[basinNum,iteration+1:iteration+nCand] = keySlot[basinNum,iteration]
+        
     # Update job status in the Database table.
     try:
-        db.updateIterationStatus(statusData,int(gageMeta.gageID),iteration,str(gageMeta.gage),keyStatus)
+        for candNum in range(0,nCand):
+            db.updateIterationStatus(statusData,int(gageMeta.gageID),iteration+candNum,str(gageMeta.gage),keyStatus)
     except:
         raise
     
                 
-def generateRestartBsubScript(jobData,gageID,runDir):
+def generateRunScript(jobData,gageID,runDir,restartFlag,gageMeta,nCand=1):
     """
-    Generic function to create a run script that will be called by bsub
-    to execute the model. This run script is used specifically to restart
-    the model instead of removing all output prior to running the model.
+    Generic function to create a run script that will be submitted through
+    the scheduler backend to execute the model. If the restart flag is False,
+    all prior model restart output is cleaned out in preparation for the
+    next iteration. Otherwise, the script is used specifically to restart
+    the model without removing any prior output. When more than one DDS
+    candidate is being ran, the script is submitted as an array job, and
+    each task runs the model in the directory of it's candidate. Streamflow
+    is collected alongside the model if requested.
     """
     
-    outFile = runDir + "/run_WH_Restart.sh"
+    if restartFlag:
+        outFile = runDir + "/run_WH_Restart.sh"
+    else:
+        outFile = runDir + "/run_WH.sh"
     
     if os.path.isfile(outFile):
         jobData.errMsg = "ERROR: Run script: " + outFile + " already exists."
         raise Exception()
         
+    spec = schedMod.jobSpec()
+    spec.jobName = "WH_" + str(jobData.jobID) + "_" + str(gageID)
+    spec.mpiName = "W" + str(jobData.jobID) + str(gageID)
+    spec.workDir = runDir
+    spec.exe = "./wrf_hydro.exe"
+    spec.queName = jobData.queName
+    spec.exclusive = True
+    if nCand > 1:
+        taskIndex = schedMod.getScheduler(schedMod.modelRunType(jobData)).taskIndex
+        spec.preCmds.append('CAND=' + taskIndex)
+        spec.preCmds.append('if [ $CAND -gt 0 ]; then cd ' + runDir + '_$CAND; fi')
+        if restartFlag:
+            # The whole array is re-submitted, so candidates that completed since
+            # their namelists were created, or were cancelled, are skipped. The
+            # end of the job is still reported for the skipped tasks.
+            lsmRst = "RESTART." + jobData.eCalibDate.strftime('%Y%m%d%H') + "_DOMAIN1"
+            hydroRst = "HYDRO_RST." + jobData.eCalibDate.strftime('%Y-%m-%d_%H') + ":00_DOMAIN1"
+            spec.preCmds.append('if [ -f RUN.KILLED ] || { [ ' + lsmRst + ' -nt namelist.hrldas ] && ' + \
+                                '[ ' + hydroRst + ' -nt namelist.hrldas ]; }; then')
+            spec.preCmds.append('    echo "MODEL RUN IN $PWD ALREADY COMPLETE"')
+            spec.preCmds.append('    WH_STATUS=0')
+            spec.preCmds.append('    ' + schedMod.eventCmd(jobData,outFile,taskIndex))
+            spec.preCmds.append('fi')
+    if not restartFlag:
+        spec.preCmds.append('for FILE in HYDRO_RST.*; do if [ ! -L $FILE ] ; then rm -rf $FILE; fi; done')
+        spec.preCmds.append('for FILE in RESTART.*; do if [ ! -L $FILE ] ; then rm -rf $FILE; fi; done')
+        # The time series of the previous iteration is kept until the flow
+        # archive has taken it in.
+        spec.preCmds.append('rm -f ' + chanobsMod.chrtFile)
     try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        fileObj.write('#\n')
-        fileObj.write('# LSF Batch Script to Run WRF-Hydro Calibration Simulations\n')
-        fileObj.write('#\n')
-        if len(jobData.acctKey.strip()) > 0:
-            inStr = "#BSUB -P " + str(jobData.acctKey) + '\n'
-            fileObj.write(inStr)
-        fileObj.write('#BSUB -x\n')
-        inStr = "#BSUB -n " + str(jobData.nCoresMod) + '\n'
-        fileObj.write(inStr)
-        inStr = "#BSUB -J WH_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
-        fileObj.write(inStr)
-        inStr = '#BSUB -o ' + runDir + '/%J.out\n'
-        fileObj.write(inStr)
-        inStr = '#BSUB -e ' + runDir + '/%J.err\n'
-        fileObj.write(inStr)
-        fileObj.write('#BSUB -W 6:00\n')
-        if len(jobData.queName.strip()) > 0:
-            inStr = '#BSUB -q ' + str(jobData.queName) + '\n'
-            fileObj.write(inStr)
-        fileObj.write('\n')
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        fileObj.write('mpirun.lsf ./wrf_hydro.exe\n')
-        fileObj.close
+        sizeMod.sizeModel(jobData,gageMeta,spec,jobData.bCalibDate,jobData.eCalibDate,restartFlag)
+    except:
+        raise
+    if int(jobData.streamCollect) > 0:
+        streamCmds = chanobsMod.streamCmds(jobData,gageMeta.comID,jobData.bCalibEvalDate)
+        spec.preCmds.extend(streamCmds[0])
+        spec.postCmds.extend(streamCmds[1])
+        
+    try:
+        schedMod.getScheduler(schedMod.modelRunType(jobData)).renderScript(jobData,outFile,spec)
     except:
-        jobData.errMsg = "ERROR: Failure to create: " + outFile
         raise
         
-def generateRestartPbsScript(jobData,gageID,runDir):
+def generateRScript(jobData,gageMeta,gageNum,iteration):
     """
-    Generic function to create a run script that will be called by qsub
-    to execute the model. This run script is used specifically to restart the model
-    instead of removing all output prior to running the model.
+    Generic function to create R script that will be sourced by R during
+    calibration.
     """
+    outPath = jobData.outDir + "/" + jobData.jobName + "/" + str(gageMeta.gage) + \
+              "/RUN.CALIB/calibScript.R"
+              
+    if os.path.isfile(outPath):
+        # Over-write to update mCurrent to reflect current iteration
+        os.remove(outPath)
     
-    outFile = runDir + "/run_WH_Restart.sh"
-    
-    if os.path.isfile(outFile):
-        jobData.errMsg = "ERROR: Run script: " + outFile + " already exists."
+    if os.path.isfile(outPath):
+        jobData.errMsg = "ERROR: Calibration R script: " + outPath + " aleady exists."
         raise Exception()
-        
+
     try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        fileObj.write('#\n')
-        fileObj.write('# PBS Batch Script to Run WRF-Hydro Calibration Simulations\n')
-        fileObj.write('#\n')
-        inStr = "#PBS -N WH_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
+        fileObj = open(outPath,'w')
+        fileObj.write('#### Model Parameters ####\n')
+        inStr = "objFn <- \"" + str(jobData.objFunc) + "\"\n"
         fileObj.write(inStr)
-        if len(jobData.acctKey.strip()) > 0:
-            inStr = "#PBS -A " + str(jobData.acctKey) + '\n'
-            fileObj.write(inStr)
-        inStr = "#PBS -l walltime=08:00:00\n"
+        fileObj.write('# Specify calibration method.\n')
+        inStr = "calibMethod <- \"" + str(jobData.calibMethod) + "\"\n"
         fileObj.write(inStr)
-        if len(jobData.queName.strip()) > 0:
-            inStr = "#PBS -q " + str(jobData.queName) + "\n"
-            fileObj.write(inStr)
-        inStr = "#PBS -o " + runDir + "/WH_" + str(jobData.jobID) + "_" + str(gageID) + ".out\n"
+        fileObj.write('# Specify number of calibration iterations.\n')
+        inStr = "m <- " + str(jobData.nIter) + '\n'
         fileObj.write(inStr)
-        inStr = "#PBS -e " + runDir + "/WH_" + str(jobData.jobID) + "_" + str(gageID) + ".err\n"
+        inStr = "mCurrent <- " + str(iteration) + "\n"
         fileObj.write(inStr)
-        nCoresPerNode = int(jobData.nCoresMod/jobData.nNodesMod)
-        inStr = "#PBS -l select=" + str(jobData.nNodesMod) + ":ncpus=" + str(nCoresPerNode) + \
-                ":mpiprocs=" + str(nCoresPerNode) + "\n"
+        fileObj.write('# Specify DDS parameter (if used).\n')
+        inStr = "r <- " + str(jobData.ddsR) + "\n"
         fileObj.write(inStr)
-        fileObj.write("\n")
-        inStr = 'cd ' + runDir + '\n'
+        fileObj.write('# Specify number of DDS candidates evaluated concurrently.\n')
+        inStr = "nCand <- " + str(jobData.ddsCandidates) + "\n"
         fileObj.write(inStr)
-        fileObj.write('mpiexec_mpt ./wrf_hydro.exe\n')
-        fileObj.close
-    except:
-        jobData.errMsg = "ERROR: Failure to create: " + outFile
-        raise
-        
-def generateRestartSlurmScript(jobData,gageID,runDir):
-    """
-    Generic function to create a run script that will be called by Slurm
-    to execute the model. This run script is used specifically to restart the model
-    instead of removing all output prior to running the model.
-    """
-    
-    outFile = runDir + "/run_WH_Restart.sh"
-    
-    if os.path.isfile(outFile):
-        jobData.errMsg = "ERROR: Run script: " + outFile + " already exists."
-        raise Exception()
-    
-    try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        fileObj.write('#\n')
-        fileObj.write('# Slurm Batch Script to Run WRF-Hydro Calibration Simulations\n')
-        fileObj.write('#\n')
-        inStr = "#SBATCH -J WH_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
+        fileObj.write('# Specify convergence criteria for stopping early.\n')
+        inStr = "convergeIter <- " + str(jobData.convergeIter) + "\n"
         fileObj.write(inStr)
-        if len(jobData.acctKey.strip()) > 0:
-            inStr = "#SBATCH -A " + str(jobData.acctKey) + '\n'
-            fileObj.write(inStr)
-        inStr = "#SBATCH -t 08:00:00\n"
+        inStr = "convergeEps <- " + str(jobData.convergeEps) + "\n"
         fileObj.write(inStr)
-        if len(jobData.queName.strip()) > 0:
-            inStr = "#SBATCH -p " + str(jobData.queName) + "\n"
-            fileObj.write(inStr)
-        inStr = "#SBATCH -o " + runDir + "/WH_" + str(jobData.jobID) + "_" + str(gageID) + ".out\n"
+        inStr = "convergeParmEps <- " + str(jobData.convergeParmEps) + "\n"
         fileObj.write(inStr)
-        inStr = "#SBATCH -e " + runDir + "/WH_" + str(jobData.jobID) + "_" + str(gageID) + ".err\n"
+        fileObj.write("# Specify run directory containing calibration simulations.\n")
+        inStr = "runDir <- '" + jobData.outDir + "/" + jobData.jobName + "/" + \
+                str(gageMeta.gage) + "/RUN.CALIB'\n"
         fileObj.write(inStr)
-        inStr = "#SBATCH -N " + str(jobData.nNodesMod) + '\n'
+        fileObj.write('# Basin-Specific Metadata\n')
+        inStr = "siteId <- '" + str(gageMeta.gage) + "'\n"
         fileObj.write(inStr)
-        fileObj.write("\n")
-        inStr = 'cd ' + runDir + '\n'
+        inStr = "rtlinkFile <- '" + str(gageMeta.rtLnk) + "'\n"
         fileObj.write(inStr)
-        if jobData.jobRunType == 3:
-            inStr = 'srun -n ' + str(jobData.nCoresMod) + ' ./wrf_hydro.exe\n'
-        if jobData.jobRunType == 6:
-            inStr = 'mpirun -n ' + str(jobData.nCoresMod) + ' ./wrf_hydro.exe\n'
-        fileObj.write(inStr)
-        fileObj.close
-    except:
-        jobData.errMsg = "ERROR: Failure to create: " + outFile
-        raise
-        
-def generateMpiRstScript(jobData,gageID,runDir):
-    """
-    Generic function to create a run script that will be called by mpiexec/mpirun
-    to execute the model. This script is used specifically to restart the
-    model instead of removing all output prior to running the model.
-    """
-    
-    outFile = runDir + "/run_WH_Restart.sh"
-    
-    if os.path.isfile(outFile):
-        jobData.errMsg = "ERROR: Run script: " + outFile + " already exists."
-        raise Exception()
-        
-    try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        if jobData.jobRunType == 4:
-            inStr = 'mpiexec -n ' + str(int(jobData.nCoresMod)) + ' ./W' + \
-            str(jobData.jobID) + str(gageID) + '\n'
-        if jobData.jobRunType == 5:
-            inStr = 'mpirun -np ' + str(int(jobData.nCoresMod)) + ' ./W' + \
-            str(jobData.jobID) + str(gageID) + '\n'
-        fileObj.write(inStr)
-        fileObj.close
-    except:
-        jobData.errMsg = "ERROR: Failure to create: " + outFile
-        raise
-        
-    # Make the file an executable
-    cmd = "chmod +x " + outFile
-    try:
-        subprocess.call(cmd,shell=True)
-    except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile + " to an executable."
-        raise
-        
-def generateBsubScript(jobData,gageID,runDir):
-    """
-    Generic function to create a run script that will be called by bsub
-    to execute the model. For this particular BSUB script, we clean out
-    all prior model output in preparation for the next iteration. 
-    """
-    
-    outFile = runDir + "/run_WH.sh"
-    
-    if os.path.isfile(outFile):
-        jobData.errMsg = "ERROR: Run script: " + outFile + " already exists."
-        raise Exception()
-        
-    try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        fileObj.write('#\n')
-        fileObj.write('# LSF Batch Script to Run WRF-Hydro Calibration Simulations\n')
-        fileObj.write('#\n')
-        if len(jobData.acctKey.strip()) > 0:
-            inStr = "#BSUB -P " + str(jobData.acctKey) + '\n'
-            fileObj.write(inStr)
-        fileObj.write('#BSUB -x\n')
-        inStr = "#BSUB -n " + str(jobData.nCoresMod) + '\n'
-        fileObj.write(inStr)
-        inStr = "#BSUB -J WH_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
-        fileObj.write(inStr)
-        inStr = '#BSUB -o ' + runDir + '/%J.out\n'
-        fileObj.write(inStr)
-        inStr = '#BSUB -e ' + runDir + '/%J.err\n'
-        fileObj.write(inStr)
-        fileObj.write('#BSUB -W 6:00\n')
-        if len(jobData.queName.strip()) > 0:
-            inStr = '#BSUB -q ' + str(jobData.queName) + '\n'
-            fileObj.write(inStr)
-        fileObj.write('\n')
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        inStr = 'for FILE in HYDRO_RST.*; do if [ ! -L $FILE ] ; then rm -rf $FILE; fi; done\n'
-        fileObj.write(inStr)
-        inStr = 'for FILE in RESTART.*; do if [ ! -L $FILE ] ; then rm -rf $FILE; fi; done\n'
-        fileObj.write(inStr)
-        fileObj.write('mpirun.lsf ./wrf_hydro.exe\n')
-        fileObj.close
-    except:
-        jobData.errMsg = "ERROR: Failure to create: " + outFile
-        raise
-        
-def generatePbsScript(jobData,gageID,runDir):
-    """
-    Generic function to create a script that will be called by qsub
-    to execute the model.
-    """
-    
-    outFile = runDir + "/run_WH.sh"
-    
-    if os.path.isfile(outFile):
-        jobData.errMsg = "ERROR: Run script: " + outFile + " already exists."
-        raise Exception()
-        
-    try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        fileObj.write('#\n')
-        fileObj.write('# PBS Batch Script to Run WRF-Hydro Calibration Simulations\n')
-        fileObj.write('#\n')
-        inStr = "#PBS -N WH_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
-        fileObj.write(inStr)
-        if len(jobData.acctKey.strip()) > 0:
-            inStr = "#PBS -A " + str(jobData.acctKey) + '\n'
-            fileObj.write(inStr)
-        inStr = "#PBS -l walltime=08:00:00\n"
-        fileObj.write(inStr)
-        if len(jobData.queName.strip()) > 0:
-            inStr = "#PBS -q " + str(jobData.queName) + "\n"
-            fileObj.write(inStr)
-        inStr = "#PBS -o " + runDir + "/WH_" + str(jobData.jobID) + "_" + str(gageID) + ".out\n"
-        fileObj.write(inStr)
-        inStr = "#PBS -e " + runDir + "/WH_" + str(jobData.jobID) + "_" + str(gageID) + ".err\n"
-        fileObj.write(inStr)
-        nCoresPerNode = int(jobData.nCoresMod/jobData.nNodesMod)
-        inStr = "#PBS -l select=" + str(jobData.nNodesMod) + ":ncpus=" + str(nCoresPerNode) + \
-                ":mpiprocs=" + str(nCoresPerNode) + "\n"
-        fileObj.write(inStr)
-        fileObj.write("\n")
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        inStr = 'for FILE in HYDRO_RST.*; do if [ ! -L $FILE ] ; then rm -rf $FILE; fi; done\n'
-        fileObj.write(inStr)
-        inStr = 'for FILE in RESTART.*; do if [ ! -L $FILE ] ; then rm -rf $FILE; fi; done\n'
-        fileObj.write(inStr)
-        fileObj.write('mpiexec_mpt ./wrf_hydro.exe\n')
-        fileObj.close
-    except:
-        jobData.errMsg = "ERROR: Failure to create: " + outFile
-        raise
-        
-def generateSlurmScript(jobData,gageID,runDir):
-    """
-    Generic function to create a script that will be called by Slurm
-    to execute the model.
-    """
-    
-    outFile = runDir + "/run_WH.sh"
-    
-    if os.path.isfile(outFile):
-        jobData.errMsg = "ERROR: Run script: " + outFile + " already exists."
-        raise Exception()
-        
-    try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        fileObj.write('#\n')
-        fileObj.write('# Slurm Batch Script to Run WRF-Hydro Calibration Simulations\n')
-        fileObj.write('#\n')
-        inStr = "#SBATCH -J WH_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
-        fileObj.write(inStr)
-        if len(jobData.acctKey.strip()) > 0:
-            inStr = "#SBATCH -A " + str(jobData.acctKey) + '\n'
-            fileObj.write(inStr)
-        inStr = "#SBATCH -t 08:00:00\n"
-        fileObj.write(inStr)
-        if len(jobData.queName.strip()) > 0:
-            inStr = "#SBATCH -p " + str(jobData.queName) + "\n"
-            fileObj.write(inStr)
-        inStr = "#SBATCH -o " + runDir + "/WH_" + str(jobData.jobID) + "_" + str(gageID) + ".out\n"
-        fileObj.write(inStr)
-        inStr = "#SBATCH -e " + runDir + "/WH_" + str(jobData.jobID) + "_" + str(gageID) + ".err\n"
-        fileObj.write(inStr)
-        inStr = "#SBATCH -N " + str(jobData.nNodesMod) + "\n"
-        fileObj.write(inStr)
-        fileObj.write("\n")
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        inStr = 'for FILE in HYDRO_RST.*; do if [ ! -L $FILE ] ; then rm -rf $FILE; fi; done\n'
-        fileObj.write(inStr)
-        inStr = 'for FILE in RESTART.*; do if [ ! -L $FILE ] ; then rm -rf $FILE; fi; done\n'
-        fileObj.write(inStr)
-        if jobData.jobRunType == 3:
-            inStr = "srun -n " + str(jobData.nCoresMod) + " ./wrf_hydro.exe\n"
-        if jobData.jobRunType == 6:
-            inStr = "mpirun -n " + str(jobData.nCoresMod) + " ./wrf_hydro.exe\n"
-        fileObj.close
-    except:
-        jobData.errMsg = "ERROR: Failure to create: " + outFile
-        raise
-        
-def generateMpiScript(jobData,gageID,runDir):
-    """
-    Generic function to create a run script that will be called by mpiexec/mpirun
-    to execute the model. For this particular script, we clean out all prior
-    moel output in preparation for the next iteration.
-    """
-    
-    outFile = runDir + "/run_WH.sh"
-    
-    if os.path.isfile(outFile):
-        jobData.errMsg = "ERROR: Run script: " + outFile + " already exists."
-        raise Exception()
-        
-    try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        inStr = 'for FILE in HYDRO_RST.*; do if [ ! -L $FILE ] ; then rm -rf $FILE; fi; done\n'
-        fileObj.write(inStr)
-        inStr = 'for FILE in RESTART.*; do if [ ! -L $FILE ] ; then rm -rf $FILE; fi; done\n'
-        fileObj.write(inStr)
-        if jobData.jobRunType == 4:
-            inStr = 'mpiexec -n ' + str(int(jobData.nCoresMod)) + ' ./W' + \
-            str(jobData.jobID) + str(gageID) + '\n'
-        if jobData.jobRunType == 5:
-            inStr = 'mpirun -np ' + str(int(jobData.nCoresMod)) + ' ./W' + \
-            str(jobData.jobID) + str(gageID) + '\n'
-        fileObj.write(inStr)
-        fileObj.close
-    except:
-        jobData.errMsg = 'Failure to create: ' + outFile
-        raise
-        
-    # Make the file an executable.
-    cmd = "chmod +x " + outFile
-    try:
-        subprocess.call(cmd,shell=True)
-    except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile + " to an executable."
-        raise
-        
-def generateRScript(jobData,gageMeta,gageNum,iteration):
-    """
-    Generic function to create R script that will be sourced by R during
-    calibration.
-    """
-    outPath = jobData.outDir + "/" + jobData.jobName + "/" + str(gageMeta.gage) + \
-              "/RUN.CALIB/calibScript.R"
-              
-    if os.path.isfile(outPath):
-        # Over-write to update mCurrent to reflect current iteration
-        os.remove(outPath)
-    
-    if os.path.isfile(outPath):
-        jobData.errMsg = "ERROR: Calibration R script: " + outPath + " aleady exists."
-        raise Exception()
-
-    try:
-        fileObj = open(outPath,'w')
-        fileObj.write('#### Model Parameters ####\n')
-        inStr = "objFn <- \"" + str(jobData.objFunc) + "\"\n"
-        fileObj.write(inStr)
-        fileObj.write('# Specify number of calibration iterations.\n')
-        inStr = "m <- " + str(jobData.nIter) + '\n'
-        fileObj.write(inStr)
-        inStr = "mCurrent <- " + str(iteration) + "\n"
-        fileObj.write(inStr)
-        fileObj.write('# Specify DDS parameter (if used).\n')
-        inStr = "r <- " + str(jobData.ddsR) + "\n"
-        fileObj.write(inStr)
-        fileObj.write("# Specify run directory containing calibration simulations.\n")
-        inStr = "runDir <- '" + jobData.outDir + "/" + jobData.jobName + "/" + \
-                str(gageMeta.gage) + "/RUN.CALIB'\n"
-        fileObj.write(inStr)
-        fileObj.write('# Basin-Specific Metadata\n')
-        inStr = "siteId <- '" + str(gageMeta.gage) + "'\n"
-        fileObj.write(inStr)
-        inStr = "rtlinkFile <- '" + str(gageMeta.rtLnk) + "'\n"
-        fileObj.write(inStr)
-        inStr = "linkId <- " + str(gageMeta.comID) + "\n"
+        inStr = "linkId <- " + str(gageMeta.comID) + "\n"
         fileObj.write(inStr)
         fileObj.write('# Start date for evaluation period (e.g., after spinup period)\n')
         inStr = "startDate <- as.POSIXct(\"" + jobData.bCalibEvalDate.strftime('%Y-%m-%d') + "\", " + \
@@ -1454,13 +1083,14 @@ def generateRScript(jobData,gageMeta,gageNum,iteration):
         jobData.errMsg = "ERROR: Failure to create: " + outPath
         raise        
         
-def generateBsubCalibScript(jobData,gageID,runDir,workDir,staticData):
+def generateCalibScript(jobData,gageID,runDir,workDir,staticData,gageMeta):
     """
-    Generic Function function to create BSUB script for running R
-    calibration routines. These jobs will be shorter than 
-    the model runs, but still need to be ran through Yellowstone
+    Generic Function function to create the script submitted through the
+    scheduler backend for running R calibration routines. These jobs will
+    be shorter than the model runs, but still need to be ran through HPC
     compute nodes. This function also creates the shell script that
-    will execute R and Python to modify parameters.
+    will extract streamflow from the model output, and execute R and 
+    Python to modify parameters.
     """
     
     outFile1 = workDir + "/run_WH_CALIB.sh"
@@ -1468,131 +1098,39 @@ def generateBsubCalibScript(jobData,gageID,runDir,workDir,staticData):
     if os.path.isfile(outFile1):
         # We are just going to manually over-write the file everytime to be safe.
         os.remove(outFile1)
-    
-    if not os.path.isfile(outFile1):
-        try:
-            fileObj = open(outFile1,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('#\n')
-            fileObj.write('# LSF Batch Script to Run WRF-Hydro Calibration R Code\n')
-            fileObj.write('#\n')
-            if len(jobData.acctKey.strip()) > 0:
-                inStr = "#BSUB -P " + str(jobData.acctKey) + '\n'
-                fileObj.write(inStr)
-            inStr = "#BSUB -n " + str(jobData.nCoresR) + '\n'
-            fileObj.write(inStr)
-            inStr = "#BSUB -J WH_CALIB_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
-            fileObj.write(inStr)
-            inStr = '#BSUB -o ' + workDir + '/%J.out\n'
-            fileObj.write(inStr)
-            inStr = '#BSUB -e ' + workDir + '/%J.err\n'
-            fileObj.write(inStr)
-            # We are using 2 hours to be safe here. 
-            fileObj.write('#BSUB -W 2:00\n')
-            if len(jobData.queNameAnalysis.strip()) > 0:
-                inStr = '#BSUB -q ' + str(jobData.queNameAnalysis) + '\n'
-                fileObj.write(inStr)
-            fileObj.write('\n')
-            inStr = 'cd ' + workDir + '\n'
-            fileObj.write(inStr)
-            fileObj.write('./calibCmd.sh\n')
-            fileObj.close
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile1
-            raise    
-            
-    outFile2 = workDir + "/calibCmd.sh"
-    
-    runRProgram = workDir + "/calib_workflow.R"
-    srcScript = workDir + "/calibScript.R"
         
-    if not os.path.isfile(outFile2):
-        # This is the file that will run the R code first to generate params_new.txt and
-        # params_stats.txt. Python is called next, which will read in 
-        try:
-            fileObj = open(outFile2,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('Rscript ' + runRProgram + " " + srcScript + '\n')
-            fileObj.write('python ' + workDir + '/adjust_parameters.py ' + workDir + ' ' + runDir + ' ' + \
-                          str(staticData.gwBaseFlag) + ' ' + str(staticData.chnRtOpt) + ' \n')
-            fileObj.write('exit\n')
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile2
-            raise
-            
-    # Make shell script an executable.
-    cmd = 'chmod +x ' + outFile2
+    spec = calibSpec(jobData,gageID,workDir)
+    
     try:
-        subprocess.call(cmd,shell=True)
+        schedMod.getScheduler(jobData.analysisRunType).renderScript(jobData,outFile1,spec)
     except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile2 + " to an executable."
         raise
-        
-def generatePbsCalibScript(jobData,gageID,runDir,workDir,staticData):
-    """
-    Generic Function function to create PBS script for running R
-    calibration routines. These jobs will be shorter than 
-    the model runs, but still need to be ran through HPC
-    compute nodes. This function also creates the shell script that
-    will execute R and Python to modify parameters.
-    """
-    
-    outFile1 = workDir + "/run_WH_CALIB.sh"
-    
-    if os.path.isfile(outFile1):
-        # We are just going to manually over-write the file everytime to be safe.
-        os.remove(outFile1)
-    
-    if not os.path.isfile(outFile1):
-        try:
-            fileObj = open(outFile1,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('#\n')
-            fileObj.write('# PBS Batch Script to Run WRF-Hydro Calibration R Code\n')
-            fileObj.write('#\n')
-            if len(jobData.acctKey.strip()) > 0:
-                inStr = "#PBS -A " + str(jobData.acctKey) + '\n'
-                fileObj.write(inStr)
-            inStr = "#PBS -N WH_CALIB_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
-            fileObj.write(inStr)
-            inStr = '#PBS -o ' + workDir + '/WH_CALIB_' + str(jobData.jobID) + '_' + str(gageID) + '.out\n'
-            fileObj.write(inStr)
-            inStr = '#PBS -e ' + workDir + '/WH_CALIB_' + str(jobData.jobID) + '_' + str(gageID) + '.err\n'
-            fileObj.write(inStr)
-            nCoresPerNode = int(jobData.nCoresR/jobData.nNodesR)
-            inStr = "#PBS -l select=" + str(jobData.nNodesR) + ":ncpus=" + str(nCoresPerNode) + \
-                    ":mpiprocs=" + str(nCoresPerNode) + "\n"
-            fileObj.write(inStr)
-            # We are using 2 hours to be safe here. 
-            fileObj.write('#PBS -l walltime=02:00:00\n')
-            if len(jobData.queNameAnalysis.strip()) > 0:
-                inStr = '#PBS -q ' + str(jobData.queNameAnalysis) + '\n'
-                fileObj.write(inStr)
-            fileObj.write('\n')
-            inStr = 'cd ' + workDir + '\n'
-            fileObj.write(inStr)
-            fileObj.write('./calibCmd.sh\n')
-            fileObj.close
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile1
-            raise    
             
-    outFile2 = workDir + "/calibCmd.sh"
+    outFile2 = workDir + '/calibCmd.sh'
+    outLink2 = workDir + '/' + spec.mpiName
+    
+    runRProgram = workDir + '/calib_workflow.R'
+    srcScript = workDir + '/calibScript.R'
     
-    runRProgram = workDir + "/calib_workflow.R"
-    srcScript = workDir + "/calibScript.R"
-        
     if not os.path.isfile(outFile2):
-        # This is the file that will run the R code first to generate params_new.txt and
-        # params_stats.txt. Python is called next, which will read in 
+        # This is the file that will run R code. First to generate params_new.txt and
+        # params_stats.txt. Python is called next, which will generate new parameters.
         try:
             fileObj = open(outFile2,'w')
             fileObj.write('#!/bin/bash\n')
+            # Extract the streamflow at the gage from the output of each DDS candidate.
+            fileObj.write('for outDir in ' + runDir + ' ' + runDir + '_*; do\n')
+            fileObj.write('    if [ -d $outDir ]; then\n')
+            fileObj.write('        ' + chanobsMod.extractCmd('$outDir',gageMeta.comID,jobData.bCalibEvalDate,
+                                                             jobData.nCoresR) + '\n')
+            fileObj.write('    fi\n')
+            fileObj.write('done\n')
             fileObj.write('Rscript ' + runRProgram + " " + srcScript + '\n')
-            fileObj.write('python ' + workDir + '/adjust_parameters.py ' + workDir + ' ' + \
-                          runDir + ' ' + str(staticData.gwBaseFlag) + ' ' + \
+            fileObj.write('python ' + workDir + '/adjust_parameters.py ' + workDir + \
+                          ' ' + runDir + ' ' + str(staticData.gwBaseFlag) + ' ' + \
                           str(staticData.chnRtOpt) + ' \n')
             fileObj.write('exit\n')
+            fileObj.close()
         except:
             jobData.errMsg = "ERROR: Failure to create: " + outFile2
             raise
@@ -1605,157 +1143,166 @@ def generatePbsCalibScript(jobData,gageID,runDir,workDir,staticData):
         jobData.errMsg = "ERROR: Failure to convert: " + outFile2 + " to an executable."
         raise
         
-def generateSlurmCalibScript(jobData,gageID,runDir,workDir,staticData):
+    # Make symbolic link to newly created executable, which will be called by
+    # mpiexec/mpirun.
+    if schedMod.getScheduler(jobData.analysisRunType).name == 'MPI':
+        if not os.path.islink(outLink2):
+            try:
+                os.symlink(outFile2,outLink2)
+            except:
+                jobData.errMsg = "ERROR: Failure to create symbolic link: " + outLink2
+                raise
+        
+def calibSpec(jobData,gageID,workDir):
     """
-    Generic Function function to create Slurm script for running R
-    calibration routines. These jobs will be shorter than 
-    the model runs, but still need to be ran through HPC
-    compute nodes. This function also creates the shell script that
-    will execute R and Python to modify parameters.
+    Generic function to return the job specification of the R calibration
+    routines for a basin.
     """
+    spec = schedMod.jobSpec()
+    spec.jobName = "WH_CALIB_" + str(jobData.jobID) + "_" + str(gageID)
+    spec.mpiName = "C" + str(jobData.jobID) + str(gageID)
+    spec.title = "WRF-Hydro Calibration R Code"
+    spec.workDir = workDir
+    spec.exe = "./calibCmd.sh"
+    spec.parallel = False
+    spec.nCores = jobData.nCoresR
+    spec.nNodes = jobData.nNodesR
+    # We are using 2 hours to be safe here.
+    spec.wallTime = 120
+    spec.queName = jobData.queNameAnalysis
+    return spec
     
-    outFile1 = workDir + "/run_WH_CALIB.sh"
+def generateChainScript(jobData,gageID,runDir,workDir,nCand):
+    """
+    Generic function to create the script for running the R calibration
+    routines chained to the model runs of a DDS generation. The script
+    first checks each model run wrote it's final RESTART files since the
+    namelists were created, or was cancelled for not being able to beat the
+    best run. Otherwise, the calibration routines are not ran, as the
+    workflow will restart the model runs.
+    """
+    outFile = workDir + "/run_WH_CALIB_CHAIN.sh"
     
-    if os.path.isfile(outFile1):
-        # We are just going to manually over-write the file everytime to be safe.
-        os.remove(outFile1)
+    if os.path.isfile(outFile):
+        os.remove(outFile)
+        
+    lsmRst = "RESTART." + jobData.eCalibDate.strftime('%Y%m%d%H') + "_DOMAIN1"
+    hydroRst = "HYDRO_RST." + jobData.eCalibDate.strftime('%Y-%m-%d_%H') + ":00_DOMAIN1"
+    candDirs = [candidateDir(runDir,candNum) for candNum in range(0,nCand)]
     
-    if not os.path.isfile(outFile1):
-        try:
-            fileObj = open(outFile1,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('#\n')
-            fileObj.write('# Slurm Batch Script to Run WRF-Hydro Calibration R Code\n')
-            fileObj.write('#\n')
-            if len(jobData.acctKey.strip()) > 0:
-                inStr = "#SBATCH -A " + str(jobData.acctKey) + '\n'
-                fileObj.write(inStr)
-            inStr = "#SBATCH -J WH_CALIB_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
-            fileObj.write(inStr)
-            inStr = '#SBATCH -o ' + workDir + '/WH_CALIB_' + str(jobData.jobID) + '_' + str(gageID) + '.out\n'
-            fileObj.write(inStr)
-            inStr = '#SBATCH -e ' + workDir + '/WH_CALIB_' + str(jobData.jobID) + '_' + str(gageID) + '.err\n'
-            fileObj.write(inStr)
-            inStr = "#SBATCH -N " + str(jobData.nNodesR) + "\n"
-            fileObj.write(inStr)
-            # We are using 2 hours to be safe here. 
-            fileObj.write('#SBATCH -t 02:00:00\n')
-            if len(jobData.queNameAnalysis.strip()) > 0:
-                inStr = '#SBATCH -p ' + str(jobData.queNameAnalysis) + '\n'
-                fileObj.write(inStr)
-            fileObj.write('\n')
-            inStr = 'cd ' + workDir + '\n'
-            fileObj.write(inStr)
-            fileObj.write('./calibCmd.sh\n')
-            fileObj.close
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile1
-            raise    
-            
-    outFile2 = workDir + "/calibCmd.sh"
+    spec = calibSpec(jobData,gageID,workDir)
+    spec.preCmds.append('for DIR in ' + " ".join(candDirs) + '; do')
+    spec.preCmds.append('    if [ ! -f $DIR/RUN.KILLED ]; then')
+    spec.preCmds.append('        if [ ! $DIR/' + lsmRst + ' -nt $DIR/namelist.hrldas ] || ' + \
+                        '[ ! $DIR/' + hydroRst + ' -nt $DIR/namelist.hrldas ]; then')
+    spec.preCmds.append('            echo "MODEL RUN IN $DIR DID NOT COMPLETE"')
+    spec.preCmds.append('            exit 1')
+    spec.preCmds.append('        fi')
+    spec.preCmds.append('    fi')
+    spec.preCmds.append('done')
     
-    runRProgram = workDir + "/calib_workflow.R"
-    srcScript = workDir + "/calibScript.R"
-        
-    if not os.path.isfile(outFile2):
-        # This is the file that will run the R code first to generate params_new.txt and
-        # params_stats.txt. Python is called next, which will read in 
-        try:
-            fileObj = open(outFile2,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('Rscript ' + runRProgram + " " + srcScript + '\n')
-            fileObj.write('python ' + workDir + '/adjust_parameters.py ' + workDir + \
-                          ' ' + runDir + ' ' + str(staticData.gwBaseFlag) + ' ' + \
-                          str(staticData.chnRtOpt) + ' \n')
-            fileObj.write('exit\n')
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile2
-            raise
-            
-    # Make shell script an executable.
-    cmd = 'chmod +x ' + outFile2
     try:
-        subprocess.call(cmd,shell=True)
+        schedMod.getScheduler(jobData.analysisRunType).renderScript(jobData,outFile,spec)
     except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile2 + " to an executable."
         raise
         
-def generateMpiCalibScript(jobData,gageID,runDir,workDir,staticData):
+def submitModel(statusData,staticData,gageMeta,gage,gageID,basinNum,iteration,runDir,workDir,
+                scriptPath,nCand,pbsJobId):
     """
-    Generic function to create mpiexec/mpirun script for running R calibration
-    routines. This function also creates the shell script that will execute
-    R and Python to modify parameters. 
+    Generic function to submit the model runs of a DDS generation for a basin.
+    If chainJobs is on, and the model runs and calibration routines go through
+    the same type of scheduler, the calibration routines are submitted along
+    with the model runs, and held back until the model runs complete. The
+    job ID of the calibration job is kept in the CALIB.CHAIN file of the basin
+    until the workflow finds the model runs have left the scheduler.
     """
+    schedModel = schedMod.getScheduler(schedMod.modelRunType(statusData))
+    schedAnalysis = schedMod.getScheduler(statusData.analysisRunType)
+    chainPath = workDir + "/CALIB.CHAIN"
     
-    outFile1 = workDir + "/run_WH_CALIB.sh"
-    
-    if os.path.isfile(outFile1):
-        # We are just gonig to manually over-write the file everytime to be safe.
-        os.remove(outFile1)
+    if os.path.isfile(chainPath):
+        os.remove(chainPath)
         
-    if not os.path.isfile(outFile1):
+    statusName = schedModel.statusName("WH_" + str(statusData.jobID) + "_" + str(gageID),\
+                                       "W" + str(statusData.jobID) + str(gageID))
+    steps = [[scriptPath,nCand,statusName,runDir + "/WH_" + str(statusData.jobID) + "_" + str(gageID),
+              statusData.queName]]
+    
+    if int(statusData.chainJobs) > 0 and schedModel.name == schedAnalysis.name:
         try:
-            fileObj = open(outFile1,'w')
-            fileObj.write('#!/bin/bash\n')
-            inStr = 'cd ' + workDir + '\n'
-            fileObj.write(inStr)
-            if jobData.analysisRunType == 4:
-                inStr = 'mpiexec -n ' + str(int(jobData.nCoresR)) + ' ./C' + \
-                str(jobData.jobID) + str(gageID) +'\n'
-            if jobData.analysisRunType == 5:
-                inStr = 'mpirun -np ' + str(int(jobData.nCoresR)) + ' ./C' + \
-                str(jobData.jobID) + str(gageID) +'\n'
-            fileObj.write(inStr)
-            fileObj.close
+            generateRScript(staticData,gageMeta,gage,int(iteration)+1)
+            generateChainScript(statusData,int(gageID),runDir,workDir,nCand)
         except:
-            jobData.errMsg = "ERROR: Failure to create " + outFile1
             raise
-            
-    # Make the file an executable.
-    cmd = "chmod +x " + outFile1
+        calibName = schedAnalysis.statusName("WH_CALIB_" + str(statusData.jobID) + "_" + str(gageID),\
+                                             "C" + str(statusData.jobID) + str(gageID))
+        steps.append([workDir + "/run_WH_CALIB_CHAIN.sh",1,calibName,
+                      runDir + "/WH_CALIB_" + str(statusData.jobID) + "_" + str(gageID),
+                      statusData.queNameAnalysis])
+    
     try:
-        subprocess.call(cmd,shell=True)
+        jobIds = schedModel.submitChain(statusData,steps,iteration)
     except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile1 + " to an executable."
         raise
-            
-    outFile2 = workDir + '/calibCmd.sh'
-    outLink2 = workDir + '/C' + str(jobData.jobID) + str(gageID) 
-    
-    runRProgram = workDir + '/calib_workflow.R'
-    srcScript = workDir + '/calibScript.R'
+    schedModel.trackJob(pbsJobId,basinNum,jobIds[0])
     
-    if not os.path.isfile(outFile2):
-        # This is the file that will run R code. First to generate params_new.txt and
-        # params_stats.txt. Python is called next, which will generate new parameters.
+    if len(jobIds) > 1:
         try:
-            fileObj = open(outFile2,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('Rscript ' + runRProgram + " " + srcScript + '\n')
-            fileObj.write('python ' + workDir + '/adjust_parameters.py ' + workDir + \
-                          ' ' + runDir + ' ' + str(staticData.gwBaseFlag) + ' ' + \
-                          str(staticData.chnRtOpt) + ' \n')
-            fileObj.write('exit\n')
+            fileObj = open(chainPath,'w')
+            fileObj.write(str(jobIds[1]) + "\n")
+            fileObj.close()
         except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile2
+            statusData.errMsg = "ERROR: Failure to create: " + chainPath
             raise
-            
-    # Make shell script an executable.
-    cmd = 'chmod +x ' + outFile2
+        print "CALIBRATION CODE CHAINED TO MODEL SIMULATION"
+        
+def pickupChain(statusData,workDir,runDir,nCand,basinNum,pbsJobId,completeFlag):
+    """
+    Generic function to pick up the calibration job chained to the model runs
+    of a basin, once the model runs have left the scheduler. If the model runs
+    completed, the calibration job is tracked in place of the model job, and
+    True is returned. Otherwise, the calibration job is cancelled, as it will
+    not be released by the scheduler, and False is returned. False is also
+    returned if no calibration job was chained to the model runs.
+    """
+    chainPath = workDir + "/CALIB.CHAIN"
+    if not os.path.isfile(chainPath):
+        return False
+        
     try:
-        subprocess.call(cmd,shell=True)
+        fileObj = open(chainPath,'r')
+        jobId = fileObj.readline().strip()
+        fileObj.close()
+        os.remove(chainPath)
     except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile2 + " to an executable."
+        statusData.errMsg = "ERROR: Unable to read: " + chainPath
         raise
         
-    # Make symbolic link to newly created executable, which will be called by
-    # mpiexec/mpirun.
-    if not os.path.islink(outLink2):
+    schedAnalysis = schedMod.getScheduler(statusData.analysisRunType)
+    calibName = statusMod.calibJobName(statusData,basinNum)
+    
+    # Model jobs cancelled for not being able to beat the best run exit with
+    # an error, so the calibration job will not be released. For mpiexec/mpirun,
+    # the calibration code is ran in sequence after the model regardless, and
+    # exits on it's own if the model runs did not complete.
+    if schedAnalysis.name != 'MPI':
+        for candNum in range(0,nCand):
+            if os.path.isfile(candidateDir(runDir,candNum) + "/RUN.KILLED"):
+                completeFlag = False
+    
+    if completeFlag:
+        schedAnalysis.trackJob(pbsJobId,basinNum,int(jobId))
+        schedMod.limiter.release(schedAnalysis.name,calibName)
+        print "MODEL HAS COMPLETED, CHAINED CALIB CODE RELEASED"
+        return True
+        
+    if schedAnalysis.name != 'MPI':
         try:
-            os.symlink(outFile2,outLink2)
+            schedAnalysis.cancel(statusData,jobId)
         except:
-            jobData.errMsg = "ERROR: Failure to create symbolic link: " + outLink2
             raise
+        print "CANCELLED CHAINED CALIB JOB: " + str(jobId) + " FOR: " + calibName
+    return False
         
 def linkToRst(statusData,gage,runDir,gageMeta,staticData):
     """
@@ -1803,3 +1350,124 @@ def linkToRst(statusData,gage,runDir,gageMeta,staticData):
             os.symlink(gageMeta.optLandRstFile,link1)
         if not os.path.islink(link2):
             os.symlink(gageMeta.optHydroRstFile,link2)
+            
+def candidateCount(statusData,iteration):
+    """
+    Generic function to return the number of DDS candidates in the generation
+    starting at an iteration. The last generation is cut short if the number
+    of iterations is not a multiple of the number of candidates.
+    """
+    return min(int(statusData.ddsCandidates),int(statusData.nIter)-int(iteration))
+    
+def candidateDir(runDir,candNum):
+    """
+    Generic function to return the run directory of a DDS candidate. The first
+    candidate is ran in the calibration run directory.
+    """
+    if candNum == 0:
+        return runDir
+    else:
+        return runDir + "_" + str(candNum)
+        
+def setupCandidates(statusData,runDir,nCand):
+    """
+    Generic function to create the run directories of the DDS candidates
+    beyond the first. The symbolic links to the executable and parameter
+    tables in the calibration run directory are re-created in each one. 
+    Restart links are made when the model is started.
+    """
+    for candNum in range(1,nCand):
+        candDir = candidateDir(runDir,candNum)
+        if os.path.isdir(candDir):
+            continue
+        try:
+            os.mkdir(candDir)
+        except:
+            statusData.errMsg = "ERROR: Failure to create directory: " + candDir
+            raise
+        for fileTmp in os.listdir(runDir):
+            pathTmp = runDir + "/" + fileTmp
+            if not os.path.islink(pathTmp):
+                continue
+            if fileTmp.startswith('RESTART.') or fileTmp.startswith('HYDRO_RST.'):
+                continue
+            try:
+                os.symlink(os.readlink(pathTmp),candDir + "/" + fileTmp)
+            except:
+                statusData.errMsg = "ERROR: Failure to create symbolic link: " + candDir + "/" + fileTmp
+                raise
+                
+def walkCandidates(begDate,endDate,runDir,nCand):
+    """
+    Generic function to walk the run directories of all candidates of a DDS
+    generation. The dates returned are those of the first candidate. The 
+    run flag is True if any of the candidates still need to run. Candidates
+    cancelled because they could not beat the best run are complete.
+    """
+    runStatus = statusMod.walkMod(begDate,endDate,runDir)
+    if os.path.isfile(runDir + "/RUN.KILLED"):
+        runStatus[2] = False
+    for candNum in range(1,nCand):
+        candDir = candidateDir(runDir,candNum)
+        candStatus = statusMod.walkMod(begDate,endDate,candDir)
+        if candStatus[2] and not os.path.isfile(candDir + "/RUN.KILLED"):
+            runStatus[2] = True
+    return runStatus
+    
+def candidateDone(statusData,candDir):
+    """
+    Generic function to determine if the model run of a DDS candidate either
+    completed, or was cancelled because it could not beat the best run.
+    """
+    if os.path.isfile(candDir + "/RUN.KILLED"):
+        return True
+    runStatus = statusMod.walkMod(statusData.bCalibDate,statusData.eCalibDate,candDir)
+    return not runStatus[2]
+    
+def prepCandidates(statusData,gage,gageMeta,staticData,runDir,nCand,startType):
+    """
+    Generic function to prepare the run directories of the DDS candidates 
+    beyond the first for a model run. Each candidate may have stopped at a 
+    different point, so the run directory of each is walked to determine
+    where it will start from. When restarting (startType of 2), candidates
+    that are already done are left as they are.
+    """
+    for candNum in range(1,nCand):
+        candDir = candidateDir(runDir,candNum)
+        if startType == 2 and candidateDone(statusData,candDir):
+            continue
+        check = candDir + "/namelist.hrldas"
+        check2 = candDir + "/hydro.namelist"
+        if os.path.isfile(check):
+            os.remove(check)
+        if os.path.isfile(check2):
+            os.remove(check2)
+            
+        if staticData.coldStart == 0:
+            try:
+                linkToRst(statusData,gage,candDir,gageMeta,staticData)
+            except:
+                raise
+                
+        runStatus = statusMod.walkMod(statusData.bCalibDate,statusData.eCalibDate,candDir)
+        begDate = runStatus[0]
+        endDate = runStatus[1]
+        
+        candStart = startType
+        if begDate == staticData.bCalibDate:
+            if staticData.coldStart == 1:
+                candStart = 1
+            else:
+                candStart = 3
+                
+        if candStart == 2:
+            try:
+                errMod.cleanRunDir(statusData,candDir)
+            except:
+                raise
+                
+        try:
+            namelistMod.createHrldasNL(statusData,gageMeta,staticData,candDir,candStart,begDate,endDate,1)
+            namelistMod.createHydroNL(statusData,gageMeta,staticData,candDir,candStart,begDate,endDate,1)
+        except:
+            raise
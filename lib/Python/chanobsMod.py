@@ -0,0 +1,343 @@
+# Module file containing functions for extracting the streamflow at a gage
+# from the CHANOBS output of a model run into a single compact time series
+# file (chrt.nc), read by the R analysis code in place of the individual
+# CHANOBS files. The index of the gage link is resolved once from the first
+# output file, and only the streamflow value at that index is read from each
+# file. Files are read by a bounded pool of worker processes, as the NetCDF
+# library is not safe to call from multiple threads of one process.
+# Streamflow may also be collected while the model is still running, by a
+# collector launched alongside the model in the model job script. It appends
+# each newly completed CHANOBS time step to the time series file, and may
+# remove the CHANOBS files once they have been consumed.
+
+# Logan Karsten
+# National Center for Atmospheric Research
+# Research Applications Laboratory
+
+import os
+import time
+import signal
+import datetime
+import multiprocessing
+import numpy as np
+from netCDF4 import Dataset
+
+import warnings
+warnings.filterwarnings("ignore")
+
+# Name of the time series file placed into the run directory, and of the flag
+# placed next to it once the collector has collected the final time steps.
+chrtFile = "chrt.nc"
+streamFlag = "STREAM.COMPLETE"
+# Programs ran by job scripts to extract the streamflow from a run directory,
+# and to collect it while the model is running.
+extractProgram = os.path.dirname(os.path.realpath(__file__)) + "/extract_streamflow.py"
+streamProgram = os.path.dirname(os.path.realpath(__file__)) + "/stream_streamflow.py"
+# Reference time for the time series file.
+epoch = datetime.datetime(1970,1,1)
+
+def extractCmd(outDir,linkId,startDate,nProcs):
+    """
+    Generic function to return the shell command placed into job scripts to
+    extract the streamflow at a gage from a run directory ahead of R.
+    """
+    return 'python ' + extractProgram + ' ' + outDir + ' ' + str(linkId) + ' ' + \
+           startDate.strftime('%Y%m%d%H%M') + ' --nProcs ' + str(nProcs)
+
+def streamCmds(jobData,linkId,startDate):
+    """
+    Generic function to return the shell commands placed before and after the
+    model in a model job script to collect streamflow while the model is
+    running. The collector runs in the background from the directory the model
+    runs in, and is stopped once the model exits, after which it collects the
+    final time steps.
+    """
+    preCmds = []
+    inStr = 'python ' + streamProgram + ' $PWD ' + str(linkId) + ' ' + startDate.strftime('%Y%m%d%H%M')
+    if int(jobData.streamCollect) == 2:
+        inStr = inStr + ' --delete'
+    preCmds.append(inStr + ' &')
+    preCmds.append('STREAM_PID=$!')
+    postCmds = ['kill -TERM $STREAM_PID; wait $STREAM_PID']
+    return [preCmds,postCmds]
+
+def listChanobs(outDir,startDate):
+    """
+    Generic function to return the sorted list of [date,file name] for all
+    CHANOBS files in a run directory valid on or after startDate.
+    """
+    files = []
+    for fileName in os.listdir(outDir):
+        if '.CHANOBS_DOMAIN' not in fileName:
+            continue
+        try:
+            dTmp = datetime.datetime.strptime(fileName.split('.')[0],'%Y%m%d%H%M')
+        except ValueError:
+            continue
+        if dTmp >= startDate:
+            files.append([dTmp,fileName])
+    files.sort()
+    return files
+
+def gageIndex(filePath,linkId):
+    """
+    Generic function to return the index of the gage link in the feature_id
+    variable of a CHANOBS file, or None if the link is not in the file.
+    """
+    idTmp = Dataset(filePath,'r')
+    try:
+        indTmp = np.where(idTmp.variables['feature_id'][:] == int(linkId))[0]
+    finally:
+        idTmp.close()
+    if len(indTmp) == 0:
+        return None
+    return int(indTmp[0])
+
+def readChunk(args):
+    """
+    Generic function ran by each worker process to read the streamflow at the
+    gage index from a contiguous chunk of CHANOBS files.
+    """
+    outDir,fileNames,gageIndx = args
+    values = np.empty(len(fileNames),dtype=np.float64)
+    for i in range(0,len(fileNames)):
+        idTmp = Dataset(outDir + "/" + fileNames[i],'r')
+        try:
+            valTmp = idTmp.variables['streamflow'][gageIndx]
+        finally:
+            idTmp.close()
+        if np.ma.is_masked(valTmp):
+            values[i] = np.nan
+        else:
+            values[i] = float(valTmp)
+    return values
+
+def extractStreamflow(outDir,linkId,startDate,nProcs=1):
+    """
+    Generic function to extract the streamflow at a gage from all CHANOBS
+    files of a run directory valid on or after startDate into the time series
+    file of the run directory. Values already collected into the time series
+    file while the model was running are kept for times whose CHANOBS files
+    have since been removed. A time series file left from a previous run is
+    removed when the next run of the directory is started.
+    """
+    outPath = outDir + "/" + chrtFile
+    values = readChrt(outDir)
+
+    files = listChanobs(outDir,startDate)
+    if len(files) == 0:
+        if len(values) == 0:
+            raise Exception("No CHANOBS files found in: " + outDir + " after: " + str(startDate))
+        return
+
+    gageIndx = gageIndex(outDir + "/" + files[0][1],linkId)
+    if gageIndx is None:
+        raise Exception("Link: " + str(linkId) + " not found in CHANOBS output in: " + outDir)
+
+    # Split the files into contiguous chunks, a few per worker process to
+    # balance the load.
+    nProcs = max(1,int(nProcs))
+    fileNames = [fileTmp[1] for fileTmp in files]
+    nChunks = min(len(fileNames),nProcs*4)
+    bounds = np.linspace(0,len(fileNames),nChunks+1).astype(int)
+    tasks = [[outDir,fileNames[bounds[i]:bounds[i+1]],gageIndx] for i in range(0,nChunks)]
+
+    if nProcs > 1:
+        pool = multiprocessing.Pool(min(nProcs,nChunks))
+        try:
+            results = pool.map(readChunk,tasks)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [readChunk(task) for task in tasks]
+
+    qTmp = np.concatenate(results)
+    for i in range(0,len(files)):
+        values[files[i][0]] = qTmp[i]
+    times = sorted(values.keys())
+    writeChrt(outPath,np.array([(dTmp - epoch).total_seconds() for dTmp in times]),
+              np.array([values[dTmp] for dTmp in times]),linkId)
+
+def writeChrt(outPath,times,values,linkId):
+    """
+    Generic function to write a streamflow time series file. The file is
+    written under a temporary name and moved into place once complete.
+    The time dimension is unlimited so the series can be appended to.
+    """
+    tmpPath = outPath + ".tmp"
+    if os.path.isfile(tmpPath):
+        os.remove(tmpPath)
+
+    idOut = Dataset(tmpPath,'w',format='NETCDF4')
+    try:
+        idOut.createDimension('time',None)
+        timeVar = idOut.createVariable('time','f8',('time',))
+        timeVar.units = 'seconds since 1970-01-01 00:00:00 UTC'
+        qVar = idOut.createVariable('q_cms','f4',('time',),fill_value=-9999.0)
+        qVar.units = 'm3 s-1'
+        idOut.feature_id = int(linkId)
+        timeVar[:] = times
+        qVar[:] = np.ma.masked_invalid(values)
+    finally:
+        idOut.close()
+
+    os.rename(tmpPath,outPath)
+
+def appendChrt(outPath,positions,newValues):
+    """
+    Generic function to write new streamflow values into an existing time
+    series file in place. Values for times already in the file are replaced,
+    and values after the last time in the file are appended along the
+    unlimited time dimension. The positions dictionary holds the position of
+    each time in the file, and is updated once the values are written.
+    False is returned, and nothing is written, if the file does not exist or
+    a value falls between the times in the file, in which case the file
+    needs to be re-written with writeChrt.
+    """
+    if not os.path.isfile(outPath):
+        return False
+    newTimes = sorted(newValues.keys())
+    nTimes = len(positions)
+    if nTimes > 0:
+        lastTime = max(positions.keys())
+        for dTmp in newTimes:
+            if dTmp not in positions and dTmp < lastTime:
+                return False
+
+    newPositions = {}
+    idOut = Dataset(outPath,'a')
+    try:
+        timeVar = idOut.variables['time']
+        qVar = idOut.variables['q_cms']
+        # The file was changed by something else.
+        if len(timeVar) != nTimes:
+            return False
+        for dTmp in newTimes:
+            if dTmp in positions:
+                pos = positions[dTmp]
+            else:
+                pos = nTimes + len(newPositions)
+                newPositions[dTmp] = pos
+            timeVar[pos:pos+1] = np.array([(dTmp - epoch).total_seconds()])
+            qVar[pos:pos+1] = np.ma.masked_invalid(np.array([newValues[dTmp]]))
+    finally:
+        idOut.close()
+
+    positions.update(newPositions)
+    return True
+
+def readChrt(outDir):
+    """
+    Generic function to read the time series file of a run directory into a
+    dictionary of streamflow values keyed by datetime. An empty dictionary
+    is returned if no time series file exists.
+    """
+    inPath = outDir + "/" + chrtFile
+    values = {}
+    if not os.path.isfile(inPath):
+        return values
+
+    idTmp = Dataset(inPath,'r')
+    try:
+        times = idTmp.variables['time'][:]
+        qTmp = np.ma.filled(idTmp.variables['q_cms'][:].astype(np.float64),np.nan)
+    finally:
+        idTmp.close()
+    for i in range(0,len(times)):
+        values[epoch + datetime.timedelta(seconds=float(times[i]))] = qTmp[i]
+    return values
+
+def streamStreamflow(outDir,linkId,startDate,pollInterval=60.0,deleteFlag=False):
+    """
+    Generic function to collect the streamflow at a gage from a run directory
+    while the model is running. Every pollInterval seconds, CHANOBS files
+    valid on or after startDate are read, except for the latest file, which
+    the model may still be writing. New values are appended to the time
+    series file in place, replacing any values for the same times left from
+    an earlier attempt of the run. The file is only re-written in full when
+    it is first created, when a value falls between the times already in
+    it, or when it can not be appended to. Once a SIGTERM is received (the model has
+    exited), all remaining files are collected and the function returns.
+    If deleteFlag is True, CHANOBS files are removed once consumed, along
+    with any CHANOBS files before startDate, which are never used. The
+    STREAM.COMPLETE flag is placed into the run directory once the final
+    time steps have been collected.
+    """
+    flagPath = outDir + "/" + streamFlag
+    if os.path.isfile(flagPath):
+        os.remove(flagPath)
+
+    stopFlag = [False]
+    def stopHandler(signum,frame):
+        stopFlag[0] = True
+    signal.signal(signal.SIGTERM,stopHandler)
+
+    outPath = outDir + "/" + chrtFile
+    values = readChrt(outDir)
+    # Position of each time in the time series file, which is kept sorted.
+    positions = dict([[dTmp,i] for i,dTmp in enumerate(sorted(values.keys()))])
+    gageIndx = None
+
+    while True:
+        finalFlag = stopFlag[0]
+        files = []
+        for fileName in os.listdir(outDir):
+            if '.CHANOBS_DOMAIN' not in fileName:
+                continue
+            try:
+                dTmp = datetime.datetime.strptime(fileName.split('.')[0],'%Y%m%d%H%M')
+            except ValueError:
+                continue
+            files.append([dTmp,fileName])
+        files.sort()
+        if not finalFlag:
+            files = files[:-1]
+
+        consumed = []
+        newValues = {}
+        for dTmp,fileName in files:
+            if dTmp < startDate:
+                consumed.append(fileName)
+                continue
+            # Leave a file that can not be read yet in place.
+            if gageIndx is None:
+                try:
+                    gageIndx = gageIndex(outDir + "/" + fileName,linkId)
+                except:
+                    continue
+                if gageIndx is None:
+                    raise Exception("Link: " + str(linkId) + " not found in CHANOBS output in: " + outDir)
+            try:
+                newValues[dTmp] = readChunk([outDir,[fileName],gageIndx])[0]
+            except:
+                continue
+            values[dTmp] = newValues[dTmp]
+            consumed.append(fileName)
+
+        if len(newValues) > 0:
+            try:
+                appendFlag = appendChrt(outPath,positions,newValues)
+            except:
+                appendFlag = False
+            if not appendFlag:
+                times = sorted(values.keys())
+                writeChrt(outPath,np.array([(dTmp - epoch).total_seconds() for dTmp in times]),
+                          np.array([values[dTmp] for dTmp in times]),linkId)
+                positions = dict([[dTmp,i] for i,dTmp in enumerate(times)])
+
+        if deleteFlag:
+            for fileName in consumed:
+                try:
+                    os.remove(outDir + "/" + fileName)
+                except OSError:
+                    pass
+
+        if finalFlag:
+            open(flagPath,'a').close()
+            return
+
+        # Sleep in short steps so a stop request is acted on promptly.
+        timeEnd = time.time() + float(pollInterval)
+        while time.time() < timeEnd and not stopFlag[0]:
+            time.sleep(1.0)
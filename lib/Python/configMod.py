@@ -42,10 +42,29 @@ class jobMeta:
         self.optCalStripHrs = []
         self.jobRunType = []
         self.analysisRunType = []
+        self.schedCacheTTL = []
+        self.maxSubmitRate = []
+        self.maxJobsInFlight = []
+        self.idleWait = []
+        self.nBasinThreads = []
         self.nIter = []
         self.calibMethod = []
         self.objFunc = []
         self.ddsR = []
+        self.ddsCandidates = []
+        self.convergeIter = []
+        self.convergeEps = []
+        self.convergeParmEps = []
+        self.boundInterval = []
+        self.taskFarm = []
+        self.farmNodes = []
+        self.farmCoresPerNode = []
+        self.farmWallTime = []
+        self.chainJobs = []
+        self.autoSize = []
+        self.cellsPerCore = []
+        self.wallTimeModel = []
+        self.streamCollect = []
         self.outDir = []
         self.email = None
         self.slChan = None
@@ -73,6 +92,7 @@ class jobMeta:
         self.nSensSample = []
         self.nSensIter = []
         self.nSensBatch = []
+        self.sensMaxRuns = []
         self.bSensDate = []
         self.eSensDate = []
         self.bSensEvalDate = []
@@ -171,10 +191,88 @@ class jobMeta:
         self.optSpinFlag = int(parser.get('logistics','optSpinFlag'))
         self.jobRunType = int(parser.get('logistics','jobRunType'))
         self.analysisRunType = int(parser.get('logistics','analysisRunType'))
+        # Optional entry. Older job configuration files will not contain it.
+        if parser.has_option('logistics','schedCacheTTL'):
+            self.schedCacheTTL = float(parser.get('logistics','schedCacheTTL'))
+        else:
+            self.schedCacheTTL = 60.0
+        if parser.has_option('logistics','maxSubmitRate'):
+            self.maxSubmitRate = float(parser.get('logistics','maxSubmitRate'))
+        else:
+            self.maxSubmitRate = 0.0
+        if parser.has_option('logistics','maxJobsInFlight'):
+            self.maxJobsInFlight = int(parser.get('logistics','maxJobsInFlight'))
+        else:
+            self.maxJobsInFlight = 0
+        if parser.has_option('logistics','idleWait'):
+            self.idleWait = float(parser.get('logistics','idleWait'))
+        else:
+            self.idleWait = 60.0
+        if parser.has_option('logistics','nBasinThreads'):
+            self.nBasinThreads = int(parser.get('logistics','nBasinThreads'))
+        else:
+            self.nBasinThreads = 1
+        self.calibMethod = str(parser.get('logistics','calibMethod'))
         self.objFunc = str(parser.get('logistics','objectiveFunction'))
         self.ddsR = str(parser.get('logistics','ddsR'))
         if len(self.ddsR) != 0:
             self.ddsR = float(self.ddsR)
+        if parser.has_option('logistics','ddsCandidates'):
+            self.ddsCandidates = int(parser.get('logistics','ddsCandidates'))
+        else:
+            self.ddsCandidates = 1
+        if parser.has_option('logistics','convergeIter'):
+            self.convergeIter = int(parser.get('logistics','convergeIter'))
+        else:
+            self.convergeIter = 0
+        if parser.has_option('logistics','convergeEps'):
+            self.convergeEps = float(parser.get('logistics','convergeEps'))
+        else:
+            self.convergeEps = 0.0
+        if parser.has_option('logistics','convergeParmEps'):
+            self.convergeParmEps = float(parser.get('logistics','convergeParmEps'))
+        else:
+            self.convergeParmEps = 0.0
+        if parser.has_option('logistics','boundInterval'):
+            self.boundInterval = float(parser.get('logistics','boundInterval'))
+        else:
+            self.boundInterval = 0.0
+        if parser.has_option('logistics','streamCollect'):
+            self.streamCollect = int(parser.get('logistics','streamCollect'))
+        else:
+            self.streamCollect = 0
+        if parser.has_option('logistics','taskFarm'):
+            self.taskFarm = int(parser.get('logistics','taskFarm'))
+        else:
+            self.taskFarm = 0
+        if parser.has_option('logistics','farmNodes'):
+            self.farmNodes = int(parser.get('logistics','farmNodes'))
+        else:
+            self.farmNodes = 1
+        if parser.has_option('logistics','farmCoresPerNode'):
+            self.farmCoresPerNode = int(parser.get('logistics','farmCoresPerNode'))
+        else:
+            self.farmCoresPerNode = self.nCoresMod
+        if parser.has_option('logistics','farmWallTime'):
+            self.farmWallTime = int(parser.get('logistics','farmWallTime'))
+        else:
+            self.farmWallTime = 720
+        if parser.has_option('logistics','chainJobs'):
+            self.chainJobs = int(parser.get('logistics','chainJobs'))
+        else:
+            self.chainJobs = 0
+        if parser.has_option('logistics','autoSize'):
+            self.autoSize = int(parser.get('logistics','autoSize'))
+        else:
+            self.autoSize = 0
+        if parser.has_option('logistics','cellsPerCore'):
+            self.cellsPerCore = int(parser.get('logistics','cellsPerCore'))
+        else:
+            self.cellsPerCore = 2500
+        if parser.has_option('logistics','wallTimeModel'):
+            self.wallTimeModel = int(parser.get('logistics','wallTimeModel'))
+        else:
+            self.wallTimeModel = 480
         self.email = str(parser.get('logistics','email'))
         #self.slChan = str(parser.get('logistics','slackChannel'))
         #self.slToken = str(parser.get('logistics','slackToken'))
@@ -227,6 +325,10 @@ class jobMeta:
         self.bValidEvalDate = datetime.datetime.strptime(self.bValidEvalDate,'%Y-%m-%d')
         self.nSensSample = int(parser.get('Sensitivity','sensParmSample'))
         self.nSensBatch = int(parser.get('Sensitivity','sensBatchNum'))
+        if parser.has_option('Sensitivity','sensMaxRuns'):
+            self.sensMaxRuns = int(parser.get('Sensitivity','sensMaxRuns'))
+        else:
+            self.sensMaxRuns = 0
         self.bSensDate = parser.get('Sensitivity','bSensDate')
         self.bSensDate = datetime.datetime.strptime(self.bSensDate,'%Y-%m-%d')
         self.eSensDate = parser.get('Sensitivity','eSensDate')
@@ -348,15 +450,11 @@ def createJob(argsUser):
             raise Exception()
         else:
             # Read in the sensitivity parameter table and calculate the total number 
-            # of model iterations that will take place. Make sure the total number
-            # is a multiple of the batch number
+            # of model iterations that will take place. Model runs are started through
+            # a sliding window, so the total number need not be a multiple of the
+            # batch number.
             tblTmp = pd.read_csv(jobObj.sensTbl,sep=',')
-            nIterTmp = jobObj.nSensSample*(len(np.where(tblTmp.sens_flag == 1)[0])+1)
-            if nIterTmp % jobObj.nSensBatch != 0:
-                print "ERROR: Invalid number of sensitivity batch runs. Must be compatible with num_sens_params * (sample+1)"
-                raise Exception()
-            else:
-                jobObj.nSensIter = nIterTmp
+            jobObj.nSensIter = jobObj.nSensSample*(len(np.where(tblTmp.sens_flag == 1)[0])+1)
     else:
         jobObj.nSensIter = 0
         
@@ -478,6 +576,114 @@ def checkConfig(parser):
         print "ERROR: Invalid analysisRunType specified."
         raise Exception()
         
+    if parser.has_option('logistics','schedCacheTTL'):
+        check = float(parser.get('logistics','schedCacheTTL'))
+        if check < 0.0:
+            print "ERROR: Invalid schedCacheTTL specified."
+            raise Exception()
+            
+    if parser.has_option('logistics','maxSubmitRate'):
+        check = float(parser.get('logistics','maxSubmitRate'))
+        if check < 0.0:
+            print "ERROR: Invalid maxSubmitRate specified."
+            raise Exception()
+            
+    if parser.has_option('logistics','maxJobsInFlight'):
+        check = int(parser.get('logistics','maxJobsInFlight'))
+        if check < 0:
+            print "ERROR: Invalid maxJobsInFlight specified."
+            raise Exception()
+            
+    if parser.has_option('logistics','idleWait'):
+        check = float(parser.get('logistics','idleWait'))
+        if check < 0.0:
+            print "ERROR: Invalid idleWait specified."
+            raise Exception()
+            
+    if parser.has_option('logistics','nBasinThreads'):
+        check = int(parser.get('logistics','nBasinThreads'))
+        if check < 1:
+            print "ERROR: Invalid nBasinThreads specified."
+            raise Exception()
+            
+    if parser.has_option('logistics','ddsCandidates'):
+        check = int(parser.get('logistics','ddsCandidates'))
+        if check < 1:
+            print "ERROR: Invalid ddsCandidates specified."
+            raise Exception()
+            
+    if parser.has_option('logistics','convergeIter'):
+        check = int(parser.get('logistics','convergeIter'))
+        if check < 0:
+            print "ERROR: Invalid convergeIter specified."
+            raise Exception()
+    if parser.has_option('logistics','convergeEps'):
+        check = float(parser.get('logistics','convergeEps'))
+        if check < 0.0:
+            print "ERROR: Invalid convergeEps specified."
+            raise Exception()
+    if parser.has_option('logistics','convergeParmEps'):
+        check = float(parser.get('logistics','convergeParmEps'))
+        if check < 0.0:
+            print "ERROR: Invalid convergeParmEps specified."
+            raise Exception()
+    if parser.has_option('logistics','boundInterval'):
+        check = float(parser.get('logistics','boundInterval'))
+        if check < 0.0:
+            print "ERROR: Invalid boundInterval specified."
+            raise Exception()
+    if parser.has_option('logistics','streamCollect'):
+        check = int(parser.get('logistics','streamCollect'))
+        if check < 0 or check > 2:
+            print "ERROR: Invalid streamCollect specified."
+            raise Exception()
+    if parser.has_option('logistics','taskFarm'):
+        check = int(parser.get('logistics','taskFarm'))
+        if check < 0:
+            print "ERROR: Invalid taskFarm specified."
+            raise Exception()
+        if check > 0:
+            # Model runs are packed onto the nodes of the farm allocations, so
+            # each run must fit on a single node of a batch scheduler allocation.
+            if int(parser.get('logistics','jobRunType')) not in [1,2,3,6]:
+                print "ERROR: taskFarm requires a batch scheduler jobRunType."
+                raise Exception()
+            if int(parser.get('logistics','nNodesModel')) != 1:
+                print "ERROR: taskFarm requires nNodesModel to be 1."
+                raise Exception()
+            if parser.has_option('logistics','farmNodes'):
+                if int(parser.get('logistics','farmNodes')) <= 0:
+                    print "ERROR: Invalid farmNodes specified."
+                    raise Exception()
+            if parser.has_option('logistics','farmCoresPerNode'):
+                if int(parser.get('logistics','farmCoresPerNode')) < int(parser.get('logistics','nCoresModel')):
+                    print "ERROR: farmCoresPerNode must be at least nCoresModel."
+                    raise Exception()
+            if parser.has_option('logistics','farmWallTime'):
+                if int(parser.get('logistics','farmWallTime')) <= 0:
+                    print "ERROR: Invalid farmWallTime specified."
+                    raise Exception()
+    if parser.has_option('logistics','chainJobs'):
+        check = int(parser.get('logistics','chainJobs'))
+        if check < 0 or check > 1:
+            print "ERROR: Invalid chainJobs specified."
+            raise Exception()
+    if parser.has_option('logistics','autoSize'):
+        check = int(parser.get('logistics','autoSize'))
+        if check < 0 or check > 1:
+            print "ERROR: Invalid autoSize specified."
+            raise Exception()
+    if parser.has_option('logistics','cellsPerCore'):
+        check = int(parser.get('logistics','cellsPerCore'))
+        if check <= 0:
+            print "ERROR: Invalid cellsPerCore specified."
+            raise Exception()
+    if parser.has_option('logistics','wallTimeModel'):
+        check = int(parser.get('logistics','wallTimeModel'))
+        if check <= 0:
+            print "ERROR: Invalid wallTimeModel specified."
+            raise Exception()
+        
     check = int(parser.get('logistics','nCoresR'))
     if not check:
         print "ERROR: Number of R Cores to use not specified."
@@ -511,9 +717,9 @@ def checkConfig(parser):
         print "ERROR: Cannot run cold start calibrations with optional spinup files."
         raise Exception()
     
-    # Check to make sure calibration method is DDS
+    # Check to make sure calibration method is DDS, or DDS assisted by an RBF surrogate.
     check = str(parser.get('logistics','calibMethod'))
-    if check != "DDS":
+    if check != "DDS" and check != "RBF":
         print "ERROR: Invalid calibration method passed to program."
         raise Exception()
         
@@ -642,6 +848,11 @@ def checkConfig(parser):
         if check2 <= 0:
             print "ERROR: Please choose sensBatchNum greater than 0."
             raise Exception()
+        if parser.has_option('Sensitivity','sensMaxRuns'):
+            check2 = int(parser.get('Sensitivity','sensMaxRuns'))
+            if check2 < 0:
+                print "ERROR: Invalid sensMaxRuns specified."
+                raise Exception()
         bDate = parser.get('Sensitivity','bSensDate')
         eDate = parser.get('Sensitivity','eSensDate')
         bEDate = parser.get('Sensitivity','bSensEvalDate')
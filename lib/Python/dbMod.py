@@ -9,8 +9,10 @@ import sqlite3
 import datetime
 #from slacker import Slacker
 import pandas as pd
+import numpy as np
 import os
 import shutil
+import telemMod
 
 import warnings
 warnings.filterwarnings("ignore")
@@ -36,7 +38,9 @@ class Database(object):
             raise Exception()
         
         try:
-            self.conn = sqlite3.connect(jobData.dbPath)
+            # The connection may be shared by the threads processing basins.
+            # Access is serialized through poolMod.lockedProxy.
+            self.conn = sqlite3.connect(jobData.dbPath,check_same_thread=False)
         except:
             jobData.errMsg = "ERROR: Unable to connect to DB file: " + jobData.dbPath
             self.conn = None
@@ -70,6 +74,26 @@ class Database(object):
         self.db = None
         self.connected = False
         
+    def executeBatch(self,jobData,sqlCmd,rows,errMsg):
+        """
+        Generic function to execute a parameterized SQL statement once for 
+        each row of values passed in, inside a single transaction. Either all
+        rows are written, or none are.
+        """
+        if len(rows) == 0:
+            return
+            
+        try:
+            self.dbCursor.executemany(sqlCmd,rows)
+            self.conn.commit()
+        except:
+            jobData.errMsg = errMsg
+            try:
+                self.conn.rollback()
+            except:
+                pass
+            raise
+            
     def getJobID(self,jobData):
         """
         Generic function to return job ID based on information passed in
@@ -283,6 +307,10 @@ class Database(object):
             
         tmpMeta['gageID'] = results[0]
         tmpMeta['comID'] = results[2]
+        tmpMeta['hydE'] = results[9]
+        tmpMeta['hydW'] = results[10]
+        tmpMeta['hydS'] = results[11]
+        tmpMeta['hydN'] = results[12]
         tmpMeta['geoFile'] = results[13]
         tmpMeta['landSpatialMeta'] = results[14]
         tmpMeta['wrfInput'] = results[15]
@@ -609,98 +637,55 @@ class Database(object):
             jobData.errMsg = "ERROR: No Connection to Database: " + self.dbName
             raise Exception()
             
-        jobID = int(jobData.jobID)
         numIter = int(jobData.nIter)
-        nBas = int(len(jobData.gages))
         
         if jobData.calibFlag == 1:
             # Read in CSV file containing parameters being calibrated.
             baseParms = pd.read_csv(jobData.calibTbl)
             baseParms = baseParms[baseParms['calib_flag'] == 1]
             baseParms = baseParms.reset_index()
-            nParms = len(baseParms)
-        
-            for iteration in range(1,numIter+1):
-                for basin in range(0,nBas):
-                    for parm in range(0,nParms):
-                        domainID = int(jobData.gageIDs[basin])
-                        parmName = str(baseParms.parameter[parm])
-                        itStr = str(iteration)
-                        gageStr = str(jobData.gages[basin])
-                        # Calib_Params
-                        # First determine if table row has already been created.
-                        sqlCmd = "select * from \"Calib_Params\" where \"jobID\"='" + str(jobID) + "'" + \
-                                 " and \"domainID\"='" + str(domainID) + "'" + " and iteration='" + \
-                                 itStr + "'" + " and \"paramName\"='" + parmName + "';"
-                        try:
-                            self.dbCursor.execute(sqlCmd)
-                            results = self.dbCursor.fetchone()
-                        except:
-                            jobData.errMsg = "ERROR: Unable to extract calibration parameter information for " + \
-                                             "job ID: " + str(jobID) + " gage: " + gageStr + \
-                                             " iteration: " + itStr + " parameter: " + parmName
-                            raise
-                        
-                        if not results:
-                            # Create "empty" entry into table.
-                            sqlCmd = "insert into \"Calib_Params\" (\"jobID\",\"domainID\",iteration,\"paramName\",\"paramValue\") " + \
-                                     "values (" + str(jobID) + "," + str(domainID) + "," + \
-                                     str(iteration) + ",'" + parmName + "',-9999);"
-                            try:
-                                self.dbCursor.execute(sqlCmd)
-                                self.conn.commit()
-                            except:
-                                jobData.errMsg = "ERROR: Unable to create empty calibration parameter information for " + \
-                                                 "job ID: " + str(jobID) + " gage: " + gageStr + \
-                                                 " iteration: " + itStr + " parameter: " + parmName
-                                raise
+            
+            self.populateParms(jobData,"Calib_Params",numIter,list(baseParms.parameter),"calibration")
+            
         if jobData.sensFlag == 1:
             # Read in CSV file containing parameters being ran through sensitivity analysis.
             baseParms = pd.read_csv(jobData.sensTbl)
             baseParms = baseParms[baseParms['sens_flag'] == 1]
             baseParms = baseParms.reset_index()
-            nParms = len(baseParms)
+            
+            self.populateParms(jobData,"Sens_Params",int(jobData.nSensIter),list(baseParms.parameter),"sensitivity")
+            
+    def populateParms(self,jobData,tblName,numIter,parmNames,descStr):
+        """
+        Generic function to create "empty" parameter rows in either Calib_Params
+        or Sens_Params for each iteration, for each basin, for each parameter. Rows
+        already created by a previous instance of the workflow are left alone by
+        the unique table keys (see initDB.py).
+        """
+        jobID = int(jobData.jobID)
         
-            for iteration in range(1,jobData.nSensIter+1):
-                for basin in range(0,nBas):
-                    for parm in range(0,nParms):
-                        # Sens_Params
-                        domainID = int(jobData.gageIDs[basin])
-                        parmName = str(baseParms.parameter[parm])
-                        itStr = str(iteration)
-                        gageStr = str(jobData.gages[basin])
-                        # First determine if table row has already been created.
-                        sqlCmd = "select * from \"Sens_Params\" where \"jobID\"='" + str(jobID) + "'" + \
-                                 " and \"domainID\"='" + str(domainID) + "'" + " and iteration='" + \
-                                 itStr + "'" + " and \"paramName\"='" + parmName + "';"
-                        try:
-                            self.dbCursor.execute(sqlCmd)
-                            results = self.dbCursor.fetchone()
-                        except:
-                            jobData.errMsg = "ERROR: Unable to extract sensitivity parameter information for " + \
-                                             "job ID: " + str(jobID) + " gage: " + gageStr + \
-                                             " iteration: " + itStr + " parameter: " + parmName
-                            raise
-                        
-                        if not results:
-                            # Create "empty" entry into table.
-                            sqlCmd = "insert into \"Sens_Params\" (\"jobID\",\"domainID\",iteration,\"paramName\",\"paramValue\") " + \
-                                     "values (" + str(jobID) + "," + str(domainID) + "," + \
-                                     str(iteration) + ",'" + parmName + "',-9999);"
-                            try:
-                                self.dbCursor.execute(sqlCmd)
-                                self.conn.commit()
-                            except:
-                                jobData.errMsg = "ERROR: Unable to create empty sensitivity parameter information for " + \
-                                                 "job ID: " + str(jobID) + " gage: " + gageStr + \
-                                                 " iteration: " + itStr + " parameter: " + parmName
-                                raise
+        rows = []
+        for iteration in range(1,numIter+1):
+            for basin in range(0,len(jobData.gages)):
+                domainID = int(jobData.gageIDs[basin])
+                for parmName in parmNames:
+                    rows.append((jobID,domainID,iteration,str(parmName)))
+                    
+        # Create "empty" entries into table.
+        sqlCmd = "insert or ignore into \"" + tblName + "\" (\"jobID\",\"domainID\",iteration,\"paramName\",\"paramValue\") " + \
+                 "values (?,?,?,?,-9999);"
+        try:
+            self.executeBatch(jobData,sqlCmd,rows,"ERROR: Unable to create empty " + descStr + \
+                              " parameter information for job ID: " + str(jobID))
+        except:
+            raise
                     
     def populateCalibTable(self,jobData,domainID,gageName):
         """
         Generic function to create empty table rows that will store calibration 
         information for each iteration, for each basin, for each job. This information
-        will be updated as the calibration workflow progresses.
+        will be updated as the calibration workflow progresses. Rows already
+        created are left alone by the unique table keys (see initDB.py).
         """
         if not self.connected:
             jobData.errMsg = "ERROR: No Connection to Database: " + self.dbName
@@ -709,39 +694,24 @@ class Database(object):
         jobID = int(jobData.jobID)
         numIter = int(jobData.nIter)
         
-        for iteration in range(1,numIter+1):
-            # First determine if table row has already been created.
-            sqlCmd = "select * from \"Calib_Stats\" where \"jobID\"='" + str(jobID) + "'" + \
-                     " and \"domainID\"='" + str(domainID) + "'" + " and iteration='" + \
-                     str(iteration) + "';"
-            try:
-                self.dbCursor.execute(sqlCmd)
-                results = self.dbCursor.fetchone()
-            except:
-                jobData.errMsg = "ERROR: Unable to extract calib stats for job ID: " + str(jobID) + \
-                                 " domainID: " + str(domainID) + " Iteration: " + str(iteration)
-                raise
-            
-            if not results:
-                # Create "empty" entry into table.
-                sqlCmd = "insert into \"Calib_Stats\" (\"jobID\",\"domainID\",iteration,\"objfnVal\",bias,rmse," + \
-                         "cor,nse,nselog,kge,fdcerr,msof,\"hyperResMultiObj\",best,complete) values (" + str(jobID) + \
-                         "," + str(domainID) + "," + str(iteration) + ",-9999,-9999,-9999," + \
-                         "-9999,-9999,-9999,-9999,-9999,-9999,-9999,0,0);"
-                try:
-                    self.dbCursor.execute(sqlCmd)
-                    self.conn.commit()
-                except:
-                    jobData.errMsg = "ERROR: Unable to create empty table entry into Calib_Stats for " + \
-                                     "job ID: " + str(jobID) + " domainID: " + str(domainID) + \
-                                     " iteration: " + str(iteration)
-                    raise
+        rows = [(jobID,int(domainID),iteration) for iteration in range(1,numIter+1)]
+        
+        # Create "empty" entries into table.
+        sqlCmd = "insert or ignore into \"Calib_Stats\" (\"jobID\",\"domainID\",iteration,\"objfnVal\",bias,rmse," + \
+                 "cor,nse,nselog,kge,fdcerr,msof,\"hyperResMultiObj\",best,complete) values (?,?,?,-9999,-9999,-9999," + \
+                 "-9999,-9999,-9999,-9999,-9999,-9999,-9999,0,0);"
+        try:
+            self.executeBatch(jobData,sqlCmd,rows,"ERROR: Unable to create empty table entry into Calib_Stats for " + \
+                              "job ID: " + str(jobID) + " domainID: " + str(domainID))
+        except:
+            raise
                     
     def populateSensTable(self,jobData,domainID,gageName):
         """
         Generic function to create empty table rows that will store sensitivity 
         information for each iteration, for each basin, for each job. This information
-        will be updated as the workflow progresses.
+        will be updated as the workflow progresses. Rows already created are
+        left alone by the unique table keys (see initDB.py).
         """
         if not self.connected:
             jobData.errMsg = "ERROR: No Connection to Database: " + self.dbName
@@ -750,48 +720,20 @@ class Database(object):
         jobID = int(jobData.jobID)
         numIter = int(jobData.nSensIter)
         
+        rows = []
         for iteration in range(1,numIter+1):
-            # First determine if table row has already been created.
-            sqlCmd = "select * from \"Sens_Stats\" where \"jobID\"='" + str(jobID) + "'" + \
-                     " and \"domainID\"='" + str(domainID) + "'" + " and iteration='" + \
-                     str(iteration) + "';"
-            try:
-                self.dbCursor.execute(sqlCmd)
-                results = self.dbCursor.fetchone()
-            except:
-                jobData.errMsg = "ERROR: Unable to extract sensitivity stats for job ID: " + str(jobID) + \
-                                 " domainID: " + str(domainID) + " Iteration: " + str(iteration)
-                raise
+            rows.append((jobID,int(domainID),iteration,'hourly'))
+            rows.append((jobID,int(domainID),iteration,'daily'))
             
-            if not results:
-                # Create "empty" entry into table.
-                # First for hourly stats
-                sqlCmd = "insert into \"Sens_Stats\" (\"jobID\",\"domainID\",iteration,\"objfnVal\",bias,rmse," + \
-                         "cor,nse,nselog,kge,fdcerr,msof,\"hyperResMultiObj\",\"timeStep\",complete) values (" + str(jobID) + \
-                         "," + str(domainID) + "," + str(iteration) + ",-9999,-9999,-9999," + \
-                         "-9999,-9999,-9999,-9999,-9999,-9999,-9999,'hourly',0);"
-                try:
-                    self.dbCursor.execute(sqlCmd)
-                    self.conn.commit()
-                except:
-                    jobData.errMsg = "ERROR: Unable to create empty table entry into Sens_Stats for " + \
-                                     "job ID: " + str(jobID) + " domainID: " + str(domainID) + \
-                                     " iteration: " + str(iteration) + " for hourly stats."
-                    raise
-                    
-                # Next for daily stats
-                sqlCmd = "insert into \"Sens_Stats\" (\"jobID\",\"domainID\",iteration,\"objfnVal\",bias,rmse," + \
-                         "cor,nse,nselog,kge,fdcerr,msof,\"hyperResMultiObj\",\"timeStep\",complete) values (" + str(jobID) + \
-                         "," + str(domainID) + "," + str(iteration) + ",-9999,-9999,-9999," + \
-                         "-9999,-9999,-9999,-9999,-9999,-9999,-9999,'daily',0);"
-                try:
-                    self.dbCursor.execute(sqlCmd)
-                    self.conn.commit()
-                except:
-                    jobData.errMsg = "ERROR: Unable to create empty table entry into Sens_Stats for " + \
-                                     "job ID: " + str(jobID) + " domainID: " + str(domainID) + \
-                                     " iteration: " + str(iteration) + " for daily stats."
-                    raise
+        # Create "empty" entries into table for both hourly and daily stats.
+        sqlCmd = "insert or ignore into \"Sens_Stats\" (\"jobID\",\"domainID\",iteration,\"objfnVal\",bias,rmse," + \
+                 "cor,nse,nselog,kge,fdcerr,msof,\"hyperResMultiObj\",\"timeStep\",complete) values (?,?,?,-9999,-9999,-9999," + \
+                 "-9999,-9999,-9999,-9999,-9999,-9999,-9999,?,0);"
+        try:
+            self.executeBatch(jobData,sqlCmd,rows,"ERROR: Unable to create empty table entry into Sens_Stats for " + \
+                              "job ID: " + str(jobID) + " domainID: " + str(domainID))
+        except:
+            raise
                     
     def iterationStatus(self,jobData,domainID,gageName):
         """
@@ -840,6 +782,68 @@ class Database(object):
             
         return results
         
+    def statusMatrix(self,jobData,tblName,nIter,timeStep=None):
+        """
+        Generic function to extract the complete status for all basins/iterations
+        of a job in a single query. A numpy array of size [nBasins,nIter] is
+        returned, with rows aligned to jobData.gageIDs. Iterations without a 
+        table entry are left as 0.0.
+        """
+        if not self.connected:
+            jobData.errMsg = "ERROR: No Connection to Database: " + self.dbName
+            raise Exception()
+            
+        jobID = int(jobData.jobID)
+        
+        sqlCmd = "select \"domainID\",iteration,complete from \"" + tblName + "\" where \"jobID\"=?"
+        sqlArgs = [jobID]
+        if timeStep is not None:
+            sqlCmd = sqlCmd + " and \"timeStep\"=?"
+            sqlArgs.append(timeStep)
+            
+        try:
+            self.dbCursor.execute(sqlCmd + ";",sqlArgs)
+            results = self.dbCursor.fetchall()
+        except:
+            jobData.errMsg = "ERROR: Unable to extract status from " + tblName + " for job ID: " + str(jobID)
+            raise
+            
+        statusOut = np.empty([len(jobData.gageIDs),int(nIter)])
+        statusOut[:,:] = 0.0
+        
+        basinInd = {}
+        for basin in range(0,len(jobData.gageIDs)):
+            basinInd[int(jobData.gageIDs[basin])] = basin
+            
+        for domainID,iteration,complete in results:
+            basin = basinInd.get(int(domainID))
+            if basin is None or int(iteration) < 1 or int(iteration) > int(nIter):
+                continue
+            statusOut[basin,int(iteration)-1] = float(complete)
+            
+        return statusOut
+        
+    def calibStatusMatrix(self,jobData):
+        """
+        Generic function to extract the calibration status of all basins/iterations
+        for a job from Calib_Stats.
+        """
+        try:
+            return self.statusMatrix(jobData,"Calib_Stats",jobData.nIter)
+        except:
+            raise
+            
+    def sensStatusMatrix(self,jobData):
+        """
+        Generic function to extract the sensitivity status of all basins/iterations
+        for a job from Sens_Stats. At a minimum, we will ALWAYS have daily statistics,
+        so use these to pull the status values. 
+        """
+        try:
+            return self.statusMatrix(jobData,"Sens_Stats",jobData.nSensIter,'daily')
+        except:
+            raise
+            
     def updateIterationStatus(self,jobData,domainID,iteration,gageName,newStatus):
         """
         Generic function to update the status of each basin as things progress.
@@ -886,13 +890,15 @@ class Database(object):
                              " domainID: " + str(domainID) + " Iteration: " + str(iterTmp)
             raise
         
-    def logCalibParams(self,jobData,jobID,domainID,calibTbl,iteration):
+    def logCalibParams(self,jobData,jobID,domainID,calibTbl,iteration,candNum=0):
         """
         Generic function for logging newly created parameter values created
-        by R into the database Calib_Params table.
+        by R into the database Calib_Params table. When DDS candidates are
+        evaluated concurrently, each row of the table holds one candidate,
+        and candidates occupy consecutive iterations.
         """
         # Iterations start as 0 in the workflow
-        iteration = int(iteration) + 1
+        iteration = int(iteration) + int(candNum) + 1
         
         if not self.connected:
             jobData.errMsg = "ERROR: No Connection to Database: " + self.dbName
@@ -912,27 +918,31 @@ class Database(object):
         paramNames = list(tblData.columns.values)
         
         # Update parameter values in Calib_Params
+        rows = []
         for paramName in paramNames:
             if paramName != "iter":
-                sqlCmd = "update \"Calib_Params\" set \"paramValue\"='" + str(tblData[paramName][0]) + \
-                         "' where \"jobID\"='" + str(jobID) + "' and \"domainID\"='" + str(domainID) + \
-                         "' and \"iteration\"='" + str(iteration) + "' and \"paramName\"='" + \
-                         str(paramName) + "';"
-                try:
-                    self.dbCursor.execute(sqlCmd)
-                    self.conn.commit()
-                except:
-                    jobData.errMsg = "ERROR: Failure to enter value for parameter: " + str(paramName) + \
-                                     " jobID: " + str(jobID) + " domainID: " + str(domainID) + \
-                                     " iteration: " + str(iteration)
-                    raise
+                rows.append((float(tblData[paramName][candNum]),int(jobID),int(domainID),iteration,str(paramName)))
                 
-    def logCalibStats(self,jobData,jobID,domainID,gage,iteration,statsTbl,staticData):
+        sqlCmd = "update \"Calib_Params\" set \"paramValue\"=? where \"jobID\"=? and \"domainID\"=? " + \
+                 "and \"iteration\"=? and \"paramName\"=?;"
+        try:
+            self.executeBatch(jobData,sqlCmd,rows,"ERROR: Failure to enter parameter values for jobID: " + \
+                              str(jobID) + " domainID: " + str(domainID) + " iteration: " + str(iteration))
+        except:
+            raise
+                
+    def logCalibStats(self,jobData,jobID,domainID,gage,iteration,statsTbl,staticData,candNum=0):
         """
         Generic function for entering calibration statistics into Calib_Stats to
         keep track of performance statistics for each calibration iteration.
         """
-        iteration = int(iteration) + 1
+        iteration = int(iteration) + int(candNum) + 1
+        
+        # Each DDS candidate is ran in it's own output directory.
+        if int(candNum) == 0:
+            candDir = "/RUN.CALIB/OUTPUT/"
+        else:
+            candDir = "/RUN.CALIB/OUTPUT_" + str(candNum) + "/"
         
         if not self.connected:
             jobData.errMsg = "ERROR: No Connection to Database: " + self.dbName
@@ -949,22 +959,22 @@ class Database(object):
             jobData.errMsg = "ERROR: Failure to read in table: " + statsTbl
             raise
             
-        objF = str(tblData.obj[0])
-        bias = str(tblData.bias[0])
-        rmse = str(tblData.rmse[0])
-        cor = str(tblData.cor[0])
-        nse = str(tblData.nse[0])
-        nselog = str(tblData.nselog[0])
-        kge = str(tblData.kge[0])
+        objF = str(tblData.obj[candNum])
+        bias = str(tblData.bias[candNum])
+        rmse = str(tblData.rmse[candNum])
+        cor = str(tblData.cor[candNum])
+        nse = str(tblData.nse[candNum])
+        nselog = str(tblData.nselog[candNum])
+        kge = str(tblData.kge[candNum])
         fdc = str(-9999)
-        msof = str(tblData.msof[0])
-        hyperResMultiObj = str(tblData.hyperResMultiObj[0])
+        msof = str(tblData.msof[candNum])
+        hyperResMultiObj = str(tblData.hyperResMultiObj[candNum])
         
-        if int(tblData.best[0]) == 1:
+        if int(tblData.best[candNum]) == 1:
             # This means we need to copy the parameter files that were created over
             # to the FINAL_PARAMS directory. These will be linked to for the validation
             # simulation.
-            inFile = str(jobData.jobDir) + "/" + gage + "/RUN.CALIB/OUTPUT/Fulldom.nc"
+            inFile = str(jobData.jobDir) + "/" + gage + candDir + "Fulldom.nc"
             outFile = str(jobData.jobDir) + "/" + gage + "/RUN.CALIB/FINAL_PARAMETERS/Fulldom.nc"
             # Remove existing "best" file.
             if os.path.isfile(outFile):
@@ -986,7 +996,7 @@ class Database(object):
                 
             if staticData.chnRtOpt == 3:
                 # Handle CHANPARM.TBL
-                inFile = str(jobData.jobDir) + "/" + gage + "/RUN.CALIB/OUTPUT/CHANPARM.TBL"
+                inFile = str(jobData.jobDir) + "/" + gage + candDir + "CHANPARM.TBL"
                 outFile = str(jobData.jobDir) + "/" + gage + "/RUN.CALIB/FINAL_PARAMETERS/CHANPARM.TBL"
                 # Remove existing "best" file.
                 if os.path.isfile(outFile):
@@ -1007,7 +1017,7 @@ class Database(object):
                         raise
                 
             if staticData.gwBaseFlag == 1:
-                inFile = str(jobData.jobDir) + "/" + gage + "/RUN.CALIB/OUTPUT/GWBUCKPARM.nc"
+                inFile = str(jobData.jobDir) + "/" + gage + candDir + "GWBUCKPARM.nc"
                 outFile = str(jobData.jobDir) + "/" + gage + "/RUN.CALIB/FINAL_PARAMETERS/GWBUCKPARM.nc"
                 # Remove existing "best" file.
                 if os.path.isfile(outFile):
@@ -1027,7 +1037,7 @@ class Database(object):
                     jobData.errMsg = "ERROR: Failed to copy: " + inFile + " to: " + outFile
                     raise
                 
-            inFile = str(jobData.jobDir) + "/" + gage + "/RUN.CALIB/OUTPUT/HYDRO_TBL_2D.nc"
+            inFile = str(jobData.jobDir) + "/" + gage + candDir + "HYDRO_TBL_2D.nc"
             outFile = str(jobData.jobDir) + "/" + gage + "/RUN.CALIB/FINAL_PARAMETERS/HYDRO_TBL_2D.nc"
             # Remove existing "best" file.
             if os.path.isfile(outFile):
@@ -1047,7 +1057,7 @@ class Database(object):
                 jobData.errMsg = "ERROR: Failed to copy: " + inFile + " to: " + outFile
                 raise
                 
-            inFile = str(jobData.jobDir) + "/" + gage + "/RUN.CALIB/OUTPUT/soil_properties.nc"
+            inFile = str(jobData.jobDir) + "/" + gage + candDir + "soil_properties.nc"
             outFile = str(jobData.jobDir) + "/" + gage + "/RUN.CALIB/FINAL_PARAMETERS/soil_properties.nc"
             # Remove existing "best" file.
             if os.path.isfile(outFile):
@@ -1138,6 +1148,31 @@ class Database(object):
                              "for jobID: " + str(jobID) + " for domainID: " + str(domainID)
             raise
             
+    def fillConvergedBasin(self,jobData,jobID,domainID,iteration):
+        """
+        Generic function to fill out all iterations of a basin from a given
+        iteration on to a status of 1 once the calibration of the basin has
+        converged. All parameter values and statistics for these iterations
+        will stay at -9999.
+        """
+        if not self.connected:
+            jobData.errMsg = "ERROR: No Connection to Database: " + self.dbName
+            raise Exception()
+            
+        # Iterations start as 0 in the workflow
+        iteration = int(iteration) + 1
+        
+        sqlCmd = "update \"Calib_Stats\" set complete='1' where \"jobID\"=? and " + \
+                 "\"domainID\"=? and iteration>=?;"
+        
+        try:
+            self.dbCursor.execute(sqlCmd,(int(jobID),int(domainID),iteration))
+            self.conn.commit()
+        except:
+            jobData.errMsg = "ERROR: Failure to fill basin status to 1 after convergence " + \
+                             "for jobID: " + str(jobID) + " for domainID: " + str(domainID)
+            raise
+            
     def genValidParmTbl(self,jobData,jobID,domainID,gage):
         """
         Generic function to extract the best values from the DB for this basin.
@@ -1439,21 +1474,20 @@ class Database(object):
             jobData.errMsg = "ERROR: Failure to read in table: " + parmTxtFile
             raise
             
+        rows = []
         for paramTmp in range(1,len(list(tblData.columns.values))):
             parmName = list(tblData.columns.values)[paramTmp]
             for iteration in range(0,jobData.nSensIter):
-                sqlCmd = "update \"Sens_Params\" set \"paramValue\"='" + \
-                         str(tblData[parmName][iteration]) + "' where \"jobID\"='" + \
-                         str(jobData.jobID) + "' and \"domainID\"='" + str(gageID) + \
-                         "' and iteration='" + str(iteration+1) + "' and " + \
-                         "\"paramName\"='" + parmName + "';"
-                try:
-                    self.dbCursor.execute(sqlCmd)
-                    self.conn.commit()
-                except:
-                    jobData.errMsg = "ERROR: Failure to enter sensitivity parameters for job: " + \
-                                     str(jobData.jobID) + " basin: " + str(gageID) + " iteration: " + str(iteration)
-                    raise Exception()
+                rows.append((float(tblData[parmName][iteration]),int(jobData.jobID),int(gageID),
+                             iteration+1,str(parmName)))
+                             
+        sqlCmd = "update \"Sens_Params\" set \"paramValue\"=? where \"jobID\"=? and \"domainID\"=? " + \
+                 "and iteration=? and \"paramName\"=?;"
+        try:
+            self.executeBatch(jobData,sqlCmd,rows,"ERROR: Failure to enter sensitivity parameters for job: " + \
+                              str(jobData.jobID) + " basin: " + str(gageID))
+        except:
+            raise
                     
         # Touch a file indicating parameters have been logged 
         try:
@@ -1487,30 +1521,31 @@ class Database(object):
         for tmpName in list(tblData.columns.values):
             tblData[tmpName][pd.isnull(tblData[tmpName])] = -9999.0
         
-        # Loop through table and enter information into DB.
+        # Build one update per table row, setting all statistics at once.
+        statCols = []
+        statNames = []
         for stat in list(tblData.columns.values):
-            numEntries = len(tblData.id)
-            for entry in range(0,numEntries):
-                if stat == 'id':
-                    continue
-                if stat == 'nsewt':
-                    continue
-                if stat == 'objFn':
-                    statName = 'objfnVal'
-                else:
-                    statName = stat
-                        
-                sqlCmd = "update \"Sens_Stats\" set \"" + statName + "\"='" + \
-                         str(tblData[stat][entry]) + "' where \"jobID\"='" + \
-                         str(jobData.jobID) + "' and \"domainID\"='" + str(gageID) + \
-                         "' and \"iteration\"='" + str(tblData['id'][entry]) + "' and " + \
-                         "\"timeStep\"='" + tblData['timeStep'][entry] + "';"
-                try:
-                    self.dbCursor.execute(sqlCmd)
-                    self.conn.commit()
-                except:
-                    jobData.errMsg = "ERROR: Failure to enter Sensitivity statistics for jobID: " + \
-                                     str(jobData.jobID) + " domainID: " + str(gageID)
+            if stat == 'id' or stat == 'nsewt' or stat == 'timeStep':
+                continue
+            if stat == 'objFn':
+                statNames.append('objfnVal')
+            else:
+                statNames.append(stat)
+            statCols.append(stat)
+            
+        rows = []
+        for entry in range(0,len(tblData.id)):
+            rowTmp = [float(tblData[stat][entry]) for stat in statCols]
+            rowTmp.extend([int(jobData.jobID),int(gageID),int(tblData['id'][entry]),str(tblData['timeStep'][entry])])
+            rows.append(tuple(rowTmp))
+            
+        sqlCmd = "update \"Sens_Stats\" set " + ",".join(["\"" + statName + "\"=?" for statName in statNames]) + \
+                 " where \"jobID\"=? and \"domainID\"=? and \"iteration\"=? and \"timeStep\"=?;"
+        try:
+            self.executeBatch(jobData,sqlCmd,rows,"ERROR: Failure to enter Sensitivity statistics for jobID: " + \
+                              str(jobData.jobID) + " domainID: " + str(gageID))
+        except:
+            raise
                                         
         # Touch a file indicating parameters have been logged 
         try:
@@ -1518,3 +1553,80 @@ class Database(object):
         except:
             jobData.errMsg = "ERROR: Unable to create empty file: " + completePath
             raise Exception()
+            
+    def logTelemetry(self,jobData,events):
+        """
+        Function to enter job telemetry events into the DB Job_Telemetry table,
+        inside a single transaction. Each event is a list of [recordType,time,
+        script,task,domainID,iteration,phase,jobType,value1,value2]. A SUBMIT
+        event adds a row, with value1/value2 being the system job ID and status
+        name. START and END events fill in the most recent row of the script
+        and task that has not finished, with value1/value2 being the seconds
+        elapsed in the job and exit status for END events. A row is added for
+        jobs not recorded on submission. The table is created if the DB file 
+        predates it.
+        """
+        if not self.connected:
+            jobData.errMsg = "ERROR: No Connection to Database: " + self.dbName
+            raise Exception()
+            
+        openCmd = "select rowid from \"Job_Telemetry\" where \"jobID\"=? and \"script\"=? and " + \
+                  "\"task\"=? and \"endTime\" is null order by rowid desc limit 1;"
+        insertCmd = "insert into \"Job_Telemetry\" (\"jobID\",\"domainID\",\"iteration\",\"phase\"," + \
+                    "\"jobType\",\"script\",\"task\",\"schedJobId\",\"statusName\",\"submitTime\"," + \
+                    "\"startTime\",\"endTime\",\"exitCode\") values (?,?,?,?,?,?,?,?,?,?,?,?,?);"
+        try:
+            self.dbCursor.execute("create table if not exists \"Job_Telemetry\" " + telemMod.tableSchema)
+            for recordType,timeTmp,script,task,domainID,iteration,phase,jobType,val1,val2 in events:
+                if recordType == 'SUBMIT':
+                    self.dbCursor.execute(insertCmd,(int(jobData.jobID),domainID,iteration,phase,jobType,
+                                                     script,task,str(val1),str(val2),timeTmp,None,None,None))
+                    continue
+                    
+                self.dbCursor.execute(openCmd,(int(jobData.jobID),script,task))
+                rowTmp = self.dbCursor.fetchone()
+                if recordType == 'START':
+                    startTime = timeTmp
+                    endTime = None
+                    exitCode = None
+                else:
+                    startTime = timeTmp - int(val1)
+                    endTime = timeTmp
+                    exitCode = int(val2)
+                    
+                if rowTmp is None:
+                    self.dbCursor.execute(insertCmd,(int(jobData.jobID),domainID,-1,phase,jobType,
+                                                     script,task,None,None,None,startTime,endTime,exitCode))
+                elif recordType == 'START':
+                    self.dbCursor.execute("update \"Job_Telemetry\" set \"startTime\"=? where rowid=?;",
+                                          (startTime,rowTmp[0]))
+                else:
+                    self.dbCursor.execute("update \"Job_Telemetry\" set \"startTime\"=coalesce(\"startTime\",?)," + \
+                                          "\"endTime\"=?,\"exitCode\"=? where rowid=?;",
+                                          (startTime,endTime,exitCode,rowTmp[0]))
+            self.conn.commit()
+        except:
+            jobData.errMsg = "ERROR: Failure to enter job telemetry for jobID: " + str(jobData.jobID)
+            try:
+                self.conn.rollback()
+            except:
+                pass
+            raise
+            
+    def telemetryTable(self,jobData):
+        """
+        Function to return all rows of the Job_Telemetry table for a job as a
+        pandas data frame, in the order they were entered.
+        """
+        if not self.connected:
+            jobData.errMsg = "ERROR: No Connection to Database: " + self.dbName
+            raise Exception()
+            
+        sqlCmd = "select * from \"Job_Telemetry\" where \"jobID\"=? order by rowid;"
+        try:
+            tblData = pd.read_sql_query(sqlCmd,self.conn,params=(int(jobData.jobID),))
+        except:
+            jobData.errMsg = "ERROR: Unable to extract job telemetry for job ID: " + str(jobData.jobID)
+            raise
+            
+        return tblData
@@ -162,6 +162,7 @@ def cleanCalib(jobData,workDir,runDir):
     calibCompleteFlag = workDir + "/CALIB_ITER.COMPLETE"
     calibTbl = workDir + "/params_new.txt"
     statsTbl = workDir + "/params_stats.txt"
+    convergedFlag = workDir + "/CALIB_CONVERGED"
     
     if os.path.isfile(calibCompleteFlag):
         try:
@@ -184,12 +185,22 @@ def cleanCalib(jobData,workDir,runDir):
             jobData.errMsg = "ERROR: Failure to remove: " + statsTbl
             raise
             
+    if os.path.isfile(convergedFlag):
+        try:
+            os.remove(convergedFlag)
+        except:
+            jobData.errMsg = "ERROR: Failure to remove: " + convergedFlag
+            raise
+            
 def scrubParams(jobData,runDir,staticData):
     """
     Generic function to remove parameter files generated after calibration.
     This is done to remove the risk of a model being ran with the improper
     file. It also allows the workflow to remove model output prior to a 
-    simulation but not the new parameter files needed.
+    simulation but not the new parameter files needed. The adjusted files
+    kept in the ADJUSTED_PARAMETERS directory by adjust_parameters.py, which
+    are linked into the run directory, are left in place so they can be
+    re-used by the next iteration.
     """
     fullDomFile = runDir + "/Fulldom.nc"
     hydroTbl = runDir + "/HYDRO_TBL_2D.nc"
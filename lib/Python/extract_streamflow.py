@@ -0,0 +1,57 @@
+# Program to extract the streamflow at a gage from the CHANOBS output of
+# a model run into a single time series file (chrt.nc) in the run directory.
+# This file is read by the R analysis code in place of opening every CHANOBS
+# file. Any values already collected into the file while the model was
+# running are kept. If no time series file exists, the R code falls back to
+# reading the CHANOBS files directly.
+
+# Logan Karsten
+# National Center for Atmospheric Research
+# Research Applications Laboratory
+# karsten@ucar.edu
+# 303-497-2693
+
+import argparse
+import sys
+import os
+import datetime
+
+# Set the Python path to include package specific functions.
+sys.path.insert(0,os.path.dirname(os.path.realpath(__file__)))
+
+import chanobsMod
+
+def main(argv):
+    # Parse arguments.
+    parser = argparse.ArgumentParser(description='Program to extract the streamflow ' + \
+             'at a gage from CHANOBS model output.')
+    parser.add_argument('outDir',metavar='outDir',type=str,nargs='+',
+                        help='Directory containing CHANOBS model output.')
+    parser.add_argument('linkId',metavar='linkId',type=int,nargs='+',
+                        help='Link ID (feature_id) of the gage.')
+    parser.add_argument('startDate',metavar='startDate',type=str,nargs='+',
+                        help='Beginning of the period to extract (YYYYMMDDHHMM).')
+    parser.add_argument('--nProcs',type=int,nargs='?',default=1,
+                        help='Number of processes used to read the output files.')
+
+    args = parser.parse_args(argv)
+    outDir = str(args.outDir[0])
+
+    try:
+        startDate = datetime.datetime.strptime(str(args.startDate[0]),'%Y%m%d%H%M')
+    except ValueError:
+        print "ERROR: Invalid start date: " + str(args.startDate[0])
+        sys.exit(1)
+
+    if not os.path.isdir(outDir):
+        print "ERROR: Directory: " + outDir + " not found."
+        sys.exit(1)
+
+    try:
+        chanobsMod.extractStreamflow(outDir,args.linkId[0],startDate,args.nProcs)
+    except Exception as e:
+        print "ERROR: Unable to extract streamflow: " + str(e)
+        sys.exit(2)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
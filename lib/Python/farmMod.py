@@ -0,0 +1,178 @@
+# Module file containing functions for the task farm used to pack many small
+# model runs into a few large scheduler allocations. Instead of submitting a
+# job per model run, the workflow places each run (task) into a queue in the
+# FARM directory of the job. A dispatcher (farm_dispatch.py) running inside
+# each farm allocation claims queued tasks and runs them on the free cores of
+# its nodes. The layout of the FARM directory is:
+# queue/<TASK> - Tasks waiting for a free slot in a farm allocation.
+# running/<TASK> - Tasks claimed by a farm allocation.
+# cancel/<TASK> - Tasks the workflow has asked to be cancelled.
+# hosts/<TASK> - Host file of a running task, for the MPI launcher.
+# Each task file holds the job script to run, the base path of the stdout/
+# stderr files, the task index within an array of tasks, and once claimed,
+# the name of the farm allocation running it. Task names are the status
+# name of the job, followed by the task index.
+
+# Logan Karsten
+# National Center for Atmospheric Research
+# Research Applications Laboratory
+
+import os
+
+# Prefix of the job name of farm allocations.
+farmPrefix = "WH_FARM_"
+# Program ran inside each farm allocation to dispatch tasks.
+dispatchProgram = os.path.dirname(os.path.realpath(__file__)) + "/farm_dispatch.py"
+
+def farmDir(jobDir):
+    """
+    Generic function to return the FARM directory of a job, creating it if
+    it does not exist.
+    """
+    dirTmp = str(jobDir) + "/FARM"
+    for subDir in ['queue','running','cancel','hosts']:
+        if not os.path.isdir(dirTmp + "/" + subDir):
+            try:
+                os.makedirs(dirTmp + "/" + subDir)
+            except OSError:
+                # Created by another process in the meantime.
+                if not os.path.isdir(dirTmp + "/" + subDir):
+                    raise
+    return dirTmp
+
+def taskName(statusName,taskId):
+    """
+    Generic function to return the name of a task in the farm.
+    """
+    return str(statusName) + "." + str(int(taskId))
+
+def taskStatus(nameTmp):
+    """
+    Generic function to return the status name of the job a task belongs to.
+    """
+    return nameTmp.rsplit('.',1)[0]
+
+def enqueueTask(jobDir,statusName,taskId,scriptPath,logBase):
+    """
+    Generic function to place a task into the queue of the farm. The task
+    file is written under a temporary name and moved into place once
+    complete, so a dispatcher never claims a partially written task.
+    """
+    dirTmp = farmDir(jobDir)
+    nameTmp = taskName(statusName,taskId)
+    if logBase is None:
+        logBase = ''
+    tmpPath = dirTmp + "/." + nameTmp + ".tmp"
+    fileObj = open(tmpPath,'w')
+    fileObj.write(str(scriptPath) + "\n")
+    fileObj.write(str(logBase) + "\n")
+    fileObj.write(str(int(taskId)) + "\n")
+    fileObj.close()
+    # Any cancellation left from a previous run of the task no longer applies.
+    if os.path.isfile(dirTmp + "/cancel/" + nameTmp):
+        os.remove(dirTmp + "/cancel/" + nameTmp)
+    os.rename(tmpPath,dirTmp + "/queue/" + nameTmp)
+    return nameTmp
+
+def readTask(taskPath):
+    """
+    Generic function to read a task file. Returns the job script, base path
+    of the stdout/stderr files (or None), task index, and name of the farm
+    allocation running the task (or None).
+    """
+    fileObj = open(taskPath,'r')
+    lines = [line.strip() for line in fileObj]
+    fileObj.close()
+    while len(lines) < 4:
+        lines.append('')
+    logBase = lines[1] if len(lines[1]) > 0 else None
+    farmName = lines[3] if len(lines[3]) > 0 else None
+    return [lines[0],logBase,int(lines[2]),farmName]
+
+def listTasks(jobDir):
+    """
+    Generic function to return the sorted list of queued tasks, and a
+    dictionary of running tasks mapped to the farm allocation running them
+    (None if the allocation has not recorded itself yet).
+    """
+    dirTmp = farmDir(jobDir)
+    queued = sorted([nameTmp for nameTmp in os.listdir(dirTmp + "/queue") if not nameTmp.startswith('.')])
+    running = {}
+    for nameTmp in os.listdir(dirTmp + "/running"):
+        try:
+            running[nameTmp] = readTask(dirTmp + "/running/" + nameTmp)[3]
+        except (IOError,OSError,ValueError):
+            # The task finished since the directory was listed.
+            continue
+    return [queued,running]
+
+def claimTask(jobDir,nameTmp,farmName):
+    """
+    Generic function for a farm allocation to claim a queued task. Moving the
+    task file is atomic, so only one allocation can claim a task. Returns
+    False if the task was claimed by another allocation, or cancelled.
+    """
+    dirTmp = farmDir(jobDir)
+    runPath = dirTmp + "/running/" + nameTmp
+    try:
+        os.rename(dirTmp + "/queue/" + nameTmp,runPath)
+    except OSError:
+        return False
+    fileObj = open(runPath,'a')
+    fileObj.write(str(farmName) + "\n")
+    fileObj.close()
+    return True
+
+def finishTask(jobDir,nameTmp):
+    """
+    Generic function to remove a task from the farm once it has exited.
+    """
+    dirTmp = farmDir(jobDir)
+    for pathTmp in [dirTmp + "/running/" + nameTmp,dirTmp + "/cancel/" + nameTmp,
+                    dirTmp + "/hosts/" + nameTmp]:
+        try:
+            os.remove(pathTmp)
+        except OSError:
+            pass
+
+def cancelTasks(jobDir,statusName):
+    """
+    Generic function to cancel all tasks of a job. Queued tasks are removed
+    from the queue, running tasks are flagged for the dispatcher running
+    them to terminate.
+    """
+    dirTmp = farmDir(jobDir)
+    queued,running = listTasks(jobDir)
+    for nameTmp in queued:
+        if taskStatus(nameTmp) == statusName:
+            try:
+                os.remove(dirTmp + "/queue/" + nameTmp)
+            except OSError:
+                # The task was claimed in the meantime.
+                if os.path.isfile(dirTmp + "/running/" + nameTmp):
+                    open(dirTmp + "/cancel/" + nameTmp,'a').close()
+    for nameTmp in running.keys():
+        if taskStatus(nameTmp) == statusName:
+            open(dirTmp + "/cancel/" + nameTmp,'a').close()
+
+def cancelRequested(jobDir,nameTmp):
+    """
+    Generic function to check if the workflow has asked for a task to be
+    cancelled.
+    """
+    return os.path.isfile(str(jobDir) + "/FARM/cancel/" + nameTmp)
+
+def reapTasks(jobDir,farmNames):
+    """
+    Generic function to remove running tasks whose farm allocation is no
+    longer in the scheduler, such as when the allocation hit it's wall
+    clock limit. The workflow will then find the model run is no longer
+    running, and restart it. Returns the list of tasks removed.
+    """
+    queued,running = listTasks(jobDir)
+    reaped = []
+    for nameTmp in running.keys():
+        if running[nameTmp] is not None and running[nameTmp] not in farmNames:
+            finishTask(jobDir,nameTmp)
+            reaped.append(nameTmp)
+    return reaped
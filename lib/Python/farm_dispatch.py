@@ -0,0 +1,223 @@
+# Program ran inside each task farm allocation to pack model runs onto the
+# nodes of the allocation. Queued tasks of the job are claimed from the FARM
+# directory while a node has enough free cores for them, and ran as a
+# background process confined to that node. Tasks the workflow cancels are
+# terminated. The program exits once no tasks have been queued for the idle
+# period, releasing the allocation, or when the allocation is terminated by
+# the scheduler, in which case all running tasks are terminated with it.
+
+# Logan Karsten
+# National Center for Atmospheric Research
+# Research Applications Laboratory
+# karsten@ucar.edu
+# 303-497-2693
+
+import argparse
+import sys
+import os
+import re
+import signal
+import socket
+import subprocess
+import time
+
+# Set the Python path to include package specific functions.
+sys.path.insert(0,os.path.dirname(os.path.realpath(__file__)))
+
+import farmMod
+
+# Running tasks, keyed by task name. Each entry is [process,host,nCores].
+running = {}
+
+def main(argv):
+    # Parse arguments.
+    parser = argparse.ArgumentParser(description='Program to run model tasks ' + \
+             'inside a task farm allocation.')
+    parser.add_argument('jobDir',metavar='jobDir',type=str,nargs='+',
+                        help='Job directory holding the task farm.')
+    parser.add_argument('farmName',metavar='farmName',type=str,nargs='+',
+                        help='Job name of the farm allocation.')
+    parser.add_argument('coresPerNode',metavar='coresPerNode',type=int,nargs='+',
+                        help='Number of cores on each node of the allocation.')
+    parser.add_argument('--idle',type=int,nargs='?',default=300,
+                        help='Seconds to wait for new tasks before exiting.')
+    parser.add_argument('--poll',type=int,nargs='?',default=10,
+                        help='Seconds between checks of the task queue.')
+
+    args = parser.parse_args(argv)
+    jobDir = str(args.jobDir[0])
+    farmName = str(args.farmName[0])
+    coresPerNode = int(args.coresPerNode[0])
+
+    hosts = farmHosts()
+    if len(hosts) == 0:
+        print "ERROR: Unable to determine the hosts of the allocation."
+        sys.exit(1)
+    print "TASK FARM: " + farmName + " RUNNING ON: " + ",".join(hosts)
+
+    signal.signal(signal.SIGTERM,terminate)
+    signal.signal(signal.SIGINT,terminate)
+
+    freeCores = dict([(host,coresPerNode) for host in hosts])
+    idleTime = time.time()
+    while True:
+        # Collect tasks that have exited, and terminate cancelled tasks.
+        for nameTmp in running.keys():
+            proc,host,nCores = running[nameTmp]
+            if proc.poll() is None:
+                if farmMod.cancelRequested(jobDir,nameTmp):
+                    print "CANCELLING TASK: " + nameTmp
+                    killTask(proc)
+                continue
+            print "TASK: " + nameTmp + " EXITED WITH: " + str(proc.returncode)
+            farmMod.finishTask(jobDir,nameTmp)
+            freeCores[host] = freeCores[host] + nCores
+            del running[nameTmp]
+
+        try:
+            queued = farmMod.listTasks(jobDir)[0]
+        except OSError:
+            queued = []
+
+        for nameTmp in queued:
+            taskPath = jobDir + "/FARM/queue/" + nameTmp
+            try:
+                scriptPath,logBase,taskId,farmTmp = farmMod.readTask(taskPath)
+                nCores = taskCores(scriptPath)
+            except (IOError,OSError,ValueError):
+                # Claimed by another allocation in the meantime.
+                continue
+            if nCores > coresPerNode:
+                print "WARNING: TASK: " + nameTmp + " REQUIRES MORE CORES THAN A NODE HOLDS."
+                continue
+            host = None
+            for hostTmp in hosts:
+                if freeCores[hostTmp] >= nCores:
+                    host = hostTmp
+                    break
+            if host is None:
+                continue
+            if not farmMod.claimTask(jobDir,nameTmp,farmName):
+                continue
+            try:
+                proc = startTask(jobDir,nameTmp,scriptPath,logBase,taskId,host,nCores)
+            except:
+                print "WARNING: UNABLE TO START TASK: " + nameTmp
+                farmMod.finishTask(jobDir,nameTmp)
+                continue
+            print "STARTED TASK: " + nameTmp + " ON: " + host
+            running[nameTmp] = [proc,host,nCores]
+            freeCores[host] = freeCores[host] - nCores
+
+        if len(running) > 0 or len(queued) > 0:
+            idleTime = time.time()
+        elif (time.time() - idleTime) >= args.idle:
+            print "NO TASKS LEFT FOR: " + farmName + ". EXITING."
+            break
+
+        time.sleep(args.poll)
+
+def farmHosts():
+    """
+    Generic function to return the list of hosts of the allocation, from the
+    environment set by the batch scheduler.
+    """
+    if 'SLURM_JOB_NODELIST' in os.environ:
+        try:
+            hostsTmp = subprocess.check_output(['scontrol','show','hostnames',
+                                                os.environ['SLURM_JOB_NODELIST']])
+            return uniqueHosts(hostsTmp.split())
+        except:
+            return []
+    if 'PBS_NODEFILE' in os.environ:
+        try:
+            fileObj = open(os.environ['PBS_NODEFILE'],'r')
+            hostsTmp = fileObj.read().split()
+            fileObj.close()
+            return uniqueHosts(hostsTmp)
+        except IOError:
+            return []
+    if 'LSB_HOSTS' in os.environ:
+        return uniqueHosts(os.environ['LSB_HOSTS'].split())
+    return [socket.gethostname()]
+
+def uniqueHosts(hostsTmp):
+    """
+    Generic function to remove repeated hosts, keeping the original order.
+    """
+    hosts = []
+    for host in hostsTmp:
+        if host not in hosts:
+            hosts.append(host)
+    return hosts
+
+def taskCores(scriptPath):
+    """
+    Generic function to read the number of cores a task requires from the
+    #FARM directive of it's script.
+    """
+    fileObj = open(scriptPath,'r')
+    try:
+        for line in fileObj:
+            match = re.match('^#FARM -n ([0-9]+)',line)
+            if match is not None:
+                return int(match.group(1))
+    finally:
+        fileObj.close()
+    return 1
+
+def startTask(jobDir,nameTmp,scriptPath,logBase,taskId,host,nCores):
+    """
+    Generic function to run the script of a task in the background on a host
+    of the allocation. The host is passed in the variables each MPI launcher
+    reads, along with a host file. The task runs in it's own session so all
+    of it's processes can be terminated together.
+    """
+    hostFile = jobDir + "/FARM/hosts/" + nameTmp
+    fileObj = open(hostFile,'w')
+    for coreNum in range(0,nCores):
+        fileObj.write(host + "\n")
+    fileObj.close()
+
+    envTmp = dict(os.environ)
+    envTmp['WH_TASK_ID'] = str(taskId)
+    envTmp['WH_FARM_HOSTS'] = host
+    envTmp['WH_FARM_HOSTFILE'] = hostFile
+    envTmp['PBS_NODEFILE'] = hostFile
+    envTmp['LSB_HOSTS'] = " ".join([host]*nCores)
+    envTmp['LSB_MCPU_HOSTS'] = host + " " + str(nCores)
+
+    if logBase is None:
+        logBase = jobDir + "/FARM/" + nameTmp
+    outObj = open(logBase + ".out",'w')
+    errObj = open(logBase + ".err",'w')
+    try:
+        proc = subprocess.Popen(['bash',scriptPath],env=envTmp,stdout=outObj,stderr=errObj,
+                                preexec_fn=os.setsid)
+    finally:
+        outObj.close()
+        errObj.close()
+    return proc
+
+def killTask(proc):
+    """
+    Generic function to terminate all processes of a task.
+    """
+    try:
+        os.killpg(proc.pid,signal.SIGTERM)
+    except OSError:
+        # The task has already exited.
+        pass
+
+def terminate(signum,frame):
+    """
+    Generic function to terminate all running tasks when the allocation is
+    terminated. The tasks are left in the running directory, and dropped by
+    the workflow once the allocation has left the scheduler.
+    """
+    for nameTmp in running.keys():
+        killTask(running[nameTmp][0])
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,206 @@
+# Module file containing functions for calculating the streamflow metrics
+# and objective functions used by the workflow. Each metric is calculated for
+# a matrix of simulated streamflow (runs x time steps) against one vector of
+# observations in a single vectorized pass. Missing values (NaN) are masked
+# following the na.rm handling of the R metrics in calib_utils.R. Time steps
+# without observations are dropped first, as the R code merges the model
+# output with the observations before calculating any metric.
+
+# Logan Karsten
+# National Center for Atmospheric Research
+# Research Applications Laboratory
+
+import os
+import numpy as np
+
+import warnings
+warnings.filterwarnings("ignore")
+
+# Program ran by the R analysis code to calculate the metrics of many runs.
+metricsProgram = os.path.dirname(os.path.realpath(__file__)) + "/calc_metrics.py"
+
+# Names of the metrics calculated by calcMetrics, in the order of the
+# statistics tables written by the R code.
+metricNames = ["objFn","cor","rmse","bias","nse","nselog","nsewt","kge","msof","hyperResMultiObj"]
+
+def pairSums(sim,obs,values):
+    """
+    Generic function to return the sum of values for each run over the time
+    steps where both the simulated and observed streamflow are present.
+    """
+    mask = ~np.isnan(sim) & ~np.isnan(obs)[np.newaxis,:]
+    return np.sum(np.where(mask,values,0.0),axis=1)
+
+def rmse(sim,obs):
+    """
+    Generic function to calculate the root mean square error of each run.
+    """
+    err = pairSums(sim,obs,(sim - obs)**2)
+    nVals = np.minimum(np.sum(~np.isnan(sim),axis=1),np.sum(~np.isnan(obs)))
+    return np.sqrt(err/nVals)
+
+def pbias(sim,obs):
+    """
+    Generic function to calculate the percent bias of each run.
+    """
+    return pairSums(sim,obs,sim - obs)/np.nansum(obs)*100.0
+
+def nse(sim,obs):
+    """
+    Generic function to calculate the Nash-Sutcliffe efficiency of each run.
+    """
+    err1 = pairSums(sim,obs,(sim - obs)**2)
+    err2 = np.nansum((obs - np.nanmean(obs))**2)
+    return 1.0 - err1/err2
+
+def nseLog(sim,obs):
+    """
+    Generic function to calculate the Nash-Sutcliffe efficiency of the log
+    of the streamflow of each run.
+    """
+    return nse(np.log(sim + 1e-04),np.log(obs + 1e-04))
+
+def nseWt(sim,obs,w=0.5,p=1.0):
+    """
+    Generic function to calculate the weighted mean of the Nash-Sutcliffe
+    efficiency, and the Nash-Sutcliffe efficiency of the log of the streamflow
+    of each run.
+    """
+    return ((w**p)*(nse(sim,obs)**p) + (w**p)*(nseLog(sim,obs)**p))**(1.0/p)
+
+def cor(sim,obs):
+    """
+    Generic function to calculate the correlation of each run with the
+    observations over the time steps where both are present.
+    """
+    mask = ~np.isnan(sim) & ~np.isnan(obs)[np.newaxis,:]
+    nVals = np.sum(mask,axis=1)
+    simTmp = np.where(mask,sim,0.0)
+    obsTmp = np.where(mask,obs[np.newaxis,:],0.0)
+    simAnom = np.where(mask,simTmp - (np.sum(simTmp,axis=1)/nVals)[:,np.newaxis],0.0)
+    obsAnom = np.where(mask,obsTmp - (np.sum(obsTmp,axis=1)/nVals)[:,np.newaxis],0.0)
+    return np.sum(simAnom*obsAnom,axis=1)/np.sqrt(np.sum(simAnom**2,axis=1)*np.sum(obsAnom**2,axis=1))
+
+def kge(sim,obs,sR=1.0,sAlpha=1.0,sBeta=1.0):
+    """
+    Generic function to calculate the Kling-Gupta efficiency of each run.
+    """
+    r = cor(sim,obs)
+    alpha = np.nanstd(sim,axis=1,ddof=1)/np.nanstd(obs,ddof=1)
+    beta = np.nanmean(sim,axis=1)/np.nanmean(obs)
+    return 1.0 - np.sqrt((sR*(r - 1.0))**2 + (sAlpha*(alpha - 1.0))**2 + (sBeta*(beta - 1.0))**2)
+
+def msof(sim,obs,scales=(1,24)):
+    """
+    Generic function to calculate the multi-scale objective function of each
+    run. Each scale is a number of time steps the streamflow is averaged
+    over before the squared error is taken, weighted by the ratio of the
+    variance of the observations to the variance of the averaged observations.
+    """
+    varObs = np.nanvar(obs,ddof=1)
+    sumTmp = np.zeros(sim.shape[0])
+    for scale in scales:
+        if scale < 1:
+            raise Exception("Scales (number of time steps) must not be less than 1.")
+        nBlocks = sim.shape[1]//int(scale)
+        simBlk = sim[:,0:nBlocks*int(scale)].reshape(sim.shape[0],nBlocks,int(scale))
+        obsBlk = obs[0:nBlocks*int(scale)].reshape(nBlocks,int(scale))
+        simBlk = np.nanmean(simBlk,axis=2)
+        obsBlk = np.nanmean(obsBlk,axis=1)
+        mask = ~np.isnan(simBlk) & ~np.isnan(obsBlk)[np.newaxis,:]
+        nVals = np.sum(mask,axis=1)
+        obsTmp = np.where(mask,obsBlk[np.newaxis,:],0.0)
+        obsAnom = np.where(mask,obsTmp - (np.sum(obsTmp,axis=1)/nVals)[:,np.newaxis],0.0)
+        varBlk = np.sum(obsAnom**2,axis=1)/(nVals - 1)
+        sumTmp = sumTmp + pairSums(simBlk,obsBlk,(simBlk - obsBlk)**2)*varObs/varBlk
+    return np.sqrt(sumTmp)
+
+def hyperResMultiObj(sim,obs,w0=0.4,w1=0.2,w2=0.4):
+    """
+    Generic function to calculate the weighted combination of the normalized
+    Nash-Sutcliffe efficiency, peak discharge error and volume error of
+    each run.
+    """
+    nnse = 1.0/(2.0 - nse(sim,obs))
+    pe = (np.nanmax(sim,axis=1) - np.nanmax(obs))/np.nanmax(obs)
+    ve = pairSums(sim,obs,sim - obs)/np.nansum(obs)
+    return w0*(1.0 - nnse) + w1*np.abs(pe) + w2*np.abs(ve)
+
+# Objective functions, keyed by the objective function name used in the
+# configuration file. Each entry holds the metric function, and a flag
+# indicating larger values of the metric are better, in which case the
+# objective function minimized by the calibration is 1 - metric.
+objFunctions = {'Rmse':[rmse,False],
+                'PBias':[pbias,False],
+                'Nse':[nse,True],
+                'NseLog':[nseLog,True],
+                'NseWt':[nseWt,True],
+                'Kge':[kge,True],
+                'Msof':[msof,False],
+                'hyperResMultiObj':[hyperResMultiObj,False]}
+
+def registerObjective(objName,metricFunc,maxFlag):
+    """
+    Generic function to add an objective function. The metric function must
+    take the simulated streamflow (runs x time steps) and the observations
+    (time steps), and return one value per run.
+    """
+    objFunctions[objName] = [metricFunc,maxFlag]
+
+def objective(objName,sim,obs):
+    """
+    Generic function to calculate the objective function minimized by the
+    calibration for each run.
+    """
+    if objName not in objFunctions:
+        raise Exception("Unknown objective function: " + str(objName))
+    metricFunc,maxFlag = objFunctions[objName]
+    valTmp = metricFunc(sim,obs)
+    if maxFlag:
+        return 1.0 - valTmp
+    return valTmp
+
+def calcMetrics(objName,sim,obs):
+    """
+    Generic function to calculate the objective function and all metrics for
+    each run. Time steps without observations are dropped first. Returns a
+    dictionary of arrays with one value per run, keyed by metric name.
+    """
+    sim = np.atleast_2d(np.asarray(sim,dtype=np.float64))
+    obs = np.asarray(obs,dtype=np.float64)
+    keep = ~np.isnan(obs)
+    sim = sim[:,keep]
+    obs = obs[keep]
+
+    stats = {}
+    stats['objFn'] = objective(objName,sim,obs)
+    stats['cor'] = cor(sim,obs)
+    stats['rmse'] = rmse(sim,obs)
+    stats['bias'] = pbias(sim,obs)
+    stats['nse'] = nse(sim,obs)
+    stats['nselog'] = nseLog(sim,obs)
+    stats['nsewt'] = nseWt(sim,obs)
+    stats['kge'] = kge(sim,obs)
+    stats['msof'] = msof(sim,obs)
+    stats['hyperResMultiObj'] = hyperResMultiObj(sim,obs)
+    return stats
+
+def dailyMeans(times,values):
+    """
+    Generic function to average streamflow (runs x time steps, or time
+    steps) to daily (UTC) values. Times are in seconds since 1970. Returns
+    the times of the beginning of each day, and the daily means.
+    """
+    days = np.floor(np.asarray(times)/86400.0)
+    dayTimes,dayIndex = np.unique(days,return_inverse=True)
+    values = np.asarray(values,dtype=np.float64)
+    valTmp = np.atleast_2d(values)
+    nDays = len(dayTimes)
+    binTmp = (np.arange(valTmp.shape[0])[:,np.newaxis]*nDays + dayIndex[np.newaxis,:]).ravel()
+    mask = ~np.isnan(valTmp.ravel())
+    sums = np.bincount(binTmp[mask],weights=valTmp.ravel()[mask],minlength=valTmp.shape[0]*nDays)
+    counts = np.bincount(binTmp[mask],minlength=valTmp.shape[0]*nDays)
+    means = (sums/counts).reshape(valTmp.shape[0],nDays)
+    if values.ndim == 1:
+        means = means[0,:]
+    return dayTimes*86400.0,means
@@ -58,8 +58,7 @@ def createHrldasNL(statusData,gageData,jobData,outDir,typeFlag,bDate,eDate,genFl
         if genFlag == 0:
             inStr = ' SPATIAL_FILENAME = "' + str(gageData.soilFile) + '"' + '\n'
         if genFlag == 1:
-            pthTmp = str(jobData.outDir) + "/" + str(jobData.jobName) + "/" + \
-                     str(gageData.gage) + "/RUN.CALIB/OUTPUT/soil_properties.nc"
+            pthTmp = outDir + "/soil_properties.nc"
             if not os.path.isfile(pthTmp):
                 statusData.errMsg = "ERROR: Failure to find: " + pthTmp
                 raise Exception()
@@ -271,8 +270,7 @@ def createHydroNL(statusData,gageData,jobData,outDir,typeFlag,bDate,eDate,genFla
         if genFlag == 0:
             inStr = ' GEO_FINEGRID_FLNM = "' + str(gageData.fullDom) + '"' + '\n'
         if genFlag == 1:
-            pthTmp = str(jobData.outDir) + "/" + str(jobData.jobName) + "/" + \
-                     str(gageData.gage) + "/RUN.CALIB/OUTPUT/Fulldom.nc"
+            pthTmp = outDir + "/Fulldom.nc"
             if not os.path.isfile(pthTmp):
                 statusData.errMsg = "ERROR: Failure to find: " + pthTmp
                 raise Exception()
@@ -306,8 +304,7 @@ def createHydroNL(statusData,gageData,jobData,outDir,typeFlag,bDate,eDate,genFla
             inStr = ' HYDROTBL_F = "' + str(gageData.hydroSpatial) + '"' + '\n'
         if genFlag == 1:
             # Calibration run with updated parameter dataset
-            pthTmp = str(jobData.outDir) + "/" + str(jobData.jobName) + "/" + \
-                     str(gageData.gage) + "/RUN.CALIB/OUTPUT/HYDRO_TBL_2D.nc"
+            pthTmp = outDir + "/HYDRO_TBL_2D.nc"
             if not os.path.isfile(pthTmp):
                 statusData.errMsg = "ERROR: Failure to find: " + pthTmp
                 raise Exception()
@@ -592,8 +589,7 @@ def createHydroNL(statusData,gageData,jobData,outDir,typeFlag,bDate,eDate,genFla
             if genFlag == 0:
                 inStr = ' GWBUCKPARM_file = "' + str(gageData.gwFile) + '"\n'
             if genFlag == 1:
-                pthTmp = str(jobData.outDir) + "/" + str(jobData.jobName) + "/" + \
-                         str(gageData.gage) + "/RUN.CALIB/OUTPUT/GWBUCKPARM.nc"
+                pthTmp = outDir + "/GWBUCKPARM.nc"
                 if not os.path.isfile(pthTmp):
                     statusData.errMsg = "ERROR: Failure to find: " + pthTmp
                     raise Exception()
@@ -0,0 +1,101 @@
+# Module file containing objects and functions for advancing the workflow
+# state of many basins concurrently through a bounded pool of threads. Each
+# basin is handled by one thread at a time, so the per-basin logic (and the
+# ordering of iterations within a basin) is unchanged. Blocking I/O such as
+# file system checks, scheduler commands, and database access for one basin
+# no longer stalls the remaining basins.
+
+# Logan Karsten
+# National Center for Atmospheric Research
+# Research Applications Laboratory
+
+import copy
+import threading
+import Queue
+
+import warnings
+warnings.filterwarnings("ignore")
+
+class lockedProxy(object):
+    """
+    Proxy object that serializes all method calls made on an object that
+    is not safe to share between threads, such as the database object.
+    """
+    def __init__(self,obj):
+        self.obj = obj
+        self.lock = threading.RLock()
+
+    def __getattr__(self,name):
+        attr = getattr(self.obj,name)
+        if not callable(attr):
+            return attr
+
+        def lockedCall(*args,**kwargs):
+            self.lock.acquire()
+            try:
+                return attr(*args,**kwargs)
+            finally:
+                self.lock.release()
+
+        return lockedCall
+
+def runBasinPool(jobData,nThreads,basinFunc,basinArgs):
+    """
+    Generic function to call basinFunc once for each entry in basinArgs using
+    a pool of nThreads threads. Each call receives a shallow copy of jobData
+    as its first argument, so error and notification messages set by one basin
+    do not clobber those of another. Once a call fails, no further basins are
+    started. After all running calls have finished, the first error message
+    is placed into jobData.errMsg and an exception is raised.
+    """
+    nThreads = max(1,min(int(nThreads),len(basinArgs)))
+
+    # Run serially when only one thread is requested. This keeps the behavior
+    # (and tracebacks) identical to the old serial loop.
+    if nThreads == 1:
+        for args in basinArgs:
+            try:
+                basinFunc(jobData,*args)
+            except:
+                raise
+        return
+
+    taskQueue = Queue.Queue()
+    for args in basinArgs:
+        taskQueue.put(args)
+
+    errors = []
+    errLock = threading.Lock()
+
+    def worker():
+        while True:
+            if len(errors) > 0:
+                return
+            try:
+                args = taskQueue.get_nowait()
+            except Queue.Empty:
+                return
+            jobTmp = copy.copy(jobData)
+            try:
+                basinFunc(jobTmp,*args)
+            except:
+                errLock.acquire()
+                errors.append(str(jobTmp.errMsg))
+                errLock.release()
+                return
+
+    threads = []
+    for threadNum in range(0,nThreads):
+        thread = threading.Thread(target=worker)
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+
+    # Join with a timeout so the main thread remains responsive to Ctrl-C.
+    for thread in threads:
+        while thread.isAlive():
+            thread.join(1.0)
+
+    if len(errors) > 0:
+        jobData.errMsg = errors[0]
+        raise Exception()
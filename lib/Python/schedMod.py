@@ -0,0 +1,1000 @@
+# Module file containing the scheduler backends used to render job scripts,
+# submit jobs, query the status of jobs, and cancel jobs. Each backend
+# corresponds to one of the jobRunType/analysisRunType options:
+# 1 - LSF (bsub/bjobs)
+# 2 - PBS (qsub/qstat)
+# 3 - Slurm (sbatch/squeue) with srun
+# 4 - Local execution with mpiexec
+# 5 - Local execution with mpirun
+# 6 - Slurm (sbatch/squeue) with mpirun
+# When taskFarm is turned on, model runs are placed into the task farm of the
+# job instead (negative run types), and ran inside a few large allocations of
+# the batch scheduler.
+# Submissions from all backends are throttled through a shared submission
+# limiter, and recorded in the job telemetry (telemMod).
+
+# Logan Karsten
+# National Center for Atmospheric Research
+# Research Applications Laboratory
+
+import os
+import pwd
+import re
+import signal
+import subprocess
+import time
+import threading
+import psutil
+import farmMod
+import telemMod
+
+import warnings
+warnings.filterwarnings("ignore")
+
+class jobSpec:
+    def __init__(self):
+        # Initialize empty object describing a job to be rendered into a
+        # run script by one of the scheduler backends.
+        # Job name as it will appear in the scheduler queue.
+        self.jobName = []
+        # Name of the executable link run by mpiexec/mpirun. This is the name
+        # that will show up in the process table.
+        self.mpiName = []
+        # Directory the job will be executed from.
+        self.workDir = []
+        # Directory to place scheduler stdout/stderr files. Defaults to workDir.
+        self.logDir = None
+        # Title placed into the comment block at the top of the script.
+        self.title = "WRF-Hydro Calibration Simulations"
+        # Shell commands ran before and after the main executable.
+        self.preCmds = []
+        self.postCmds = []
+        # Main executable to run. For batch schedulers, this will be ran through
+        # the MPI launcher if parallel is True.
+        self.exe = []
+        self.parallel = True
+        # Resources requested.
+        self.nCores = 1
+        self.nNodes = 1
+        # Wall clock time in minutes.
+        self.wallTime = 480
+        self.queName = ''
+        # Request exclusive use of the nodes (LSF only).
+        self.exclusive = False
+
+class scheduler:
+    """
+    Base scheduler backend. Each backend implements how a job script is
+    rendered, how a script (or array of scripts) is submitted, how a batched
+    status query of all jobs owned by a user is made, and how jobs are cancelled.
+    """
+    name = None
+    # Flag to indicate the system job ID's returned on submission are to be
+    # tracked by the workflow in the pbsJobId arrays.
+    trackIds = False
+    # Shell expression evaluating to the 0-based index of a task within an
+    # array job.
+    taskIndex = None
+
+    def __init__(self,runType):
+        self.runType = runType
+
+    def header(self,jobData,spec):
+        """
+        Generic function to return the list of scheduler directives placed
+        at the top of a job script.
+        """
+        return []
+
+    def launch(self,jobData,spec):
+        """
+        Generic function to return the command line used to launch the main
+        executable of a job.
+        """
+        return spec.exe
+
+    def renderScript(self,jobData,outFile,spec):
+        """
+        Generic function to write a job script from a job specification.
+        """
+        if spec.logDir is None:
+            spec.logDir = spec.workDir
+
+        header = self.header(jobData,spec)
+
+        try:
+            fileObj = open(outFile,'w')
+            fileObj.write('#!/bin/bash\n')
+            for inStr in header:
+                fileObj.write(inStr + '\n')
+            if len(header) > 0:
+                fileObj.write('\n')
+            fileObj.write('cd ' + spec.workDir + '\n')
+            fileObj.write(telemMod.startCmd(jobData,outFile,self.taskIndex) + '\n')
+            for inStr in spec.preCmds:
+                fileObj.write(inStr + '\n')
+            fileObj.write(self.launch(jobData,spec) + '\n')
+            # The exit status of the main executable is reported, and returned
+            # by the script, regardless of the commands ran after it.
+            fileObj.write('WH_STATUS=$?\n')
+            for inStr in spec.postCmds:
+                fileObj.write(inStr + '\n')
+            fileObj.write(eventCmd(jobData,outFile,self.taskIndex) + '\n')
+            fileObj.close()
+        except:
+            jobData.errMsg = "ERROR: Failure to create: " + outFile
+            raise
+
+        # Make the file an executable.
+        try:
+            os.chmod(outFile,0755)
+        except:
+            jobData.errMsg = "ERROR: Failure to convert: " + outFile + " to an executable."
+            raise
+
+    def submit(self,jobData,scriptPath,logBase=None,queName='',statusName=None,afterId=None,afterArray=False,
+               iteration=None):
+        """
+        Generic function to submit a job script. The submission is held back
+        by the submission limiter if the submission rate, or number of jobs
+        in flight for the queue, is exceeded. statusName is the name the
+        status check functions will look for the job under. If afterId is
+        given, the job will not start until that job (an array job if
+        afterArray is True) has completed successfully. The submission is
+        recorded in the job telemetry under the calibration/sensitivity
+        iteration, if given. Returns the system job ID.
+        """
+        queKey = (self.name,str(queName))
+        limiter.lock.acquire()
+        try:
+            limiter.acquire(jobData,self,queKey,1)
+            jobId = self.submitScript(jobData,scriptPath,logBase,self.depend(jobData,afterId,afterArray))
+            limiter.record(queKey,jobId,statusName,1)
+            telemMod.logSubmit(jobData,scriptPath,1,jobId,statusName,iteration)
+        finally:
+            limiter.lock.release()
+        return jobId
+
+    def submitArray(self,jobData,scriptPath,nTasks,jobName,logBase=None,queName='',afterId=None,afterArray=False,
+                    iteration=None):
+        """
+        Generic function to submit a job script as an array of nTasks tasks.
+        Each task can determine it's index from the taskIndex shell expression.
+        Returns the system job ID of the array.
+        """
+        queKey = (self.name,str(queName))
+        limiter.lock.acquire()
+        try:
+            limiter.acquire(jobData,self,queKey,int(nTasks))
+            jobId = self.submitArrayScript(jobData,scriptPath,nTasks,jobName,logBase,
+                                           self.depend(jobData,afterId,afterArray))
+            limiter.record(queKey,jobId,jobName,int(nTasks))
+            telemMod.logSubmit(jobData,scriptPath,nTasks,jobId,jobName,iteration)
+        finally:
+            limiter.lock.release()
+        return jobId
+
+    def submitChain(self,jobData,steps,iteration=None):
+        """
+        Generic function to submit a chain of job scripts, each of which will
+        not start until the previous job has completed successfully. Each step
+        is a list of [scriptPath,nTasks,statusName,logBase,queName]. Steps with
+        more than one task are submitted as array jobs. All steps are recorded
+        in the job telemetry under the same iteration. Returns the list of
+        system job ID's. The chain is cut short if the job ID of a step can
+        not be determined, as the next step can not depend on it.
+        """
+        jobIds = []
+        afterId = None
+        afterArray = False
+        for scriptPath,nTasks,statusName,logBase,queName in steps:
+            if int(nTasks) > 1:
+                jobId = self.submitArray(jobData,scriptPath,nTasks,statusName,logBase,queName,
+                                         afterId,afterArray,iteration)
+            else:
+                jobId = self.submit(jobData,scriptPath,logBase,queName,statusName,afterId,afterArray,
+                                    iteration)
+            jobIds.append(jobId)
+            if jobId == -9999:
+                break
+            afterId = jobId
+            afterArray = int(nTasks) > 1
+        return jobIds
+
+    def depend(self,jobData,afterId,afterArray):
+        """
+        Generic function to return the submission arguments making a job
+        depend on the successful completion of another job.
+        """
+        if afterId is None:
+            return []
+        jobData.errMsg = "ERROR: Job dependencies not supported for: " + str(self.name)
+        raise Exception()
+
+    def submitScript(self,jobData,scriptPath,logBase=None,depArgs=[]):
+        """
+        Generic function to hand a job script to the scheduler. Returns the
+        system job ID.
+        """
+        jobData.errMsg = "ERROR: Job submission not supported for: " + str(self.name)
+        raise Exception()
+
+    def submitArrayScript(self,jobData,scriptPath,nTasks,jobName,logBase=None,depArgs=[]):
+        """
+        Generic function to hand a job script to the scheduler as an array job.
+        Returns the system job ID of the array.
+        """
+        jobData.errMsg = "ERROR: Array job submission not supported for: " + str(self.name)
+        raise Exception()
+
+    def statusName(self,jobName,mpiName):
+        """
+        Generic function to return the name a job will be found under when
+        checking the status of the job.
+        """
+        return jobName
+
+    def query(self,jobData):
+        """
+        Generic function to query all jobs owned by the job owner. Returns
+        a dictionary of job names mapped to system job ID's.
+        """
+        return {}
+
+    def cancel(self,jobData,jobId):
+        """
+        Generic function to cancel a job.
+        """
+        jobData.errMsg = "ERROR: Job cancellation not supported for: " + str(self.name)
+        raise Exception()
+
+    def checkOwner(self,jobData,expName,jobId):
+        """
+        Generic function to ensure a job found running belongs to the job owner.
+        """
+        return
+
+    def trackJob(self,pbsJobId,jobIndex,jobId):
+        """
+        Generic function to place a job ID returned from submission into
+        the array of job ID's tracked by the workflow.
+        """
+        if self.trackIds:
+            pbsJobId[jobIndex] = jobId
+
+def eventCmd(jobData,scriptPath=None,taskIndex=None):
+    """
+    Generic function to return the shell command placed at the end of each job
+    script to report the job has finished. A single line containing the time,
+    script name and exit status of the job is appended to the event spool
+    file in the job directory, which the workflow watches instead of checking
+    the flag files in every basin directory. If the path of the job script is
+    given, the end of the job is recorded in the telemetry spool file as well.
+    The exit status is taken from the WH_STATUS shell variable, set by
+    renderScript after the main executable, and the script exits with it.
+    """
+    eventStr = 'echo "$(date +%s) $(basename $0) $WH_STATUS" >> ' + str(jobData.jobDir) + '/WORKFLOW.EVENTS'
+    if scriptPath is not None:
+        eventStr = telemMod.endCmd(jobData,scriptPath,taskIndex,'$WH_STATUS') + '; ' + eventStr
+    return eventStr + '; exit $WH_STATUS'
+
+def formatWallTime(wallTime,longFormat=True):
+    """
+    Generic function to convert a wall clock time in minutes into a HH:MM:SS
+    or H:MM string.
+    """
+    hours = int(wallTime)/60
+    minutes = int(wallTime)%60
+    if longFormat:
+        return "%02d:%02d:00" % (hours,minutes)
+    else:
+        return "%d:%02d" % (hours,minutes)
+
+class lsfScheduler(scheduler):
+    name = 'LSF'
+    taskIndex = '$((${LSB_JOBINDEX}-1))'
+
+    def header(self,jobData,spec):
+        lines = ['#','# LSF Batch Script to Run ' + spec.title,'#']
+        if len(jobData.acctKey.strip()) > 0:
+            lines.append("#BSUB -P " + str(jobData.acctKey))
+        if spec.exclusive:
+            lines.append("#BSUB -x")
+        lines.append("#BSUB -n " + str(spec.nCores))
+        lines.append("#BSUB -J " + spec.jobName)
+        lines.append("#BSUB -o " + spec.logDir + "/%J.out")
+        lines.append("#BSUB -e " + spec.logDir + "/%J.err")
+        lines.append("#BSUB -W " + formatWallTime(spec.wallTime,False))
+        if len(spec.queName.strip()) > 0:
+            lines.append("#BSUB -q " + str(spec.queName))
+        return lines
+
+    def launch(self,jobData,spec):
+        if spec.parallel:
+            return 'mpirun.lsf ' + spec.exe
+        return spec.exe
+
+    def depend(self,jobData,afterId,afterArray):
+        if afterId is None:
+            return []
+        return ["-w 'done(" + str(afterId) + ")'"]
+
+    def submitScript(self,jobData,scriptPath,logBase=None,depArgs=[]):
+        try:
+            jobTmp = subprocess.check_output(" ".join(["bsub"] + depArgs) + " < " + scriptPath,shell=True)
+        except:
+            jobData.errMsg = "ERROR: Unable to submit: " + scriptPath
+            raise
+        # Expected output: Job <JOBID> is submitted to queue <QUEUE>.
+        match = re.search('<([0-9]+)>',jobTmp)
+        if match is None:
+            return -9999
+        return int(match.group(1))
+
+    def submitArrayScript(self,jobData,scriptPath,nTasks,jobName,logBase=None,depArgs=[]):
+        cmd = " ".join(["bsub"] + depArgs) + " -J \"" + jobName + "[1-" + str(int(nTasks)) + "]\" < " + scriptPath
+        try:
+            jobTmp = subprocess.check_output(cmd,shell=True)
+        except:
+            jobData.errMsg = "ERROR: Unable to submit array job: " + scriptPath
+            raise
+        match = re.search('<([0-9]+)>',jobTmp)
+        if match is None:
+            return -9999
+        return int(match.group(1))
+
+    def query(self,jobData):
+        try:
+            jobsTmp = subprocess.check_output(['bjobs','-u',str(jobData.owner),'-w','-noheader'],
+                                              stderr=open(os.devnull,'w'))
+        except:
+            jobData.errMsg = "ERROR: Unable to run bjobs for user: " + str(jobData.owner)
+            raise
+        names = {}
+        for lineTmp in jobsTmp.split('\n'):
+            colsTmp = lineTmp.split()
+            if len(colsTmp) < 7:
+                continue
+            # Pending jobs have no execution host listed, which shifts the
+            # job name over one column.
+            if colsTmp[2] == 'PEND' and len(colsTmp) == 9:
+                nameTmp = colsTmp[5]
+            else:
+                nameTmp = colsTmp[6]
+            # Tasks of an array job are listed as NAME[INDEX].
+            names[re.sub('\[[0-9]+\]$','',nameTmp)] = colsTmp[0]
+        return names
+
+    def cancel(self,jobData,jobId):
+        try:
+            subprocess.call(['bkill',str(jobId)])
+        except:
+            jobData.errMsg = "ERROR: Unable to cancel job: " + str(jobId)
+            raise
+
+class pbsScheduler(scheduler):
+    name = 'PBS'
+    trackIds = True
+    taskIndex = '${PBS_ARRAY_INDEX}'
+
+    def header(self,jobData,spec):
+        lines = ['#','# PBS Batch Script to Run ' + spec.title,'#']
+        lines.append("#PBS -N " + spec.jobName)
+        if len(jobData.acctKey.strip()) > 0:
+            lines.append("#PBS -A " + str(jobData.acctKey))
+        lines.append("#PBS -l walltime=" + formatWallTime(spec.wallTime))
+        if len(spec.queName.strip()) > 0:
+            lines.append("#PBS -q " + str(spec.queName))
+        lines.append("#PBS -o " + spec.logDir + "/" + spec.jobName + ".out")
+        lines.append("#PBS -e " + spec.logDir + "/" + spec.jobName + ".err")
+        nCoresPerNode = int(spec.nCores/spec.nNodes)
+        lines.append("#PBS -l select=" + str(spec.nNodes) + ":ncpus=" + str(nCoresPerNode) + \
+                     ":mpiprocs=" + str(nCoresPerNode))
+        return lines
+
+    def launch(self,jobData,spec):
+        if spec.parallel:
+            return 'mpiexec_mpt ' + spec.exe
+        return spec.exe
+
+    def depend(self,jobData,afterId,afterArray):
+        if afterId is None:
+            return []
+        if afterArray:
+            return ['-W','depend=afterok:' + str(afterId) + '[]']
+        return ['-W','depend=afterok:' + str(afterId)]
+
+    def submitScript(self,jobData,scriptPath,logBase=None,depArgs=[]):
+        try:
+            jobTmp = subprocess.check_output(['qsub'] + depArgs + [scriptPath])
+        except:
+            jobData.errMsg = "ERROR: Unable to submit: " + scriptPath
+            raise
+        return int(jobTmp.split('.')[0])
+
+    def submitArrayScript(self,jobData,scriptPath,nTasks,jobName,logBase=None,depArgs=[]):
+        # PBS will not accept an array job with a single task.
+        if int(nTasks) == 1:
+            return self.submitScript(jobData,scriptPath,logBase,depArgs)
+        try:
+            jobTmp = subprocess.check_output(['qsub'] + depArgs + ['-N',jobName,'-J','0-' + str(int(nTasks)-1),
+                                              scriptPath])
+        except:
+            jobData.errMsg = "ERROR: Unable to submit array job: " + scriptPath
+            raise
+        return int(jobTmp.split('[')[0].split('.')[0])
+
+    def query(self,jobData):
+        try:
+            jobsTmp = subprocess.check_output(['qstat','-u',str(jobData.owner)])
+        except:
+            jobData.errMsg = "ERROR: Unable to run qstat for user: " + str(jobData.owner)
+            raise
+        names = {}
+        if len(jobsTmp) == 0:
+            # This means no jobs are running for the user.
+            return names
+        linesTmp = jobsTmp.split('\n')
+        # The exptected return from qstat on Cheyenne gives us at least 7 lines to parse.
+        if len(linesTmp) < 7:
+            jobData.errMsg = "ERROR: Expected qstat return should be greater than 6 lines."
+            raise Exception()
+        for lineNum in range(5,len(linesTmp)):
+            # This is a CRUDE assumption based on the behavior of qstat
+            # on Cheyenne.
+            colsTmp = linesTmp[lineNum].split()
+            if len(colsTmp) < 4:
+                continue
+            names[colsTmp[3]] = int(colsTmp[0].split('[')[0].split('.')[0])
+        return names
+
+    def cancel(self,jobData,jobId):
+        try:
+            subprocess.call(['qdel',str(jobId)])
+        except:
+            jobData.errMsg = "ERROR: Unable to cancel job: " + str(jobId)
+            raise
+
+class slurmScheduler(scheduler):
+    name = 'SLURM'
+    taskIndex = '${SLURM_ARRAY_TASK_ID}'
+
+    def header(self,jobData,spec):
+        lines = ['#','# Slurm Batch Script to Run ' + spec.title,'#']
+        lines.append("#SBATCH -J " + spec.jobName)
+        if len(jobData.acctKey.strip()) > 0:
+            lines.append("#SBATCH -A " + str(jobData.acctKey))
+        lines.append("#SBATCH -t " + formatWallTime(spec.wallTime))
+        if len(spec.queName.strip()) > 0:
+            lines.append("#SBATCH -p " + str(spec.queName))
+        lines.append("#SBATCH -o " + spec.logDir + "/" + spec.jobName + ".out")
+        lines.append("#SBATCH -e " + spec.logDir + "/" + spec.jobName + ".err")
+        lines.append("#SBATCH -N " + str(spec.nNodes))
+        return lines
+
+    def launch(self,jobData,spec):
+        if not spec.parallel:
+            return spec.exe
+        if self.runType == 6:
+            return 'mpirun -n ' + str(spec.nCores) + ' ' + spec.exe
+        return 'srun -n ' + str(spec.nCores) + ' ' + spec.exe
+
+    def depend(self,jobData,afterId,afterArray):
+        if afterId is None:
+            return []
+        # Dependencies on an array job wait on all tasks of the array.
+        return ['--dependency=afterok:' + str(afterId)]
+
+    def submitScript(self,jobData,scriptPath,logBase=None,depArgs=[]):
+        try:
+            jobTmp = subprocess.check_output(['sbatch'] + depArgs + [scriptPath])
+        except:
+            jobData.errMsg = "ERROR: Unable to submit: " + scriptPath
+            raise
+        # Expected output: Submitted batch job JOBID
+        try:
+            return int(jobTmp.split()[-1])
+        except:
+            return -9999
+
+    def submitArrayScript(self,jobData,scriptPath,nTasks,jobName,logBase=None,depArgs=[]):
+        try:
+            jobTmp = subprocess.check_output(['sbatch'] + depArgs + ['-J',jobName,'--array=0-' + str(int(nTasks)-1),
+                                              scriptPath])
+        except:
+            jobData.errMsg = "ERROR: Unable to submit array job: " + scriptPath
+            raise
+        try:
+            return int(jobTmp.split()[-1])
+        except:
+            return -9999
+
+    def query(self,jobData):
+        # Tasks of array jobs are listed under the base job ID of the array
+        # (%F) returned on submission, rather than <id>_<n> (%i).
+        try:
+            jobsTmp = subprocess.check_output(['squeue','-u',str(jobData.owner),
+                                               '--noheader','--format=%F %j'])
+        except:
+            jobData.errMsg = "ERROR: Unable to run squeue for user: " + str(jobData.owner)
+            raise
+        names = {}
+        for lineTmp in jobsTmp.split('\n'):
+            colsTmp = lineTmp.split()
+            if len(colsTmp) < 2:
+                continue
+            names[colsTmp[1].strip()] = colsTmp[0]
+        return names
+
+    def cancel(self,jobData,jobId):
+        try:
+            subprocess.call(['scancel',str(jobId)])
+        except:
+            jobData.errMsg = "ERROR: Unable to cancel job: " + str(jobId)
+            raise
+
+class mpiScheduler(scheduler):
+    name = 'MPI'
+    taskIndex = '${WH_TASK_ID}'
+
+    def statusName(self,jobName,mpiName):
+        return mpiName
+
+    def launch(self,jobData,spec):
+        # The executable is always launched through a uniquely named link so the
+        # job can be found in the process table. Serial jobs are launched as a
+        # single process.
+        nCores = int(spec.nCores)
+        if not spec.parallel:
+            nCores = 1
+        if self.runType == 5:
+            return 'mpirun -np ' + str(nCores) + ' ./' + spec.mpiName
+        return 'mpiexec -n ' + str(nCores) + ' ./' + spec.mpiName
+
+    def shellCmd(self,scriptPath,nTasks,logBase):
+        """
+        Generic function to return the shell command running a script, or
+        all tasks of an array of the script in the background under a
+        single parent shell.
+        """
+        if int(nTasks) == 1:
+            cmd = scriptPath
+            if logBase is not None:
+                cmd = cmd + " 1>" + logBase + ".out 2>" + logBase + ".err"
+            return cmd
+        cmd = ""
+        for task in range(0,int(nTasks)):
+            cmd = cmd + "WH_TASK_ID=" + str(task) + " " + scriptPath
+            if logBase is not None:
+                cmd = cmd + " 1>" + logBase + "_" + str(task) + ".out 2>" + \
+                      logBase + "_" + str(task) + ".err"
+            cmd = cmd + " & "
+        return cmd + "wait"
+
+    def submitScript(self,jobData,scriptPath,logBase=None,depArgs=[]):
+        try:
+            p = subprocess.Popen([self.shellCmd(scriptPath,1,logBase)],shell=True)
+        except:
+            jobData.errMsg = "ERROR: Unable to execute: " + scriptPath
+            raise
+        return p.pid
+
+    def submitArrayScript(self,jobData,scriptPath,nTasks,jobName,logBase=None,depArgs=[]):
+        try:
+            p = subprocess.Popen([self.shellCmd(scriptPath,nTasks,logBase)],shell=True)
+        except:
+            jobData.errMsg = "ERROR: Unable to execute: " + scriptPath
+            raise
+        return p.pid
+
+    def submitChain(self,jobData,steps,iteration=None):
+        # There is no scheduler to hold back dependent jobs, so the steps are
+        # ran one after another under a single parent shell. Each step checks
+        # for itself that the step before it completed.
+        cmds = []
+        for scriptPath,nTasks,statusName,logBase,queName in steps:
+            cmds.append(self.shellCmd(scriptPath,nTasks,logBase))
+        if len(cmds) > 1:
+            cmds = ["( " + cmd + " )" for cmd in cmds]
+        limiter.lock.acquire()
+        try:
+            for scriptPath,nTasks,statusName,logBase,queName in steps:
+                limiter.acquire(jobData,self,(self.name,str(queName)),int(nTasks))
+            try:
+                p = subprocess.Popen([" ; ".join(cmds)],shell=True)
+            except:
+                jobData.errMsg = "ERROR: Unable to execute: " + steps[0][0]
+                raise
+            for scriptPath,nTasks,statusName,logBase,queName in steps:
+                limiter.record((self.name,str(queName)),p.pid,statusName,int(nTasks))
+                telemMod.logSubmit(jobData,scriptPath,nTasks,p.pid,statusName,iteration)
+        finally:
+            limiter.lock.release()
+        return [p.pid]*len(steps)
+
+    def query(self,jobData):
+        names = {}
+        for proc in psutil.process_iter():
+            try:
+                nameTmp = proc.name()
+                pidTmp = proc.pid
+            except:
+                # Process ended before Python could get the name/PID.
+                continue
+            if nameTmp not in names:
+                names[nameTmp] = pidTmp
+        return names
+
+    def cancel(self,jobData,jobId):
+        try:
+            os.kill(int(jobId),signal.SIGTERM)
+        except OSError:
+            # Process has already ended.
+            return
+        except:
+            jobData.errMsg = "ERROR: Unable to cancel process: " + str(jobId)
+            raise
+
+    def checkOwner(self,jobData,expName,jobId):
+        # Ensure these are being ran by the proper user.
+        try:
+            proc_stat_file = os.stat('/proc/%d' % int(jobId))
+        except:
+            # The process ended since the process table was read.
+            return
+        uid = proc_stat_file.st_uid
+        userCheck = pwd.getpwuid(uid)[0]
+        if userCheck != str(jobData.owner):
+            jobData.errMsg = "ERROR: " + expName + " is being ran by: " + \
+            userCheck + " When it should be ran by: " + jobData.owner
+            raise Exception()
+
+class farmScheduler(scheduler):
+    """
+    Task farm backend. Jobs are not handed to the scheduler, but placed as
+    tasks into the farm queue of the job. Up to jobData.taskFarm allocations
+    of the batch scheduler (base backend) are kept running while tasks are
+    queued, each running farm_dispatch.py to pack tasks onto the free cores
+    of it's nodes. Tasks are found under their status name while queued or
+    running, so the existing status checks are unchanged.
+    """
+    name = 'FARM'
+    taskIndex = '${WH_TASK_ID}'
+
+    def __init__(self,runType,base):
+        self.runType = runType
+        self.base = base
+
+    def header(self,jobData,spec):
+        # Cores are read back by the dispatcher when packing tasks.
+        return ['#','# Task Farm Script to Run ' + spec.title,'#',
+                '#FARM -n ' + str(int(spec.nCores))]
+
+    def launch(self,jobData,spec):
+        # Tasks are confined to the node(s) the dispatcher placed them on.
+        # For LSF and PBS, the dispatcher sets the host variables the MPI
+        # launchers already read.
+        if not spec.parallel:
+            return spec.exe
+        if self.base.runType == 3:
+            return 'srun --exclusive -N 1 -n ' + str(int(spec.nCores)) + \
+                   ' -w $WH_FARM_HOSTS ' + spec.exe
+        if self.base.runType == 6:
+            return 'mpirun -np ' + str(int(spec.nCores)) + ' -hostfile $WH_FARM_HOSTFILE ' + spec.exe
+        return self.base.launch(jobData,spec)
+
+    def submit(self,jobData,scriptPath,logBase=None,queName='',statusName=None,afterId=None,afterArray=False,
+               iteration=None):
+        # Tasks do not count against the scheduler, so only the farm
+        # allocations are throttled.
+        self.depend(jobData,afterId,afterArray)
+        queKey = (self.name,str(queName))
+        limiter.lock.acquire()
+        try:
+            try:
+                farmMod.enqueueTask(jobData.jobDir,statusName,0,scriptPath,logBase)
+            except:
+                jobData.errMsg = "ERROR: Unable to place: " + scriptPath + " into the task farm."
+                raise
+            limiter.record(queKey,statusName,statusName,1)
+            telemMod.logSubmit(jobData,scriptPath,1,statusName,statusName,iteration)
+        finally:
+            limiter.lock.release()
+        return statusName
+
+    def submitArray(self,jobData,scriptPath,nTasks,jobName,logBase=None,queName='',afterId=None,afterArray=False,
+                    iteration=None):
+        self.depend(jobData,afterId,afterArray)
+        queKey = (self.name,str(queName))
+        limiter.lock.acquire()
+        try:
+            for task in range(0,int(nTasks)):
+                logTmp = None
+                if logBase is not None:
+                    logTmp = logBase + "_" + str(task)
+                try:
+                    farmMod.enqueueTask(jobData.jobDir,jobName,task,scriptPath,logTmp)
+                except:
+                    jobData.errMsg = "ERROR: Unable to place: " + scriptPath + " into the task farm."
+                    raise
+            limiter.record(queKey,jobName,jobName,int(nTasks))
+            telemMod.logSubmit(jobData,scriptPath,nTasks,jobName,jobName,iteration)
+        finally:
+            limiter.lock.release()
+        return jobName
+
+    def statusName(self,jobName,mpiName):
+        return self.base.statusName(jobName,mpiName)
+
+    def farmName(self,jobData,farmNum):
+        """
+        Generic function to return the job name of a farm allocation.
+        """
+        return farmMod.farmPrefix + str(jobData.jobID) + "_" + str(farmNum)
+
+    def query(self,jobData):
+        timeTmp = time.time()
+        try:
+            baseNames = self.base.query(jobData)
+        except:
+            raise
+        limiter.prune(self.base.name,set(baseNames.values()),timeTmp)
+
+        farmNames = set()
+        for farmNum in range(0,int(jobData.taskFarm)):
+            nameTmp = self.farmName(jobData,farmNum)
+            if nameTmp in baseNames or \
+               limiter.recentlySubmitted(self.base.name,nameTmp,jobData.submitGrace):
+                farmNames.add(nameTmp)
+
+        try:
+            # Tasks left behind by allocations that have ended are dropped,
+            # so the workflow finds the runs missing and restarts them.
+            farmMod.reapTasks(jobData.jobDir,farmNames)
+            queued,running = farmMod.listTasks(jobData.jobDir)
+        except:
+            jobData.errMsg = "ERROR: Unable to read the task farm of: " + str(jobData.jobDir)
+            raise
+
+        if len(queued) > 0:
+            try:
+                self.startFarms(jobData,farmNames,len(queued))
+            except:
+                raise
+
+        names = {}
+        for nameTmp in queued + running.keys():
+            statusTmp = farmMod.taskStatus(nameTmp)
+            names[statusTmp] = statusTmp
+        return names
+
+    def startFarms(self,jobData,farmNames,nQueued):
+        """
+        Generic function to submit farm allocations while tasks are queued,
+        up to jobData.taskFarm allocations. No more allocations are submitted
+        than there are queued tasks.
+        """
+        dirTmp = farmMod.farmDir(jobData.jobDir)
+        nStart = min(int(jobData.taskFarm) - len(farmNames),nQueued)
+        for farmNum in range(0,int(jobData.taskFarm)):
+            if nStart <= 0:
+                break
+            nameTmp = self.farmName(jobData,farmNum)
+            if nameTmp in farmNames:
+                continue
+            spec = jobSpec()
+            spec.jobName = nameTmp
+            spec.mpiName = nameTmp
+            spec.workDir = dirTmp
+            spec.title = "WRF-Hydro Task Farm"
+            spec.exe = 'python ' + farmMod.dispatchProgram + ' ' + str(jobData.jobDir) + ' ' + \
+                       nameTmp + ' ' + str(int(jobData.farmCoresPerNode))
+            spec.parallel = False
+            spec.exclusive = True
+            spec.nNodes = int(jobData.farmNodes)
+            spec.nCores = int(jobData.farmNodes)*int(jobData.farmCoresPerNode)
+            spec.wallTime = int(jobData.farmWallTime)
+            spec.queName = jobData.queName
+            scriptPath = dirTmp + "/" + nameTmp + ".sh"
+            try:
+                self.base.renderScript(jobData,scriptPath,spec)
+                self.base.submit(jobData,scriptPath,dirTmp + "/" + nameTmp,jobData.queName,nameTmp)
+            except:
+                raise
+            print "STARTED TASK FARM ALLOCATION: " + nameTmp
+            farmNames.add(nameTmp)
+            nStart = nStart - 1
+
+    def cancel(self,jobData,jobId):
+        try:
+            farmMod.cancelTasks(jobData.jobDir,str(jobId))
+        except:
+            jobData.errMsg = "ERROR: Unable to cancel task farm job: " + str(jobId)
+            raise
+
+class submitLimiter:
+    """
+    Token bucket limiting the rate jobs are submitted to each queue, along
+    with a cap on the number of jobs submitted by the workflow that are
+    queued or running at any given time. The limiter only blocks when a limit
+    has actually been reached.
+    """
+    def __init__(self):
+        # Tokens available and time of the last refill, keyed by queue.
+        self.tokens = {}
+        self.lastFill = {}
+        # Jobs submitted by this instance of the workflow that have not yet
+        # been seen to leave the scheduler. Keyed by queue, each entry is a list
+        # of [jobId,statusName,submitTime,nTasks].
+        self.inFlight = {}
+        # Time of the most recent submission.
+        self.lastSubmit = 0.0
+        # Basins may be submitting jobs from multiple threads. Submissions
+        # waiting on a limit release the lock through the condition, so the
+        # status checks of other basins are not held up.
+        self.lock = threading.RLock()
+        self.cond = threading.Condition(self.lock)
+
+    def countInFlight(self,schedName=None,queKey=None):
+        """
+        Generic function to count the jobs in flight for a queue, or for all
+        queues of a scheduler.
+        """
+        count = 0
+        self.lock.acquire()
+        try:
+            for keyTmp in self.inFlight.keys():
+                if queKey is not None and keyTmp != queKey:
+                    continue
+                if schedName is not None and keyTmp[0] != schedName:
+                    continue
+                for entry in self.inFlight[keyTmp]:
+                    count = count + entry[3]
+        finally:
+            self.lock.release()
+        return count
+
+    def acquire(self,jobData,sched,queKey,nTasks):
+        """
+        Generic function to block until a job of nTasks can be submitted to
+        the queue without exceeding jobData.maxJobsInFlight or jobData.maxSubmitRate.
+        Must be called with the lock held. The lock is released while waiting,
+        and the limits are checked again once it has been taken back.
+        """
+        maxJobs = int(jobData.maxJobsInFlight)
+        if maxJobs > 0:
+            pollStep = max(float(jobData.schedCacheTTL),5.0)
+            while True:
+                count = self.countInFlight(queKey=queKey)
+                if count == 0 or (count + nTasks) <= maxJobs:
+                    break
+                print "MAXIMUM NUMBER OF JOBS IN FLIGHT REACHED. WAITING ON JOBS TO FINISH."
+                self.cond.wait(pollStep)
+                timeTmp = time.time()
+                try:
+                    names = sched.query(jobData)
+                except:
+                    raise
+                self.prune(sched.name,set(names.values()),timeTmp)
+
+        rate = float(jobData.maxSubmitRate)
+        if rate <= 0.0:
+            return
+        if queKey not in self.tokens:
+            self.tokens[queKey] = max(rate,1.0)
+            self.lastFill[queKey] = time.time()
+        while True:
+            # Refill the bucket based on time elapsed. The bucket holds at most
+            # one minute's worth of submissions (at least one submission).
+            timeTmp = time.time()
+            self.tokens[queKey] = min(max(rate,1.0),self.tokens[queKey] + \
+                                      (timeTmp - self.lastFill[queKey])*rate/60.0)
+            self.lastFill[queKey] = timeTmp
+            if self.tokens[queKey] >= 1.0:
+                break
+            self.cond.wait((1.0 - self.tokens[queKey])*60.0/rate)
+        self.tokens[queKey] = self.tokens[queKey] - 1.0
+
+    def record(self,queKey,jobId,statusName,nTasks):
+        """
+        Generic function to record a job that has been submitted.
+        """
+        if queKey not in self.inFlight:
+            self.inFlight[queKey] = []
+        self.lastSubmit = time.time()
+        self.inFlight[queKey].append([jobId,statusName,self.lastSubmit,nTasks])
+
+    def release(self,schedName,statusName):
+        """
+        Generic function to reset the submission time of a job held back by a
+        dependency, once the dependency has been met. The job is treated as
+        just submitted while it makes it's way into the scheduler, or process
+        table.
+        """
+        self.lock.acquire()
+        try:
+            for keyTmp in self.inFlight.keys():
+                if keyTmp[0] != schedName:
+                    continue
+                for entry in self.inFlight[keyTmp]:
+                    if entry[1] == statusName:
+                        entry[2] = time.time()
+        finally:
+            self.lock.release()
+
+    def prune(self,schedName,ids,snapTime):
+        """
+        Generic function to forget jobs that were submitted before a scheduler
+        snapshot was taken, but are no longer present in it.
+        """
+        idsTmp = set([str(idTmp) for idTmp in ids])
+        self.lock.acquire()
+        try:
+            for keyTmp in self.inFlight.keys():
+                if keyTmp[0] != schedName:
+                    continue
+                self.inFlight[keyTmp] = [entry for entry in self.inFlight[keyTmp] \
+                                         if entry[2] >= snapTime or \
+                                         (entry[0] != -9999 and str(entry[0]) in idsTmp)]
+        finally:
+            self.lock.release()
+
+    def recentlySubmitted(self,schedName,statusName,grace):
+        """
+        Generic function to check if a job was submitted under a given status
+        name within the last grace seconds. Jobs can take a moment to show up
+        in the scheduler, or process table, after being submitted.
+        """
+        timeTmp = time.time()
+        self.lock.acquire()
+        try:
+            for keyTmp in self.inFlight.keys():
+                if keyTmp[0] != schedName:
+                    continue
+                for entry in self.inFlight[keyTmp]:
+                    if entry[1] == statusName and (timeTmp - entry[2]) < float(grace):
+                        return True
+        finally:
+            self.lock.release()
+        return False
+
+# One submission limiter shared by all scheduler backends.
+limiter = submitLimiter()
+
+# Scheduler backends are stateless aside from the run type, so one instance
+# is shared for each run type.
+schedulers = {}
+
+def getScheduler(runType):
+    """
+    Generic function to return the scheduler backend for a jobRunType/
+    analysisRunType value. Negative values return the task farm backend
+    running on top of the batch scheduler of the positive value.
+    """
+    runType = int(runType)
+    if runType not in schedulers:
+        if runType < 0:
+            base = getScheduler(-runType)
+            if base is None:
+                return None
+            schedulers[runType] = farmScheduler(runType,base)
+        elif runType == 1:
+            schedulers[runType] = lsfScheduler(runType)
+        elif runType == 2:
+            schedulers[runType] = pbsScheduler(runType)
+        elif runType == 3 or runType == 6:
+            schedulers[runType] = slurmScheduler(runType)
+        elif runType == 4 or runType == 5:
+            schedulers[runType] = mpiScheduler(runType)
+        else:
+            return None
+    return schedulers[runType]
+
+def modelRunType(jobData):
+    """
+    Generic function to return the run type the calibration model runs are
+    submitted through. This is the task farm of the job if turned on.
+    """
+    if int(jobData.taskFarm) > 0:
+        return -int(jobData.jobRunType)
+    return int(jobData.jobRunType)
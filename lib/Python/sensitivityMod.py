@@ -9,9 +9,14 @@ import os
 import calibIoMod
 import namelistMod
 import statusMod
+import schedMod
+import sizeMod
 import errMod
+import chanobsMod
+import archiveMod
+import metricsMod
 import subprocess
-import time
+import numpy as np
 
 import warnings
 warnings.filterwarnings("ignore")
@@ -108,54 +113,25 @@ def preProc(preProcStatus,statusData,staticData,db,gageID,gage,pbsJobId,basinNum
             else:
                 # The job is still running.
                 print "SENSITIVITY PRE PROC SENS RUNNING FOR BASIN: " + str(gageID)
-                time.sleep(1)
                 preProcStatus = False
                 return
                 
     # Generate run script to generate parameters for this basin. Then execute the job.
-    if statusData.analysisRunType == 1:
-        #BSUB
-        generateBsubPreProcScript(statusData,gageID,workDir,workDir,gageMeta,staticData)
-        cmd = "bsub < " + workDir + "/run_WH_SENS_PREPROC.sh"
-        try:
-            subprocess.call(cmd,shell=True)
-        except:
-            statusData.errMsg = "ERROR: Unable to launch sensitivity pre-processing job for gage: " + str(gage)
-            raise
-    if statusData.analysisRunType == 2:
-        #PBS
-        try:
-            generatePbsPreProcScript(statusData,gageID,workDir,workDir,gageMeta,staticData)
-        except:
-            statusData.errMsg = "ERROR: Unable to create PBS script for gage: " + str(gage)
-            raise
-        try:
-            jobTmp = subprocess.check_output(['qsub',workDir + '/run_WH_SENS_PREPROC.sh'])
-            pbsJobId[basinNum] = int(jobTmp.split('.')[0])
-        except:
-            statusData.errMsg = "ERROR: Unable to launch sensitivity pre-processing job for gage: " + str(gageMeta.gage[basinNum])
-            raise
-    if statusData.analysisRunType == 3 or statusData.analysisRunType == 6:
-        #SLURM
-        generateSlurmPreProcScript(statusData,gageID,workDir,workDir,gageMeta,staticData)
-        cmd = "sbatch " + workDir + "/run_WH_SENS_PREPROC.sh"
-        try:
-            subprocess.call(cmd,shell=True)
-        except:
-            statusData.errMsg = "ERROR: Unable to launch sensitivity pre-processing job for gage: " + str(gage)
-            raise
-    if statusData.analysisRunType == 4 or statusData.analysisRunType == 5:
-        #MPIEXEC/MPIRUN
-        generateMpiPreProcScript(statusData,gageID,workDir,workDir,gageMeta,staticData)
-        cmd = workDir + "/run_WH_SENS_PREPROC.sh 1>" + workDir + "/WH_SENS_PREPROC_" + \
-              str(statusData.jobID) + "_" + str(gageID) + ".out" + \
-              ' 2>' + workDir + "/WH_SENS_PREPROC_" + str(statusData.jobID) + "_" + str(gageID) + ".err"
-        try:
-            p3 = subprocess.Popen([cmd],shell=True)
-            time.sleep(1)
-        except:
-            statusData.errMsg = "ERROR: Unable to launch WRF-Hydro Calib job for gage: " + str(gage)
-            raise
+    sched = schedMod.getScheduler(statusData.analysisRunType)
+    try:
+        generatePreProcScript(statusData,gageID,workDir,gageMeta,staticData)
+    except:
+        statusData.errMsg = "ERROR: Unable to create sensitivity pre-processing script for gage: " + str(gage)
+        raise
+    statusName = sched.statusName("WH_SENS_PREPROC_" + str(statusData.jobID) + "_" + str(gageID),\
+                                  "SPRE" + str(statusData.jobID) + str(gageID))
+    try:
+        jobTmp = sched.submit(statusData,workDir + "/run_WH_SENS_PREPROC.sh",workDir + "/WH_SENS_PREPROC_" + \
+                              str(statusData.jobID) + "_" + str(gageID),statusData.queNameAnalysis,statusName)
+        sched.trackJob(pbsJobId,basinNum,jobTmp)
+    except:
+        statusData.errMsg = "ERROR: Unable to launch sensitivity pre-processing job for gage: " + str(gage)
+        raise
     
 def postProc(postProcStatus,statusData,staticData,db,gageID,gage,pbsJobId,basinNum):
     """
@@ -329,57 +305,37 @@ def postProc(postProcStatus,statusData,staticData,db,gageID,gage,pbsJobId,basinN
                 
     if runStatus == True:
         # Generate run script to generate parameters for this basin. Then execute the job.
-        if statusData.analysisRunType == 1:
-            #BSUB
-            generateBsubPostProcScript(statusData,gageID,workDir,workDir,gageMeta)
-            cmd = "bsub < " + workDir + "/run_WH_SENS_POSTPROC.sh"
-            try:
-                subprocess.call(cmd,shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch sensitivity post-processing job for gage: " + str(gage)
-                raise
-        if statusData.analysisRunType == 2:
-            #PBS
-            try:
-                generatePbsPostProcScript(statusData,gageID,workDir,workDir,gageMeta)
-            except:
-                statusData.errMsg = "ERROR: Unable to create PBS script for gage: " + str(gage)
-                raise
-            try:
-                jobTmp = subprocess.check_output(['qsub',workDir + '/run_WH_SENS_POSTPROC.sh'])
-                pbsJobId[basinNum] = int(jobTmp.split('.')[0])
-            except:
-                statusData.errMsg = "ERROR: Unable to launch sensitivity post-processing job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.analysisRunType == 3 or statusData.analysisRunType == 6:
-            #SLURM
-            generateSlurmPostProcScript(statusData,gageID,workDir,workDir,gageMeta)
-            cmd = "sbatch " + workDir + "/run_WH_SENS_POSTPROC.sh"
-            try:
-                subprocess.call(cmd,shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch sensitivity post-processing job for gage: " + str(gage)
-                raise
-        if statusData.analysisRunType == 4 or statusData.analysisRunType == 5:
-            #MPIEXEC/MPIRUN
-            generateMpiPostProcScript(statusData,gageID,workDir,workDir,gageMeta)
-            cmd = workDir + "/run_WH_SENS_POSTPROC.sh 1>" + workDir + "/WH_SENS_POSTPROC_" + \
-                  str(statusData.jobID) + "_" + str(gageID) + ".out" + \
-                  ' 2>' + workDir + "/WH_SENS_POSTPROC_" + str(statusData.jobID) + "_" + str(gageID) + ".err"
-            try:
-                p3 = subprocess.Popen([cmd],shell=True)
-                time.sleep(1)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro Calib job for gage: " + str(gage)
-                raise
+        sched = schedMod.getScheduler(statusData.analysisRunType)
+        try:
+            generatePostProcScript(statusData,gageID,workDir)
+        except:
+            statusData.errMsg = "ERROR: Unable to create sensitivity post-processing script for gage: " + str(gage)
+            raise
+        statusName = sched.statusName("WH_SENS_POSTPROC_" + str(statusData.jobID) + "_" + str(gageID),\
+                                      "SPOS" + str(statusData.jobID) + str(gageID))
+        try:
+            jobTmp = sched.submit(statusData,workDir + "/run_WH_SENS_POSTPROC.sh",workDir + "/WH_SENS_POSTPROC_" + \
+                                  str(statusData.jobID) + "_" + str(gageID),statusData.queNameAnalysis,statusName)
+            sched.trackJob(pbsJobId,basinNum,jobTmp)
+        except:
+            statusData.errMsg = "ERROR: Unable to launch sensitivity post-processing job for gage: " + str(gage)
+            raise
         try:
             open(runFlag,'a').close()
         except:
             statusData.errMsg = "ERROR: Unable to create: " + lockFile
             raise
             
-    time.sleep(1)
-            
+# Status values of sensitivity iterations with a model simulation in flight.
+runStates = [0.5,-0.25,-0.5]
+
+def runsInFlight(keySlot):
+    """
+    Generic function to count the sensitivity iterations in a status array
+    with a model simulation in flight.
+    """
+    return int(np.in1d(np.asarray(keySlot).ravel(),runStates).sum())
+    
 def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbsJobId,pbsCollectId):
     """
     Function for running the sensitivity analysis for a given basin. 
@@ -419,61 +375,20 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
             statusData.errMsg = "ERROR: Unable to generate sensitivity pre-processing R namelist"
             raise
     
-    if statusData.jobRunType == 1:
-        # If BSUB run script doesn't exist, create it here.
-        bsubFile = runDir + "/run_WH.sh"
-        if not os.path.isfile(bsubFile):
-            try:
-                generateBsubScript(statusData,int(gageID),runDir,gageMeta,iteration)
-            except:
-                raise
-    if statusData.jobRunType == 2:
-        pbsFile = runDir + "/run_WH.sh"
-        if not os.path.isfile(pbsFile):
-            try:
-                generatePbsScript(statusData,int(gageID),runDir,gageMeta,iteration)
-            except:
-                raise
-    if statusData.jobRunType == 3:
-        slurmFile = runDir + "/run_WH.sh"
-        if not os.path.isfile(slurmFile):
-            try:
-                generateSlurmScript(statusData,int(gageID),runDir,gageMeta,iteration)
-            except:
-                raise
-    if statusData.jobRunType == 4 or statusData.jobRunType == 5:
-        # If run script doesn't exist, create it here.
-        runScript = runDir + "/run_WH.sh"
-        if not os.path.isfile(runScript):
-            try:
-                generateMpiScript(statusData,int(gageID),runDir,gageMeta,iteration)
-            except:
-                raise
-                
-    if statusData.analysisRunType == 1:
-        collectScript = runDir + "/run_collection.sh"
-        try:
-            generateBsubCollectScript(statusData,int(gageID),runDir,gageMeta,iteration,workDir)
-        except:
-            raise
-    if statusData.analysisRunType == 2:
-        collectScript = runDir + "/run_collection.sh"
+    # If the run script doesn't exist, create it here.
+    runScript = runDir + "/run_WH.sh"
+    if not os.path.isfile(runScript):
         try:
-            generatePbsCollectScript(statusData,int(gageID),runDir,gageMeta,iteration,workDir)
-        except:
-            raise
-    if statusData.analysisRunType == 3:
-        collectScript = runDir + "/run_collection.sh"
-        try:
-            generateSlurmCollectScript(statusData,int(gageID),runDir,gageMeta,iteration,workDir)
-        except:
-            raise
-    if statusData.analysisRunType == 4 or statusData.analysisRunType == 5:
-        collectScript = runDir + "/SCOL" + str(statusData.jobID) + str(gageID) + str(iteration)
-        try:
-            generateMpiCollectScript(statusData,int(gageID),runDir,gageMeta,iteration,workDir)
+            generateRunScript(statusData,int(gageID),runDir,gageMeta,iteration)
         except:
             raise
+                
+    schedAnalysis = schedMod.getScheduler(statusData.analysisRunType)
+    collectScript = runDir + "/run_collection.sh"
+    try:
+        generateCollectScript(statusData,int(gageID),runDir,gageMeta,iteration,workDir)
+    except:
+        raise
             
     # Calculate datetime objects
     begDate = statusData.bSensDate
@@ -732,27 +647,14 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
                 raise
                 
         # Fire off model.
-        if statusData.jobRunType == 1:
-            cmd = "bsub < " + runDir + "/run_WH.sh"
-        if statusData.jobRunType == 2:
-            try:
-                jobTmp = subprocess.check_output(['qsub',runDir + '/run_WH.sh'])
-                pbsJobId[basinNum,iteration] = int(jobTmp.split('.')[0])
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + \
-                                    str(gageMeta.gage[basinNum]) + " Iteration: " + str(iteration)
-                raise
-        if statusData.jobRunType == 3 or statusData.analysisRunType == 6:
-            cmd = "sbatch " + runDir + "/run_WH.sh"
-        if statusData.jobRunType == 4 or statusData.jobRunType == 5:
-            cmd = runDir + "/run_WH.sh 1>" + runDir + "/WH_" + \
-                  str(statusData.jobID) + "_" + str(gageID) + ".out" + \
-                  ' 2>' + runDir + "/WH_" + str(statusData.jobID) + "_" + str(gageID) + ".err"
+        sched = schedMod.getScheduler(statusData.jobRunType)
+        statusName = sched.statusName("WHS" + str(statusData.jobID) + str(gageID) + str(iteration),\
+                                      "WHS" + str(statusData.jobID) + str(gageID) + str(iteration))
         try:
-            if statusData.jobRunType == 1 or statusData.jobRunType == 3:
-                subprocess.call(cmd,shell=True)
-            if statusData.jobRunType == 4 or statusData.jobRunType == 5:
-                p = subprocess.Popen([cmd],shell=True)
+            jobTmp = sched.submit(statusData,runDir + "/run_WH.sh",runDir + "/WH_" + \
+                                  str(statusData.jobID) + "_" + str(gageID),statusData.queName,statusName,
+                                  iteration=iteration)
+            sched.trackJob(pbsJobId,(basinNum,iteration),jobTmp)
         except:
             statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + \
                                 str(gageMeta.gage[basinNum]) + " Iteration: " + str(iteration)
@@ -811,27 +713,14 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
                 raise
                 
         # Fire off model.
-        if statusData.jobRunType == 1:
-            cmd = "bsub < " + runDir + "/run_WH.sh"
-        if statusData.jobRunType == 2:
-            try:
-                jobTmp = subprocess.check_output(['qsub',runDir + '/run_WH.sh'])
-                pbsJobId[basinNum,iteration] = int(jobTmp.split('.')[0])
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + \
-                                    str(gageMeta.gage[basinNum]) + " Iteration: " + str(iteration)
-                raise
-        if statusData.jobRunType == 3 or statusData.analysisRunType == 6:
-            cmd = "sbatch " + runDir + "/run_WH.sh"
-        if statusData.jobRunType == 4 or statusData.jobRunType == 5:
-            cmd = runDir + "/run_WH.sh 1>" + runDir + "/WH_" + \
-                  str(statusData.jobID) + "_" + str(gageID) + ".out" + \
-                  ' 2>' + runDir + "/WH_" + str(statusData.jobID) + "_" + str(gageID) + ".err"
+        sched = schedMod.getScheduler(statusData.jobRunType)
+        statusName = sched.statusName("WHS" + str(statusData.jobID) + str(gageID) + str(iteration),\
+                                      "WHS" + str(statusData.jobID) + str(gageID) + str(iteration))
         try:
-            if statusData.jobRunType == 1 or statusData.jobRunType == 3:
-                subprocess.call(cmd,shell=True)
-            if statusData.jobRunType == 4 or statusData.jobRunType == 5:
-                p = subprocess.Popen([cmd],shell=True)
+            jobTmp = sched.submit(statusData,runDir + "/run_WH.sh",runDir + "/WH_" + \
+                                  str(statusData.jobID) + "_" + str(gageID),statusData.queName,statusName,
+                                  iteration=iteration)
+            sched.trackJob(pbsJobId,(basinNum,iteration),jobTmp)
         except:
             statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + \
                                 str(gageMeta.gage[basinNum]) + " Iteration: " + str(iteration)
@@ -868,32 +757,26 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
                 keyStatus = -0.9
                 runFlag = False
                 
+    if keyStatus == 0.75 and not runFlag and int(statusData.streamCollect) > 0:
+        # If the streamflow was collected while the model was running, no 
+        # collection job is needed.
+        if os.path.isfile(runDir + "/" + chanobsMod.streamFlag):
+            print "STREAMFLOW COLLECTED DURING MODEL RUN"
+            open(collectComplete,'a').close()
+            keyStatus = 1.0
+            keySlot[basinNum,iteration] = 1.0
+            
     if keyStatus == 0.75 and not runFlag:
         # Ready to fire off collection program.
         print "FIRING OFF COLLECTION"
-        # Fire off model.
-        if statusData.analysisRunType == 1:
-            cmd = "bsub < " + collectScript
-        if statusData.analysisRunType == 2:
-            try:
-                jobTmp = subprocess.check_output(['qsub',collectScript])
-                pbsCollectId[basinNum,iteration] = int(jobTmp.split('.')[0])
-            except:
-                statusData.errMsg = "ERROR: Unable to launch collection job for gage: " + \
-                                    str(gageMeta.gage[basinNum]) + " Iteration: " + str(iteration)
-                raise
-        if statusData.analysisRunType == 3 or statusData.analysisRunType == 6:
-            cmd = "sbatch " + collectScript
-        if statusData.analysisRunType == 4 or statusData.analysisRunType == 5:
-            cmd = collectScript + " 1>" + runDir + "/SCOL_" + \
-                  str(statusData.jobID) + "_" + str(gageID) + "_" + str(iteration) + ".out" + \
-                  ' 2>' + runDir + "/SCOL_" + str(statusData.jobID) + "_" + \
-                  str(gageID) + "_" + str(iteration) + ".err"
+        # Fire off collection program.
+        statusName = schedAnalysis.statusName("WH_SENS_COLLECT_" + str(statusData.jobID) + "_" + str(gageID) + "_" + str(iteration),\
+                                              "SCOL" + str(statusData.jobID) + str(gageID) + str(iteration))
         try:
-            if statusData.analysisRunType == 1 or statusData.analysisRunType == 3:
-                subprocess.call(cmd,shell=True)
-            if statusData.analysisRunType == 4 or statusData.analysisRunType == 5:
-                p = subprocess.Popen([cmd],shell=True)
+            jobTmp = schedAnalysis.submit(statusData,collectScript,runDir + "/SCOL_" + \
+                                          str(statusData.jobID) + "_" + str(gageID) + "_" + str(iteration),statusData.queNameAnalysis,statusName,
+                                          iteration=iteration)
+            schedAnalysis.trackJob(pbsCollectId,(basinNum,iteration),jobTmp)
         except:
             statusData.errMsg = "ERROR: Unable to launch collection job for gage: " + \
                                 str(gageMeta.gage[basinNum]) + " Iteration: " + str(iteration)
@@ -902,6 +785,14 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,iteration,pbs
         keyStatus = 0.9
         keySlot[basinNum,iteration] = 0.9
         
+    if keyStatus == 1.0:
+        # Place the streamflow of the completed run into the flow archive.
+        try:
+            archiveMod.archiveRun(statusData,"SENS",int(statusData.nSensIter),statusData.bSensEvalDate,
+                                  statusData.eSensDate,basinNum,iteration,runDir,gageMeta.comID)
+        except:
+            raise
+        
     # Update job status in the Database table.
     try:
         db.updateSensIterationStatus(statusData,int(gageMeta.gageID),iteration,str(gageMeta.gage),keyStatus)
@@ -959,6 +850,13 @@ def genRNameList(jobData,workDir,gageMeta,gage):
         inStr = "obsFile <- \"" + workDir + "/OBS/obsStrData.Rdata\"\n"
         fileObj.write(inStr)
         fileObj.write("\n")
+        fileObj.write("# Program calculating the metrics of all runs, and the job directory\n")
+        fileObj.write("# holding the flow archive it reads the simulated streamflow from\n")
+        inStr = "metricsProgram <- \"" + metricsMod.metricsProgram + "\"\n"
+        fileObj.write(inStr)
+        inStr = "jobDir <- \"" + os.path.dirname(os.path.dirname(workDir)) + "\"\n"
+        fileObj.write(inStr)
+        fileObj.write("\n")
         fileObj.write("# Start date for evaluation period (e.g. after spinup period)\n")
         inStr = "startDate <- as.POSIXct(\"" + jobData.bSensEvalDate.strftime('%Y-%m-%d') + "\", " + \
                 "format=\"%Y-%m-%d\", tz=\"UTC\")\n"
@@ -979,437 +877,97 @@ def genRNameList(jobData,workDir,gageMeta,gage):
         jobData.errMsg = "ERROR: Failure to create: " + rNameList
         raise
         
-def generateBsubPreProcScript(jobData,gageID,runDir,workDir,gageMeta,staticData):
+def analysisSpec(jobData,jobName,mpiName,workDir,exe,wallTime):
     """
-    Generic Function function to create BSUB script for running R
-    sensitivity pre-processing routines.
+    Generic function to return the job specification of one of the R
+    sensitivity analysis jobs for a basin. The shell script ran by the job
+    is ran serially.
     """
-    
-    outFile1 = workDir + "/run_WH_SENS_PREPROC.sh"
-    
-    if os.path.isfile(outFile1):
-        # We are just going to manually over-write the file everytime to be safe.
-        os.remove(outFile1)
-    
-    if not os.path.isfile(outFile1):
-        try:
-            fileObj = open(outFile1,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('#\n')
-            fileObj.write('# LSF Batch Script to Run WRF-Hydro Calibration R Code\n')
-            fileObj.write('#\n')
-            if len(jobData.acctKey.strip()) > 0:
-                inStr = "#BSUB -P " + str(jobData.acctKey) + '\n'
-                fileObj.write(inStr)
-            inStr = "#BSUB -n 1\n"
-            fileObj.write(inStr)
-            inStr = "#BSUB -J WH_SENS_PREPROC_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
-            fileObj.write(inStr)
-            inStr = '#BSUB -o ' + workDir + '/%J.out\n'
-            fileObj.write(inStr)
-            inStr = '#BSUB -e ' + workDir + '/%J.err\n'
-            fileObj.write(inStr)
-            fileObj.write('#BSUB -W 1:00\n')
-            if len(jobData.queNameAnalysis.strip()) > 0:
-                inStr = '#BSUB -q ' + str(jobData.queNameAnalysis) + '\n'
-                fileObj.write(inStr)
-            # Temporary handling of Cheyenne/Geyser environment for NCAR.
-            fileObj.write('\n')
-            inStr = 'cd ' + workDir + '\n'
-            fileObj.write(inStr)
-            fileObj.write('./sensPreProc.sh\n')
-            fileObj.close
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile1
-            raise    
-            
-    outFile2 = workDir + "/sensPreProc.sh"
-    
-    runRProgram = workDir + "/sens_workflow_pre.R"
-        
-    if not os.path.isfile(outFile2):
-        # This is the file that will run the R code first to generate params_new.txt and
-        # params_stats.txt. Python is called next, which will read in 
-        try:
-            fileObj = open(outFile2,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('Rscript ' + runRProgram + '\n')
-            fileObj.write('python ' + workDir + '/adjust_parameters_sensitivity.py ' + gageMeta.fullDom + \
-                          ' ' + gageMeta.hydroSpatial + ' ' + gageMeta.soilFile + ' ' + \
-                          gageMeta.gwFile + ' ' + workDir + ' ' + str(jobData.nSensIter) + ' ' + \
-                          str(staticData.gwBaseFlag) + ' ' + str(staticData.chnRtOpt) + ' \n')
-            fileObj.write('exit\n')
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile2
-            raise
-            
-    # Make shell script an executable.
-    cmd = 'chmod +x ' + outFile2
-    try:
-        subprocess.call(cmd,shell=True)
-    except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile2 + " to an executable."
-        raise
-        
-def generatePbsPreProcScript(jobData,gageID,runDir,workDir,gageMeta,staticData):
+    spec = schedMod.jobSpec()
+    spec.jobName = jobName
+    spec.mpiName = mpiName
+    spec.title = "WRF-Hydro Calibration R Code"
+    spec.workDir = workDir
+    spec.exe = exe
+    spec.parallel = False
+    spec.nCores = 1
+    spec.nNodes = 1
+    spec.wallTime = wallTime
+    spec.queName = jobData.queNameAnalysis
+    return spec
+    
+def writeCmdScript(jobData,outFile,cmds,spec):
     """
-    Generic Function function to create PBS script for running R
-    pre-processing routines.
+    Generic function to create the shell script ran by one of the R
+    sensitivity analysis jobs, if it does not already exist. For
+    mpiexec/mpirun, the script is ran through a symbolic link named
+    after the job, so the job can be found in the process table.
     """
-    
-    outFile1 = workDir + "/run_WH_SENS_PREPROC.sh"
-    
-    if os.path.isfile(outFile1):
-        # We are just going to manually over-write the file everytime to be safe.
-        os.remove(outFile1)
-    
-    if not os.path.isfile(outFile1):
-        try:
-            fileObj = open(outFile1,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('#\n')
-            fileObj.write('# PBS Batch Script to Run WRF-Hydro Calibration R Code\n')
-            fileObj.write('#\n')
-            if len(jobData.acctKey.strip()) > 0:
-                inStr = "#PBS -A " + str(jobData.acctKey) + '\n'
-                fileObj.write(inStr)
-            inStr = "#PBS -N WH_SENS_PREPROC_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
-            fileObj.write(inStr)
-            inStr = '#PBS -o ' + workDir + '/WH_SENS_PREPROC_' + str(jobData.jobID) + '_' + str(gageID) + '.out\n'
-            fileObj.write(inStr)
-            inStr = '#PBS -e ' + workDir + '/WH_SENS_PREPROC_' + str(jobData.jobID) + '_' + str(gageID) + '.err\n'
-            fileObj.write(inStr)
-            inStr = "#PBS -l select=1:ncpus=1:mpiprocs=1\n"
-            fileObj.write(inStr)
-            fileObj.write('#PBS -l walltime=01:00:00\n')
-            if len(jobData.queNameAnalysis.strip()) > 0:
-                inStr = '#PBS -q ' + str(jobData.queNameAnalysis) + '\n'
-                fileObj.write(inStr)
-            fileObj.write('\n')
-            inStr = 'cd ' + workDir + '\n'
-            fileObj.write(inStr)
-            fileObj.write('./sensPreProc.sh\n')
-            fileObj.close
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile1
-            raise    
-            
-    outFile2 = workDir + "/sensPreProc.sh"
-    
-    runRProgram = workDir + "/sens_workflow_pre.R"
-        
-    if not os.path.isfile(outFile2):
-        # This is the file that will run the R code first to generate params_new.txt and
-        # params_stats.txt. Python is called next, which will read in 
+    if not os.path.isfile(outFile):
         try:
-            fileObj = open(outFile2,'w')
+            fileObj = open(outFile,'w')
             fileObj.write('#!/bin/bash\n')
-            fileObj.write('Rscript ' + runRProgram + '\n')
-            fileObj.write('python ' + workDir + '/adjust_parameters_sensitivity.py ' + gageMeta.fullDom + \
-                          ' ' + gageMeta.hydroSpatial + ' ' + gageMeta.soilFile + ' ' + \
-                          gageMeta.gwFile + ' ' + workDir + ' ' + str(jobData.nSensIter) + ' ' + \
-                          str(staticData.gwBaseFlag) + ' ' + str(staticData.chnRtOpt) + ' \n')
+            for inStr in cmds:
+                fileObj.write(inStr + '\n')
             fileObj.write('exit\n')
+            fileObj.close()
         except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile2
+            jobData.errMsg = "ERROR: Failure to create: " + outFile
             raise
             
     # Make shell script an executable.
-    cmd = 'chmod +x ' + outFile2
+    cmd = 'chmod +x ' + outFile
     try:
         subprocess.call(cmd,shell=True)
     except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile2 + " to an executable."
+        jobData.errMsg = "ERROR: Failure to convert: " + outFile + " to an executable."
         raise
         
-def generateSlurmPreProcScript(jobData,gageID,runDir,workDir,gageMeta,staticData):
+    # Make symbolic link to the shell script, which will be called by
+    # mpiexec/mpirun.
+    outLink = spec.workDir + '/' + spec.mpiName
+    if schedMod.getScheduler(jobData.analysisRunType).name == 'MPI':
+        if not os.path.islink(outLink):
+            try:
+                os.symlink(outFile,outLink)
+            except:
+                jobData.errMsg = "ERROR: Failure to create symbolic link: " + outLink
+                raise
+                
+def generatePreProcScript(jobData,gageID,workDir,gageMeta,staticData):
     """
-    Generic Function function to create Slurm script for running R
-    pre-processing routines. 
+    Generic function to create the script submitted through the scheduler
+    backend for running the R sensitivity pre-processing routines, and the
+    shell script it runs to generate the parameter sets with R and Python.
     """
-    
     outFile1 = workDir + "/run_WH_SENS_PREPROC.sh"
     
     if os.path.isfile(outFile1):
         # We are just going to manually over-write the file everytime to be safe.
         os.remove(outFile1)
-    
-    if not os.path.isfile(outFile1):
-        try:
-            fileObj = open(outFile1,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('#\n')
-            fileObj.write('# Slurm Batch Script to Run WRF-Hydro Calibration R Code\n')
-            fileObj.write('#\n')
-            if len(jobData.acctKey.strip()) > 0:
-                inStr = "#SBATCH -A " + str(jobData.acctKey) + '\n'
-                fileObj.write(inStr)
-            inStr = "#SBATCH -J WH_SENS_PREPROC_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
-            fileObj.write(inStr)
-            inStr = '#SBATCH -o ' + workDir + '/WH_SENS_PREPROC_' + str(jobData.jobID) + '_' + str(gageID) + '.out\n'
-            fileObj.write(inStr)
-            inStr = '#SBATCH -e ' + workDir + '/WH_SENS_PREPROC_' + str(jobData.jobID) + '_' + str(gageID) + '.err\n'
-            fileObj.write(inStr)
-            inStr = "#SBATCH -N 1\n"
-            fileObj.write(inStr)
-            fileObj.write('#SBATCH -t 01:00:00\n')
-            if len(jobData.queNameAnalysis.strip()) > 0:
-                inStr = '#SBATCH -p ' + str(jobData.queNameAnalysis) + '\n'
-                fileObj.write(inStr)
-            fileObj.write('\n')
-            inStr = 'cd ' + workDir + '\n'
-            fileObj.write(inStr)
-            fileObj.write('./sensPreProc.sh\n')
-            fileObj.close
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile1
-            raise    
-            
-    outFile2 = workDir + "/sensPreProc.sh"
-    
-    runRProgram = workDir + "/sens_workflow_pre.R"
-        
-    if not os.path.isfile(outFile2):
-        # This is the file that will run the R code first to generate params_new.txt and
-        # params_stats.txt. Python is called next, which will read in 
-        try:
-            fileObj = open(outFile2,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('Rscript ' + runRProgram + '\n')
-            fileObj.write('python ' + workDir + '/adjust_parameters_sensitivity.py ' + gageMeta.fullDom + \
-                          ' ' + gageMeta.hydroSpatial + ' ' + gageMeta.soilFile + ' ' + \
-                          gageMeta.gwFile + ' ' + workDir + ' ' + str(jobData.nSensIter) + ' ' + \
-                          str(staticData.gwBaseFlag) + ' ' + str(staticData.chnRtOpt) + ' \n')
-            fileObj.write('exit\n')
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile2
-            raise
-            
-    # Make shell script an executable.
-    cmd = 'chmod +x ' + outFile2
-    try:
-        subprocess.call(cmd,shell=True)
-    except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile2 + " to an executable."
-        raise
-        
-def generateMpiPreProcScript(jobData,gageID,runDir,workDir,gageMeta,staticData):
-    """
-    Generic function to create mpiexec/mpirun script for running R pre-processing
-    routines.
-    """
-    
-    outFile1 = workDir + "/run_WH_SENS_PREPROC.sh"
-    
-    if os.path.isfile(outFile1):
-        # We are just gonig to manually over-write the file everytime to be safe.
-        os.remove(outFile1)
-        
-    if not os.path.isfile(outFile1):
-        try:
-            fileObj = open(outFile1,'w')
-            fileObj.write('#!/bin/bash\n')
-            inStr = 'cd ' + workDir + '\n'
-            fileObj.write(inStr)
-            if jobData.analysisRunType == 4:
-                inStr = 'mpiexec -n 1 ./SPRE' + \
-                str(jobData.jobID) + str(gageID) +'\n'
-            if jobData.analysisRunType == 5:
-                inStr = 'mpirun -np 1 ./SPRE' + \
-                str(jobData.jobID) + str(gageID) +'\n'
-            fileObj.write(inStr)
-            fileObj.close
-        except:
-            jobData.errMsg = "ERROR: Failure to create " + outFile1
-            raise
-            
-    # Make the file an executable.
-    cmd = "chmod +x " + outFile1
-    try:
-        subprocess.call(cmd,shell=True)
-    except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile1 + " to an executable."
-        raise
-            
-    outFile2 = workDir + '/sensPreProc.sh'
-    outLink2 = workDir + '/SPRE' + str(jobData.jobID) + str(gageID) 
-    
-    runRProgram = workDir + '/sens_workflow_pre.R'
-    
-    if not os.path.isfile(outFile2):
-        # This is the file that will run R code. First to generate params_new.txt and
-        # params_stats.txt. Python is called next, which will generate new parameters.
-        try:
-            fileObj = open(outFile2,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('Rscript ' + runRProgram + '\n')
-            fileObj.write('python ' + workDir + '/adjust_parameters_sensitivity.py ' + gageMeta.fullDom + \
-                          ' ' + gageMeta.hydroSpatial + ' ' + gageMeta.soilFile + ' ' + \
-                          gageMeta.gwFile + ' ' + workDir + ' ' + str(jobData.nSensIter) + ' ' + \
-                          str(staticData.gwBaseFlag) + ' ' + str(staticData.chnRtOpt) + ' \n')
-            fileObj.write('exit\n')
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile2
-            raise
-            
-    # Make shell script an executable.
-    cmd = 'chmod +x ' + outFile2
-    try:
-        subprocess.call(cmd,shell=True)
-    except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile2 + " to an executable."
-        raise
-        
-    # Make symbolic link to newly created executable, which will be called by
-    # mpiexec/mpirun.
-    if not os.path.islink(outLink2):
-        try:
-            os.symlink(outFile2,outLink2)
-        except:
-            jobData.errMsg = "ERROR: Failure to create symbolic link: " + outLink2
-            raise
-            
-def generateBsubScript(jobData,gageID,runDir,gageMeta,iteration):
-    """
-    Generic function to create a run script that will be called by bsub
-    to execute the model.
-    """
-    
-    outFile = runDir + "/run_WH.sh"
-    
-    if os.path.isfile(outFile):
-        jobData.errMsg = "ERROR: Run script: " + outFile + " already exists."
-        raise Exception()
         
+    spec = analysisSpec(jobData,"WH_SENS_PREPROC_" + str(jobData.jobID) + "_" + str(gageID),
+                        "SPRE" + str(jobData.jobID) + str(gageID),workDir,"./sensPreProc.sh",60)
     try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        fileObj.write('#\n')
-        fileObj.write('# LSF Batch Script to Run WRF-Hydro Calibration Simulations\n')
-        fileObj.write('#\n')
-        if len(jobData.acctKey.strip()) > 0:
-            inStr = "#BSUB -P " + str(jobData.acctKey) + '\n'
-            fileObj.write(inStr)
-        fileObj.write('#BSUB -x\n')
-        inStr = "#BSUB -n " + str(jobData.nCoresMod) + '\n'
-        fileObj.write(inStr)
-        inStr = "#BSUB -J WHS" + str(jobData.jobID) + str(gageID) + str(iteration) + '\n'
-        fileObj.write(inStr)
-        inStr = '#BSUB -o ' + runDir + '/%J.out\n'
-        fileObj.write(inStr)
-        inStr = '#BSUB -e ' + runDir + '/%J.err\n'
-        fileObj.write(inStr)
-        fileObj.write('#BSUB -W 8:00\n')
-        if len(jobData.queName.strip()) > 0:
-            inStr = '#BSUB -q ' + str(jobData.queName) + '\n'
-            fileObj.write(inStr)
-        fileObj.write('\n')
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        fileObj.write('mpirun.lsf ./wrf_hydro.exe\n')
-        fileObj.write(inStr)
-        fileObj.close
+        schedMod.getScheduler(jobData.analysisRunType).renderScript(jobData,outFile1,spec)
     except:
-        jobData.errMsg = "ERROR: Failure to create: " + outFile
         raise
         
-def generatePbsScript(jobData,gageID,runDir,gageMeta,iteration):
-    """
-    Generic function to create a script that will be called by qsub
-    to execute the model.
-    """
-    
-    outFile = runDir + "/run_WH.sh"
-    
-    if os.path.isfile(outFile):
-        jobData.errMsg = "ERROR: Run script: " + outFile + " already exists."
-        raise Exception()
-        
-    try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        fileObj.write('#\n')
-        fileObj.write('# PBS Batch Script to Run WH Calibration Simulations\n')
-        fileObj.write('#\n')
-        inStr = "#PBS -N WHS" + str(jobData.jobID) + str(gageID) + str(iteration) + '\n'
-        fileObj.write(inStr)
-        if len(jobData.acctKey.strip()) > 0:
-            inStr = "#PBS -A " + str(jobData.acctKey) + '\n'
-            fileObj.write(inStr)
-        inStr = "#PBS -l walltime=08:00:00\n"
-        fileObj.write(inStr)
-        if len(jobData.queName.strip()) > 0:
-            inStr = "#PBS -q " + str(jobData.queName) + "\n"
-            fileObj.write(inStr)
-        inStr = "#PBS -o " + runDir + "/WHS" + str(jobData.jobID) + str(gageID) + str(iteration) + ".out\n"
-        fileObj.write(inStr)
-        inStr = "#PBS -e " + runDir + "/WHS" + str(jobData.jobID) + str(gageID) + str(iteration) + ".err\n"
-        fileObj.write(inStr)
-        nCoresPerNode = int(jobData.nCoresMod/jobData.nNodesMod)
-        inStr = "#PBS -l select=" + str(jobData.nNodesMod) + ":ncpus=" + str(nCoresPerNode) + \
-                ":mpiprocs=" + str(nCoresPerNode) + "\n"
-        fileObj.write(inStr)
-        fileObj.write("\n")
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        fileObj.write('mpiexec_mpt ./wrf_hydro.exe\n')
-        fileObj.write(inStr)
-        fileObj.close
-    except:
-        jobData.errMsg = "ERROR: Failure to create: " + outFile
-        raise
-        
-def generateSlurmScript(jobData,gageID,runDir,gageMeta,iteration):
-    """
-    Generic function to create a script that will be called by Slurm
-    to execute the model.
-    """
-
-    outFile = runDir + "/run_WH.sh"
-
-    if os.path.isfile(outFile):
-        jobData.errMsg = "ERROR: Run script: " + outFile + " already exists."
-        raise Exception()
-        
+    runRProgram = workDir + "/sens_workflow_pre.R"
+    cmds = ['Rscript ' + runRProgram,
+            'python ' + workDir + '/adjust_parameters_sensitivity.py ' + gageMeta.fullDom + \
+            ' ' + gageMeta.hydroSpatial + ' ' + gageMeta.soilFile + ' ' + \
+            gageMeta.gwFile + ' ' + workDir + ' ' + str(jobData.nSensIter) + ' ' + \
+            str(staticData.gwBaseFlag) + ' ' + str(staticData.chnRtOpt)]
     try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        fileObj.write('#\n')
-        fileObj.write('# Slurm Batch Script to Run WH Calibration Simulations\n')
-        fileObj.write('#\n')
-        inStr = '#SBATCH -J WHS_' + str(jobData.jobID) + str(gageID) + str(iteration) + '\n'
-        fileObj.write(inStr)
-        if len(jobData.acctKey.strip()) > 0:
-            inStr = '#SBATCH -A ' + str(jobData.acctKey) + '\n'
-            fileObj.write(inStr)
-        inStr = '#SBATCH -t 08:00:00\n'
-        fileObj.write(inStr)
-        if len(jobData.queName.strip()) > 0:
-            inStr = '#SBATCH -p ' + str(jobData.queName) + '\n'
-            fileObj.write(inStr)
-        inStr = "#SBATCH -o " + runDir + "/WHS_" + str(jobData.jobID) + str(gageID) + str(iteration) + ".out\n"
-        fileObj.write(inStr)
-        inStr = "#SBATCH -e " + runDir + "/WHS_" + str(jobData.jobID) + str(gageID) + str(iteration) + ".err\n"
-        fileObj.write(inStr)
-        inStr = '#SBATCH -N ' + str(jobData.nNodesMod) + '\n'
-        fileObj.write(inStr)
-        fileObj.write('\n')
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        if jobData.jobRunType == 3:
-            inStr = 'srun -n ' + str(jobData.nCoresMod) + ' ./wrf_hydro.exe\n'
-        if jobData.jobRunType == 6:
-            inStr = 'mpirun -n ' + str(jobData.nCoresMod) + ' ./wrf_hydro.exe\n'
-        fileObj.write(inStr)
-        fileObj.close        
+        writeCmdScript(jobData,workDir + "/sensPreProc.sh",cmds,spec)
     except:
-        jobData.errMsg = "ERROR: Failure to create: " + outFile
         raise
         
-def generateMpiScript(jobData,gageID,runDir,gageMeta,iteration):
+def generateRunScript(jobData,gageID,runDir,gageMeta,iteration):
     """
-    Generic function to create a run script that will use mpiexec/mpirun to execute
-    the model.
+    Generic function to create a run script that will be submitted through
+    the scheduler backend to execute the model for a sensitivity iteration.
     """
     
     outFile = runDir + "/run_WH.sh"
@@ -1418,440 +976,66 @@ def generateMpiScript(jobData,gageID,runDir,gageMeta,iteration):
         jobData.errMsg = "ERROR: Run script: " + outFile + " already exists."
         raise Exception()
         
+    spec = schedMod.jobSpec()
+    spec.jobName = "WHS" + str(jobData.jobID) + str(gageID) + str(iteration)
+    spec.mpiName = spec.jobName
+    spec.workDir = runDir
+    spec.exe = "./wrf_hydro.exe"
+    spec.queName = jobData.queName
+    spec.exclusive = True
     try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        if jobData.jobRunType == 4:
-            inStr = 'mpiexec -n ' + str(int(jobData.nCoresMod)) + ' ./WHS' + \
-                    str(jobData.jobID) + str(gageID) + str(iteration) + '\n'
-        if jobData.jobRunType == 5:
-            inStr = 'mpirun -np ' + str(int(jobData.nCoresMod)) + ' ./WHS' + \
-                    str(jobData.jobID) + str(gageID) + str(iteration) + '\n'
-        fileObj.write(inStr)
-        inStr = "Rscript " + runDir + "/../Collect_simulated_flow.R " + runDir + "\n"
-        fileObj.write(inStr)
-        fileObj.close
+        sizeMod.sizeModel(jobData,gageMeta,spec,jobData.bSensDate,jobData.eSensDate)
     except:
-        jobData.errMsg = "ERROR: Failure to create: " + outFile
         raise
+    if int(jobData.streamCollect) > 0:
+        streamCmds = chanobsMod.streamCmds(jobData,gageMeta.comID,jobData.bSensEvalDate)
+        spec.preCmds.extend(streamCmds[0])
+        spec.postCmds.extend(streamCmds[1])
     
-    # Make the file an executable.
-    cmd = "chmod +x " + outFile
     try:
-        subprocess.call(cmd,shell=True)
+        schedMod.getScheduler(jobData.jobRunType).renderScript(jobData,outFile,spec)
     except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile + " to an executable."
         raise
         
-def generateBsubPostProcScript(jobData,gageID,runDir,workDir,gageMeta,staticData):
+def generatePostProcScript(jobData,gageID,workDir):
     """
-    Generic Function function to create BSUB script for running R
-    sensitivity post-processing routines.
+    Generic function to create the script submitted through the scheduler
+    backend for running the R sensitivity post-processing routines, and the
+    shell script it runs.
     """
-    
     outFile1 = workDir + "/run_WH_SENS_POSTPROC.sh"
     
     if os.path.isfile(outFile1):
         # We are just going to manually over-write the file everytime to be safe.
         os.remove(outFile1)
-    
-    if not os.path.isfile(outFile1):
-        try:
-            fileObj = open(outFile1,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('#\n')
-            fileObj.write('# LSF Batch Script to Run WRF-Hydro Calibration R Code\n')
-            fileObj.write('#\n')
-            if len(jobData.acctKey.strip()) > 0:
-                inStr = "#BSUB -P " + str(jobData.acctKey) + '\n'
-                fileObj.write(inStr)
-            inStr = "#BSUB -n 1\n"
-            fileObj.write(inStr)
-            inStr = "#BSUB -J WH_SENS_POSTPROC_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
-            fileObj.write(inStr)
-            inStr = '#BSUB -o ' + workDir + '/%J.out\n'
-            fileObj.write(inStr)
-            inStr = '#BSUB -e ' + workDir + '/%J.err\n'
-            fileObj.write(inStr)
-            fileObj.write('#BSUB -W 3:00\n')
-            if len(jobData.queNameAnalysis.strip()) > 0:
-                inStr = '#BSUB -q ' + str(jobData.queNameAnalysis) + '\n'
-                fileObj.write(inStr)
-            fileObj.write('\n')
-            inStr = 'cd ' + workDir + '\n'
-            fileObj.write(inStr)
-            fileObj.write('./sensPreProc.sh\n')
-            fileObj.close
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile1
-            raise    
-            
-    outFile2 = workDir + "/sensPreProc.sh"
-    
-    runRProgram = workDir + "/sens_workflow_pre.R"
         
-    if not os.path.isfile(outFile2):
-        # This is the file that will run the R code first to generate params_new.txt and
-        # params_stats.txt. Python is called next, which will read in 
-        try:
-            fileObj = open(outFile2,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('Rscript ' + runRProgram + '\n')
-            fileObj.write('python ' + workDir + '/adjust_parameters_sensitivity.py ' + gageMeta.fullDom + \
-                          ' ' + gageMeta.hydroSpatial + ' ' + gageMeta.soilFile + ' ' + \
-                          gageMeta.gwFile + ' ' + workDir + ' ' + str(jobData.nSensIter) + ' ' + \
-                          str(staticData.gwBaseFlag) + ' ' + str(staticData.chnRtOpt) + ' \n')
-            fileObj.write('exit\n')
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile2
-            raise
-            
-    # Make shell script an executable.
-    cmd = 'chmod +x ' + outFile2
+    spec = analysisSpec(jobData,"WH_SENS_POSTPROC_" + str(jobData.jobID) + "_" + str(gageID),
+                        "SPOS" + str(jobData.jobID) + str(gageID),workDir,"./sensPostProc.sh",180)
     try:
-        subprocess.call(cmd,shell=True)
+        schedMod.getScheduler(jobData.analysisRunType).renderScript(jobData,outFile1,spec)
     except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile2 + " to an executable."
         raise
         
-def generatePbsPostProcScript(jobData,gageID,runDir,workDir,gageMeta):
-    """
-    Generic Function function to create PBS script for running R
-    post-processing routines.
-    """
-    
-    outFile1 = workDir + "/run_WH_SENS_POSTPROC.sh"
-    
-    if os.path.isfile(outFile1):
-        # We are just going to manually over-write the file everytime to be safe.
-        os.remove(outFile1)
-    
-    if not os.path.isfile(outFile1):
-        try:
-            fileObj = open(outFile1,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('#\n')
-            fileObj.write('# PBS Batch Script to Run WRF-Hydro Calibration R Code\n')
-            fileObj.write('#\n')
-            if len(jobData.acctKey.strip()) > 0:
-                inStr = "#PBS -A " + str(jobData.acctKey) + '\n'
-                fileObj.write(inStr)
-            inStr = "#PBS -N WH_SENS_POSTPROC_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
-            fileObj.write(inStr)
-            inStr = '#PBS -o ' + workDir + "/WH_SENS_POSTPROC_" + str(jobData.jobID) + "_" + str(gageID) + '.out\n'
-            fileObj.write(inStr)
-            inStr = '#PBS -e ' + workDir + "/WH_SENS_POSTPROC_" + str(jobData.jobID) + "_" + str(gageID) + '.err\n'
-            fileObj.write(inStr)
-            inStr = "#PBS -l select=1:ncpus=1:mpiprocs=1\n"
-            fileObj.write(inStr)
-            fileObj.write('#PBS -l walltime=03:00:00\n')
-            if len(jobData.queNameAnalysis.strip()) > 0:
-                inStr = '#PBS -q ' + str(jobData.queNameAnalysis) + '\n'
-                fileObj.write(inStr)
-            fileObj.write('\n')
-            inStr = 'cd ' + workDir + '\n'
-            fileObj.write(inStr)
-            fileObj.write('./sensPostProc.sh\n')
-            fileObj.close
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile1
-            raise    
-            
-    outFile2 = workDir + "/sensPostProc.sh"
-    
-    runRProgram = workDir + "/sens_workflow_post.R"
-        
-    if not os.path.isfile(outFile2):
-        # This is the file that will run the R code first to generate params_new.txt and
-        # params_stats.txt. Python is called next, which will read in 
-        try:
-            fileObj = open(outFile2,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('Rscript ' + runRProgram + '\n')
-            fileObj.write('exit\n')
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile2
-            raise
-            
-    # Make shell script an executable.
-    cmd = 'chmod +x ' + outFile2
-    try:
-        subprocess.call(cmd,shell=True)
-    except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile2 + " to an executable."
-        raise
-        
-def generateSlurmPostProcScript(jobData,gageID,runDir,workDir,gageMeta):
-    """
-    Generic Function function to create Slurm script for running R
-    post-processing routines. 
-    """
-    
-    outFile1 = workDir + "/run_WH_SENS_POSTPROC.sh"
-    
-    if os.path.isfile(outFile1):
-        # We are just going to manually over-write the file everytime to be safe.
-        os.remove(outFile1)
-    
-    if not os.path.isfile(outFile1):
-        try:
-            fileObj = open(outFile1,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('#\n')
-            fileObj.write('# Slurm Batch Script to Run WRF-Hydro Calibration R Code\n')
-            fileObj.write('#\n')
-            if len(jobData.acctKey.strip()) > 0:
-                inStr = "#SBATCH -A " + str(jobData.acctKey) + '\n'
-                fileObj.write(inStr)
-            inStr = "#SBATCH -J WH_SENS_POSTPROC_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
-            fileObj.write(inStr)
-            inStr = '#SBATCH -o ' + workDir + '/WH_SENS_POSTPROC_' + str(jobData.jobID) + '_' + str(gageID) + '.out\n'
-            fileObj.write(inStr)
-            inStr = '#SBATCH -e ' + workDir + '/WH_SENS_POSTPROC_' + str(jobData.jobID) + '_' + str(gageID) + '.err\n'
-            fileObj.write(inStr)
-            inStr = "#SBATCH -N 1\n"
-            fileObj.write(inStr)
-            fileObj.write('#SBATCH -t 03:00:00\n')
-            if len(jobData.queNameAnalysis.strip()) > 0:
-                inStr = '#SBATCH -p ' + str(jobData.queNameAnalysis) + '\n'
-                fileObj.write(inStr)
-            fileObj.write('\n')
-            inStr = 'cd ' + workDir + '\n'
-            fileObj.write(inStr)
-            fileObj.write('./sensPostProc.sh\n')
-            fileObj.close
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile1
-            raise    
-            
-    outFile2 = workDir + "/sensPostProc.sh"
-    
     runRProgram = workDir + "/sens_workflow_post.R"
-        
-    if not os.path.isfile(outFile2):
-        # This is the file that will run the R code first to generate params_new.txt and
-        # params_stats.txt. Python is called next, which will read in 
-        try:
-            fileObj = open(outFile2,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('Rscript ' + runRProgram + '\n')
-            fileObj.write('exit\n')
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile2
-            raise
-            
-    # Make shell script an executable.
-    cmd = 'chmod +x ' + outFile2
-    try:
-        subprocess.call(cmd,shell=True)
-    except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile2 + " to an executable."
-        raise
-        
-def generateMpiPostProcScript(jobData,gageID,runDir,workDir,gageMeta):
-    """
-    Generic function to create mpiexec/mpirun script for running R post-processing
-    routines.
-    """
-    
-    outFile1 = workDir + "/run_WH_SENS_POSTPROC.sh"
-    
-    if os.path.isfile(outFile1):
-        # We are just gonig to manually over-write the file everytime to be safe.
-        os.remove(outFile1)
-        
-    if not os.path.isfile(outFile1):
-        try:
-            fileObj = open(outFile1,'w')
-            fileObj.write('#!/bin/bash\n')
-            inStr = 'cd ' + workDir + '\n'
-            fileObj.write(inStr)
-            if jobData.analysisRunType == 4:
-                inStr = 'mpiexec -n 1 ./SPOS' + \
-                str(jobData.jobID) + str(gageID) +'\n'
-            if jobData.analysisRunType == 5:
-                inStr = 'mpirun -np 1 ./SPOS' + \
-                str(jobData.jobID) + str(gageID) +'\n'
-            fileObj.write(inStr)
-            fileObj.close
-        except:
-            jobData.errMsg = "ERROR: Failure to create " + outFile1
-            raise
-            
-    # Make the file an executable.
-    cmd = "chmod +x " + outFile1
-    try:
-        subprocess.call(cmd,shell=True)
-    except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile1 + " to an executable."
-        raise
-            
-    outFile2 = workDir + '/sensPostProc.sh'
-    outLink2 = workDir + '/SPOS' + str(jobData.jobID) + str(gageID) 
-    
-    runRProgram = workDir + '/sens_workflow_post.R'
-    
-    if not os.path.isfile(outFile2):
-        # This is the file that will run R code. First to generate params_new.txt and
-        # params_stats.txt. Python is called next, which will generate new parameters.
-        try:
-            fileObj = open(outFile2,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('Rscript ' + runRProgram + '\n')
-            fileObj.write('exit\n')
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile2
-            raise
-            
-    # Make shell script an executable.
-    cmd = 'chmod +x ' + outFile2
-    try:
-        subprocess.call(cmd,shell=True)
-    except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile2 + " to an executable."
-        raise
-        
-    # Make symbolic link to newly created executable, which will be called by
-    # mpiexec/mpirun.
-    if not os.path.islink(outLink2):
-        try:
-            os.symlink(outFile2,outLink2)
-        except:
-            jobData.errMsg = "ERROR: Failure to create symbolic link: " + outLink2
-            raise
-            
-def generateBsubCollectScript(jobData,gageID,runDir,gageMeta,iteration,workDir):
-    """
-    Generic function to create BSUB script for running an R program to collect
-    data into an Rdataset for sensitivity analysis.
-    """
-    
-    outFile = runDir + "/run_collection.sh"
-    
-    if os.path.isfile(outFile):
-        # We are just going to manually over-write the file to be safe.
-        os.remove(outFile)
-        
-    if not os.path.isfile(outFile): 
-        try:
-            fileObj = open(outFile,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('#\n')
-            if len(jobData.acctKey.strip()) > 0:
-                inStr = "#BSUB -P " + str(jobData.acctKey) + '\n'
-                fileObj.write(inStr)
-            inStr = "#BSUB -n 1\n"
-            fileObj.write(inStr)
-            inStr = "#BSUB -J WH_SENS_COLLECT_" + str(jobData.jobID) + "_" + \
-                    str(gageID) + '_' + str(iteration) + '\n'
-            fileObj.write(inStr)
-            inStr = '#BSUB -o ' + runDir + '/%J.out\n'
-            fileObj.write(inStr)
-            inStr = '#BSUB -e ' + runDir + '/%J.err\n'
-            fileObj.write(inStr)
-            fileObj.write('#BSUB -W 3:00\n')
-            if len(jobData.queNameAnalysis.strip()) > 0:
-                inStr = '#BSUB -q ' + str(jobData.queNameAnalysis) + '\n'
-                fileObj.write(inStr)
-            fileObj.write('\n')
-            inStr = 'cd ' + runDir + '\n'
-            fileObj.write(inStr)
-            fileObj.write('./collectOutput.sh\n')
-            fileObj.close
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile
-            raise    
-            
-    outFile2 = runDir + "/collectOutput.sh"
-    
-    runRProgram = runDir + "/Collect_simulated_flow.R"
-    
-    # Make a link to the R namelist created during pre-processing.
-    nameListR = workDir + "/namelist.sensitivity"
-    link = runDir + "/namelist.sensitivity"
-    
-    if not os.path.isfile(link):
-        if not os.path.isfile(nameListR):
-            jobData.errMsg = "ERROR: Failure to find: " + nameListR
-            raise
-        try:
-            os.symlink(nameListR,link)
-        except:
-            jobData.errMsg = "ERROR: Failure to make link: " + link
-            raise
-    
-    if not os.path.isfile(outFile2):
-        # This is the file that will run R code to collect model output into a single Rdataset
-        try:
-            fileObj = open(outFile2,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('Rscript ' + runRProgram + ' ' + runDir + '\n')
-            fileObj.write('exit\n')
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile2
-            raise
-            
-    # Make shell script an executable.
-    cmd = 'chmod +x ' + outFile2
     try:
-        subprocess.call(cmd,shell=True)
+        writeCmdScript(jobData,workDir + "/sensPostProc.sh",['Rscript ' + runRProgram],spec)
     except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile2 + " to an executable."
         raise
         
-def generatePbsCollectScript(jobData,gageID,runDir,gageMeta,iteration,workDir):
+def generateCollectScript(jobData,gageID,runDir,gageMeta,iteration,workDir):
     """
-    Generic function to create QSUB script for running an R program to collect
-    data into an Rdataset for sensitivity analysis.
+    Generic function to create the script submitted through the scheduler
+    backend for running an R program to collect data into an Rdataset for
+    sensitivity analysis, and the shell script it runs. The streamflow at
+    the gage is extracted from the model output first, using the cores of
+    the job.
     """
-    
     outFile = runDir + "/run_collection.sh"
     
     if os.path.isfile(outFile):
         # We are just going to manually over-write the file to be safe.
         os.remove(outFile)
         
-    if not os.path.isfile(outFile): 
-        try:
-            fileObj = open(outFile,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('#\n')
-            if len(jobData.acctKey.strip()) > 0:
-                inStr = "#PBS -A " + str(jobData.acctKey) + '\n'
-                fileObj.write(inStr)
-            inStr = "#PBS -N WH_SENS_COLLECT_" + str(jobData.jobID) + "_" + str(gageID) + \
-                    "_" + str(iteration) + '\n'
-            fileObj.write(inStr)
-            inStr = '#PBS -o ' + runDir + "/WH_SENS_COLLECT_" + str(jobData.jobID) + \
-                    "_" + str(gageID) + "_" + str(iteration) + '.out\n'
-            fileObj.write(inStr)
-            inStr = '#PBS -e ' + runDir + "/WH_SENS_COLLECT_" + str(jobData.jobID) + \
-                    "_" + str(gageID) + "_" + str(iteration) + '.err\n'
-            fileObj.write(inStr)
-            nCoresPerNode = int(jobData.nCoresR/jobData.nNodesR)
-            inStr = "#PBS -l select=" + str(jobData.nNodesR) + ":ncpus=" + str(nCoresPerNode) + \
-                    ":mpiprocs=" + str(nCoresPerNode) + "\n"
-            #inStr = "#PBS -l select=1:ncpus=1:mpiprocs=1\n"
-            fileObj.write(inStr)
-            fileObj.write('#PBS -l walltime=01:00:00\n')
-            if len(jobData.queNameAnalysis.strip()) > 0:
-                inStr = '#PBS -q ' + str(jobData.queNameAnalysis) + '\n'
-                fileObj.write(inStr)
-            fileObj.write('\n')
-            inStr = 'cd ' + runDir + '\n'
-            fileObj.write(inStr)
-            fileObj.write('./collectOutput.sh\n')
-            fileObj.close
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile
-            raise    
-            
-    outFile2 = runDir + "/collectOutput.sh"
-    
-    runRProgram = runDir + "/Collect_simulated_flow.R"
-    
     # Make a link to the R namelist created during pre-processing.
     nameListR = workDir + "/namelist.sensitivity"
     link = runDir + "/namelist.sensitivity"
@@ -1859,161 +1043,30 @@ def generatePbsCollectScript(jobData,gageID,runDir,gageMeta,iteration,workDir):
     if not os.path.isfile(link):
         if not os.path.isfile(nameListR):
             jobData.errMsg = "ERROR: Failure to find: " + nameListR
-            raise
+            raise Exception()
         try:
             os.symlink(nameListR,link)
         except:
             jobData.errMsg = "ERROR: Failure to make link: " + link
             raise
-    
-    if not os.path.isfile(outFile2):
-        # This is the file that will run R code to collect model output into a single Rdataset
-        try:
-            fileObj = open(outFile2,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('Rscript ' + runRProgram + ' ' + runDir + '\n')
-            fileObj.write('exit\n')
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile2
-            raise
             
-    # Make shell script an executable.
-    cmd = 'chmod +x ' + outFile2
+    spec = analysisSpec(jobData,"WH_SENS_COLLECT_" + str(jobData.jobID) + "_" + str(gageID) + "_" + str(iteration),
+                        "SCOL" + str(jobData.jobID) + str(gageID) + str(iteration),runDir,"./collectOutput.sh",180)
+    spec.nCores = jobData.nCoresR
+    spec.nNodes = jobData.nNodesR
     try:
-        subprocess.call(cmd,shell=True)
+        schedMod.getScheduler(jobData.analysisRunType).renderScript(jobData,outFile,spec)
     except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile2 + " to an executable."
         raise
         
-def generateSlurmCollectScript(jobData,gageID,runDir,gageMeta,iteration,workDir):
-    """
-    Generic function to create Slurm script for running an R program to collect
-    data into an Rdataset for sensitivity analysis.
-    """
-    
-    outFile = runDir + "/run_collection.sh"
-    
-    if os.path.isfile(outFile):
-        # We are just going to manually over-write the file to be safe.
-        os.remove(outFile)
-        
-    if not os.path.isfile(outFile): 
-        try:
-            fileObj = open(outFile,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('#\n')
-            if len(jobData.acctKey.strip()) > 0:
-                inStr = "#SBATCH -A " + str(jobData.acctKey) + '\n'
-                fileObj.write(inStr)
-            inStr = "#SBATCH -J WH_SENS_COLLECT_" + str(jobData.jobID) + "_" + \
-                    str(gageID) + "_" + str(iteration) + '\n'
-            fileObj.write(inStr)
-            inStr = '#SBATCH -o ' + runDir + '/WH_SENS_COLLECTION_' + str(jobData.jobID) + \
-                    '_' + str(gageID) + "_" + str(iteration) + '.out\n'
-            fileObj.write(inStr)
-            inStr = '#SBATCH -e ' + runDir + '/WH_SENS_COLLECTION_' + str(jobData.jobID) + \
-                    '_' + str(gageID) + "_" + str(iteration) + '.err\n'
-            fileObj.write(inStr)
-            inStr = "#SBATCH -N 1\n"
-            fileObj.write(inStr)
-            fileObj.write('#SBATCH -t 03:00:00\n')
-            if len(jobData.queNameAnalysis.strip()) > 0:
-                inStr = '#SBATCH -p ' + str(jobData.queNameAnalysis) + '\n'
-                fileObj.write(inStr)
-            fileObj.write('\n')
-            inStr = 'cd ' + runDir + '\n'
-            fileObj.write(inStr)
-            fileObj.write('./collectOutput.sh\n')
-            fileObj.close
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile
-            raise    
-            
-    outFile2 = runDir + "/collectOutput.sh"
-    
     runRProgram = runDir + "/Collect_simulated_flow.R"
-    
-    # Make a link to the R namelist created during pre-processing.
-    nameListR = workDir + "/namelist.sensitivity"
-    link = runDir + "/namelist.sensitivity"
-    
-    if not os.path.isfile(link):
-        if not os.path.isfile(nameListR):
-            jobData.errMsg = "ERROR: Failure to find: " + nameListR
-            raise
-        try:
-            os.symlink(nameListR,link)
-        except:
-            jobData.errMsg = "ERROR: Failure to make link: " + link
-            raise
-    
-    if not os.path.isfile(outFile2):
-        # This is the file that will run R code to collect model output into a single Rdataset
-        try:
-            fileObj = open(outFile2,'w')
-            fileObj.write('#!/bin/bash\n')
-            fileObj.write('Rscript ' + runRProgram + ' ' + runDir + '\n')
-            fileObj.write('exit\n')
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile2
-            raise
-            
-    # Make shell script an executable.
-    cmd = 'chmod +x ' + outFile2
+    cmds = [chanobsMod.extractCmd(runDir,gageMeta.comID,jobData.bSensEvalDate,jobData.nCoresR),
+            'Rscript ' + runRProgram + ' ' + runDir]
     try:
-        subprocess.call(cmd,shell=True)
+        writeCmdScript(jobData,runDir + "/collectOutput.sh",cmds,spec)
     except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile2 + " to an executable."
         raise
         
-def generateMpiCollectScript(jobData,gageID,runDir,gageMeta,iteration,workDir):
-    """
-    Generic function to create MPI script for running an R program to collect
-    data into an Rdataset for sensitivity analysis.
-    """
-    
-    outFile = runDir + "/SCOL" + str(jobData.jobID) + str(gageID) + str(iteration)
-    runRProgram = runDir + "/Collect_simulated_flow.R"
-    
-    # Make a link to the R namelist created during pre-processing.
-    nameListR = workDir + "/namelist.sensitivity"
-    link = runDir + "/namelist.sensitivity"
-    
-    if os.path.isfile(outFile):
-        # We are just going to manually over-write the file to be safe.
-        os.remove(outFile)
-        
-    if not os.path.isfile(link):
-        if not os.path.isfile(nameListR):
-            jobData.errMsg = "ERROR: Failure to find: " + nameListR
-            raise
-        try:
-            os.symlink(nameListR,link)
-        except:
-            jobData.errMsg = "ERROR: Failure to make link: " + link
-            raise
-        
-    if not os.path.isfile(outFile): 
-        try:
-            fileObj = open(outFile,'w')
-            fileObj.write('#!/bin/bash\n')
-            inStr = 'cd ' + runDir + '\n'
-            fileObj.write(inStr)
-            fileObj.write('Rscript ' + runRProgram + ' ' + runDir + '\n')
-            fileObj.write('exit\n')
-            fileObj.close
-        except:
-            jobData.errMsg = "ERROR: Failure to create: " + outFile
-            raise    
-            
-    # Make shell script an executable.
-    cmd = 'chmod +x ' + outFile
-    try:
-        subprocess.call(cmd,shell=True)
-    except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile + " to an executable."
-        raise
-             
 def linkToRst(statusData,gage,runDir,gageMeta,staticData):
     """
     Generic function to link to necessary restart files from the spinup.
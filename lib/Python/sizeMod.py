@@ -0,0 +1,138 @@
+# Module file containing functions for sizing the resources requested by the
+# model runs of each basin. The number of cores is chosen from the size of
+# the domain of the basin in Domain_Meta. The routing grid extents (hyd_*)
+# are converted to land grid cells through the aggregation factor, as the
+# model decomposes the domain over the land grid. The wall clock time is
+# chosen from the runtimes of previous model runs of the basin. Each model
+# run that exits successfully records it's start and end times, number of
+# cores, and number of simulated hours in MODEL_RUNTIMES.txt in the basin
+# directory, which is shared by all phases of the workflow.
+
+# Logan Karsten
+# National Center for Atmospheric Research
+# Research Applications Laboratory
+
+import os
+import math
+
+import warnings
+warnings.filterwarnings("ignore")
+
+# File in the basin directory holding the runtimes of previous model runs.
+runtimeFile = "MODEL_RUNTIMES.txt"
+# Number of the most recent model runs used to size the wall clock time.
+nHistory = 10
+# Multiple of the slowest recent runtime requested, covering variability
+# in the file system and nodes.
+wallFactor = 1.5
+# Minutes added on top of the runtime estimate for model start up.
+wallPad = 15
+
+def landCells(gageMeta):
+    """
+    Generic function to return the number of land grid cells of a basin,
+    from the routing grid extents and aggregation factor in Domain_Meta.
+    """
+    nx = abs(int(gageMeta.hydE) - int(gageMeta.hydW)) + 1
+    ny = abs(int(gageMeta.hydN) - int(gageMeta.hydS)) + 1
+    aggFact = max(int(gageMeta.aggFact),1)
+    return int(math.ceil(float(nx)/aggFact))*int(math.ceil(float(ny)/aggFact))
+
+def sizeCores(jobData,gageMeta):
+    """
+    Generic function to return the number of cores and nodes for the model
+    runs of a basin. Cores are requested for every cellsPerCore land grid
+    cells, up to nCoresModel. Nodes are filled with the number of cores per
+    node implied by nCoresModel and nNodesModel.
+    """
+    nCores = int(math.ceil(float(landCells(gageMeta))/float(jobData.cellsPerCore)))
+    nCores = max(1,min(nCores,int(jobData.nCoresMod)))
+    coresPerNode = int(math.ceil(float(jobData.nCoresMod)/float(jobData.nNodesMod)))
+    nNodes = int(math.ceil(float(nCores)/float(coresPerNode)))
+    return [nCores,nNodes]
+
+def readRuntimes(jobData,gageMeta):
+    """
+    Generic function to return the list of [startTime,endTime,nCores,nHours]
+    of previous model runs of a basin, oldest first.
+    """
+    runtimePath = str(jobData.jobDir) + "/" + str(gageMeta.gage) + "/" + runtimeFile
+    if not os.path.isfile(runtimePath):
+        return []
+    runtimes = []
+    try:
+        fileObj = open(runtimePath,'r')
+        for line in fileObj:
+            colsTmp = line.split()
+            if len(colsTmp) != 4:
+                # Incomplete line from a run that was killed while recording.
+                continue
+            try:
+                runtimes.append([int(colsTmp[0]),int(colsTmp[1]),int(colsTmp[2]),int(colsTmp[3])])
+            except ValueError:
+                continue
+        fileObj.close()
+    except:
+        jobData.errMsg = "ERROR: Unable to read: " + runtimePath
+        raise
+    return runtimes
+
+def sizeWallTime(jobData,gageMeta,nCores,bDate,eDate):
+    """
+    Generic function to return the wall clock time, in minutes, for a model
+    run of a basin from bDate to eDate. The slowest of the recent runs of the
+    basin, in seconds per simulated hour, is scaled up for runs that will use
+    fewer cores. Runs are given wallTimeModel if the basin has no history.
+    """
+    try:
+        runtimes = readRuntimes(jobData,gageMeta)
+    except:
+        raise
+    runtimes = [entry for entry in runtimes if entry[3] > 0 and entry[1] > entry[0]]
+    if len(runtimes) == 0:
+        return int(jobData.wallTimeModel)
+
+    rate = 0.0
+    for startTime,endTime,nCoresRun,nHours in runtimes[-nHistory:]:
+        rateTmp = float(endTime - startTime)/float(nHours)*max(1.0,float(nCoresRun)/float(nCores))
+        rate = max(rate,rateTmp)
+
+    dt = eDate - bDate
+    nHours = dt.days*24 + int(dt.seconds/3600.0)
+    wallTime = int(math.ceil(wallFactor*rate*nHours/60.0)) + wallPad
+    return max(2*wallPad,min(wallTime,int(jobData.wallTimeModel)))
+
+def sizeModel(jobData,gageMeta,spec,bDate,eDate,restartFlag=False):
+    """
+    Generic function to set the cores, nodes and wall clock time of a model
+    job specification for a basin. If autoSize is off, the global settings
+    are used. Otherwise, the job is sized for the basin, and the job script
+    records the runtime of the model once it exits successfully. Restarts
+    of failed runs are given wallTimeModel, in case the run was killed for
+    running over the sized wall clock time.
+    """
+    if int(jobData.autoSize) == 0:
+        spec.nCores = jobData.nCoresMod
+        spec.nNodes = jobData.nNodesMod
+        spec.wallTime = int(jobData.wallTimeModel)
+        return
+
+    try:
+        spec.nCores,spec.nNodes = sizeCores(jobData,gageMeta)
+    except:
+        jobData.errMsg = "ERROR: Unable to size the model runs for gage: " + str(gageMeta.gage)
+        raise
+    if restartFlag:
+        spec.wallTime = int(jobData.wallTimeModel)
+    else:
+        try:
+            spec.wallTime = sizeWallTime(jobData,gageMeta,spec.nCores,bDate,eDate)
+        except:
+            raise
+
+    # Record the runtime of the model once it exits successfully.
+    runtimePath = str(jobData.jobDir) + "/" + str(gageMeta.gage) + "/" + runtimeFile
+    spec.preCmds.append('MODEL_START=$(date +%s)')
+    spec.postCmds.append('if [ $WH_STATUS -eq 0 ]; then echo "$MODEL_START $(date +%s) ' + \
+                         str(spec.nCores) + ' $(sed -n \'s/^ *KHOUR *= *\\([0-9]*\\).*/\\1/p\' ' + \
+                         'namelist.hrldas)" >> ' + runtimePath + '; fi')
@@ -9,8 +9,8 @@ import os
 import calibIoMod
 import namelistMod
 import statusMod
+import schedMod
 import errMod
-import subprocess
 
 import warnings
 warnings.filterwarnings("ignore")
@@ -43,36 +43,13 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,pbsJobId):
     except:
         raise
         
-    if statusData.jobRunType == 1:
-        # If BSUB run script doesn't exist, create it here.
-        bsubFile = runDir + "/run_WH.sh"
-        if not os.path.isfile(bsubFile):
-            try:
-                generateBsubScript(statusData,int(gageID),runDir,gageMeta)
-            except:
-                raise
-    if statusData.jobRunType == 2:
-        pbsFile = runDir + "/run_WH.sh"
-        if not os.path.isfile(pbsFile):
-            try:
-                generatePbsScript(statusData,int(gageID),runDir,gageMeta)
-            except:
-                raise
-    if statusData.jobRunType == 3 or statusData.jobRunType == 6:
-        slurmFile = runDir + "/run_WH.sh"
-        if not os.path.isfile(slurmFile):
-            try:
-                generateSlurmScript(statusData,int(gageID),runDir,gageMeta)
-            except:
-                raise
-    if statusData.jobRunType == 4 or statusData.jobRunType == 5:
-        # If run script doesn't exist, create it here.
-        runScript = runDir + "/run_WH.sh"
-        if not os.path.isfile(runScript):
-            try:
-                generateMpiScript(statusData,int(gageID),runDir,gageMeta)
-            except:
-                raise
+    # If the run script doesn't exist, create it here.
+    runScript = runDir + "/run_WH.sh"
+    if not os.path.isfile(runScript):
+        try:
+            generateRunScript(statusData,int(gageID),runDir,gageMeta)
+        except:
+            raise
     
     # Calculate datetime objects
     begDate = statusData.bSpinDate
@@ -80,6 +57,7 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,pbsJobId):
         
     # Initialize status
     keyStatus = keySlot[basinNum]
+    runFlag = False
     
     try:
         basinStatus = statusMod.checkBasJob(statusData,basinNum,pbsJobId)
@@ -229,26 +207,13 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,pbsJobId):
                 raise
                 
         # Fire off model.
-        if statusData.jobRunType == 1:
-            cmd = "bsub < " + runDir + "/run_WH.sh"
-        if statusData.jobRunType == 2:
-            try:
-                jobTmp = subprocess.check_output(['qsub',runDir + '/run_WH.sh'])
-                pbsJobId[basinNum] = int(jobTmp.split('.')[0])
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.jobRunType == 3 or statusData.jobRunType == 6:
-            cmd = "sbatch " + runDir + "/run_WH.sh"
-        if statusData.jobRunType == 4 or statusData.jobRunType == 5:
-            cmd = runDir + "/run_WH.sh 1>" + runDir + "/WH_" + \
-                  str(statusData.jobID) + "_" + str(gageID) + ".out" + \
-                  ' 2>' + runDir + "/WH_" + str(statusData.jobID) + "_" + str(gageID) + ".err"
+        sched = schedMod.getScheduler(statusData.jobRunType)
+        statusName = sched.statusName("WH_" + str(statusData.jobID) + "_" + str(gageID),\
+                                      "W" + str(statusData.jobID) + str(gageID))
         try:
-            if statusData.jobRunType == 1 or statusData.jobRunType == 3 or statusData.jobRunType == 6:
-                subprocess.call(cmd,shell=True)
-            if statusData.jobRunType == 4 or statusData.jobRunType == 5:
-                p = subprocess.Popen([cmd],shell=True)
+            jobTmp = sched.submit(statusData,runDir + "/run_WH.sh",runDir + "/WH_" + \
+                                  str(statusData.jobID) + "_" + str(gageID),statusData.queName,statusName)
+            sched.trackJob(pbsJobId,basinNum,jobTmp)
         except:
             statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
             raise
@@ -288,26 +253,13 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,pbsJobId):
                 raise
                 
         # Fire off model.
-        if statusData.jobRunType == 1:
-            cmd = "bsub < " + runDir + "/run_WH.sh"
-        if statusData.jobRunType == 2:
-            try:
-                jobTmp = subprocess.check_output(['qsub',runDir + '/run_WH.sh'])
-                pbsJobId[basinNum] = int(jobTmp.split('.')[0])
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.jobRunType == 3 or statusData.jobRunType == 6:
-            cmd = "sbatch " + runDir + "/run_WH.sh"
-        if statusData.jobRunType == 4 or statusData.jobRunType == 5:
-            cmd = runDir + "/run_WH.sh 1>" + runDir + "/WH_" + \
-                  str(statusData.jobID) + "_" + str(gageID) + ".out" + \
-                  ' 2>' + runDir + "/WH_" + str(statusData.jobID) + "_" + str(gageID) + ".err"
+        sched = schedMod.getScheduler(statusData.jobRunType)
+        statusName = sched.statusName("WH_" + str(statusData.jobID) + "_" + str(gageID),\
+                                      "W" + str(statusData.jobID) + str(gageID))
         try:
-            if statusData.jobRunType == 1 or statusData.jobRunType == 3 or statusData.jobRunType == 6:
-                subprocess.call(cmd,shell=True)
-            if statusData.jobRunType == 4 or statusData.jobRunType == 5:
-                p = subprocess.Popen([cmd],shell=True)
+            jobTmp = sched.submit(statusData,runDir + "/run_WH.sh",runDir + "/WH_" + \
+                                  str(statusData.jobID) + "_" + str(gageID),statusData.queName,statusName)
+            sched.trackJob(pbsJobId,basinNum,jobTmp)
         except:
             statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
             raise
@@ -315,10 +267,11 @@ def runModel(statusData,staticData,db,gageID,gage,keySlot,basinNum,pbsJobId):
         keyStatus = 0.5
         keySlot[basinNum] = 0.5
                 
-def generateBsubScript(jobData,gageID,runDir,gageMeta):
+def generateRunScript(jobData,gageID,runDir,gageMeta):
     """
-    Generic function to create a run script that will be called by bsub
-    to execute the model.
+    Generic function to create a run script that will be submitted through
+    the scheduler backend to execute the model. Model output not needed
+    for the spinup is removed once the model has finished.
     """
     
     outFile = runDir + "/run_WH.sh"
@@ -327,189 +280,22 @@ def generateBsubScript(jobData,gageID,runDir,gageMeta):
         jobData.errMsg = "ERROR: Run script: " + outFile + " already exists."
         raise Exception()
         
-    try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        fileObj.write('#\n')
-        fileObj.write('# LSF Batch Script to Run WRF-Hydro Calibration Simulations\n')
-        fileObj.write('#\n')
-        if len(jobData.acctKey.strip()) > 0:
-            inStr = "#BSUB -P " + str(jobData.acctKey) + '\n'
-            fileObj.write(inStr)
-        fileObj.write('#BSUB -x\n')
-        inStr = "#BSUB -n " + str(jobData.nCoresMod) + '\n'
-        fileObj.write(inStr)
-        inStr = "#BSUB -J WH_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
-        fileObj.write(inStr)
-        inStr = '#BSUB -o ' + runDir + '/%J.out\n'
-        fileObj.write(inStr)
-        inStr = '#BSUB -e ' + runDir + '/%J.err\n'
-        fileObj.write(inStr)
-        fileObj.write('#BSUB -W 8:00\n')
-        if len(jobData.queName.strip()) > 0:
-            inStr = '#BSUB -q ' + str(jobData.queName) + '\n'
-            fileObj.write(inStr)
-        fileObj.write('\n')
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        fileObj.write('mpirun.lsf ./wrf_hydro.exe\n')
-        fileObj.write('\n')
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        inStr = 'rm -rf *.LDASOUT_DOMAIN1\n'
-        fileObj.write(inStr)
-        inStr = 'rm -rf *.CHRTOUT_DOMAIN1\n'
-        fileObj.write(inStr)
-        inStr = 'rm -rf *.CHANOBS_DOMAIN1\n'
-        fileObj.write(inStr)
-        fileObj.close
-    except:
-        jobData.errMsg = "ERROR: Failure to create: " + outFile
-        raise
-        
-def generatePbsScript(jobData,gageID,runDir,gageMeta):
-    """
-    Generic function to create a script that will be called by qsub
-    to execute the model.
-    """
-    
-    outFile = runDir + "/run_WH.sh"
-    
-    if os.path.isfile(outFile):
-        jobData.errMsg = "ERROR: Run script: " + outFile + " already exists."
-        raise Exception()
-    
-    try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        fileObj.write('#\n')
-        fileObj.write('# PBS Batch Script to Run WH Calibration Simulations\n')
-        fileObj.write('#\n')
-        inStr = "#PBS -N WH_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
-        fileObj.write(inStr)
-        if len(jobData.acctKey.strip()) > 0:
-            inStr = "#PBS -A " + str(jobData.acctKey) + '\n'
-            fileObj.write(inStr)
-        inStr = "#PBS -l walltime=08:00:00\n"
-        fileObj.write(inStr)
-        if len(jobData.queName.strip()) > 0:
-            inStr = "#PBS -q " + str(jobData.queName) + "\n"
-            fileObj.write(inStr)
-        inStr = "#PBS -o " + runDir + "/WH_" + str(jobData.jobID) + "_" + str(gageID) + ".out\n"
-        fileObj.write(inStr)
-        inStr = "#PBS -e " + runDir + "/WH_" + str(jobData.jobID) + "_" + str(gageID) + ".err\n"
-        fileObj.write(inStr)
-        nCoresPerNode = int(jobData.nCoresMod/jobData.nNodesMod)
-        inStr = "#PBS -l select=" + str(jobData.nNodesMod) + ":ncpus=" + str(nCoresPerNode) + \
-                ":mpiprocs=" + str(nCoresPerNode) + "\n"
-        fileObj.write(inStr)
-        fileObj.write("\n")
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        fileObj.write('mpiexec_mpt ./wrf_hydro.exe\n')
-        fileObj.write('\n')
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        inStr = 'rm -rf *.LDASOUT_DOMAIN1\n'
-        fileObj.write(inStr)
-        inStr = 'rm -rf *.CHRTOUT_DOMAIN1\n'
-        fileObj.write(inStr)
-        inStr = 'rm -rf *.CHANOBS_DOMAIN1\n'
-        fileObj.write(inStr)
-        fileObj.close
-    except:
-        jobData.errMsg = "ERROR: Failure to create: " + outFile
-        raise
-        
-def generateSlurmScript(jobData,gageID,runDir,gageMeta):
-    """
-    Generic function to create a script that will be called by Slurm
-    to execute the model.
-    """
-
-    outFile = runDir + "/run_WH.sh"
-
-    if os.path.isfile(outFile):
-        jobData.errMsg = "ERROR: Run script: " + outFile + " already exists."
-        raise Exception()
-        
-    try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        fileObj.write('#\n')
-        fileObj.write('# Slurm Batch Script to Run WH Calibration Simulations\n')
-        fileObj.write('#\n')
-        inStr = '#SBATCH -J WH_' + str(jobData.jobID) + "_" + str(gageID) + '\n'
-        fileObj.write(inStr)
-        if len(jobData.acctKey.strip()) > 0:
-            inStr = '#SBATCH -A ' + str(jobData.acctKey) + '\n'
-            fileObj.write(inStr)
-        inStr = '#SBATCH -t 08:00:00\n'
-        fileObj.write(inStr)
-        if len(jobData.queName.strip()) > 0:
-            inStr = '#SBATCH -p ' + str(jobData.queName) + '\n'
-            fileObj.write(inStr)
-        inStr = "#SBATCH -o " + runDir + "/WH_" + str(jobData.jobID) + "_" + str(gageID) + ".out\n"
-        fileObj.write(inStr)
-        inStr = "#SBATCH -e " + runDir + "/WH_" + str(jobData.jobID) + "_" + str(gageID) + ".err\n"
-        fileObj.write(inStr)
-        inStr = '#SBATCH -N ' + str(jobData.nNodesMod) + '\n'
-        fileObj.write(inStr)
-        fileObj.write('\n')
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        if jobData.jobRunType == 3:
-            inStr = 'srun -n ' + str(jobData.nCoresMod) + ' ./wrf_hydro.exe\n'
-        if jobData.jobRunType == 6:
-            inStr = 'mpirun -n ' + str(jobData.nCoresMod) + ' ./wrf_hydro.exe\n'
-        fileObj.write(inStr)
-        fileObj.write('\n')
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        inStr = 'rm -rf *.LDASOUT_DOMAIN1\n'
-        fileObj.write(inStr)
-        inStr = 'rm -rf *.CHRTOUT_DOMAIN1\n'
-        fileObj.write(inStr)
-        inStr = 'rm -rf *.CHANOBS_DOMAIN1\n'
-        fileObj.write(inStr)
-        fileObj.close        
-    except:
-        jobData.errMsg = "ERROR: Failure to create: " + outFile
-        raise
-        
-def generateMpiScript(jobData,gageID,runDir,gageMeta):
-    """
-    Generic function to create a run script that will use mpiexec/mpirun to execute
-    the model.
-    """
-    
-    outFile = runDir + "/run_WH.sh"
-    
-    if os.path.isfile(outFile):
-        jobData.errMsg = "ERROR: Run script: " + outFile + " already exists."
-        raise Exception()
-        
-    try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        if jobData.jobRunType == 4:
-            inStr = 'mpiexec -n ' + str(int(jobData.nCoresMod)) + ' ./W' + \
-                    str(jobData.jobID) + str(gageID) + '\n'
-        if jobData.jobRunType == 5:
-            inStr = 'mpirun -np ' + str(int(jobData.nCoresMod)) + ' ./W' + \
-                    str(jobData.jobID) + str(gageID) + '\n'
-        fileObj.write(inStr)
-        fileObj.close
-    except:
-        jobData.errMsg = "ERROR: Failure to create: " + outFile
-        raise
+    spec = schedMod.jobSpec()
+    spec.jobName = "WH_" + str(jobData.jobID) + "_" + str(gageID)
+    spec.mpiName = "W" + str(jobData.jobID) + str(gageID)
+    spec.workDir = runDir
+    spec.exe = "./wrf_hydro.exe"
+    spec.nCores = jobData.nCoresMod
+    spec.nNodes = jobData.nNodesMod
+    spec.wallTime = 480
+    spec.queName = jobData.queName
+    spec.exclusive = True
+    spec.postCmds.append('cd ' + runDir)
+    spec.postCmds.append('rm -rf *.LDASOUT_DOMAIN1')
+    spec.postCmds.append('rm -rf *.CHRTOUT_DOMAIN1')
+    spec.postCmds.append('rm -rf *.CHANOBS_DOMAIN1')
     
-    # Make the file an executable.
-    cmd = "chmod +x " + outFile
     try:
-        subprocess.call(cmd,shell=True)
+        schedMod.getScheduler(jobData.jobRunType).renderScript(jobData,outFile,spec)
     except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile + " to an executable."
         raise
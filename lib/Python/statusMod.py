@@ -7,10 +7,14 @@
 from glob import glob
 import os
 import pwd
-import subprocess
-import pandas as pd
 import datetime
-import psutil
+import time
+import threading
+import select
+import ctypes
+import ctypes.util
+import numpy as np
+import schedMod
 
 import warnings
 warnings.filterwarnings("ignore")
@@ -55,6 +59,24 @@ class statusMeta:
         self.coldStart = []
         self.jobRunType = []
         self.analysisRunType = []
+        self.schedCacheTTL = 60.0
+        self.maxSubmitRate = 0.0
+        self.maxJobsInFlight = 0
+        self.idleWait = 60.0
+        self.submitGrace = 120.0
+        self.nBasinThreads = 1
+        self.ddsCandidates = 1
+        self.boundInterval = 0.0
+        self.streamCollect = 0
+        self.taskFarm = 0
+        self.farmNodes = 1
+        self.farmCoresPerNode = 1
+        self.farmWallTime = 720
+        self.chainJobs = 0
+        self.autoSize = 0
+        self.cellsPerCore = 2500
+        self.wallTimeModel = 480
+        self.sensMaxRuns = 0
         self.acctKey = []
         self.queName = []
         self.queNameAnalysis = []
@@ -115,194 +137,417 @@ class statusMeta:
         self.gages = gagesTmp[:]
         self.gageIDs = gageIDsTmp[:]
         
-def checkBasJob(jobData,gageNum,pbsJobId):
+
+# Cached snapshots of the job scheduler, keyed by the type of scheduler being
+# queried (LSF, PBS, SLURM, MPI). Each snapshot is a dictionary holding the
+# time it was taken, a dictionary of job names mapped to their system job IDs
+# (process IDs for mpiexec/mpirun), and a set of the job IDs. This allows
+# all of the check functions below to answer their question with a single
+# lookup, instead of querying the scheduler once per basin.
+schedCache = {}
+
+# Time the current sweep through the basins began. A job that is missing from
+# a snapshot taken before the sweep began may have been submitted after the
+# snapshot was taken, so the snapshot will be refreshed before the job is
+# declared as not running.
+schedSweep = {'time':None}
+
+# Lock guarding the snapshot cache when basins are being processed by
+# multiple threads.
+schedLock = threading.RLock()
+
+def schedType(runType):
     """
-    Generic function to check the status of a model run. If we are running BSUB/QSUB/Slurm,
-    we will check the que for a specific job name following the format: WH_JOBID_DOMAINID
-    where JOBID = Unique job ID pulled from the database and DOMAINID is
-    a unique domain ID pulled from the database. If we are running mpiexec/mpirun,
-    we will be looking for instances of the model to be running in the format of
-    wrf_hydro_JOBID_DOMAINID.exe. The number of instances should match the number
-    of model cores specified in the config file. For QSUB/BSUB, the number of nodes
-    being uses should also match the number of cores being used. 
+    Generic function to map a jobRunType/analysisRunType value to the type
+    of scheduler that will be queried for job status.
     """
-    
-    # Get unique PID.
-    pidUnique = os.getpid()
-    userTmp = pwd.getpwuid(os.getuid()).pw_name
-    
-    if userTmp != str(jobData.owner):
-        jobData.errMsg = "ERROR: you are not the owner of this job."
+    sched = schedMod.getScheduler(runType)
+    if sched is None:
+        return None
+    return sched.name
+
+def markSchedSweep():
+    """
+    Generic function to mark the beginning of a new sweep through the basins
+    by the main calling program. Cached scheduler snapshots are re-used during
+    the sweep until they expire.
+    """
+    schedSweep['time'] = time.time()
+
+def clearSchedSnapshot():
+    """
+    Generic function to throw away all cached scheduler snapshots, forcing
+    the next status check to query the scheduler.
+    """
+    schedCache.clear()
+
+def getSchedSnapshot(jobData,runType,force=False):
+    """
+    Generic function to return a snapshot of all jobs the owner has running
+    through the scheduler. The scheduler is only queried when no snapshot
+    exists, the existing snapshot is older than jobData.schedCacheTTL seconds,
+    or the calling function forces a refresh.
+    """
+    sched = schedMod.getScheduler(runType)
+    if sched is None:
+        jobData.errMsg = "ERROR: Unknown job run type: " + str(runType)
         raise Exception()
-    
-    if jobData.jobRunType == 1:
-        csvPath = "./BJOBS_" + str(pidUnique) + ".csv"
-        cmd = 'bjobs -u ' + str(jobData.owner) + ' -w -noheader > ' + csvPath
-        try:
-            subprocess.call(cmd,shell=True)
-        except:
-            jobData.errMsg = "ERROR: Unable to pipe BJOBS output to" + csvPath
-            raise
-    
-        colNames = ['JOBID','USER','STAT','QUEUE','FROM_HOST','EXEC_HOST','JOB_NAME',\
-                   'SUBMIT_MONTH','SUBMIT_DAY','SUBMIT_HHMM']
+
+    schedLock.acquire()
+    try:
+        snapshot = schedCache.get(sched.name)
+        if snapshot is not None and not force:
+            if (time.time() - snapshot['time']) < float(jobData.schedCacheTTL):
+                return snapshot
+
+        timeTmp = time.time()
         try:
-            jobs = pd.read_csv(csvPath,delim_whitespace=True,header=None,names=colNames)
+            names = sched.query(jobData)
         except:
-            jobData.errMsg = "ERROR: Failure to read in: " + csvPath
             raise
-        
-        # Delete temporary CSV files
-        cmdTmp = 'rm -rf ' + csvPath
-        subprocess.call(cmdTmp,shell=True)
-        
-        # Compile expected job name that the job should occupy.
-        expName = "WH_" + str(jobData.jobID) + "_" + str(jobData.gageIDs[gageNum])
-    
-        lenJobs = len(jobs.JOBID)
 
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-    
-        if lenJobs == 0:
-            status = False
-        else:
-            # Find if any jobs for this basin are being ran.
-            testDF = jobs.query("JOB_NAME == '" + expName + "'")
-            if len(testDF) != 0:
-                status = True
-                
-    if jobData.jobRunType == 2:
-        # We are running via qsub
-        # Compile expected job name that the job should occupy.
-        expName = "WH_" + str(jobData.jobID) + "_" + str(jobData.gageIDs[gageNum])
-        
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        # Run the qstat command on the username IF we are running this command
-        # for the first time (restarting workflow, or new workflow instance). 
-        # Once jobs are fired off, we will populate the jobId array with the values
-        # returned by qsub. 
-        if pbsJobId[gageNum] == -9999:
-            # Run qstat for the user.
-            try:
-                jobsTmp = subprocess.check_output(['qstat','-u',jobData.owner])
-            except:
-                jobData.errMsg = "ERROR: Unable to run qstat for user: " + jobData.owner
-                raise
-            if len(jobsTmp) == 0:
-                # This means no jobs are running for the user. We can safely
-                # assume the status is false.
-                status = False
-            else:
-                numLinesTmp = len(jobsTmp.split('\n'))
-                # The exptected return from qstat on Cheyenne gives us at least 7 lines to parse.
-                if numLinesTmp < 7:
-                    jobData.errMsg = "ERROR: Expected qstat return should be greater than 6 lines."
+        snapshot = {'time':timeTmp,'names':names,'ids':set(names.values())}
+        schedCache[sched.name] = snapshot
+
+        # Forget about any jobs submitted by the workflow that have since left
+        # the scheduler.
+        schedMod.limiter.prune(sched.name,snapshot['ids'],timeTmp)
+    finally:
+        schedLock.release()
+
+    return snapshot
+
+def checkSchedJob(jobData,runType,expName,pbsJobId,pbsIdx):
+    """
+    Generic function to check if a job name (or executable name for mpiexec/mpirun)
+    is present in the scheduler snapshot. For PBS, the job ID is placed into
+    the pbsJobId array the first time it is found, and is used to track the
+    job from there on. A job not found in a snapshot taken before the current
+    sweep began will trigger one refresh of the snapshot before returning False.
+    """
+    userTmp = pwd.getpwuid(os.getuid()).pw_name
+
+    if userTmp != str(jobData.owner):
+        jobData.errMsg = "ERROR: you are not the owner of this job."
+        raise Exception()
+
+    sched = schedMod.getScheduler(runType)
+
+    try:
+        snapshot = getSchedSnapshot(jobData,runType)
+    except:
+        raise
+
+    for attempt in range(0,2):
+        if sched.trackIds and pbsJobId[pbsIdx] != -9999:
+            status = int(pbsJobId[pbsIdx]) in snapshot['ids']
+        else:
+            status = expName in snapshot['names']
+            if status:
+                # A job running from a previous instance of the workflow was found.
+                # Set the job id into the jobIds array.
+                sched.trackJob(pbsJobId,pbsIdx,snapshot['names'][expName])
+
+        if status:
+            break
+
+        # Refresh the snapshot if it may pre-date a submission made during
+        # a previous sweep.
+        if attempt == 0:
+            if schedSweep['time'] is None or snapshot['time'] < schedSweep['time']:
+                try:
+                    snapshot = getSchedSnapshot(jobData,runType,force=True)
+                except:
                     raise
-                for lineNum in range(5,numLinesTmp):
-                    # This is a CRUDE assumption based on the behavior of qstat 
-                    # on Cheyenne.
-                    lineTmp = jobsTmp.split('\n')[lineNum]
-                    if len(lineTmp) == 0:
-                        continue
-                    else:
-                        expCheck = lineTmp.split()[3]
-                        if expCheck == expName:
-                            # We have a match. This means a job running from a 
-                            # previous instance of the workflow is still running.
-                            # Get the job id and set it into the jobIds array.
-                            pbsJobId[gageNum] = int((lineTmp.split()[0]).split('.')[0])
-                            status = True
-        else:
-            # We are checking for a job ID that has already been submitted by 
-            # this instance of the workflow. 
-            # Try running qstat for the job ID. If it's unsucessfull, then we
-            # can make a good assumption that the job is no longer running. 
-            try:
-                jobsTmp = subprocess.check_output(['qstat',str(pbsJobId[gageNum])])
-                status = True
-            except:
-                # This means the job is no longer running.
-                status = False
-                return status
-    
-    if jobData.jobRunType == 3 or jobData.jobRunType == 6:
-        # We are running via slurm
-        csvPath = "./SLURM_" + str(pidUnique) + ".csv"
-        cmd = "squeue -u " + str(jobData.owner) + \
-              ' --format=\"%.18i %.9P %.32j %.8u %.2t %.10M %.6D %R\"' + \
-              ' > ' + csvPath
+            else:
+                break
+
+    if not status and schedMod.limiter.recentlySubmitted(sched.name,expName,jobData.submitGrace):
+        # The job was just submitted and has not shown up in the scheduler yet.
+        status = True
+
+    if status and expName in snapshot['names']:
         try:
-            subprocess.call(cmd,shell=True)
+            sched.checkOwner(jobData,expName,snapshot['names'][expName])
         except:
-            jobData.errMsg = "ERROR: Unable to pipe SLURM output to: " + csvPath
-            raise
-            
-        if not os.path.isfile(csvPath):
-            jobData.errMsg = "ERROR: squeue did not create necessary CSV file with job names."
             raise
-            
+
+    return status
+
+# Flags used to watch the job directory for changes through inotify.
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+
+class eventWatcher:
+    """
+    Object to watch the event spool file (WORKFLOW.EVENTS) that the job 
+    scripts append to as they finish. On Linux, inotify is used to wake up
+    as soon as the job directory changes. On file systems where inotify 
+    is not available, or where changes made from compute nodes are not seen,
+    the size of the spool file is checked once a second instead.
+    """
+    def __init__(self,jobDir):
+        self.spoolPath = str(jobDir) + '/WORKFLOW.EVENTS'
+        self.spoolSize = self.getSize()
+        self.fd = None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'),use_errno=True)
+            fd = libc.inotify_init()
+            if fd >= 0:
+                wd = libc.inotify_add_watch(fd,str(jobDir),IN_MODIFY | IN_CLOSE_WRITE | \
+                                            IN_MOVED_TO | IN_CREATE)
+                if wd >= 0:
+                    self.fd = fd
+                else:
+                    os.close(fd)
+        except:
+            self.fd = None
+
+    def getSize(self):
         try:
-            jobs = pd.read_csv(csvPath,delim_whitespace=True)
-        except:
-            jobData.errMsg = "ERROR: Failure to read in: " + csvPath
-            raise
-            
-        # Delete temporary CSV files.
-        cmdTmp = "rm -rf " + csvPath
-        subprocess.call(cmd,shell=True)
-        
-        # Compile expected job name that the job should occupy.
-        expName = "WH_" + str(jobData.jobID) + "_" + str(jobData.gageIDs[gageNum])
-        
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        if len(jobs.NAME) > 0:
-            for jobNum in range(0,len(jobs.NAME)):
-                if jobs.NAME[jobNum].strip() == expName:
-                    print "MODEL SIMULATIONS FOUND"
-                    status = True
-        else:
-            status = False
-        
-        if not status:
-            print "NO MODEL SIMULATIONS FOUND"
-            
-    if jobData.jobRunType == 4 or jobData.jobRunType == 5:
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        # We are using mpiexec.
-        pidActive = []
-        exeName = "W" + str(jobData.jobID) + str(jobData.gageIDs[gageNum]) 
-        for proc in psutil.process_iter():
+            return os.stat(self.spoolPath).st_size
+        except OSError:
+            return 0
+
+    def newEvents(self):
+        """
+        Returns True if events were appended to the spool file since the last call.
+        """
+        sizeTmp = self.getSize()
+        if sizeTmp != self.spoolSize:
+            self.spoolSize = sizeTmp
+            return True
+        return False
+
+    def wait(self,seconds):
+        """
+        Waits up to a number of seconds for new events. Returns True if new
+        events arrived, or a stop was requested by the orchestrator.
+        """
+        timeEnd = time.time() + seconds
+        while True:
+            if self.newEvents():
+                return True
+            timeLeft = timeEnd - time.time()
+            if timeLeft <= 0.0:
+                return False
+            if self.fd is not None:
+                # Wake on any change in the job directory, or after one second
+                # to pick up changes inotify does not see.
+                try:
+                    readable = select.select([self.fd],[],[],min(timeLeft,1.0))[0]
+                    if len(readable) > 0:
+                        os.read(self.fd,65536)
+                except (select.error,OSError):
+                    self.fd = None
+                if stopRequested():
+                    return True
+            elif stopWait(min(timeLeft,1.0)):
+                return True
+
+# Event watchers, keyed by job directory.
+eventWatchers = {}
+
+def getEventWatcher(jobData):
+    """
+    Generic function to return the event spool watcher for a job.
+    """
+    schedLock.acquire()
+    try:
+        watcher = eventWatchers.get(str(jobData.jobDir))
+        if watcher is None:
+            watcher = eventWatcher(jobData.jobDir)
+            eventWatchers[str(jobData.jobDir)] = watcher
+    finally:
+        schedLock.release()
+    return watcher
+
+def stopRequested():
+    """
+    Generic function to check if the orchestrator has asked the job being ran
+    by the calling thread to stop. This is always False when the workflow
+    programs are ran on their own.
+    """
+    stopEvent = getattr(threading.current_thread(),'stopEvent',None)
+    return stopEvent is not None and stopEvent.is_set()
+
+def stopWait(seconds):
+    """
+    Generic function to sleep for a number of seconds, waking up early if 
+    the orchestrator asks the job being ran by the calling thread to stop. 
+    Returns True if a stop was requested.
+    """
+    stopEvent = getattr(threading.current_thread(),'stopEvent',None)
+    if stopEvent is None:
+        time.sleep(seconds)
+        return False
+    stopEvent.wait(seconds)
+    return stopEvent.is_set()
+
+def waitSchedEvent(jobData,runTypes):
+    """
+    Generic function to block the main calling program after a sweep through
+    the basins that made no progress. Returns as soon as a job script reports
+    it has finished through the event spool file, a job submitted by the 
+    workflow has left the scheduler, or once jobData.idleWait seconds have
+    passed. Returns immediately if jobs were submitted during the sweep.
+    """
+    if schedSweep['time'] is not None and schedMod.limiter.lastSubmit >= schedSweep['time']:
+        return
+
+    # Job scripts that finished since the last wait will have appended to
+    # the event spool file.
+    watcher = getEventWatcher(jobData)
+    if watcher.newEvents():
+        return
+
+    timeEnd = time.time() + float(jobData.idleWait)
+    pollStep = max(float(jobData.schedCacheTTL),5.0)
+
+    schedNames = {}
+    for runType in runTypes:
+        sched = schedMod.getScheduler(runType)
+        schedNames[sched.name] = runType
+
+    while True:
+        timeLeft = timeEnd - time.time()
+        if timeLeft <= 0.0:
+            return
+        countPrev = schedMod.limiter.countInFlight()
+        if watcher.wait(min(timeLeft,pollStep)):
+            return
+        for runType in schedNames.values():
             try:
-                if proc.name() == exeName:
-                    pidActive.append(proc.pid)
+                getSchedSnapshot(jobData,runType)
             except:
-                print exeName + " Found, but ended before Python could get the PID."
-        if len(pidActive) == 0:
-            status = False
-            print "NO MODEL SIMULATIONS FOUND"
-        else:
-            print "MODEL SIMULATIONS FOUND"
-            # Ensure these are being ran by the proper user.
-            proc_stat_file = os.stat('/proc/%d' % pidActive[0])
-            uid = proc_stat_file.st_uid
-            userCheck = pwd.getpwuid(uid)[0]
-            if userCheck != str(jobData.owner):
-                jobData.errMsg = "ERROR: " + exeName + " is being ran by: " + \
-                userCheck + " When it should be ran by: " + jobData.owner
-                status = False
                 raise
-            else:
-                status = True
-            
+        if schedMod.limiter.countInFlight() < countPrev:
+            return
+
+def checkBasJob(jobData,gageNum,pbsJobId):
+    """
+    Generic function to check the status of a model run. If we are running BSUB/QSUB/Slurm,
+    we will check the que for a specific job name following the format: WH_JOBID_DOMAINID
+    where JOBID = Unique job ID pulled from the database and DOMAINID is
+    a unique domain ID pulled from the database. If we are running mpiexec/mpirun,
+    we will be looking for instances of the model to be running in the format of
+    wrf_hydro_JOBID_DOMAINID.exe. The number of instances should match the number
+    of model cores specified in the config file. For QSUB/BSUB, the number of nodes
+    being uses should also match the number of cores being used.
+    """
+
+    expName = basJobName(jobData,gageNum)
+
+    try:
+        status = checkSchedJob(jobData,schedMod.modelRunType(jobData),expName,pbsJobId,gageNum)
+    except:
+        raise
+
+    if status:
+        print "MODEL SIMULATIONS FOUND"
+    else:
+        print "NO MODEL SIMULATIONS FOUND"
+
     return status
-    
+
+def basJobName(jobData,gageNum):
+    """
+    Generic function to return the name a calibration model run for a basin
+    is found under in the scheduler (or process table for mpiexec/mpirun).
+    """
+    if jobData.jobRunType == 4 or jobData.jobRunType == 5:
+        return "W" + str(jobData.jobID) + str(jobData.gageIDs[gageNum])
+    else:
+        return "WH_" + str(jobData.jobID) + "_" + str(jobData.gageIDs[gageNum])
+
+def openKeySlot(jobData,stateName,shape,transient={}):
+    """
+    Generic function to return a status ("key") array that is memory-mapped
+    to a file in the job directory. Every status transition written into the 
+    array is written to the file, so a restarted workflow resumes from the last
+    known status of each basin instead of re-probing all run directories. 
+    A new array initialized to 0.0 is created if the file does not exist, or
+    the shape of the array on disk does not match. Remove the file to force
+    the status of all basins to be re-derived. Transient states, which are
+    only meant to last until a job is submitted later in the same pass, are
+    mapped to the state they are re-derived from (transient dictionary) when
+    an existing file is opened, in case the workflow stopped in between.
+    """
+    statePath = str(jobData.jobDir) + "/" + stateName + "_STATUS.npy"
+    
+    if os.path.isfile(statePath):
+        try:
+            keySlot = np.lib.format.open_memmap(statePath,mode='r+')
+        except:
+            jobData.errMsg = "ERROR: Unable to open status file: " + statePath
+            raise
+        if keySlot.shape == tuple(shape) and keySlot.dtype == np.float64:
+            for stateTmp in transient.keys():
+                keySlot[keySlot == stateTmp] = transient[stateTmp]
+            keySlot.flush()
+            return keySlot
+        print "STATUS FILE: " + statePath + " DOES NOT MATCH THE JOB. RE-CREATING."
+        del keySlot
+        
+    try:
+        keySlot = np.lib.format.open_memmap(statePath,mode='w+',dtype=np.float64,shape=tuple(shape))
+    except:
+        jobData.errMsg = "ERROR: Unable to create status file: " + statePath
+        raise
+    keySlot[...] = 0.0
+    keySlot.flush()
+    
+    return keySlot
+    
+# Cached restart file indices, keyed by run directory. Each index holds the
+# modification time of the directory when it was listed, the time the listing
+# was taken, and a sorted list of the timestamps for which both a LSM and a
+# hydro restart file exist. Creating or removing a file in a directory updates
+# its modification time, which invalidates the index.
+restartCache = {}
+
+def getRestartIndex(runDir):
+    """
+    Generic function to return a sorted list of timestamps for which both the
+    RESTART.*_DOMAIN1 and HYDRO_RST.*_DOMAIN1 files exist in a run directory.
+    The directory is listed once, and the result is re-used until the
+    modification time of the directory changes.
+    """
+    try:
+        mTime = os.stat(runDir).st_mtime
+    except OSError:
+        # The run directory does not exist, so no restart files exist either.
+        return []
+        
+    index = restartCache.get(runDir)
+    if index is not None and index['mtime'] == mTime:
+        # Directory modification times may only have a resolution of one
+        # second. Only trust a listing taken well after the last modification.
+        if index['listTime'] - mTime > 2.0:
+            return index['dates']
+            
+    listTime = time.time()
+    lsmDates = set()
+    hydroDates = set()
+    for fileTmp in os.listdir(runDir):
+        if not fileTmp.endswith('_DOMAIN1'):
+            continue
+        try:
+            if fileTmp.startswith('RESTART.'):
+                lsmDates.add(datetime.datetime.strptime(fileTmp[8:18],'%Y%m%d%H'))
+            elif fileTmp.startswith('HYDRO_RST.'):
+                hydroDates.add(datetime.datetime.strptime(fileTmp[10:26],'%Y-%m-%d_%H:%M'))
+        except ValueError:
+            # Not a restart file written by the model.
+            continue
+            
+    dates = sorted(lsmDates & hydroDates)
+    restartCache[runDir] = {'mtime':mTime,'listTime':listTime,'dates':dates}
+    
+    return dates
+
 def walkMod(bDate,eDate,runDir):
     """
     Generic function to walk a simulation directory, and determine where the model
@@ -310,22 +555,29 @@ def walkMod(bDate,eDate,runDir):
     and the parent program needs to determine where it can try to restart.
     """
     
-    dt = eDate - bDate
-    nHours = int((dt.days*24*3600 + dt.seconds)/3600.0)
-    
     bDateOrig = bDate
     
     # Initialize flag returned to user as True. Assume model needs to ran.
     runFlag = True
     
+    # Find the latest hourly timestamp between bDate and eDate that has a
+    # complete pair of restart files. The candidate is confirmed with
+    # os.path.isfile to skip over broken symbolic links.
     output = []
-    for hourModel in range(0,nHours+1):
-        dCurrent = bDateOrig + datetime.timedelta(seconds=3600.0*hourModel)
+    for dCurrent in reversed(getRestartIndex(runDir)):
+        if dCurrent > eDate:
+            continue
+        if dCurrent < bDateOrig:
+            break
+        dt = dCurrent - bDateOrig
+        if (dt.days*24*3600 + dt.seconds) % 3600 != 0 or dt.microseconds != 0:
+            continue
         lsmRestartPath = runDir + "/RESTART." + dCurrent.strftime('%Y%m%d%H') + "_DOMAIN1"
         hydroRestartPath = runDir + "/HYDRO_RST." + dCurrent.strftime('%Y-%m-%d_%H') + ':00_DOMAIN1'
         
         if os.path.isfile(lsmRestartPath) and os.path.isfile(hydroRestartPath):
             bDate = dCurrent
+            break
             
     # If the bDate has reached the eDate, this means the model completed as expected.
     if bDate == eDate:
@@ -336,6 +588,7 @@ def walkMod(bDate,eDate,runDir):
     output.append(runFlag)
     return output
     
+
 def checkCalibJob(jobData,gageNum,pbsJobId):
     """
     Generic function to check for a calibration R job being ran for a 
@@ -346,184 +599,29 @@ def checkCalibJob(jobData,gageNum,pbsJobId):
     DOMAINID = Unique domain ID pulled from database.
     """
     
-    # Get unique PID.
-    pidUnique = os.getpid()
-    userTmp = pwd.getpwuid(os.getuid()).pw_name
-    
-    if userTmp != str(jobData.owner):
-        jobData.errMsg = "ERROR: you are not the owner of this job."
-        raise Exception()
-    
-    if jobData.analysisRunType == 1:
-        csvPath = "./BJOBS_CALIB_LISTING_" + str(pidUnique) + ".csv"
-        cmd = 'bjobs -u ' + str(jobData.owner) + ' -w -noheader > ' + csvPath
-        try:
-            subprocess.call(cmd,shell=True)
-        except:
-            jobData.errMsg = "ERROR: Unable to pipe BJOBS output to" + csvPath
-            raise
-    
-        colNames = ['JOBID','USER','STAT','QUEUE','FROM_HOST','EXEC_HOST','JOB_NAME',\
-                   'SUBMIT_MONTH','SUBMIT_DAY','SUBMIT_HHMM']
-        try:
-            jobs = pd.read_csv(csvPath,delim_whitespace=True,header=None,names=colNames)
-        except:
-            jobData.errMsg = "ERROR: Failure to read in: " + csvPath
-            raise
-        
-        # Delete temporary CSV file
-        try:
-            os.remove(csvPath)
-        except:
-            jobData.errMsg = "ERROR: Failure to remove: " + csvPath
-            raise
-        
-        # Compile expected job name that the job should occupy.
-        expName = "WH_CALIB_" + str(jobData.jobID) + "_" + str(jobData.gageIDs[gageNum])
-        
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-    
-        lenJobs = len(jobs.JOBID)
-
-        if lenJobs == 0:
-            status = False
-        else:
-            # Find if any jobs for this basin are being ran.
-            testDF = jobs.query("JOB_NAME == '" + expName + "'")
-            if len(testDF) != 0:
-                status = True
-                
-    if jobData.analysisRunType == 2:
-        # We are running via qsub
-        # Compile expected job name that the job should occupy.
-        expName = "WH_CALIB_" + str(jobData.jobID) + "_" + str(jobData.gageIDs[gageNum])
-        
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        # Run the qstat command on the username IF we are running this command
-        # for the first time (restarting workflow, or new workflow instance). 
-        # Once jobs are fired off, we will populate the jobId array with the values
-        # returned by qsub. 
-        if pbsJobId[gageNum] == -9999:
-            # Run qstat for the user.
-            try:
-                jobsTmp = subprocess.check_output(['qstat','-u',jobData.owner])
-            except:
-                jobData.errMsg = "ERROR: Unable to run qstat for user: " + jobData.owner
-                raise
-            if len(jobsTmp) == 0:
-                # This means no jobs are running for the user. We can safely
-                # assume the status is false.
-                status = False
-            else:
-                numLinesTmp = len(jobsTmp.split('\n'))
-                # The exptected return from qstat on Cheyenne gives us at least 7 lines to parse.
-                if numLinesTmp < 7:
-                    jobData.errMsg = "ERROR: Expected qstat return should be greater than 6 lines."
-                    raise
-                for lineNum in range(5,numLinesTmp):
-                    # This is a CRUDE assumption based on the behavior of qstat 
-                    # on Cheyenne.
-                    lineTmp = jobsTmp.split('\n')[lineNum]
-                    if len(lineTmp) == 0:
-                        continue
-                    else:
-                        expCheck = lineTmp.split()[3]
-                        if expCheck == expName:
-                            # We have a match. This means a job running from a 
-                            # previous instance of the workflow is still running.
-                            # Get the job id and set it into the jobIds array.
-                            pbsJobId[gageNum] = int((lineTmp.split()[0]).split('.')[0])
-                            status = True
-        else:
-            # We are checking for a job ID that has already been submitted by 
-            # this instance of the workflow. 
-            # Try running qstat for the job ID. If it's unsucessfull, then we
-            # can make a good assumption that the job is no longer running. 
-            try:
-                jobsTmp = subprocess.check_output(['qstat',str(pbsJobId[gageNum])])
-                status = True
-            except:
-                # This means the job is no longer running.
-                status = False
-                return status
-                  
-    if jobData.analysisRunType == 3 or jobData.analysisRunType == 6:
-        # We are running via slurm
-        csvPath = "./SLURM_" + str(pidUnique) + ".csv"
-        cmd = "squeue -u " + str(jobData.owner) + \
-              ' --format=\"%.18i %.9P %.32j %.8u %.2t %.10M %.6D %R\"' + \
-              ' > ' + csvPath
-        try:
-            subprocess.call(cmd,shell=True)
-        except:
-            jobData.errMsg = "ERROR: Unable to pipe SLURM output to: " + csvPath
-            raise
-            
-        if not os.path.isfile(csvPath):
-            jobData.errMsg = "ERROR: squeue did not create necessary CSV file with job names."
-            raise
-            
-        try:
-            jobs = pd.read_csv(csvPath,delim_whitespace=True)
-        except:
-            jobData.errMsg = "ERROR: Failure to read in: " + csvPath
-            raise
-            
-        # Delete temporary CSV files.
-        cmdTmp = "rm -rf " + csvPath
-        subprocess.call(cmdTmp,shell=True)
+    expName = calibJobName(jobData,gageNum)
         
-        # Compile expected job name that the job should occupy.
-        expName = "WH_CALIB_" + str(jobData.jobID) + "_" + str(jobData.gageIDs[gageNum])
+    try:
+        status = checkSchedJob(jobData,jobData.analysisRunType,expName,pbsJobId,gageNum)
+    except:
+        raise
         
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        if len(jobs.NAME) > 0:
-            for jobNum in range(0,len(jobs.NAME)):
-                if jobs.NAME[jobNum].strip() == expName:
-                    print "CALIB JOBS FOUND"
-                    status = True
-        else:
-            status = False
+    if status:
+        print "CALIB JOBS FOUND"
+    else:
+        print "NO CALIB JOBS FOUND"
         
-        if not status:
-            print "NO CALIB JOBS FOUND"
+    return status
     
+def calibJobName(jobData,gageNum):
+    """
+    Generic function to return the name a calibration R job for a basin is
+    found under in the scheduler (or process table for mpiexec/mpirun).
+    """
     if jobData.analysisRunType == 4 or jobData.analysisRunType == 5:
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        # We are running via mpiexec
-        pidActive = []
-        exeName = "C" + str(jobData.jobID) + str(jobData.gageIDs[gageNum]) 
-        for proc in psutil.process_iter():
-            try:
-                if proc.name() == exeName:
-                    pidActive.append(proc.pid)
-            except:
-                print exeName + " Found, but ended before Python could get the PID."
-        if len(pidActive) == 0:
-            status = False
-            print "NO CALIB JOBS FOUND"
-        else:
-            print "CALIB JOBS FOUND"
-            # Ensure these are being ran by the proper user.
-            proc_stat_file = os.stat('/proc/%d' % pidActive[0])
-            uid = proc_stat_file.st_uid
-            userCheck = pwd.getpwuid(uid)[0]
-            if userCheck != str(jobData.owner):
-                jobData.errMsg = "ERROR: " + exeName + " is being ran by : " + \
-                userCheck + " When it should be ran by: " + jobData.owner
-                status = False
-                raise
-            else:
-                status = True
-                
-    return status
+        return "C" + str(jobData.jobID) + str(jobData.gageIDs[gageNum])
+    else:
+        return "WH_CALIB_" + str(jobData.jobID) + "_" + str(jobData.gageIDs[gageNum])
     
 def checkBasJobValid(jobData,gageNum,modRun,pbsJobId):
     """
@@ -537,372 +635,49 @@ def checkBasJobValid(jobData,gageNum,modRun,pbsJobId):
     integer(number_cores/16.0 cores/node)
     """
     
-    # Get unique PID.
-    pidUnique = os.getpid()
-    userTmp = pwd.getpwuid(os.getuid()).pw_name
-    
-    if userTmp != str(jobData.owner):
-        jobData.errMsg = "ERROR: you are not the owner of this job."
-        raise Exception()
-    
-    if jobData.jobRunType == 1:
-        csvPath = "./BJOBS_" + str(pidUnique) + ".csv"
-        cmd = 'bjobs -u ' + str(jobData.owner) + ' -w -noheader > ' + csvPath
-        try:
-            subprocess.call(cmd,shell=True)
-        except:
-            jobData.errMsg = "ERROR: Unable to pipe BJOBS output to" + csvPath
-            raise
-    
-        colNames = ['JOBID','USER','STAT','QUEUE','FROM_HOST','EXEC_HOST','JOB_NAME',\
-                   'SUBMIT_MONTH','SUBMIT_DAY','SUBMIT_HHMM']
-        try:
-            jobs = pd.read_csv(csvPath,delim_whitespace=True,header=None,names=colNames)
-        except:
-            jobData.errMsg = "ERROR: Failure to read in: " + csvPath
-            raise
-        
-        # Delete temporary CSV files
-        cmdTmp = 'rm -rf ' + csvPath
-        subprocess.call(cmdTmp,shell=True)
-        
-        # Compile expected job name that the job should occupy.
-        expName = "WH_" + str(modRun) + '_' + str(jobData.jobID) + "_" + \
-                  str(jobData.gageIDs[gageNum])
-                  
-        lenJobs = len(jobs.JOBID)
-
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-    
-        if lenJobs == 0:
-            status = False
-        else:
-            # Find if any jobs for this basin are being ran.
-            testDF = jobs.query("JOB_NAME == '" + expName + "'")
-            if len(testDF) != 0:
-                status = True
-                
-    if jobData.jobRunType == 2:
-        # We are running via qsub
-        # Compile expected job name that the job should occupy.
-        expName = "WH_" + str(modRun) + '_' + str(jobData.jobID) + "_" + \
-                  str(jobData.gageIDs[gageNum])
-                  
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        # Run the qstat command on the username IF we are running this command
-        # for the first time (restarting workflow, or new workflow instance). 
-        # Once jobs are fired off, we will populate the jobId array with the values
-        # returned by qsub. 
-        if pbsJobId[gageNum] == -9999:
-            # Run qstat for the user.
-            try:
-                jobsTmp = subprocess.check_output(['qstat','-u',jobData.owner])
-            except:
-                jobData.errMsg = "ERROR: Unable to run qstat for user: " + jobData.owner
-                raise
-            if len(jobsTmp) == 0:
-                # This means no jobs are running for the user. We can safely
-                # assume the status is false.
-                status = False
-            else:
-                numLinesTmp = len(jobsTmp.split('\n'))
-                # The exptected return from qstat on Cheyenne gives us at least 7 lines to parse.
-                if numLinesTmp < 7:
-                    jobData.errMsg = "ERROR: Expected qstat return should be greater than 6 lines."
-                    raise
-                for lineNum in range(5,numLinesTmp):
-                    # This is a CRUDE assumption based on the behavior of qstat 
-                    # on Cheyenne.
-                    lineTmp = jobsTmp.split('\n')[lineNum]
-                    if len(lineTmp) == 0:
-                        continue
-                    else:
-                        expCheck = lineTmp.split()[3]
-                        if expCheck == expName:
-                            # We have a match. This means a job running from a 
-                            # previous instance of the workflow is still running.
-                            # Get the job id and set it into the jobIds array.
-                            pbsJobId[gageNum] = int((lineTmp.split()[0]).split('.')[0])
-                            status = True
-        else:
-            # We are checking for a job ID that has already been submitted by 
-            # this instance of the workflow. 
-            # Try running qstat for the job ID. If it's unsucessfull, then we
-            # can make a good assumption that the job is no longer running. 
-            try:
-                jobsTmp = subprocess.check_output(['qstat',str(pbsJobId[gageNum])])
-                status = True
-            except:
-                # This means the job is no longer running.
-                status = False
-                return status
-                  
-    if jobData.jobRunType == 3 or jobData.jobRunType == 6:
-        # We are running via slurm
-        csvPath = "./SLURM_" + str(pidUnique) + ".csv"
-        cmd = "squeue -u " + str(jobData.owner) + \
-              ' --format=\"%.18i %.9P %.32j %.8u %.2t %.10M %.6D %R\"' + \
-              ' > ' + csvPath
-        try:
-            subprocess.call(cmd,shell=True)
-        except:
-            jobData.errMsg = "ERROR: Unable to pipe SLURM output to: " + csvPath
-            raise
-            
-        if not os.path.isfile(csvPath):
-            jobData.errMsg = "ERROR: squeue did not create necessary CSV file with job names."
-            raise
-            
-        try:
-            jobs = pd.read_csv(csvPath,delim_whitespace=True)
-        except:
-            jobData.errMsg = "ERROR: Failure to read in: " + csvPath
-            raise
-            
-        # Delete temporary CSV files.
-        cmdTmp = "rm -rf " + csvPath
-        subprocess.call(cmd,shell=True)
-        
-        # Compile expected job name that the job should occupy.
+    if jobData.jobRunType == 4 or jobData.jobRunType == 5:
+        if modRun == "BEST":
+            expName = "WB" + str(jobData.jobID) + str(jobData.gageIDs[gageNum])
+        if modRun == "CTRL":
+            expName = "WC" + str(jobData.jobID) + str(jobData.gageIDs[gageNum])
+    else:
         expName = "WH_" + str(modRun) + '_' + str(jobData.jobID) + "_" + \
                   str(jobData.gageIDs[gageNum])
                   
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        if len(jobs.NAME) > 0:
-            for jobNum in range(0,len(jobs.NAME)):
-                if jobs.NAME[jobNum].strip() == expName:
-                    print "BASIN VALID JOBS FOUND"
-                    status = True
-        else:
-            status = False
+    try:
+        status = checkSchedJob(jobData,jobData.jobRunType,expName,pbsJobId,gageNum)
+    except:
+        raise
         
-        if not status:
-            print "NO VALID MODEL JOBS FOUND"
-                    
-    if jobData.jobRunType == 4 or jobData.jobRunType == 5:
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        # We are running via mpiexec
-        pidActive = []
-        if modRun == "BEST":
-            exeName = "WB" + str(jobData.jobID) + str(jobData.gageIDs[gageNum]) 
-        if modRun == "CTRL":
-            exeName = "WC" + str(jobData.jobID) + str(jobData.gageIDs[gageNum])
-        for proc in psutil.process_iter():
-            try:
-                if proc.name() == exeName:
-                    pidActive.append(proc.pid)
-            except:
-                print exeName + " Found, but ended before Python could get the PID."
-        if len(pidActive) == 0:
-            status = False
-            print "NO VALID MODEL JOBS FOUND"
-        else:
-            print "BASIN VALID JOBS FOUND"
-            # Ensure these are being ran by the proper user.
-            proc_stat_file = os.stat('/proc/%d' % pidActive[0])
-            uid = proc_stat_file.st_uid
-            userCheck = pwd.getpwuid(uid)[0]
-            if userCheck != str(jobData.owner):
-                jobData.errMsg = "ERROR: " + exeName + " is being ran by: " + \
-                userCheck + " When it should be ran by: " + jobData.owner
-                status = False
-                raise
-            else:
-                status = True
-                
-    
+    if status:
+        print "BASIN VALID JOBS FOUND"
+    else:
+        print "NO VALID MODEL JOBS FOUND"
             
     return status
-
+    
 def checkParmGenJob(jobData,gageNum,pbsJobId):
     """
     Generic Function to check for parameter generation jobs running. This applies
     mainly to the validation workflow. 
     """
     
-    # Get unique PID.
-    pidUnique = os.getpid()
-    userTmp = pwd.getpwuid(os.getuid()).pw_name
-    
-    if userTmp != str(jobData.owner):
-        jobData.errMsg = "ERROR: you are not the owner of this job."
-        raise Exception()
-    
-    if jobData.analysisRunType == 1:
-        csvPath = "./BJOBS_" + str(pidUnique) + ".csv"
-        cmd = 'bjobs -u ' + str(jobData.owner) + ' -w -noheader > ' + csvPath
-        try:
-            subprocess.call(cmd,shell=True)
-        except:
-            jobData.errMsg = "ERROR: Unable to pipe BJOBS output to" + csvPath
-            raise
-    
-        colNames = ['JOBID','USER','STAT','QUEUE','FROM_HOST','EXEC_HOST','JOB_NAME',\
-                   'SUBMIT_MONTH','SUBMIT_DAY','SUBMIT_HHMM']
-        try:
-            jobs = pd.read_csv(csvPath,delim_whitespace=True,header=None,names=colNames)
-        except:
-            jobData.errMsg = "ERROR: Failure to read in: " + csvPath
-            raise
-        
-        # Delete temporary CSV files
-        cmdTmp = 'rm -rf ' + csvPath
-        subprocess.call(cmdTmp,shell=True)
-        
-        # Compile expected job name that the job should occupy.
-        expName = "WH_PARM_GEN_" + str(jobData.jobID) + "_" + \
-                  str(jobData.gageIDs[gageNum])
-                  
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-    
-        lenJobs = len(jobs.JOBID)
-
-        if lenJobs == 0:
-            status = False
-        else:
-            # Find if any jobs for this basin are being ran.
-            testDF = jobs.query("JOB_NAME == '" + expName + "'")
-            if len(testDF) != 0:
-                status = True
-                
-    if jobData.analysisRunType == 3 or jobData.analysisRunType == 6:
-        # We are running via slurm
-        csvPath = "./SLURM_" + str(pidUnique) + ".csv"
-        cmd = "squeue -u " + str(jobData.owner) + \
-              ' --format=\"%.18i %.9P %.32j %.8u %.2t %.10M %.6D %R\"' + \
-              ' > ' + csvPath
-        try:
-            subprocess.call(cmd,shell=True)
-        except:
-            jobData.errMsg = "ERROR: Unable to pipe SLURM output to: " + csvPath
-            raise
-            
-        if not os.path.isfile(csvPath):
-            jobData.errMsg = "ERROR: squeue did not create necessary CSV file with job names."
-            raise
-            
-        try:
-            jobs = pd.read_csv(csvPath,delim_whitespace=True)
-        except:
-            jobData.errMsg = "ERROR: Failure to read in: " + csvPath
-            raise
-            
-        # Delete temporary CSV files.
-        cmdTmp = "rm -rf " + csvPath
-        subprocess.call(cmd,shell=True)
-        
-        # Compile expected job name that the job should occupy.
-        expName = "WH_PARM_GEN_" + str(jobData.jobID) + "_" + \
-                  str(jobData.gageIDs[gageNum])
-                  
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        if len(jobs.NAME) > 0:
-            for jobNum in range(0,len(jobs.NAME)):
-                if jobs.NAME[jobNum].strip() == expName:
-                    print "EVAL JOBS FOUND"
-                    status = True
-        else:
-            status = False
-        
-        if not status:
-            print "NO EVAL JOBS FOUND"
-        
     if jobData.analysisRunType == 4 or jobData.analysisRunType == 5:
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        # We are running via mpiexec/mpirun
-        pidActive = []
-        exeName = "P" + str(jobData.jobID) + str(jobData.gageIDs[gageNum]) 
-        for proc in psutil.process_iter():
-            try:
-                if proc.name() == exeName:
-                    pidActive.append(proc.pid)
-            except:
-                print exeName + " Found, but ended before Python could get the PID."
-        if len(pidActive) == 0:
-            status = False
-            print "NO EVAL JOBS FOUND"
-        else:
-            print "EVAL JOBS FOUND"
-            # Ensure these are being ran by the proper user.
-            proc_stat_file = os.stat('/proc/%d' % pidActive[0])
-            uid = proc_stat_file.st_uid
-            userCheck = pwd.getpwuid(uid)[0]
-            if userCheck != str(jobData.owner):
-                jobData.errMsg = "ERROR: " + exeName + " is being ran by: " + \
-                userCheck + " When it should be ran by: " + jobData.owner
-                status = False
-                raise
-            else:
-                status = True
-                
-    if jobData.analysisRunType == 2:
-        # We are running via qsub
+        expName = "P" + str(jobData.jobID) + str(jobData.gageIDs[gageNum])
+    else:
         expName = "WH_PARM_GEN_" + str(jobData.jobID) + "_" + \
                   str(jobData.gageIDs[gageNum])
                   
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
+    try:
+        status = checkSchedJob(jobData,jobData.analysisRunType,expName,pbsJobId,gageNum)
+    except:
+        raise
         
-        # Run the qstat command on the username IF we are running this command
-        # for the first time (restarting workflow, or new workflow instance). 
-        # Once jobs are fired off, we will populate the jobId array with the values
-        # returned by qsub. 
-        if pbsJobId[gageNum] == -9999:
-            # Run qstat for the user.
-            try:
-                jobsTmp = subprocess.check_output(['qstat','-u',jobData.owner])
-            except:
-                jobData.errMsg = "ERROR: Unable to run qstat for user: " + jobData.owner
-                raise
-            if len(jobsTmp) == 0:
-                # This means no jobs are running for the user. We can safely
-                # assume the status is false.
-                status = False
-            else:
-                numLinesTmp = len(jobsTmp.split('\n'))
-                # The exptected return from qstat on Cheyenne gives us at least 7 lines to parse.
-                if numLinesTmp < 7:
-                    jobData.errMsg = "ERROR: Expected qstat return should be greater than 6 lines."
-                    raise
-                for lineNum in range(5,numLinesTmp):
-                    # This is a CRUDE assumption based on the behavior of qstat 
-                    # on Cheyenne.
-                    lineTmp = jobsTmp.split('\n')[lineNum]
-                    if len(lineTmp) == 0:
-                        continue
-                    else:
-                        expCheck = lineTmp.split()[3]
-                        if expCheck == expName:
-                            # We have a match. This means a job running from a 
-                            # previous instance of the workflow is still running.
-                            # Get the job id and set it into the jobIds array.
-                            pbsJobId[gageNum] = int((lineTmp.split()[0]).split('.')[0])
-                            status = True
-        else:
-            # We are checking for a job ID that has already been submitted by 
-            # this instance of the workflow. 
-            # Try running qstat for the job ID. If it's unsucessfull, then we
-            # can make a good assumption that the job is no longer running. 
-            try:
-                jobsTmp = subprocess.check_output(['qstat',str(pbsJobId[gageNum])])
-                status = True
-            except:
-                # This means the job is no longer running.
-                status = False
-                return status
-                  
+    if status:
+        print "PARM GEN JOBS FOUND"
+    else:
+        print "NO PARM GEN JOBS FOUND"
+            
     return status
     
 def checkEvalJob(jobData,gageNum,pbsJobId):
@@ -911,544 +686,62 @@ def checkEvalJob(jobData,gageNum,pbsJobId):
     a control and best simulation during the validation workflow.
     """
     
-    # Get unique PID.
-    pidUnique = os.getpid()
-    userTmp = pwd.getpwuid(os.getuid()).pw_name
-    
-    if userTmp != str(jobData.owner):
-        jobData.errMsg = "ERROR: you are not the owner of this job."
-        raise Exception()
-    
-    if jobData.analysisRunType == 1:
-        csvPath = "./BJOBS_" + str(pidUnique) + ".csv"
-        cmd = 'bjobs -u ' + str(jobData.owner) + ' -w -noheader > ' + csvPath
-        try:
-            subprocess.call(cmd,shell=True)
-        except:
-            jobData.errMsg = "ERROR: Unable to pipe BJOBS output to" + csvPath
-            raise
-    
-        colNames = ['JOBID','USER','STAT','QUEUE','FROM_HOST','EXEC_HOST','JOB_NAME',\
-                   'SUBMIT_MONTH','SUBMIT_DAY','SUBMIT_HHMM']
-        try:
-            jobs = pd.read_csv(csvPath,delim_whitespace=True,header=None,names=colNames)
-        except:
-            jobData.errMsg = "ERROR: Failure to read in: " + csvPath
-            raise
-        
-        # Delete temporary CSV files
-        cmdTmp = 'rm -rf ' + csvPath
-        subprocess.call(cmdTmp,shell=True)
-        
-        # Compile expected job name that the job should occupy.
-        expName = "WH_EVAL_" + str(jobData.jobID) + "_" + \
-                  str(jobData.gageIDs[gageNum])
-                  
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-                  
-        lenJobs = len(jobs.JOBID)
-
-        if lenJobs == 0:
-            status = False
-        else:
-            # Find if any jobs for this basin are being ran.
-            testDF = jobs.query("JOB_NAME == '" + expName + "'")
-            if len(testDF) != 0:
-                status = True
-                
-    if jobData.analysisRunType == 2:
-        # We are running via qsub
-        # Compile expected job name that job should occupy
-        expName = "WH_EVAL_" + str(jobData.jobID) + "_" + \
-                  str(jobData.gageIDs[gageNum])
-                  
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        # Run the qstat command on the username IF we are running this command
-        # for the first time (restarting workflow, or new workflow instance). 
-        # Once jobs are fired off, we will populate the jobId array with the values
-        # returned by qsub. 
-        if pbsJobId[gageNum] == -9999:
-            # Run qstat for the user.
-            try:
-                jobsTmp = subprocess.check_output(['qstat','-u',jobData.owner])
-            except:
-                jobData.errMsg = "ERROR: Unable to run qstat for user: " + jobData.owner
-                raise
-            if len(jobsTmp) == 0:
-                # This means no jobs are running for the user. We can safely
-                # assume the status is false.
-                status = False
-            else:
-                numLinesTmp = len(jobsTmp.split('\n'))
-                # The exptected return from qstat on Cheyenne gives us at least 7 lines to parse.
-                if numLinesTmp < 7:
-                    jobData.errMsg = "ERROR: Expected qstat return should be greater than 6 lines."
-                    raise
-                for lineNum in range(5,numLinesTmp):
-                    # This is a CRUDE assumption based on the behavior of qstat 
-                    # on Cheyenne.
-                    lineTmp = jobsTmp.split('\n')[lineNum]
-                    if len(lineTmp) == 0:
-                        continue
-                    else:
-                        expCheck = lineTmp.split()[3]
-                        if expCheck == expName:
-                            # We have a match. This means a job running from a 
-                            # previous instance of the workflow is still running.
-                            # Get the job id and set it into the jobIds array.
-                            pbsJobId[gageNum] = int((lineTmp.split()[0]).split('.')[0])
-                            status = True
-        else:
-            # We are checking for a job ID that has already been submitted by 
-            # this instance of the workflow. 
-            # Try running qstat for the job ID. If it's unsucessfull, then we
-            # can make a good assumption that the job is no longer running. 
-            try:
-                jobsTmp = subprocess.check_output(['qstat',str(pbsJobId[gageNum])])
-                status = True
-            except:
-                # This means the job is no longer running.
-                status = False
-                return status
-                  
-    if jobData.analysisRunType == 3 or jobData.analysisRunType == 6:
-        # We are running via slurm
-        csvPath = "./SLURM_" + str(pidUnique) + ".csv"
-        cmd = "squeue -u " + str(jobData.owner) + \
-              ' --format=\"%.18i %.9P %.32j %.8u %.2t %.10M %.6D %R\"' + \
-              ' > ' + csvPath
-        try:
-            subprocess.call(cmd,shell=True)
-        except:
-            jobData.errMsg = "ERROR: Unable to pipe SLURM output to: " + csvPath
-            raise
-            
-        if not os.path.isfile(csvPath):
-            jobData.errMsg = "ERROR: squeue did not create necessary CSV file with job names."
-            raise
-            
-        try:
-            jobs = pd.read_csv(csvPath,delim_whitespace=True)
-        except:
-            jobData.errMsg = "ERROR: Failure to read in: " + csvPath
-            raise
-            
-        # Delete temporary CSV files.
-        cmdTmp = "rm -rf " + csvPath
-        subprocess.call(cmd,shell=True)
-        
-        # Compile expected job name that the job should occupy.
+    if jobData.analysisRunType == 4 or jobData.analysisRunType == 5:
+        expName = "E" + str(jobData.jobID) + str(jobData.gageIDs[gageNum])
+    else:
         expName = "WH_EVAL_" + str(jobData.jobID) + "_" + \
                   str(jobData.gageIDs[gageNum])
                   
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        if len(jobs.NAME) > 0:
-            for jobNum in range(0,len(jobs.NAME)):
-                if jobs.NAME[jobNum].strip() == expName:
-                    print "EVAL JOBS FOUND"
-                    status = True
-        else:
-            status = False
-        
-        if not status:
-            print "NO EVAL JOBS FOUND"
-                
-    if jobData.analysisRunType == 4 or jobData.analysisRunType == 5:
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
+    try:
+        status = checkSchedJob(jobData,jobData.analysisRunType,expName,pbsJobId,gageNum)
+    except:
+        raise
         
-        # We are running via mpiexec
-        pidActive = []
-        exeName = "E" + str(jobData.jobID) + str(jobData.gageIDs[gageNum]) 
-        for proc in psutil.process_iter():
-            try:
-                if proc.name() == exeName:
-                    pidActive.append(proc.pid)
-            except:
-                print exeName + " Found, but ended before Python could get the PID."
-        if len(pidActive) == 0:
-            status = False
-            print "NO EVAL JOBS FOUND"
-        else:
-            print "EVAL JOBS FOUND"
-            # Ensure these are being ran by the proper user.
-            proc_stat_file = os.stat('/proc/%d' % pidActive[0])
-            uid = proc_stat_file.st_uid
-            userCheck = pwd.getpwuid(uid)[0]
-            if userCheck != str(jobData.owner):
-                jobData.errMsg = "ERROR: " + exeName + " is being ran by: " + \
-                userCheck + " When it should be ran by: " + jobData.owner
-                status = False
-                raise
-            else:
-                status = True
+    if status:
+        print "EVAL JOBS FOUND"
+    else:
+        print "NO EVAL JOBS FOUND"
             
     return status
-
+    
 def checkSensPreProcJob(jobData,gageID,gageNum,pbsJobId):
     """ 
     Generic function to check for jobs running that are preparing the input
     parameter datasets for sensitivity analysis.
     """
     
-    # Get unique PID.
-    pidUnique = os.getpid()
-    userTmp = pwd.getpwuid(os.getuid()).pw_name
-    
-    if userTmp != str(jobData.owner):
-        jobData.errMsg = "ERROR: you are not the owner of this job."
-        raise Exception()
-        
-    if jobData.analysisRunType == 1:
-        csvPath = "./BJOBS_" + str(pidUnique) + ".csv"
-        cmd = 'bjobs -u ' + str(jobData.owner) + ' -w -noheader > ' + csvPath
-        try:
-            subprocess.call(cmd,shell=True)
-        except:
-            jobData.errMsg = "ERROR: Unable to pipe BJOBS output to" + csvPath
-            raise
-    
-        colNames = ['JOBID','USER','STAT','QUEUE','FROM_HOST','EXEC_HOST','JOB_NAME',\
-                   'SUBMIT_MONTH','SUBMIT_DAY','SUBMIT_HHMM']
-        try:
-            jobs = pd.read_csv(csvPath,delim_whitespace=True,header=None,names=colNames)
-        except:
-            jobData.errMsg = "ERROR: Failure to read in: " + csvPath
-            raise
-        
-        # Delete temporary CSV files
-        cmdTmp = 'rm -rf ' + csvPath
-        subprocess.call(cmdTmp,shell=True)
-        
-        # Compile expected job name that the job should occupy.
-        expName = "WH_SENS_PREPROC_" + str(jobData.jobID) + "_" + \
-                  str(gageID)
-                  
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-                  
-        lenJobs = len(jobs.JOBID)
-
-        if lenJobs == 0:
-            status = False
-        else:
-            # Find if any jobs for this basin are being ran.
-            testDF = jobs.query("JOB_NAME == '" + expName + "'")
-            if len(testDF) != 0:
-                status = True
-                
-    if jobData.analysisRunType == 2:
-        # We are running via qsub
-        # Compile expected job name that job should occupy
-        expName = "WH_SENS_PREPROC_" + str(jobData.jobID) + "_" + \
-                  str(gageID)
-                  
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        # Run the qstat command on the username IF we are running this command
-        # for the first time (restarting workflow, or new workflow instance). 
-        # Once jobs are fired off, we will populate the jobId array with the values
-        # returned by qsub. 
-        if pbsJobId[gageNum] == -9999:
-            # Run qstat for the user.
-            try:
-                jobsTmp = subprocess.check_output(['qstat','-u',jobData.owner])
-            except:
-                jobData.errMsg = "ERROR: Unable to run qstat for user: " + jobData.owner
-                raise
-            if len(jobsTmp) == 0:
-                # This means no jobs are running for the user. We can safely
-                # assume the status is false.
-                status = False
-            else:
-                numLinesTmp = len(jobsTmp.split('\n'))
-                # The exptected return from qstat on Cheyenne gives us at least 7 lines to parse.
-                if numLinesTmp < 7:
-                    jobData.errMsg = "ERROR: Expected qstat return should be greater than 6 lines."
-                    raise
-                for lineNum in range(5,numLinesTmp):
-                    # This is a CRUDE assumption based on the behavior of qstat 
-                    # on Cheyenne.
-                    lineTmp = jobsTmp.split('\n')[lineNum]
-                    if len(lineTmp) == 0:
-                        continue
-                    else:
-                        expCheck = lineTmp.split()[3]
-                        if expCheck == expName:
-                            # We have a match. This means a job running from a 
-                            # previous instance of the workflow is still running.
-                            # Get the job id and set it into the jobIds array.
-                            pbsJobId[gageNum] = int((lineTmp.split()[0]).split('.')[0])
-                            status = True
-        else:
-            # We are checking for a job ID that has already been submitted by 
-            # this instance of the workflow. 
-            # Try running qstat for the job ID. If it's unsucessfull, then we
-            # can make a good assumption that the job is no longer running. 
-            try:
-                jobsTmp = subprocess.check_output(['qstat',str(pbsJobId[gageNum])])
-                status = True
-            except:
-                # This means the job is no longer running.
-                status = False
-                return status
-                  
-    if jobData.analysisRunType == 3 or jobData.analysisRunType == 6:
-        # We are running via slurm
-        csvPath = "./SLURM_" + str(pidUnique) + ".csv"
-        cmd = "squeue -u " + str(jobData.owner) + \
-              ' --format=\"%.18i %.9P %.32j %.8u %.2t %.10M %.6D %R\"' + \
-              ' > ' + csvPath
-        try:
-            subprocess.call(cmd,shell=True)
-        except:
-            jobData.errMsg = "ERROR: Unable to pipe SLURM output to: " + csvPath
-            raise
-            
-        if not os.path.isfile(csvPath):
-            jobData.errMsg = "ERROR: squeue did not create necessary CSV file with job names."
-            raise
-            
-        try:
-            jobs = pd.read_csv(csvPath,delim_whitespace=True)
-        except:
-            jobData.errMsg = "ERROR: Failure to read in: " + csvPath
-            raise
-            
-        # Delete temporary CSV files.
-        cmdTmp = "rm -rf " + csvPath
-        subprocess.call(cmd,shell=True)
-        
-        # Compile expected job name that the job should occupy.
+    if jobData.analysisRunType == 4 or jobData.analysisRunType == 5:
+        expName = "SPRE" + str(jobData.jobID) + str(gageID)
+    else:
         expName = "WH_SENS_PREPROC_" + str(jobData.jobID) + "_" + \
                   str(gageID)
                   
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        if len(jobs.NAME) > 0:
-            for jobNum in range(0,len(jobs.NAME)):
-                if jobs.NAME[jobNum].strip() == expName:
-                    status = True
-        else:
-            status = False
-        
-    if jobData.analysisRunType == 4 or jobData.analysisRunType == 5:
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        # We are running via mpiexec
-        pidActive = []
-        exeName = "SPRE" + str(jobData.jobID) + str(gageID) 
-        print exeName
-        for proc in psutil.process_iter():
-            try:
-                if proc.name() == exeName:
-                    pidActive.append(proc.pid)
-            except:
-                print exeName + " Found, but ended before Python could get the PID."
-        if len(pidActive) == 0:
-            status = False
-        else:
-            # Ensure these are being ran by the proper user.
-            proc_stat_file = os.stat('/proc/%d' % pidActive[0])
-            uid = proc_stat_file.st_uid
-            userCheck = pwd.getpwuid(uid)[0]
-            if userCheck != str(jobData.owner):
-                jobData.errMsg = "ERROR: " + exeName + " is being ran by: " + \
-                userCheck + " When it should be ran by: " + jobData.owner
-                status = False
-                raise
-            else:
-                status = True
+    try:
+        status = checkSchedJob(jobData,jobData.analysisRunType,expName,pbsJobId,gageNum)
+    except:
+        raise
             
     return status
-
+    
 def checkSensPostProcJob(jobData,gageID,gageNum,pbsJobId):
     """ 
     Generic function to check for jobs running that are post-processing sensitivity
     model output for analysis. 
     """
     
-    # Get unique PID.
-    pidUnique = os.getpid()
-    userTmp = pwd.getpwuid(os.getuid()).pw_name
-    
-    if userTmp != str(jobData.owner):
-        jobData.errMsg = "ERROR: you are not the owner of this job."
-        raise Exception()
-        
-    if jobData.analysisRunType == 1:
-        csvPath = "./BJOBS_" + str(pidUnique) + ".csv"
-        cmd = 'bjobs -u ' + str(jobData.owner) + ' -w -noheader > ' + csvPath
-        try:
-            subprocess.call(cmd,shell=True)
-        except:
-            jobData.errMsg = "ERROR: Unable to pipe BJOBS output to" + csvPath
-            raise
-    
-        colNames = ['JOBID','USER','STAT','QUEUE','FROM_HOST','EXEC_HOST','JOB_NAME',\
-                   'SUBMIT_MONTH','SUBMIT_DAY','SUBMIT_HHMM']
-        try:
-            jobs = pd.read_csv(csvPath,delim_whitespace=True,header=None,names=colNames)
-        except:
-            jobData.errMsg = "ERROR: Failure to read in: " + csvPath
-            raise
-        
-        # Delete temporary CSV files
-        cmdTmp = 'rm -rf ' + csvPath
-        subprocess.call(cmdTmp,shell=True)
-        
-        # Compile expected job name that the job should occupy.
-        expName = "WH_SENS_POSTPROC_" + str(jobData.jobID) + "_" + \
-                  str(gageID)
-                  
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-                  
-        lenJobs = len(jobs.JOBID)
-
-        if lenJobs == 0:
-            status = False
-        else:
-            # Find if any jobs for this basin are being ran.
-            testDF = jobs.query("JOB_NAME == '" + expName + "'")
-            if len(testDF) != 0:
-                status = True
-                
-    if jobData.analysisRunType == 2:
-        # We are running via qsub
-        # Compile expected job name that job should occupy
+    if jobData.analysisRunType == 4 or jobData.analysisRunType == 5:
+        expName = "SPOS" + str(jobData.jobID) + str(gageID)
+    else:
         expName = "WH_SENS_POSTPROC_" + str(jobData.jobID) + "_" + \
                   str(gageID)
                   
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-                  
-        # Run the qstat command on the username IF we are running this command
-        # for the first time (restarting workflow, or new workflow instance). 
-        # Once jobs are fired off, we will populate the jobId array with the values
-        # returned by qsub. 
-        if pbsJobId[gageNum] == -9999:
-            # Run qstat for the user.
-            try:
-                jobsTmp = subprocess.check_output(['qstat','-u',jobData.owner])
-            except:
-                jobData.errMsg = "ERROR: Unable to run qstat for user: " + jobData.owner
-                raise
-            if len(jobsTmp) == 0:
-                # This means no jobs are running for the user. We can safely
-                # assume the status is false.
-                status = False
-            else:
-                numLinesTmp = len(jobsTmp.split('\n'))
-                # The exptected return from qstat on Cheyenne gives us at least 7 lines to parse.
-                if numLinesTmp < 7:
-                    jobData.errMsg = "ERROR: Expected qstat return should be greater than 6 lines."
-                    raise
-                for lineNum in range(5,numLinesTmp):
-                    # This is a CRUDE assumption based on the behavior of qstat 
-                    # on Cheyenne.
-                    lineTmp = jobsTmp.split('\n')[lineNum]
-                    if len(lineTmp) == 0:
-                        continue
-                    else:
-                        expCheck = lineTmp.split()[3]
-                        if expCheck == expName:
-                            # We have a match. This means a job running from a 
-                            # previous instance of the workflow is still running.
-                            # Get the job id and set it into the jobIds array.
-                            pbsJobId[gageNum] = int((lineTmp.split()[0]).split('.')[0])
-                            status = True
-        else:
-            # We are checking for a job ID that has already been submitted by 
-            # this instance of the workflow. 
-            # Try running qstat for the job ID. If it's unsucessfull, then we
-            # can make a good assumption that the job is no longer running. 
-            try:
-                jobsTmp = subprocess.check_output(['qstat',str(pbsJobId[gageNum])])
-                status = True
-            except:
-                # This means the job is no longer running.
-                status = False
-                return status
-            
-    if jobData.analysisRunType == 3 or jobData.analysisRunType == 6:
-        # We are running via slurm
-        csvPath = "./SLURM_" + str(pidUnique) + ".csv"
-        cmd = "squeue -u " + str(jobData.owner) + \
-              ' --format=\"%.18i %.9P %.32j %.8u %.2t %.10M %.6D %R\"' + \
-              ' > ' + csvPath
-        try:
-            subprocess.call(cmd,shell=True)
-        except:
-            jobData.errMsg = "ERROR: Unable to pipe SLURM output to: " + csvPath
-            raise
-            
-        if not os.path.isfile(csvPath):
-            jobData.errMsg = "ERROR: squeue did not create necessary CSV file with job names."
-            raise
-            
-        try:
-            jobs = pd.read_csv(csvPath,delim_whitespace=True)
-        except:
-            jobData.errMsg = "ERROR: Failure to read in: " + csvPath
-            raise
+    try:
+        status = checkSchedJob(jobData,jobData.analysisRunType,expName,pbsJobId,gageNum)
+    except:
+        raise
             
-        # Delete temporary CSV files.
-        cmdTmp = "rm -rf " + csvPath
-        subprocess.call(cmd,shell=True)
-        
-        # Compile expected job name that the job should occupy.
-        expName = "WH_SENS_POSTPROC_" + str(jobData.jobID) + "_" + \
-                  str(gageID)
-                  
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        if len(jobs.NAME) > 0:
-            for jobNum in range(0,len(jobs.NAME)):
-                if jobs.NAME[jobNum].strip() == expName:
-                    status = True
-        else:
-            status = False
-        
-    if jobData.analysisRunType == 4 or jobData.analysisRunType == 5:
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        # We are running via mpiexec
-        pidActive = []
-        exeName = "SPOS" + str(jobData.jobID) + str(gageID) 
-        for proc in psutil.process_iter():
-            try:
-                if proc.name() == exeName:
-                    pidActive.append(proc.pid)
-            except:
-                print exeName + " Found, but ended before Python could get the PID."
-        if len(pidActive) == 0:
-            status = False
-        else:
-            # Ensure these are being ran by the proper user.
-            proc_stat_file = os.stat('/proc/%d' % pidActive[0])
-            uid = proc_stat_file.st_uid
-            userCheck = pwd.getpwuid(uid)[0]
-            if userCheck != str(jobData.owner):
-                jobData.errMsg = "ERROR: " + exeName + " is being ran by: " + \
-                userCheck + " When it should be ran by: " + jobData.owner
-                status = False
-                raise
-            else:
-                status = True
-    
     return status
-
+    
 def checkBasSensJob(jobData,gageNum,iteration,runDir,pbsJobId):
     """
     Generic function to check the status of a sensitivity model run. If we are running BSUB/QSUB/Slurm,
@@ -1461,357 +754,35 @@ def checkBasSensJob(jobData,gageNum,iteration,runDir,pbsJobId):
     being uses should also match the number of cores being used. 
     """
     
-    # Get unique PID.
-    pidUnique = os.getpid()
-    userTmp = pwd.getpwuid(os.getuid()).pw_name
-    
-    if userTmp != str(jobData.owner):
-        jobData.errMsg = "ERROR: you are not the owner of this job."
-        raise Exception()
-    
-    if jobData.jobRunType == 1:
-        csvPath = "./BJOBS_" + str(pidUnique) + ".csv"
-        cmd = 'bjobs -u ' + str(jobData.owner) + ' -w -noheader > ' + csvPath
-        try:
-            subprocess.call(cmd,shell=True)
-        except:
-            jobData.errMsg = "ERROR: Unable to pipe BJOBS output to" + csvPath
-            raise
-    
-        colNames = ['JOBID','USER','STAT','QUEUE','FROM_HOST','EXEC_HOST','JOB_NAME',\
-                   'SUBMIT_MONTH','SUBMIT_DAY','SUBMIT_HHMM']
-        try:
-            jobs = pd.read_csv(csvPath,delim_whitespace=True,header=None,names=colNames)
-        except:
-            jobData.errMsg = "ERROR: Failure to read in: " + csvPath
-            raise
-        
-        # Delete temporary CSV files
-        cmdTmp = 'rm -rf ' + csvPath
-        subprocess.call(cmdTmp,shell=True)
-        
-        # Compile expected job name that the job should occupy.
-        expName = "WHS" + str(jobData.jobID) + str(jobData.gageIDs[gageNum]) + str(iteration)
-    
-        lenJobs = len(jobs.JOBID)
-
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-    
-        if lenJobs == 0:
-            status = False
-        else:
-            # Find if any jobs for this basin are being ran.
-            testDF = jobs.query("JOB_NAME == '" + expName + "'")
-            if len(testDF) != 0:
-                status = True
-                
-    if jobData.jobRunType == 2:
-        # We are running via qsub
-        # Compile expected job name that the job should occupy.
-        expName = "WHS" + str(jobData.jobID) + str(jobData.gageIDs[gageNum]) + str(iteration)
-        
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        # Run the qstat command on the username IF we are running this command
-        # for the first time (restarting workflow, or new workflow instance). 
-        # Once jobs are fired off, we will populate the jobId array with the values
-        # returned by qsub. 
-        if pbsJobId[gageNum,iteration] == -9999:
-            # Run qstat for the user.
-            try:
-                jobsTmp = subprocess.check_output(['qstat','-u',jobData.owner])
-            except:
-                jobData.errMsg = "ERROR: Unable to run qstat for user: " + jobData.owner
-                raise
-            if len(jobsTmp) == 0:
-                # This means no jobs are running for the user. We can safely
-                # assume the status is false.
-                status = False
-            else:
-                numLinesTmp = len(jobsTmp.split('\n'))
-                # The exptected return from qstat on Cheyenne gives us at least 7 lines to parse.
-                if numLinesTmp < 7:
-                    jobData.errMsg = "ERROR: Expected qstat return should be greater than 6 lines."
-                    raise
-                for lineNum in range(5,numLinesTmp):
-                    # This is a CRUDE assumption based on the behavior of qstat 
-                    # on Cheyenne.
-                    lineTmp = jobsTmp.split('\n')[lineNum]
-                    if len(lineTmp) == 0:
-                        continue
-                    else:
-                        expCheck = lineTmp.split()[3]
-                        if expCheck == expName:
-                            # We have a match. This means a job running from a 
-                            # previous instance of the workflow is still running.
-                            # Get the job id and set it into the jobIds array.
-                            pbsJobId[gageNum,iteration] = int((lineTmp.split()[0]).split('.')[0])
-                            status = True
-        else:
-            # We are checking for a job ID that has already been submitted by 
-            # this instance of the workflow. 
-            # Try running qstat for the job ID. If it's unsucessfull, then we
-            # can make a good assumption that the job is no longer running. 
-            try:
-                jobsTmp = subprocess.check_output(['qstat',str(pbsJobId[gageNum,iteration])])
-                status = True
-            except:
-                # This means the job is no longer running.
-                status = False
-                return status
+    expName = "WHS" + str(jobData.jobID) + str(jobData.gageIDs[gageNum]) + str(iteration)
     
-    if jobData.jobRunType == 3 or jobData.jobRunType == 6:
-        # We are running via slurm
-        csvPath = "./SLURM_" + str(pidUnique) + ".csv"
-        cmd = "squeue -u " + str(jobData.owner) + \
-              ' --format=\"%.18i %.9P %.32j %.8u %.2t %.10M %.6D %R\"' + \
-              ' > ' + csvPath
-        try:
-            subprocess.call(cmd,shell=True)
-        except:
-            jobData.errMsg = "ERROR: Unable to pipe SLURM output to: " + csvPath
-            raise
-            
-        if not os.path.isfile(csvPath):
-            jobData.errMsg = "ERROR: squeue did not create necessary CSV file with job names."
-            raise
-            
-        try:
-            jobs = pd.read_csv(csvPath,delim_whitespace=True)
-        except:
-            jobData.errMsg = "ERROR: Failure to read in: " + csvPath
-            raise
-            
-        # Delete temporary CSV files.
-        cmdTmp = "rm -rf " + csvPath
-        subprocess.call(cmd,shell=True)
-        
-        # Compile expected job name that the job should occupy.
-        expName = "WHS" + str(jobData.jobID) + str(jobData.gageIDs[gageNum]) + str(iteration)
+    try:
+        status = checkSchedJob(jobData,jobData.jobRunType,expName,pbsJobId,(gageNum,iteration))
+    except:
+        raise
         
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        if len(jobs.NAME) > 0:
-            for jobNum in range(0,len(jobs.NAME)):
-                if jobs.NAME[jobNum].strip() == expName:
-                    print "MODEL SIMULATIONS FOUND"
-                    status = True
-        else:
-            status = False
-        
-        if not status:
-            print "NO MODEL SIMULATIONS FOUND"
+    if status:
+        print "MODEL SIMULATIONS FOUND"
+    else:
+        print "NO MODEL SIMULATIONS FOUND"
             
-    if jobData.jobRunType == 4 or jobData.jobRunType == 5:
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        # We are using mpiexec.
-        pidActive = []
-        exeName = "WHS" + str(jobData.jobID) + str(jobData.gageIDs[gageNum]) + str(iteration)
-        for proc in psutil.process_iter():
-            try:
-                if proc.name() == exeName:
-                    pidActive.append(proc.pid)
-            except:
-                print exeName + " Found, but ended before Python could get the PID."
-        if len(pidActive) == 0:
-            status = False
-            print "NO MODEL SIMULATIONS FOUND"
-        else:
-            print "MODEL SIMULATIONS FOUND"
-            # Ensure these are being ran by the proper user.
-            proc_stat_file = os.stat('/proc/%d' % pidActive[0])
-            uid = proc_stat_file.st_uid
-            userCheck = pwd.getpwuid(uid)[0]
-            if userCheck != str(jobData.owner):
-                jobData.errMsg = "ERROR: " + exeName + " is being ran by: " + \
-                userCheck + " When it should be ran by: " + jobData.owner
-                status = False
-                raise
-            else:
-                status = True
-                
     return status
-
+    
 def checkSensCollectJob(jobData,gageID,iteration,gageNum,pbsJobId):
     """ 
     Generic function to check for jobs running that are collecting model output
     into an R dataset
     """
     
-    # Get unique PID.
-    pidUnique = os.getpid()
-    userTmp = pwd.getpwuid(os.getuid()).pw_name
-    
-    if userTmp != str(jobData.owner):
-        jobData.errMsg = "ERROR: you are not the owner of this job."
-        raise Exception()
-        
-    if jobData.analysisRunType == 1:
-        csvPath = "./BJOBS_" + str(pidUnique) + ".csv"
-        cmd = 'bjobs -u ' + str(jobData.owner) + ' -w -noheader > ' + csvPath
-        try:
-            subprocess.call(cmd,shell=True)
-        except:
-            jobData.errMsg = "ERROR: Unable to pipe BJOBS output to" + csvPath
-            raise
-    
-        colNames = ['JOBID','USER','STAT','QUEUE','FROM_HOST','EXEC_HOST','JOB_NAME',\
-                   'SUBMIT_MONTH','SUBMIT_DAY','SUBMIT_HHMM']
-        try:
-            jobs = pd.read_csv(csvPath,delim_whitespace=True,header=None,names=colNames)
-        except:
-            jobData.errMsg = "ERROR: Failure to read in: " + csvPath
-            raise
-        
-        # Delete temporary CSV files
-        cmdTmp = 'rm -rf ' + csvPath
-        subprocess.call(cmdTmp,shell=True)
-        
-        # Compile expected job name that the job should occupy.
-        expName = "WH_SENS_COLLECT_" + str(jobData.jobID) + "_" + \
-                  str(gageID) + "_" + str(iteration)
-                  
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-                  
-        lenJobs = len(jobs.JOBID)
-
-        if lenJobs == 0:
-            status = False
-        else:
-            # Find if any jobs for this basin are being ran.
-            testDF = jobs.query("JOB_NAME == '" + expName + "'")
-            if len(testDF) != 0:
-                status = True
-                
-    if jobData.analysisRunType == 2:
-        # We are running via qsub
-        # Compile expected job name that job should occupy
+    if jobData.analysisRunType == 4 or jobData.analysisRunType == 5:
+        expName = "SCOL" + str(jobData.jobID) + str(gageID) + str(iteration)
+    else:
         expName = "WH_SENS_COLLECT_" + str(jobData.jobID) + "_" + \
                   str(gageID) + "_" + str(iteration)
                   
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        # Run the qstat command on the username IF we are running this command
-        # for the first time (restarting workflow, or new workflow instance). 
-        # Once jobs are fired off, we will populate the jobId array with the values
-        # returned by qsub. 
-        if pbsJobId[gageNum,iteration] == -9999:
-            # Run qstat for the user.
-            try:
-                jobsTmp = subprocess.check_output(['qstat','-u',jobData.owner])
-            except:
-                jobData.errMsg = "ERROR: Unable to run qstat for user: " + jobData.owner
-                raise
-            if len(jobsTmp) == 0:
-                # This means no jobs are running for the user. We can safely
-                # assume the status is false.
-                status = False
-            else:
-                numLinesTmp = len(jobsTmp.split('\n'))
-                # The exptected return from qstat on Cheyenne gives us at least 7 lines to parse.
-                if numLinesTmp < 7:
-                    jobData.errMsg = "ERROR: Expected qstat return should be greater than 6 lines."
-                    raise
-                for lineNum in range(5,numLinesTmp):
-                    # This is a CRUDE assumption based on the behavior of qstat 
-                    # on Cheyenne.
-                    lineTmp = jobsTmp.split('\n')[lineNum]
-                    if len(lineTmp) == 0:
-                        continue
-                    else:
-                        expCheck = lineTmp.split()[3]
-                        if expCheck == expName:
-                            # We have a match. This means a job running from a 
-                            # previous instance of the workflow is still running.
-                            # Get the job id and set it into the jobIds array.
-                            pbsJobId[gageNum,iteration] = int((lineTmp.split()[0]).split('.')[0])
-                            status = True
-        else:
-            # We are checking for a job ID that has already been submitted by 
-            # this instance of the workflow. 
-            # Try running qstat for the job ID. If it's unsucessfull, then we
-            # can make a good assumption that the job is no longer running. 
-            try:
-                jobsTmp = subprocess.check_output(['qstat',str(pbsJobId[gageNum,iteration])])
-                status = True
-            except:
-                # This means the job is no longer running.
-                status = False
-                return status
-                  
-    if jobData.analysisRunType == 3 or jobData.analysisRunType == 6:
-        # We are running via slurm
-        csvPath = "./SLURM_" + str(pidUnique) + ".csv"
-        cmd = "squeue -u " + str(jobData.owner) + \
-              ' --format=\"%.18i %.9P %.32j %.8u %.2t %.10M %.6D %R\"' + \
-              ' > ' + csvPath
-        try:
-            subprocess.call(cmd,shell=True)
-        except:
-            jobData.errMsg = "ERROR: Unable to pipe SLURM output to: " + csvPath
-            raise
+    try:
+        status = checkSchedJob(jobData,jobData.analysisRunType,expName,pbsJobId,(gageNum,iteration))
+    except:
+        raise
             
-        if not os.path.isfile(csvPath):
-            jobData.errMsg = "ERROR: squeue did not create necessary CSV file with job names."
-            raise
-            
-        try:
-            jobs = pd.read_csv(csvPath,delim_whitespace=True)
-        except:
-            jobData.errMsg = "ERROR: Failure to read in: " + csvPath
-            raise
-            
-        # Delete temporary CSV files.
-        cmdTmp = "rm -rf " + csvPath
-        subprocess.call(cmd,shell=True)
-        
-        # Compile expected job name that the job should occupy.
-        expName = "WH_SENS_COLLECT_" + str(jobData.jobID) + "_" + \
-                  str(gageID) + "_" + str(iteration)
-                  
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        if len(jobs.NAME) > 0:
-            for jobNum in range(0,len(jobs.NAME)):
-                if jobs.NAME[jobNum].strip() == expName:
-                    status = True
-        else:
-            status = False
-        
-    if jobData.analysisRunType == 4 or jobData.analysisRunType == 5:
-        # Assume no jobs for basin are being ran, unless found in the data frame.
-        status = False
-        
-        # We are running via mpiexec
-        pidActive = []
-        exeName = "SCOL" + str(jobData.jobID) + str(gageID) + str(iteration)
-        for proc in psutil.process_iter():
-            try:
-                if proc.name() == exeName:
-                    pidActive.append(proc.pid)
-            except:
-                print exeName + " Found, but ended before Python could get the PID."
-        if len(pidActive) == 0:
-            status = False
-        else:
-            # Ensure these are being ran by the proper user.
-            proc_stat_file = os.stat('/proc/%d' % pidActive[0])
-            uid = proc_stat_file.st_uid
-            userCheck = pwd.getpwuid(uid)[0]
-            if userCheck != str(jobData.owner):
-                jobData.errMsg = "ERROR: " + exeName + " is being ran by: " + \
-                userCheck + " When it should be ran by: " + jobData.owner
-                status = False
-                raise
-            else:
-                status = True
-    
     return status
@@ -0,0 +1,60 @@
+# Program ran in the background of a model job script to collect the 
+# streamflow at a gage from the CHANOBS output of the model while it is 
+# running. Each newly completed CHANOBS time step is merged into the time 
+# series file (chrt.nc) of the run directory, so the time series is ready 
+# once the model exits. The program collects the final time steps and exits
+# once it receives a SIGTERM from the job script. Optionally, CHANOBS files
+# are removed once they have been consumed to bound the disk usage of a run.
+
+# Logan Karsten
+# National Center for Atmospheric Research
+# Research Applications Laboratory
+# karsten@ucar.edu
+# 303-497-2693
+
+import argparse
+import sys
+import os
+import datetime
+
+# Set the Python path to include package specific functions.
+sys.path.insert(0,os.path.dirname(os.path.realpath(__file__)))
+
+import chanobsMod
+
+def main(argv):
+    # Parse arguments.
+    parser = argparse.ArgumentParser(description='Program to collect the streamflow ' + \
+             'at a gage from CHANOBS model output while the model is running.')
+    parser.add_argument('outDir',metavar='outDir',type=str,nargs='+',
+                        help='Directory the model is writing CHANOBS output to.')
+    parser.add_argument('linkId',metavar='linkId',type=int,nargs='+',
+                        help='Link ID (feature_id) of the gage.')
+    parser.add_argument('startDate',metavar='startDate',type=str,nargs='+',
+                        help='Beginning of the period to collect (YYYYMMDDHHMM).')
+    parser.add_argument('--pollInterval',type=float,nargs='?',default=60.0,
+                        help='Number of seconds between checks for new output.')
+    parser.add_argument('--delete',action='store_true',
+                        help='Remove CHANOBS files once they have been consumed.')
+
+    args = parser.parse_args(argv)
+    outDir = str(args.outDir[0])
+
+    try:
+        startDate = datetime.datetime.strptime(str(args.startDate[0]),'%Y%m%d%H%M')
+    except ValueError:
+        print "ERROR: Invalid start date: " + str(args.startDate[0])
+        sys.exit(1)
+
+    if not os.path.isdir(outDir):
+        print "ERROR: Directory: " + outDir + " not found."
+        sys.exit(1)
+
+    try:
+        chanobsMod.streamStreamflow(outDir,args.linkId[0],startDate,args.pollInterval,args.delete)
+    except Exception as e:
+        print "ERROR: Unable to collect streamflow: " + str(e)
+        sys.exit(2)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
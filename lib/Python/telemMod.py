@@ -0,0 +1,219 @@
+# Module file containing functions for recording the telemetry of the jobs
+# ran by the workflow. Each job submitted by the workflow is recorded with
+# it's submission time, and each job script records the time it started, and
+# the time and exit status it finished with. These are appended as single
+# lines to the telemetry spool file in the job directory:
+# SUBMIT <time> <script> <nTasks> <schedJobId> <statusName> <iteration>
+# START <time> <script> <task>
+# END <time> <script> <task> <elapsedSeconds> <exitStatus>
+# Times are in seconds since 1970. The workflow periodically moves new lines
+# of the spool file into the Job_Telemetry table of the DB. Jobs are matched
+# up by their script and task index, as only one job is ever in flight for
+# a given script and task. The basin, workflow phase, and type of job are
+# taken from the location and name of the script.
+
+# Logan Karsten
+# National Center for Atmospheric Research
+# Research Applications Laboratory
+
+import os
+import time
+
+import warnings
+warnings.filterwarnings("ignore")
+
+# Telemetry spool file in the job directory.
+spoolFile = "WORKFLOW.TELEMETRY"
+# File in the job directory holding the position in the spool file up to
+# which lines have been entered into the DB.
+offsetFile = "WORKFLOW.TELEMETRY.OFFSET"
+
+# Columns of the Job_Telemetry table.
+tableSchema = '''(jobID integer, domainID integer, iteration integer,
+                 phase text, jobType text, script text, task integer,
+                 schedJobId text, statusName text, submitTime integer,
+                 startTime integer, endTime integer, exitCode integer)'''
+
+# Type of job, keyed by the name of the job script.
+jobTypes = {'run_WH.sh':'MODEL',
+            'run_WH_Restart.sh':'MODEL',
+            'run_WH_CALIB.sh':'CALIB',
+            'run_WH_CALIB_CHAIN.sh':'CALIB',
+            'run_WH_SENS_PREPROC.sh':'PREPROC',
+            'run_WH_SENS_POSTPROC.sh':'POSTPROC',
+            'run_collection.sh':'COLLECT',
+            'run_eval.sh':'EVAL',
+            'run_params.sh':'PARAMS'}
+
+def spoolPath(jobDir):
+    """
+    Generic function to return the path of the telemetry spool file of a job.
+    """
+    return str(jobDir) + "/" + spoolFile
+
+def taskExpr(taskIndex):
+    """
+    Generic function to return the shell expression a job script uses to
+    record it's task index, from the taskIndex expression of the scheduler
+    backend. Jobs that are not part of an array evaluate to 0 (or -1 under
+    LSF, which is corrected for when entered into the DB).
+    """
+    if taskIndex is None:
+        return '0'
+    return '$((' + taskIndex + '))'
+
+def startCmd(jobData,scriptPath,taskIndex=None):
+    """
+    Generic function to return the shell command placed at the top of a job
+    script to record the time the job started.
+    """
+    return 'echo "START $(date +%s) ' + str(scriptPath) + ' ' + taskExpr(taskIndex) + \
+           '" >> ' + spoolPath(jobData.jobDir)
+
+def endCmd(jobData,scriptPath,taskIndex,statusVar):
+    """
+    Generic function to return the shell command placed at the end of a job
+    script to record the time the job finished, and it's exit status held in
+    the shell variable statusVar. The seconds elapsed since the shell started
+    are recorded as well, so the start time is known for scripts that do not
+    record it.
+    """
+    return 'echo "END $(date +%s) ' + str(scriptPath) + ' ' + taskExpr(taskIndex) + \
+           ' $SECONDS ' + statusVar + '" >> ' + spoolPath(jobData.jobDir)
+
+def logSubmit(jobData,scriptPath,nTasks,jobId,statusName,iteration=None):
+    """
+    Generic function to record the submission of a job script. Calls are
+    serialized by the lock of the submission limiter. A failure to record
+    the submission is reported, but does not stop the workflow.
+    """
+    if statusName is None:
+        statusName = '-'
+    if iteration is None:
+        iteration = -1
+    try:
+        fileObj = open(spoolPath(jobData.jobDir),'a')
+        fileObj.write('SUBMIT ' + str(int(time.time())) + ' ' + str(scriptPath) + ' ' + \
+                      str(int(nTasks)) + ' ' + str(jobId) + ' ' + str(statusName) + ' ' + \
+                      str(int(iteration)) + '\n')
+        fileObj.close()
+    except:
+        print "WARNING: Unable to record the submission of: " + str(scriptPath)
+
+def classify(jobData,scriptPath):
+    """
+    Generic function to return the domainID, workflow phase and type of a job
+    from the location of it's script. Scripts are placed in the run
+    directories (<jobDir>/<gage>/RUN.<PHASE>) of each basin. Task farm
+    allocations are placed in the FARM directory of the job.
+    """
+    relPath = os.path.relpath(str(scriptPath),str(jobData.jobDir))
+    parts = relPath.split('/')
+    scriptName = parts[-1]
+    if len(parts) < 2 or parts[0] == '..':
+        return [None,'OTHER',jobTypes.get(scriptName,'OTHER')]
+    if parts[0] == 'FARM':
+        return [None,'FARM','FARM']
+
+    domainID = None
+    if parts[0] in jobData.gages:
+        domainID = int(jobData.gageIDs[jobData.gages.index(parts[0])])
+    phase = 'OTHER'
+    if len(parts) > 2 and parts[1].startswith('RUN.'):
+        phase = parts[1][4:]
+    return [domainID,phase,jobTypes.get(scriptName,'OTHER')]
+
+def readSpool(jobData):
+    """
+    Generic function to return the telemetry records added to the spool file
+    since it was last read, along with the position in the spool file after
+    them. Only complete lines are returned, as a job may be appending to the
+    spool file while it is read. Each record is a list of the record type,
+    time, and script, followed by the remaining fields of the line.
+    """
+    pathTmp = spoolPath(jobData.jobDir)
+    offsetPath = str(jobData.jobDir) + "/" + offsetFile
+    if not os.path.isfile(pathTmp):
+        return [[],0]
+
+    offset = 0
+    if os.path.isfile(offsetPath):
+        try:
+            fileObj = open(offsetPath,'r')
+            offset = int(fileObj.read().strip())
+            fileObj.close()
+        except ValueError:
+            offset = 0
+        except:
+            jobData.errMsg = "ERROR: Unable to read: " + offsetPath
+            raise
+    # The spool file was removed and recreated.
+    if offset > os.path.getsize(pathTmp):
+        offset = 0
+
+    try:
+        fileObj = open(pathTmp,'r')
+        fileObj.seek(offset)
+        strTmp = fileObj.read()
+        fileObj.close()
+    except:
+        jobData.errMsg = "ERROR: Unable to read: " + pathTmp
+        raise
+
+    endTmp = strTmp.rfind('\n') + 1
+    records = []
+    for line in strTmp[0:endTmp].split('\n'):
+        colsTmp = line.split()
+        if len(colsTmp) < 4:
+            continue
+        try:
+            colsTmp[1] = int(colsTmp[1])
+        except ValueError:
+            continue
+        records.append(colsTmp)
+    return [records,offset + endTmp]
+
+def ingestTelemetry(jobData,db):
+    """
+    Generic function to enter the telemetry records added to the spool file
+    into the DB. The position in the spool file is only advanced once the
+    records have been committed to the DB.
+    """
+    try:
+        records,offset = readSpool(jobData)
+    except:
+        raise
+    if len(records) == 0:
+        return
+
+    events = []
+    for colsTmp in records:
+        try:
+            domainID,phase,jobType = classify(jobData,colsTmp[2])
+            if colsTmp[0] == 'SUBMIT' and len(colsTmp) == 7:
+                for task in range(0,int(colsTmp[3])):
+                    events.append(['SUBMIT',colsTmp[1],colsTmp[2],task,domainID,int(colsTmp[6]),
+                                   phase,jobType,colsTmp[4],colsTmp[5]])
+            elif colsTmp[0] == 'START' and len(colsTmp) == 4:
+                events.append(['START',colsTmp[1],colsTmp[2],max(0,int(colsTmp[3])),domainID,None,
+                               phase,jobType,None,None])
+            elif colsTmp[0] == 'END' and len(colsTmp) == 6:
+                events.append(['END',colsTmp[1],colsTmp[2],max(0,int(colsTmp[3])),domainID,None,
+                               phase,jobType,int(colsTmp[4]),int(colsTmp[5])])
+        except ValueError:
+            # Line garbled by a job that was killed while writing it.
+            continue
+
+    try:
+        db.logTelemetry(jobData,events)
+    except:
+        raise
+
+    offsetPath = str(jobData.jobDir) + "/" + offsetFile
+    try:
+        fileObj = open(offsetPath,'w')
+        fileObj.write(str(offset) + '\n')
+        fileObj.close()
+    except:
+        jobData.errMsg = "ERROR: Unable to update: " + offsetPath
+        raise
@@ -8,9 +8,12 @@ import os
 import calibIoMod
 import namelistMod
 import statusMod
+import schedMod
+import sizeMod
 import errMod
+import chanobsMod
+import archiveMod
 import subprocess
-import time
 
 import warnings
 warnings.filterwarnings("ignore")
@@ -132,61 +135,17 @@ def runModelCtrl(statusData,staticData,db,gageID,gage,keySlot,basinNum,libPathTo
     except:
         raise
         
-    if statusData.analysisRunType == 1:
-        # Generate the BSUB script to run the parameter generation code. 
-        try:
-            generateBsubParmRunScript(statusData,bestDir,gageID)
-        except:
-            raise
-            
-    if statusData.jobRunType == 1:
-        # Generate the BSUB run script to run the model simulations. 
-        try:
-            generateBsubRunScript(statusData,gageID,runDir,gageMeta,'CTRL')
-        except:
-            raise
-            
-    if statusData.analysisRunType == 2:
-        # Generate the PBS script to run the parameter generation code.
-        try:
-            generatePbsParmRunScript(statusData,bestDir,gageID)
-        except:
-            raise
-            
-    if statusData.jobRunType == 2:
-        # Generate the PBS script to run the model simulations.
-        try:
-            generatePbsRunScript(statusData,gageID,runDir,gageMeta,'CTRL')
-        except:
-            raise
-            
-    if statusData.analysisRunType == 3 or statusData.analysisRunType == 6:
-        # Generate the Slurm script to run the parameter generation code.
-        try:
-            generateSlurmParmRunScript(statusData,bestDir,gageID)
-        except:
-            raise
-            
-    if statusData.jobRunType == 3 or statusData.jobRunType == 6:
-        # Generate the Slurm script to run the model simulations.
-        try:
-            generateSlurmRunScript(statusData,gageID,runDir,gageMeta,'CTRL')
-        except:
-            raise
-            
-    if statusData.analysisRunType == 4 or statusData.analysisRunType == 5:
-        # Generate the mpiexec/mpirun script to run the parameter generation 
-        try:
-            generateMpiParmRunScript(statusData,bestDir,gageID)
-        except:
-            raise
+    # Generate the script to run the parameter generation code.
+    try:
+        generateParmRunScript(statusData,bestDir,gageID)
+    except:
+        raise
             
-    if statusData.jobRunType == 4 or statusData.jobRunType == 5:
-        # Generate the BSUB run script to run the model simulations. 
-        try:
-            generateMpiRunScript(statusData,gageID,runDir,gageMeta,'CTRL')
-        except:
-            raise
+    # Generate the run script to run the model simulations.
+    try:
+        generateRunScript(statusData,gageID,runDir,gageMeta,'CTRL')
+    except:
+        raise
 
     # Calculate datetime objects
     begDate = statusData.bValidDate
@@ -194,6 +153,7 @@ def runModelCtrl(statusData,staticData,db,gageID,gage,keySlot,basinNum,libPathTo
         
     ## Initialize status
     keyStatus = keySlot[basinNum,0]
+    runFlag = False
     
     # Pull status values for parameter generation and model simulations. 
     try:
@@ -413,39 +373,17 @@ def runModelCtrl(statusData,staticData,db,gageID,gage,keySlot,basinNum,libPathTo
             except:
                 raise
                 
-        if statusData.jobRunType == 1:
-            # Fire off model.
-            cmd = "bsub < " + runDir + "/run_WH.sh"
-            try:
-                subprocess.call(cmd,shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.jobRunType == 2:
-            # Fire off model.
-            try:
-                jobTmp = subprocess.check_output(['qsub',runDir + '/run_WH.sh'])
-                pbsJobId[basinNum] = int(jobTmp.split('.')[0])
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.jobRunType == 3 or statusData.jobRunType == 6:
-            # Fire off model.
-            cmd = "sbatch " + runDir + "/run_WH.sh"
-            try:
-                subprocess.call(cmd,shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.jobRunType == 4 or statusData.jobRunType == 5:
-            cmd = runDir + "/run_WH.sh 1>" + runDir + "/WH_" + \
-                  str(statusData.jobID) + "_" + str(gageID) + ".out" + \
-                  ' 2>' + runDir + "/WH_" + str(statusData.jobID) + "_" + str(gageID) + ".err"
-            try:
-                p = subprocess.Popen([cmd],shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
+        # Fire off model.
+        sched = schedMod.getScheduler(statusData.jobRunType)
+        statusName = sched.statusName("WH_CTRL_" + str(statusData.jobID) + "_" + str(gageID),\
+                                      "WC" + str(statusData.jobID) + str(gageID))
+        try:
+            jobTmp = sched.submit(statusData,runDir + "/run_WH.sh",runDir + "/WH_" + \
+                                  str(statusData.jobID) + "_" + str(gageID),statusData.queName,statusName)
+            sched.trackJob(pbsJobId,basinNum,jobTmp)
+        except:
+            statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
+            raise
             
         # Revert statuses to -0.5 for next loop to convey the model crashed once. 
         keyStatus = -0.5
@@ -485,74 +423,33 @@ def runModelCtrl(statusData,staticData,db,gageID,gage,keySlot,basinNum,libPathTo
             except:
                 raise
                 
-        if statusData.jobRunType == 1:
-            # Fire off model.
-            cmd = "bsub < " + runDir + "/run_WH.sh"
-            try:
-                subprocess.call(cmd,shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.jobRunType == 2:
-            # Fire off model.
-            try:
-                jobTmp = subprocess.check_output(['qsub',runDir + '/run_WH.sh'])
-                pbsJobId[basinNum] = int(jobTmp.split('.')[0])
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.jobRunType == 3 or statusData.jobRunType == 6:
-            # Fire off model.
-            cmd = "sbatch " + runDir + "/run_WH.sh"
-            try:
-                subprocess.call(cmd,shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.jobRunType == 4 or statusData.jobRunType == 5:
-            cmd = runDir + "/run_WH.sh 1>" + runDir + "/WH_" + \
-                  str(statusData.jobID) + "_" + str(gageID) + ".out" + \
-                  ' 2>' + runDir + "/WH_" + str(statusData.jobID) + "_" + str(gageID) + ".err"
-            try:
-                p = subprocess.Popen([cmd],shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
+        # Fire off model.
+        sched = schedMod.getScheduler(statusData.jobRunType)
+        statusName = sched.statusName("WH_CTRL_" + str(statusData.jobID) + "_" + str(gageID),\
+                                      "WC" + str(statusData.jobID) + str(gageID))
+        try:
+            jobTmp = sched.submit(statusData,runDir + "/run_WH.sh",runDir + "/WH_" + \
+                                  str(statusData.jobID) + "_" + str(gageID),statusData.queName,statusName)
+            sched.trackJob(pbsJobId,basinNum,jobTmp)
+        except:
+            statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
+            raise
             
         keyStatus = 0.5
         keySlot[basinNum,0] = 0.5
         
     if keyStatus == 0.0 and not runFlag:
         # We need to run parameter generation code.
-        if statusData.analysisRunType == 1:
-            cmd = "bsub < " + bestDir + "/run_params.sh"
-            try:
-                subprocess.call(cmd,shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch parameter generation job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.analysisRunType == 2:
-            try:
-                jobTmp = subprocess.check_output(['qsub',bestDir + '/run_params.sh'])
-                pbsJobId[basinNum] = int(jobTmp.split('.')[0])
-            except:
-                statusData.errMsg = "ERROR: Unable to launch parameter generation job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.analysisRunType == 3 or statusData.analysisRunType == 6:
-            cmd = "sbatch " + bestDir + "/run_params.sh"
-            try:
-                subprocess.call(cmd,shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch parameter generation job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.analysisRunType == 4 or statusData.analysisRunType == 5:
-            cmd = bestDir + "/P" + str(statusData.jobID) + str(gageID)
-            try:
-                p2 = subprocess.Popen([str(cmd)],shell=True)
-                time.sleep(5)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch parameter generation job for gage: " + str(gageMeta.gage[basinNum])
-                raise
+        sched = schedMod.getScheduler(statusData.analysisRunType)
+        runScript = bestDir + "/run_params.sh"
+        statusName = sched.statusName("WH_PARM_GEN_" + str(statusData.jobID) + "_" + str(gageID),\
+                                      "P" + str(statusData.jobID) + str(gageID))
+        try:
+            jobTmp = sched.submit(statusData,runScript,None,statusData.queNameAnalysis,statusName)
+            sched.trackJob(pbsJobId,basinNum,jobTmp)
+        except:
+            statusData.errMsg = "ERROR: Unable to launch parameter generation job for gage: " + str(gageMeta.gage[basinNum])
+            raise
             
         keyStatus = 0.1
         keySlot[basinNum,0] = 0.1
@@ -620,111 +517,18 @@ def runModelBest(statusData,staticData,db,gageID,gage,keySlot,basinNum,pbsJobId)
     # Create two run scripts:
     # 1.) Job script to run the model with best parameters.
     # 2.) Job script to run the R code for evaluation/plotting.
-    if statusData.analysisRunType == 1:
-        bsubEvalScript = validWorkDir + "/run_eval.sh"
-    
-        # If the files exist, remove them and re-create.
-        if os.path.isfile(bsubEvalScript):
-            os.remove(bsubEvalScript)
-        
-        # Generate scripts to do evaluation on both 
-        # the control and best simulations. 
-        try:
-            generateBsubEvalRunScript(staticData,statusData.jobID,gageID,runDir,gageMeta,calibWorkDir,validWorkDir)
-        except:
-            raise
-            
-    if statusData.jobRunType == 1:
-        bsubRunScript = runDir + "/run_WH.sh"
-        
-        # If the files exist, remove them and re-create.
-        if os.path.isfile(bsubRunScript):
-            os.remove(bsubRunScript)
-        # Generate the BSUB run script to run the model simulations. 
-        try:
-            generateBsubRunScript(statusData,gageID,runDir,gageMeta,'BEST')
-        except:
-            raise
-            
-    if statusData.analysisRunType == 2:
-        pbsEvalScript = validWorkDir + "/run_eval.sh"
-        
-        # If the file exists, remove them and re-create.
-        if os.path.isfile(pbsEvalScript):
-            os.remove(pbsEvalScript)
-            
-        # Generate scripts to do evaluation on both
-        # the control and best simulations.
-        try:
-            generatePbsEvalRunScript(staticData,statusData.jobID,gageID,runDir,gageMeta,calibWorkDir,validWorkDir)
-        except:
-            raise
-            
-    if statusData.jobRunType == 2:
-        pbsRunScript = runDir + "/run_WH.sh"
-        
-        # If the file exists, remove them and re-create.
-        if os.path.isfile(pbsRunScript):
-            os.remove(pbsRunScript)
-        # Generate the PBS run script to run the model simulations.
-        try:
-            generatePbsRunScript(statusData,gageID,runDir,gageMeta,'BEST')
-        except:
-            raise
-            
-    if statusData.analysisRunType == 3 or statusData.analysisRunType == 6:
-        slurmEvalScript = validWorkDir + "/run_eval.sh"
-        
-        # If the file exists, remove them and re-create.
-        if os.path.isfile(slurmEvalScript):
-            os.remove(slurmEvalScript)
-            
-        # Generate scripts to do evaluation on both
-        # the control and best simulations.
-        try:
-            generateSlurmEvalRunScript(staticData,statusData.jobID,gageID,runDir,gageMeta,calibWorkDir,validWorkDir)
-        except:
-            raise
-            
-    if statusData.jobRunType == 3 or statusData.jobRunType == 6:
-        slurmRunScript = runDir + "/run_WH.sh"
-        
-        # If the file exists, remove them and re-create.
-        if os.path.isfile(slurmRunScript):
-            os.remove(slurmRunScript)
-            
-        # Generate the Slurm run script to run the model simulations.
-        try:
-            generateSlurmRunScript(statusData,gageID,runDir,gageMeta,'BEST')
-        except:
-            raise
-            
-    if statusData.analysisRunType == 4 or statusData.analysisRunType == 5:
-        evalScript = validWorkDir + "/E" + str(statusData.jobID) + str(gageID)
-    
-        # If the files exist, remove them and re-create.
-        if os.path.isfile(evalScript):
-            os.remove(evalScript)
-            
-        try:
-            generateMpiEvalRunScript(staticData,statusData.jobID,gageID,runDir,gageMeta,calibWorkDir,validWorkDir)
-        except:
-            raise
-        
-    if statusData.jobRunType == 4 or statusData.jobRunType == 5:
-        # Generate scripts to do evaluation on both 
-        # the control and best simulations. 
-    
-        runScript = runDir + "/run_WH.sh"
+    # Generate scripts to do evaluation on both 
+    # the control and best simulations. 
+    try:
+        generateEvalRunScript(statusData,staticData,gageID,gageMeta,calibWorkDir,validWorkDir)
+    except:
+        raise
         
-        # If the files exist, remove them and re-create.
-        if os.path.isfile(runScript):
-            os.remove(runScript)
-        # Generate the BSUB run script to run the model simulations. 
-        try:
-            generateMpiRunScript(statusData,gageID,runDir,gageMeta,'BEST')
-        except:
-            raise
+    # Generate the run script to run the model simulations.
+    try:
+        generateRunScript(statusData,gageID,runDir,gageMeta,'BEST')
+    except:
+        raise
         
     # Calculate datetime objects
     begDate = statusData.bValidDate
@@ -772,6 +576,7 @@ def runModelBest(statusData,staticData,db,gageID,gage,keySlot,basinNum,pbsJobId)
                 # Log statistics into the DB.
                 try:
                     db.logValidStats(statusData,int(statusData.jobID),int(gageID),str(gage))
+                    archiveValid(statusData,basinNum,ctrlDir,runDir,gageMeta)
                 except:
                     raise
                 keySlot[basinNum,1] = 1.0
@@ -845,6 +650,7 @@ def runModelBest(statusData,staticData,db,gageID,gage,keySlot,basinNum,pbsJobId)
                 # Model validation completed before workflow was restarted.
                 try:
                     db.logValidStats(statusData,int(statusData.jobID),int(gageID),str(gage))
+                    archiveValid(statusData,basinNum,ctrlDir,runDir,gageMeta)
                 except:
                     raise
                 keySlot[basinNum,1] = 1.0
@@ -962,37 +768,18 @@ def runModelBest(statusData,staticData,db,gageID,gage,keySlot,basinNum,pbsJobId)
                 raise
                 
         # Fire off model.
-        if statusData.jobRunType == 1:   
-            cmd = "bsub < " + runDir + "/run_WH.sh"
-            try:
-                subprocess.call(cmd,shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.jobRunType == 2:
-            try:
-                jobTmp = subprocess.check_output(['qsub',runDir + '/run_WH.sh'])
-                pbsJobId[basinNum] = int(jobTmp.split('.')[0])
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.jobRunType == 3 or statusData.jobRunType == 6:
-            cmd = "sbatch " + runDir + "/run_WH.sh"
-            try:
-                subprocess.call(cmd,shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.jobRunType == 4 or statusData.jobRunType == 5:
-            cmd = runDir + "/run_WH.sh 1>" + runDir + "/WH_" + \
-                  str(statusData.jobID) + "_" + str(gageID) + ".out" + \
-                  ' 2>' + runDir + "/WH_" + str(statusData.jobID) + "_" + str(gageID) + ".err"
-            try:
-                p = subprocess.Popen([cmd],shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-                
+        # Fire off model.
+        sched = schedMod.getScheduler(statusData.jobRunType)
+        statusName = sched.statusName("WH_BEST_" + str(statusData.jobID) + "_" + str(gageID),\
+                                      "WB" + str(statusData.jobID) + str(gageID))
+        try:
+            jobTmp = sched.submit(statusData,runDir + "/run_WH.sh",runDir + "/WH_" + \
+                                  str(statusData.jobID) + "_" + str(gageID),statusData.queName,statusName)
+            sched.trackJob(pbsJobId,basinNum,jobTmp)
+        except:
+            statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
+            raise
+            
         # Revert statuses to -0.5 for next loop to convey the model crashed once. 
         keyStatus = -0.5
         keySlot[basinNum,1] = -0.5
@@ -1032,36 +819,17 @@ def runModelBest(statusData,staticData,db,gageID,gage,keySlot,basinNum,pbsJobId)
                 raise
                 
         # Fire off model.
-        if statusData.jobRunType == 1:
-            cmd = "bsub < " + runDir + "/run_WH.sh"
-            try:
-                subprocess.call(cmd,shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.jobRunType == 2:
-            try:
-                jobTmp = subprocess.check_output(['qsub',runDir + '/run_WH.sh'])
-                pbsJobId[basinNum] = int(jobTmp.split('.')[0])
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.jobRunType == 3 or statusData.jobRunType == 6:
-            cmd = "sbatch " + runDir + "/run_WH.sh"
-            try:
-                subprocess.call(cmd,shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.jobRunType == 4 or statusData.jobRunType == 5:
-            cmd = runDir + "/run_WH.sh 1>" + runDir + "/WH_" + \
-                  str(statusData.jobID) + "_" + str(gageID) + ".out" + \
-                  ' 2>' + runDir + "/WH_" + str(statusData.jobID) + "_" + str(gageID) + ".err"
-            try:
-                p = subprocess.Popen([cmd],shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
-                raise
+        # Fire off model.
+        sched = schedMod.getScheduler(statusData.jobRunType)
+        statusName = sched.statusName("WH_BEST_" + str(statusData.jobID) + "_" + str(gageID),\
+                                      "WB" + str(statusData.jobID) + str(gageID))
+        try:
+            jobTmp = sched.submit(statusData,runDir + "/run_WH.sh",runDir + "/WH_" + \
+                                  str(statusData.jobID) + "_" + str(gageID),statusData.queName,statusName)
+            sched.trackJob(pbsJobId,basinNum,jobTmp)
+        except:
+            statusData.errMsg = "ERROR: Unable to launch WRF-Hydro job for gage: " + str(gageMeta.gage[basinNum])
+            raise
             
         keyStatus = 0.5
         keySlot[basinNum,1] = 0.5
@@ -1070,131 +838,37 @@ def runModelBest(statusData,staticData,db,gageID,gage,keySlot,basinNum,pbsJobId)
         # Note the control simulation needs to be completed as well in 
         # order for the evaluation code to complete. 
         # We need to run parameter generation code.
-        if statusData.analysisRunType == 1:
-            cmd = "bsub < " + validWorkDir + "/run_eval.sh"
-            try:
-                subprocess.call(cmd,shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch evaluation job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.analysisRunType == 2:
-            try:
-                jobTmp = subprocess.check_output(['qsub',validWorkDir + '/run_eval.sh'])
-                pbsJobId[basinNum] = int(jobTmp.split('.')[0])
-            except:
-                statusData.errMsg = "ERROR: Unable to launch evaluation job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.analysisRunType == 3 or statusData.analysisRunType == 6:
-            cmd = "sbatch " + validWorkDir + "/run_eval.sh"
-            try:
-                subprocess.call(cmd,shell=True)
-            except:
-                statusData.errMsg = "ERROR: Unable to launch evaluation job for gage: " + str(gageMeta.gage[basinNum])
-                raise
-        if statusData.analysisRunType == 4 or statusData.analysisRunType == 5:
-            cmd = validWorkDir + "/E" + str(statusData.jobID) + str(gageID)
-            try:
-                p2 = subprocess.Popen([str(cmd)],shell=True)
-                time.sleep(20)
-                p2.communicate
-            except:
-                statusData.errMsg = "ERROR: Unable to launch evaluation job for gage: " + str(gageMeta.gage[basinNum])
-                raise
+        sched = schedMod.getScheduler(statusData.analysisRunType)
+        runScript = validWorkDir + "/run_eval.sh"
+        statusName = sched.statusName("WH_EVAL_" + str(statusData.jobID) + "_" + str(gageID),\
+                                      "E" + str(statusData.jobID) + str(gageID))
+        try:
+            jobTmp = sched.submit(statusData,runScript,None,statusData.queNameAnalysis,statusName)
+            sched.trackJob(pbsJobId,basinNum,jobTmp)
+        except:
+            statusData.errMsg = "ERROR: Unable to launch evaluation job for gage: " + str(gageMeta.gage[basinNum])
+            raise
             
         keyStatus = 0.9
         keySlot[basinNum,1] = 0.9
                 
-def generateBsubRunScript(jobData,gageID,runDir,gageMeta,modName):
-    """
-    Generic function to create a run script that will be called by bsub
-    to execute the model.
-    """
-    
-    outFile = runDir + "/run_WH.sh"
-    
-    if os.path.isfile(outFile):
-        os.remove(outFile)
-        
-    try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        fileObj.write('#\n')
-        fileObj.write('# LSF Batch Script to Run WRF-Hydro Calibration Simulations\n')
-        fileObj.write('#\n')
-        if len(jobData.acctKey.strip()) > 0:
-            inStr = "#BSUB -P " + str(jobData.acctKey) + '\n'
-            fileObj.write(inStr)
-        fileObj.write('#BSUB -x\n')
-        inStr = "#BSUB -n " + str(jobData.nCoresMod) + '\n'
-        fileObj.write(inStr)
-        inStr = "#BSUB -J WH_" + str(modName) + "_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
-        fileObj.write(inStr)
-        inStr = '#BSUB -o ' + runDir + '/%J.out\n'
-        fileObj.write(inStr)
-        inStr = '#BSUB -e ' + runDir + '/%J.err\n'
-        fileObj.write(inStr)
-        fileObj.write('#BSUB -W 6:00\n')
-        if len(jobData.queName.strip()) > 0:
-            inStr = '#BSUB -q ' + str(jobData.queName) + '\n'
-            fileObj.write(inStr)
-        fileObj.write('\n')
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        fileObj.write('mpirun.lsf ./wrf_hydro.exe\n')
-        fileObj.close
-    except:
-        jobData.errMsg = "ERROR: Failure to create: " + outFile
-        raise
-        
-def generatePbsRunScript(jobData,gageID,runDir,gageMeta,modName):
+def archiveValid(statusData,basinNum,ctrlDir,bestDir,gageMeta):
     """
-    Generic function to create a run script that will be called by qsub
-    to execute the model.
+    Generic function to place the streamflow of the control and best
+    validation runs of a basin into the flow archive.
     """
+    for runNum,outDir in enumerate([ctrlDir,bestDir]):
+        try:
+            archiveMod.archiveRun(statusData,"VALID",2,statusData.bValidEvalDate,statusData.eValidDate,
+                                  basinNum,runNum,outDir,gageMeta.comID)
+        except:
+            raise
     
-    outFile = runDir + "/run_WH.sh"
-    
-    if os.path.isfile(outFile):
-        os.remove(outFile)
-        
-    try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        fileObj.write('#\n')
-        fileObj.write('# PBS Batch Script to Run WH Calibration Simulations\n')
-        fileObj.write('#\n')
-        inStr = "#PBS -N WH_" + str(modName) + "_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
-        fileObj.write(inStr)
-        if len(jobData.acctKey.strip()) > 0:
-            inStr = "#PBS -A " + str(jobData.acctKey) + '\n'
-            fileObj.write(inStr)
-        inStr = "#PBS -l walltime=08:00:00\n"
-        fileObj.write(inStr)
-        if len(jobData.queName.strip()) > 0:
-            inStr = "#PBS -q " + str(jobData.queName) + "\n"
-            fileObj.write(inStr)
-        inStr = "#PBS -o " + runDir + "/WH_" + str(modName) + '_' + str(jobData.jobID) + "_" + str(gageID) + ".out\n"
-        fileObj.write(inStr)
-        inStr = "#PBS -e " + runDir + "/WH_" + str(modName) + '_' + str(jobData.jobID) + "_" + str(gageID) + ".err\n"
-        fileObj.write(inStr)
-        nCoresPerNode = int(jobData.nCoresMod/jobData.nNodesMod)
-        inStr = "#PBS -l select=" + str(jobData.nNodesMod) + ":ncpus=" + str(nCoresPerNode) + \
-                ":mpiprocs=" + str(nCoresPerNode) + "\n"
-        fileObj.write(inStr)
-        fileObj.write("\n")
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        fileObj.write('mpiexec_mpt ./wrf_hydro.exe\n')
-        fileObj.write('\n')
-        fileObj.close
-    except:
-        jobData.errMsg = "ERROR: Failure to create: " + outFile
-        raise
-        
-def generateSlurmRunScript(jobData,gageID,runDir,gageMeta,modName):
+def generateRunScript(jobData,gageID,runDir,gageMeta,modName):
     """
-    Generic function to create a run script that will be called by Slurm
-    to execute the model.
+    Generic function to create a run script that will be submitted through
+    the scheduler backend to execute the model. modName is either CTRL or
+    BEST, which is used to compose the unique job name.
     """
     
     outFile = runDir + "/run_WH.sh"
@@ -1202,88 +876,25 @@ def generateSlurmRunScript(jobData,gageID,runDir,gageMeta,modName):
     if os.path.isfile(outFile):
         os.remove(outFile)
         
+    spec = schedMod.jobSpec()
+    spec.jobName = "WH_" + str(modName) + "_" + str(jobData.jobID) + "_" + str(gageID)
+    spec.mpiName = "W" + str(modName)[0] + str(jobData.jobID) + str(gageID)
+    spec.workDir = runDir
+    spec.exe = "./wrf_hydro.exe"
+    spec.queName = jobData.queName
+    spec.exclusive = True
     try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        fileObj.write('#\n')
-        fileObj.write('# Slurm Batch Script to Run WH Calibration Simulations\n')
-        fileObj.write('#\n')
-        inStr = "#SBATCH -J WH_" + str(modName) + "_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
-        fileObj.write(inStr)
-        if len(jobData.acctKey.strip()) > 0:
-            inStr = "#SBATCH -A " + str(jobData.acctKey) + '\n'
-            fileObj.write(inStr)
-        inStr = "#SBATCH -t 08:00:00\n"
-        fileObj.write(inStr)
-        if len(jobData.queName.strip()) > 0:
-            inStr = "#SBATCH -p " + str(jobData.queName) + "\n"
-            fileObj.write(inStr)
-        inStr = "#SBATCH -o " + runDir + "/WH_" + str(modName) + '_' + str(jobData.jobID) + "_" + str(gageID) + ".out\n"
-        fileObj.write(inStr)
-        inStr = "#SBATCH -e " + runDir + "/WH_" + str(modName) + '_' + str(jobData.jobID) + "_" + str(gageID) + ".err\n"
-        fileObj.write(inStr)
-        inStr = "#SBATCH -N " + str(jobData.nNodesMod) + "\n"
-        fileObj.write(inStr)
-        fileObj.write("\n")
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        if jobData.jobRunType == 3:
-            inStr = "srun -n " + str(jobData.nCoresMod) + " ./wrf_hydro.exe\n"
-        if jobData.jobRunType == 6:
-            inStr = "mpirun -n " + str(jobData.nCoresMod) + " ./wrf_hydro.exe\n"
-        fileObj.write(inStr)
-        fileObj.write('\n')
-        fileObj.close
+        sizeMod.sizeModel(jobData,gageMeta,spec,jobData.bValidDate,jobData.eValidDate)
     except:
-        jobData.errMsg = "ERROR: Failure to create: " + outFile
         raise
-        
-def generateMpiRunScript(jobData,gageID,runDir,gageMeta,modName):
-    """
-    Generic function to create a run script that will use mpiexec/mpirun to run
-    the model
-    """
+    if int(jobData.streamCollect) > 0:
+        streamCmds = chanobsMod.streamCmds(jobData,gageMeta.comID,jobData.bValidEvalDate)
+        spec.preCmds.extend(streamCmds[0])
+        spec.postCmds.extend(streamCmds[1])
     
-    outFile = runDir + "/run_WH.sh"
-    
-    if os.path.isfile(outFile):
-        os.remove(outFile)
-        
     try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        inStr = 'for FILE in HYDRO_RST.*; do if [ ! -L $FILE ] ; then rm -rf $FILE; fi; done\n'
-        fileObj.write(inStr)
-        inStr = 'for FILE in RESTART.*; do if [ ! -L $FILE ] ; then rm -rf $FILE; fi; done\n'
-        fileObj.write(inStr)
-        if modName == "BEST":
-            if jobData.jobRunType == 4:
-                inStr = 'mpiexec -n ' + str(int(jobData.nCoresMod)) + ' ./WB' + \
-                str(jobData.jobID) + str(gageID) + '\n'
-            if jobData.jobRunType == 5:
-                inStr = 'mpirun -np ' + str(int(jobData.nCoresMod)) + ' ./WB' + \
-                str(jobData.jobID) + str(gageID) + '\n'
-        if modName == "CTRL":
-            if jobData.jobRunType == 4:
-                inStr = 'mpiexec -n ' + str(int(jobData.nCoresMod)) + ' ./WC' + \
-                str(jobData.jobID) + str(gageID) + '\n'
-            if jobData.jobRunType == 5:
-                inStr = 'mpirun -np ' + str(int(jobData.nCoresMod)) + ' ./WC' + \
-                str(jobData.jobID) + str(gageID) + '\n'
-        fileObj.write(inStr)
-        fileObj.close
-    except:
-        jobData.errMsg = 'Failure to create: ' + outFile
-        raise
-        
-    # Make the file an executable.
-    cmd = "chmod +x " + outFile
-    try:
-        subprocess.call(cmd,shell=True)
+        schedMod.getScheduler(jobData.jobRunType).renderScript(jobData,outFile,spec)
     except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile + " to an executable."
         raise
         
 def generateParmScript(jobData,bestDir,gage,parmInDir,staticData):
@@ -1319,302 +930,117 @@ def generateParmScript(jobData,bestDir,gage,parmInDir,staticData):
         jobData.errMsg = "ERROR: Failure to convert: " + outFile + " to an executable."
         raise
         
-def generateMpiEvalRunScript(jobData,jobID,gageID,runDir,gageMeta,calibWorkDir,validWorkDir):
+def analysisSpec(jobData,jobName,mpiName,workDir,exe,wallTime):
     """
-    Generic function to create evaluation mpiexec/mpirun script in the best simulation directory.
-    This function also generates the shell script to call R.
+    Generic function to return the job specification of one of the
+    validation analysis jobs for a basin. The shell script ran by the job
+    is ran serially.
     """
-    # First establish paths to files being created.
-    rScript = validWorkDir + "/validScript.R"
-    fileOut = validWorkDir + "/run_eval.sh"
+    spec = schedMod.jobSpec()
+    spec.jobName = jobName
+    spec.mpiName = mpiName
+    spec.title = "WRF-Hydro Calibration R Code"
+    spec.workDir = workDir
+    spec.exe = exe
+    spec.parallel = False
+    spec.nCores = 1
+    spec.nNodes = 1
+    spec.wallTime = wallTime
+    spec.queName = jobData.queNameAnalysis
+    spec.exclusive = True
+    return spec
     
-    if os.path.isfile(rScript):
-        os.remove(rScript)
-    if os.path.isfile(fileOut):
-        os.remove(fileOut)
-        
-    # Create mpiexec/mpirun shell script for the evaluation job.
-    try:
-        fileObj = open(fileOut,'w')
-        fileObj.write('#!/bin/bash\n')
-        inStr = 'cd ' + validWorkDir + '\n'
-        fileObj.write(inStr)
-        inStr = "Rscript " + validWorkDir + "/valid_workflow.R " + rScript + "\n"
-        fileObj.write(inStr)
-        fileObj.close
-    except:
-        jobData.errMsg = "ERROR: Failure to create: " + fileOut
-        raise
+def linkCmdScript(jobData,outFile,spec):
+    """
+    Generic function to create a symbolic link to the shell script ran by
+    one of the validation analysis jobs. For mpiexec/mpirun, the script is
+    ran through the link, which is named after the job so the job can be
+    found in the process table.
+    """
+    outLink = spec.workDir + '/' + spec.mpiName
+    if schedMod.getScheduler(jobData.analysisRunType).name == 'MPI':
+        if not os.path.islink(outLink):
+            try:
+                os.symlink(outFile,outLink)
+            except:
+                jobData.errMsg = "ERROR: Failure to create symbolic link: " + outLink
+                raise
+                
+def generateParmRunScript(jobData,runDir,gageID):
+    """
+    Generic function to create the script submitted through the scheduler
+    backend to run the parameter generation script.
+    """
+    
+    outFile = runDir + "/run_params.sh"
+    
+    if os.path.isfile(outFile):
+        os.remove(outFile)
         
-    # Make shell script an executable.
-    cmd = 'chmod +x ' + fileOut
+    spec = analysisSpec(jobData,"WH_PARM_GEN_" + str(jobData.jobID) + "_" + str(gageID),
+                        "P" + str(jobData.jobID) + str(gageID),runDir,"./gen_parms.sh",20)
     try:
-        subprocess.call(cmd,shell=True)
+        schedMod.getScheduler(jobData.analysisRunType).renderScript(jobData,outFile,spec)
     except:
-        jobData.errMsg = "ERROR: Failure to convert: " + fileOut + " to an executable."
         raise
         
-    # Create validScript.R
     try:
-        fileObj = open(rScript,'w')
-        fileObj.write("#### Model Parameters ####\n")
-        fileObj.write("# Specify run directory containing validation simulations.\n")
-        inStr = "runDir <- '" + calibWorkDir + "'\n"
-        fileObj.write(inStr)
-        inStr = "validDir <- '" + validWorkDir + "'\n"
-        fileObj.write(inStr)
-        fileObj.write("# Objective function#\n")
-        inStr = "objFn <- '" + str(jobData.objFunc) + "'\n"
-        fileObj.write(inStr)
-        fileObj.write("# Basin-specific metadata\n")
-        inStr = "siteId <- '" + str(gageMeta.gage) + "'\n"
-        fileObj.write(inStr)
-        inStr = "linkId <- " + str(gageMeta.comID) + "\n"
-        fileObj.write(inStr)
-        fileObj.write('# Start and dates for evaluation period (e.g., after spinup period)\n')
-        inStr = "startCalibDate <- as.POSIXct(\"" + jobData.bCalibEvalDate.strftime('%Y-%m-%d') + "\", " + \
-                 "format=\"%Y-%m-%d\", tz=\"UTC\")\n"
-        fileObj.write(inStr)
-        inStr = "endCalibDate <- as.POSIXct(\"" + jobData.eCalibDate.strftime('%Y-%m-%d') + "\", " + \
-                 "format=\"%Y-%m-%d\", tz=\"UTC\")\n"
-        fileObj.write(inStr)
-        inStr = "startValidDate <- as.POSIXct(\"" + jobData.bValidEvalDate.strftime('%Y-%m-%d') + "\", " + \
-                 "format=\"%Y-%m-%d\", tz=\"UTC\")\n"
-        fileObj.write(inStr)
-        inStr = "endValidDate <- as.POSIXct(\"" + jobData.eValidDate.strftime('%Y-%m-%d') + "\", " + \
-                 "format=\"%Y-%m-%d\", tz=\"UTC\")\n"
-        fileObj.write(inStr)
-        fileObj.write('# Specify number of cores to use\n')
-        inStr = "ncores <- " + str(jobData.nCoresR) + "\n"
-        fileObj.write(inStr)
-        fileObj.write('# Specify whether to run daily or hourly analysis\n')
-        if jobData.dailyAnalysis == 1:
-            fileObj.write("calcDailyStats <- TRUE\n")
-        else:
-            fileObj.write("calcDailyStats <- FALSE\n")
-        fileObj.close
+        linkCmdScript(jobData,runDir + "/gen_parms.sh",spec)
     except:
-        jobData.errMsg = "ERROR: Failure to create: " + rScript
         raise
         
-    # Create symbolic link with basin/job info in link name for monitoring
-    fileLink = validWorkDir + "/E" + str(jobID) + str(gageID)
-    if not os.path.islink(fileLink):
-        try:
-            os.symlink(fileOut,fileLink)
-        except:
-            jobData.errMsg = "ERROR: Failure to create symbolic link: " + fileLink
-            raise
-        
-def generateBsubEvalRunScript(jobData,jobID,gageID,runDir,gageMeta,calibWorkDir,validWorkDir):
+def generateEvalRunScript(jobData,staticData,gageID,gageMeta,calibWorkDir,validWorkDir):
     """
-    Generic function to create evaluation BSUB script in the best simulation
-    directory. This function also generates the shell script to call R.
+    Generic function to create the evaluation script submitted through the
+    scheduler backend in the validation directory. This function also
+    generates the shell script it runs to extract the streamflow from the
+    control and best simulations and call R, and the R namelist read by the
+    evaluation code.
     """
     # First establish paths to files being created.
     rScript = validWorkDir + "/validScript.R"
-    bsubOut = validWorkDir + "/run_eval.sh"
+    outFile1 = validWorkDir + "/run_eval.sh"
+    outFile2 = validWorkDir + "/evalCmd.sh"
     
     if os.path.isfile(rScript):
         os.remove(rScript)
-    if os.path.isfile(bsubOut):
-        os.remove(bsubOut)
+    if os.path.isfile(outFile1):
+        os.remove(outFile1)
         
-    # Create BSUB shell script for the evaluation job.
+    spec = analysisSpec(jobData,"WH_EVAL_" + str(jobData.jobID) + "_" + str(gageID),
+                        "E" + str(jobData.jobID) + str(gageID),validWorkDir,"./evalCmd.sh",60)
     try:
-        fileObj = open(bsubOut,'w')
-        fileObj.write('#!/bin/bash\n')
-        fileObj.write('#\n')
-        if len(jobData.acctKey.strip()) > 0:
-            inStr = "#BSUB -P " + str(jobData.acctKey) + '\n'
-            fileObj.write(inStr)
-        fileObj.write('#BSUB -x\n')
-        inStr = "#BSUB -n 1\n"
-        fileObj.write(inStr)
-        inStr = "#BSUB -J WH_EVAL_" + str(jobID) + "_" + str(gageID) + '\n'
-        fileObj.write(inStr)
-        inStr = '#BSUB -o ' + validWorkDir + '/%J.out\n'
-        fileObj.write(inStr)
-        inStr = '#BSUB -e ' + validWorkDir + '/%J.err\n'
-        fileObj.write(inStr)
-        fileObj.write('#BSUB -W 1:00\n')
-        if len(jobData.queNameAnalysis.strip()) > 0:
-            inStr = '#BSUB -q ' + str(jobData.queNameAnalysis) + '\n'
-            fileObj.write(inStr)
-        fileObj.write('\n')
-        inStr = 'cd ' + validWorkDir + '\n'
-        fileObj.write(inStr)
-        inStr = "Rscript " + validWorkDir + "/valid_workflow.R " + rScript + "\n"
-        fileObj.write(inStr)
-        fileObj.close
+        schedMod.getScheduler(jobData.analysisRunType).renderScript(jobData,outFile1,spec)
     except:
-        jobData.errMsg = "ERROR: Failure to create: " + bsubOut
         raise
         
-    # Create validScript.R
+    # Create the shell script for the evaluation job.
     try:
-        fileObj = open(rScript,'w')
-        fileObj.write("#### Model Parameters ####\n")
-        fileObj.write("# Specify run directory containing validation simulations.\n")
-        inStr = "runDir <- '" + calibWorkDir + "'\n"
-        fileObj.write(inStr)
-        inStr = "validDir <- '" + validWorkDir + "'\n"
-        fileObj.write(inStr)
-        fileObj.write("# Objective function#\n")
-        inStr = "objFn <- '" + str(jobData.objFunc) + "'\n"
-        fileObj.write(inStr)
-        fileObj.write("# Basin-specific metadata\n")
-        inStr = "siteId <- '" + str(gageMeta.gage) + "'\n"
-        fileObj.write(inStr)
-        inStr = "linkId <- " + str(gageMeta.comID) + "\n"
-        fileObj.write(inStr)
-        fileObj.write('# Start and dates for evaluation period (e.g., after spinup period)\n')
-        inStr = "startCalibDate <- as.POSIXct(\"" + jobData.bCalibEvalDate.strftime('%Y-%m-%d') + "\", " + \
-                 "format=\"%Y-%m-%d\", tz=\"UTC\")\n"
-        fileObj.write(inStr)
-        inStr = "endCalibDate <- as.POSIXct(\"" + jobData.eCalibDate.strftime('%Y-%m-%d') + "\", " + \
-                 "format=\"%Y-%m-%d\", tz=\"UTC\")\n"
-        fileObj.write(inStr)
-        inStr = "startValidDate <- as.POSIXct(\"" + jobData.bValidEvalDate.strftime('%Y-%m-%d') + "\", " + \
-                 "format=\"%Y-%m-%d\", tz=\"UTC\")\n"
-        fileObj.write(inStr)
-        inStr = "endValidDate <- as.POSIXct(\"" + jobData.eValidDate.strftime('%Y-%m-%d') + "\", " + \
-                 "format=\"%Y-%m-%d\", tz=\"UTC\")\n"
-        fileObj.write(inStr)
-        fileObj.write('# Specify number of cores to use\n')
-        inStr = "ncores <- " + str(jobData.nCoresR) + "\n"
-        fileObj.write(inStr)
-        fileObj.write('# Specify whether to run daily or hourly analysis\n')
-        if jobData.dailyAnalysis == 1:
-            fileObj.write("calcDailyStats <- TRUE\n")
-        else:
-            fileObj.write("calcDailyStats <- FALSE\n")
-        fileObj.close
-    except:
-        jobData.errMsg = "ERROR: Failure to create: " + rScript
-        raise
-        
-def generatePbsEvalRunScript(jobData,jobID,gageID,runDir,gageMeta,calibWorkDir,validWorkDir):
-    """
-    Generic function to create evaluation PBS script in the best simulation
-    directory. This function also generates the shell script to call R.
-    """
-    
-    # First establish paths to files being created.
-    rScript = validWorkDir + "/validScript.R"
-    pbsOut = validWorkDir + "/run_eval.sh"
-    
-    # Create BSUB shell script for the evaluation job.
-    try:
-        fileObj = open(pbsOut,'w')
+        fileObj = open(outFile2,'w')
         fileObj.write('#!/bin/bash\n')
-        fileObj.write('#\n')
-        if len(jobData.acctKey.strip()) > 0:
-            inStr = "#PBS -A " + str(jobData.acctKey) + '\n'
-            fileObj.write(inStr)
-        inStr = "#PBS -N WH_EVAL_" + str(jobID) + "_" + str(gageID) + '\n'
-        fileObj.write(inStr)
-        inStr = '#PBS -o ' + validWorkDir + '/WH_EVAL_' + str(jobID) + '_' + str(gageID) + '.out\n'
-        fileObj.write(inStr)
-        inStr = '#PBS -e ' + validWorkDir + '/WH_EVAL_' + str(jobID) + '_' + str(gageID) + '.err\n'
-        fileObj.write(inStr)
-        fileObj.write('#PBS -l walltime=01:00:00\n')
-        if len(jobData.queNameAnalysis.strip()) > 0:
-            inStr = '#PBS -q ' + str(jobData.queNameAnalysis) + '\n'
-            fileObj.write(inStr)
-        inStr = "#PBS -l select=1:ncpus=1:mpiprocs=1\n"
-        fileObj.write(inStr)
-        fileObj.write('\n')
-        inStr = 'cd ' + validWorkDir + '\n'
-        fileObj.write(inStr)
+        # Extract the streamflow at the gage from the control and best simulations.
+        for outDir in [validWorkDir + "/OUTPUT/CTRL",validWorkDir + "/OUTPUT/BEST"]:
+            fileObj.write(chanobsMod.extractCmd(outDir,gageMeta.comID,staticData.bValidEvalDate,
+                                                staticData.nCoresR) + '\n')
         inStr = "Rscript " + validWorkDir + "/valid_workflow.R " + rScript + "\n"
         fileObj.write(inStr)
-        fileObj.close
+        fileObj.write('exit\n')
+        fileObj.close()
     except:
-        jobData.errMsg = "ERROR: Failure to create: " + pbsOut
+        jobData.errMsg = "ERROR: Failure to create: " + outFile2
         raise
         
-    # Create validScript.R
+    # Make shell script an executable.
+    cmd = 'chmod +x ' + outFile2
     try:
-        fileObj = open(rScript,'w')
-        fileObj.write("#### Model Parameters ####\n")
-        fileObj.write("# Specify run directory containing validation simulations.\n")
-        inStr = "runDir <- '" + calibWorkDir + "'\n"
-        fileObj.write(inStr)
-        inStr = "validDir <- '" + validWorkDir + "'\n"
-        fileObj.write(inStr)
-        fileObj.write("# Objective function#\n")
-        inStr = "objFn <- '" + str(jobData.objFunc) + "'\n"
-        fileObj.write(inStr)
-        fileObj.write("# Basin-specific metadata\n")
-        inStr = "siteId <- '" + str(gageMeta.gage) + "'\n"
-        fileObj.write(inStr)
-        inStr = "linkId <- " + str(gageMeta.comID) + "\n"
-        fileObj.write(inStr)
-        fileObj.write('# Start and dates for evaluation period (e.g., after spinup period)\n')
-        inStr = "startCalibDate <- as.POSIXct(\"" + jobData.bCalibEvalDate.strftime('%Y-%m-%d') + "\", " + \
-                 "format=\"%Y-%m-%d\", tz=\"UTC\")\n"
-        fileObj.write(inStr)
-        inStr = "endCalibDate <- as.POSIXct(\"" + jobData.eCalibDate.strftime('%Y-%m-%d') + "\", " + \
-                 "format=\"%Y-%m-%d\", tz=\"UTC\")\n"
-        fileObj.write(inStr)
-        inStr = "startValidDate <- as.POSIXct(\"" + jobData.bValidEvalDate.strftime('%Y-%m-%d') + "\", " + \
-                 "format=\"%Y-%m-%d\", tz=\"UTC\")\n"
-        fileObj.write(inStr)
-        inStr = "endValidDate <- as.POSIXct(\"" + jobData.eValidDate.strftime('%Y-%m-%d') + "\", " + \
-                 "format=\"%Y-%m-%d\", tz=\"UTC\")\n"
-        fileObj.write(inStr)
-        fileObj.write('# Specify number of cores to use\n')
-        inStr = "ncores <- " + str(jobData.nCoresR) + "\n"
-        fileObj.write(inStr)
-        fileObj.write('# Specify whether to run daily or hourly analysis\n')
-        if jobData.dailyAnalysis == 1:
-            fileObj.write("calcDailyStats <- TRUE\n")
-        else:
-            fileObj.write("calcDailyStats <- FALSE\n")
-        fileObj.close
+        subprocess.call(cmd,shell=True)
     except:
-        jobData.errMsg = "ERROR: Failure to create: " + rScript
+        jobData.errMsg = "ERROR: Failure to convert: " + outFile2 + " to an executable."
         raise
         
-def generateSlurmEvalRunScript(jobData,jobID,gageID,runDir,gageMeta,calibWorkDir,validWorkDir):
-    """
-    Generic function to create evaluation Slurm script in the best simulation
-    directory. This function also generates the shell script to call R.
-    """
-    
-    # First establish paths to files being created.
-    rScript = validWorkDir + "/validScript.R"
-    pbsOut = validWorkDir + "/run_eval.sh"
-    
-    # Create BSUB shell script for the evaluation job.
     try:
-        fileObj = open(pbsOut,'w')
-        fileObj.write('#!/bin/bash\n')
-        fileObj.write('#\n')
-        if len(jobData.acctKey.strip()) > 0:
-            inStr = "#SBATCH -A " + str(jobData.acctKey) + '\n'
-            fileObj.write(inStr)
-        inStr = "#SBATCH -J WH_EVAL_" + str(jobID) + "_" + str(gageID) + '\n'
-        fileObj.write(inStr)
-        inStr = '#SBATCH -o ' + validWorkDir + '/WH_EVAL_' + str(jobID) + '_' + str(gageID) + '.out\n'
-        fileObj.write(inStr)
-        inStr = '#SBATCH -e ' + validWorkDir + '/WH_EVAL_' + str(jobID) + '_' + str(gageID) + '.err\n'
-        fileObj.write(inStr)
-        fileObj.write('#SBATCH -t 01:00:00\n')
-        if len(jobData.queNameAnalysis.strip()) > 0:
-            inStr = '#SBATCH -p ' + str(jobData.queNameAnalysis) + '\n'
-            fileObj.write(inStr)
-        inStr = "#SBATCH -N 1\n"
-        fileObj.write(inStr)
-        fileObj.write('\n')
-        inStr = 'cd ' + validWorkDir + '\n'
-        fileObj.write(inStr)
-        inStr = "Rscript " + validWorkDir + "/valid_workflow.R " + rScript + "\n"
-        fileObj.write(inStr)
-        fileObj.close
+        linkCmdScript(jobData,outFile2,spec)
     except:
-        jobData.errMsg = "ERROR: Failure to create: " + pbsOut
         raise
         
     # Create validScript.R
@@ -1627,7 +1053,7 @@ def generateSlurmEvalRunScript(jobData,jobID,gageID,runDir,gageMeta,calibWorkDir
         inStr = "validDir <- '" + validWorkDir + "'\n"
         fileObj.write(inStr)
         fileObj.write("# Objective function#\n")
-        inStr = "objFn <- '" + str(jobData.objFunc) + "'\n"
+        inStr = "objFn <- '" + str(staticData.objFunc) + "'\n"
         fileObj.write(inStr)
         fileObj.write("# Basin-specific metadata\n")
         inStr = "siteId <- '" + str(gageMeta.gage) + "'\n"
@@ -1635,184 +1061,31 @@ def generateSlurmEvalRunScript(jobData,jobID,gageID,runDir,gageMeta,calibWorkDir
         inStr = "linkId <- " + str(gageMeta.comID) + "\n"
         fileObj.write(inStr)
         fileObj.write('# Start and dates for evaluation period (e.g., after spinup period)\n')
-        inStr = "startCalibDate <- as.POSIXct(\"" + jobData.bCalibEvalDate.strftime('%Y-%m-%d') + "\", " + \
+        inStr = "startCalibDate <- as.POSIXct(\"" + staticData.bCalibEvalDate.strftime('%Y-%m-%d') + "\", " + \
                  "format=\"%Y-%m-%d\", tz=\"UTC\")\n"
         fileObj.write(inStr)
-        inStr = "endCalibDate <- as.POSIXct(\"" + jobData.eCalibDate.strftime('%Y-%m-%d') + "\", " + \
+        inStr = "endCalibDate <- as.POSIXct(\"" + staticData.eCalibDate.strftime('%Y-%m-%d') + "\", " + \
                  "format=\"%Y-%m-%d\", tz=\"UTC\")\n"
         fileObj.write(inStr)
-        inStr = "startValidDate <- as.POSIXct(\"" + jobData.bValidEvalDate.strftime('%Y-%m-%d') + "\", " + \
+        inStr = "startValidDate <- as.POSIXct(\"" + staticData.bValidEvalDate.strftime('%Y-%m-%d') + "\", " + \
                  "format=\"%Y-%m-%d\", tz=\"UTC\")\n"
         fileObj.write(inStr)
-        inStr = "endValidDate <- as.POSIXct(\"" + jobData.eValidDate.strftime('%Y-%m-%d') + "\", " + \
+        inStr = "endValidDate <- as.POSIXct(\"" + staticData.eValidDate.strftime('%Y-%m-%d') + "\", " + \
                  "format=\"%Y-%m-%d\", tz=\"UTC\")\n"
         fileObj.write(inStr)
         fileObj.write('# Specify number of cores to use\n')
-        inStr = "ncores <- " + str(jobData.nCoresR) + "\n"
+        inStr = "ncores <- " + str(staticData.nCoresR) + "\n"
         fileObj.write(inStr)
         fileObj.write('# Specify whether to run daily or hourly analysis\n')
-        if jobData.dailyAnalysis == 1:
+        if staticData.dailyAnalysis == 1:
             fileObj.write("calcDailyStats <- TRUE\n")
         else:
             fileObj.write("calcDailyStats <- FALSE\n")
-        fileObj.close
+        fileObj.close()
     except:
         jobData.errMsg = "ERROR: Failure to create: " + rScript
         raise
         
-def generateBsubParmRunScript(jobData,runDir,gageID):
-    """
-    Generic function to run BSUB command to run the parameter generation script.
-    """
-    
-    outFile = runDir + "/run_params.sh"
-    
-    if os.path.isfile(outFile):
-        os.remove(outFile)
-        
-    try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        fileObj.write('#\n')
-        if len(jobData.acctKey.strip()) > 0:
-            inStr = "#BSUB -P " + str(jobData.acctKey) + '\n'
-            fileObj.write(inStr)
-        fileObj.write('#BSUB -x\n')
-        inStr = "#BSUB -n 1\n"
-        fileObj.write(inStr)
-        inStr = "#BSUB -J WH_PARM_GEN_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
-        fileObj.write(inStr)
-        inStr = '#BSUB -o ' + runDir + '/%J.out\n'
-        fileObj.write(inStr)
-        inStr = '#BSUB -e ' + runDir + '/%J.err\n'
-        fileObj.write(inStr)
-        fileObj.write('#BSUB -W 0:20\n')
-        if len(jobData.queNameAnalysis.strip()) > 0:
-            inStr = '#BSUB -q ' + str(jobData.queNameAnalysis) + '\n'
-            fileObj.write(inStr)
-        fileObj.write('\n')
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        fileObj.write('./gen_parms.sh\n')
-        fileObj.close
-    except:
-        jobData.errMsg = "ERROR: Failure to create: " + outFile
-        raise
-        
-def generatePbsParmRunScript(jobData,runDir,gageID):
-    """
-    Generic function to run PBS command to run the parameter generation script.
-    """
-    
-    outFile = runDir + "/run_params.sh"
-    
-    if os.path.isfile(outFile):
-        os.remove(outFile)
-        
-    try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        fileObj.write('#\n')
-        if len(jobData.acctKey.strip()) > 0:
-            inStr = "#PBS -A " + str(jobData.acctKey) + '\n'
-            fileObj.write(inStr)
-        inStr = "#PBS -N WH_PARM_GEN_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
-        fileObj.write(inStr)
-        inStr = '#PBS -o ' + runDir + '/WH_PARM_GEN_' + str(jobData.jobID) + '_' + str(gageID) + '.out\n'
-        fileObj.write(inStr)
-        inStr = '#PBS -e ' + runDir + '/WH_PARM_GEN_' + str(jobData.jobID) + '_' + str(gageID) + '.err\n'
-        fileObj.write(inStr)
-        fileObj.write('#PBS -l walltime=00:20:00\n')
-        if len(jobData.queNameAnalysis.strip()) > 0:
-            inStr = '#PBS -q ' + str(jobData.queNameAnalysis) + '\n'
-            fileObj.write(inStr)
-        inStr = "#PBS -l select=1:ncpus=1:mpiprocs=1\n"
-        fileObj.write(inStr)
-        fileObj.write('\n')
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        fileObj.write('./gen_parms.sh\n')
-        fileObj.close
-    except:
-        jobData.errMsg = "ERROR: Failure to create: " + outFile
-        raise
-        
-def generateSlurmParmRunScript(jobData,runDir,gageID):
-    """
-    Generic function to run Slurm command to run the parameter generation script.
-    """
-    
-    outFile = runDir + "/run_params.sh"
-    
-    if os.path.isfile(outFile):
-        os.remove(outFile)
-        
-    try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        fileObj.write('#\n')
-        if len(jobData.acctKey.strip()) > 0:
-            inStr = "#SBATCH -A " + str(jobData.acctKey) + '\n'
-            fileObj.write(inStr)
-        inStr = "#SBATCH -J WH_PARM_GEN_" + str(jobData.jobID) + "_" + str(gageID) + '\n'
-        fileObj.write(inStr)
-        inStr = '#SBATCH -o ' + runDir + '/WH_PARM_GEN_' + str(jobData.jobID) + '_' + str(gageID) + '.out\n'
-        fileObj.write(inStr)
-        inStr = '#SBATCH -e ' + runDir + '/WH_PARM_GEN_' + str(jobData.jobID) + '_' + str(gageID) + '.err\n'
-        fileObj.write(inStr)
-        fileObj.write('#SBATCH -t 00:20:00\n')
-        if len(jobData.queNameAnalysis.strip()) > 0:
-            inStr = '#SBATCH -p ' + str(jobData.queNameAnalysis) + '\n'
-            fileObj.write(inStr)
-        inStr = "#SBATCH -N 1\n"
-        fileObj.write(inStr)
-        fileObj.write('\n')
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        fileObj.write('./gen_parms.sh\n')
-        fileObj.close
-    except:
-        jobData.errMsg = "ERROR: Failure to create: " + outFile
-        raise
-        
-def generateMpiParmRunScript(jobData,runDir,gageID):
-    """
-    Generic function to run mpiexec/mpirun to run the parameter generation script.
-    """
-    
-    outFile = runDir + "/run_params.sh"
-    
-    if os.path.isfile(outFile):
-        os.remove(outFile)
-        
-    try:
-        fileObj = open(outFile,'w')
-        fileObj.write('#!/bin/bash\n')
-        inStr = 'cd ' + runDir + '\n'
-        fileObj.write(inStr)
-        fileObj.write('./gen_parms.sh\n')
-        fileObj.close
-    except:
-        jobData.errMsg = "ERROR: Failure to create: " + outFile
-        raise
-        
-    # Make shell script an executable.
-    cmd = 'chmod +x ' + outFile
-    try:
-        subprocess.call(cmd,shell=True)
-    except:
-        jobData.errMsg = "ERROR: Failure to convert: " + outFile + " to an executable."
-        raise
-        
-    # Create symbolic link with basin/job info in link name for monitoring
-    fileLink = runDir + "/P" + str(jobData.jobID) + str(gageID)
-    if not os.path.islink(fileLink):
-        try:
-            os.symlink(outFile,fileLink)
-        except:
-            jobData.errMsg = "ERROR: Failure to create symbolic link: " + fileLink
-            raise
-        
 def linkToRst(statusData,gage,runDir,gageMeta,staticData):
     """
     Generic function to link to necessary restart files from the spinup.
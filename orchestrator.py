@@ -0,0 +1,309 @@
+# Main calling program to run many workflow jobs (spinup, sensitivity,
+# calibration, validation) from a single long-running process. Each job
+# is ran in its own thread through the main function of the corresponding
+# top-level program. All jobs share one set of scheduler snapshots, one
+# submission limiter, and one set of imported modules, instead of running
+# one polling process per job. Jobs are added and removed by sending
+# commands to the orchestrator over a local UNIX socket:
+#
+#    python orchestrator.py start
+#    python orchestrator.py add calib 5 [--optDbPath DB]
+#    python orchestrator.py remove 5 [--optDbPath DB]
+#    python orchestrator.py list
+#    python orchestrator.py shutdown
+
+# Logan Karsten
+# National Center for Atmospheric Research
+# Research Applications Laboratory
+# karsten@ucar.edu
+# 303-497-2693
+
+import sys
+import argparse
+import os
+import socket
+import SocketServer
+import threading
+
+# Set the Python path to include package specific functions.
+prPath = os.path.realpath(__file__)
+pathSplit = prPath.split('/')
+libPath = '/'
+for j in range(1,len(pathSplit)-1):
+    libPath = libPath + pathSplit[j] + '/'
+topDir = libPath
+libPath = libPath + 'lib/Python'
+sys.path.insert(0,libPath)
+
+import warnings
+warnings.filterwarnings("ignore")
+
+import pandas as pd
+import dbMod
+import statusMod
+import spinup
+import sensitivity
+import calib
+import validation
+
+# Map of workflow phases to the top-level program ran for them.
+phaseMods = {'spinup':spinup,
+             'sensitivity':sensitivity,
+             'calib':calib,
+             'validation':validation}
+
+class orchestrator(object):
+    """
+    Object holding the jobs being ran by the orchestrator. Jobs are keyed
+    by (dbPath,jobID), as all phases of a job share the same job directory
+    and PYTHON.LOCK file. Only one phase of a job may run at a time.
+    """
+    def __init__(self):
+        self.jobs = {}
+        self.lock = threading.RLock()
+        self.shutdown = threading.Event()
+
+    def dbKey(self,dbPath):
+        if dbPath is None:
+            dbPath = topDir + "wrfHydroCalib.db"
+        return os.path.realpath(dbPath)
+
+    def add(self,phase,jobID,dbPath):
+        """
+        Generic function to start running a phase of a job.
+        """
+        if phase not in phaseMods:
+            return "ERROR: Unknown phase: " + phase
+        key = (self.dbKey(dbPath),int(jobID))
+
+        self.lock.acquire()
+        try:
+            if key in self.jobs and self.jobs[key]['thread'].isAlive():
+                return "ERROR: Job ID: " + str(jobID) + " is already running phase: " + \
+                       self.jobs[key]['phase']
+            argv = [str(jobID),'--optDbPath',key[0]]
+            thread = threading.Thread(target=self.runJob,args=(key,phase,argv))
+            thread.daemon = True
+            thread.stopEvent = threading.Event()
+            self.jobs[key] = {'phase':phase,'thread':thread,'status':'RUNNING'}
+            thread.start()
+        finally:
+            self.lock.release()
+
+        return "ADDED JOB ID: " + str(jobID) + " PHASE: " + phase
+
+    def remove(self,jobID,dbPath):
+        """
+        Generic function to ask a running job to stop. The job stops at the
+        beginning of its next sweep through the basins.
+        """
+        key = (self.dbKey(dbPath),int(jobID))
+        self.lock.acquire()
+        try:
+            if key not in self.jobs:
+                return "ERROR: Job ID: " + str(jobID) + " is not known to the orchestrator."
+            self.jobs[key]['thread'].stopEvent.set()
+            self.jobs[key]['status'] = 'STOPPING'
+        finally:
+            self.lock.release()
+        return "STOPPING JOB ID: " + str(jobID)
+
+    def listJobs(self):
+        """
+        Generic function to report the status of all jobs.
+        """
+        lines = []
+        self.lock.acquire()
+        try:
+            for key in sorted(self.jobs.keys()):
+                lines.append("JOB ID: " + str(key[1]) + " PHASE: " + self.jobs[key]['phase'] + \
+                             " STATUS: " + self.jobs[key]['status'] + " DB: " + key[0])
+        finally:
+            self.lock.release()
+        if len(lines) == 0:
+            return "NO JOBS"
+        return "\n".join(lines)
+
+    def runJob(self,key,phase,argv):
+        """
+        Generic function ran by each job thread. The main function of the
+        top-level program exits through sys.exit, which only ends this thread.
+        """
+        status = 'COMPLETE'
+        try:
+            phaseMods[phase].main(argv)
+        except SystemExit as e:
+            if e.code not in [None,0]:
+                status = 'FAILED (' + str(e.code) + ')'
+        except:
+            status = 'FAILED'
+
+        self.lock.acquire()
+        try:
+            if self.jobs[key]['status'] == 'STOPPING':
+                status = 'STOPPED'
+            self.jobs[key]['status'] = status
+        finally:
+            self.lock.release()
+
+        self.cleanLock(key)
+        print "ORCHESTRATOR: JOB ID: " + str(key[1]) + " PHASE: " + phase + " " + status
+
+    def cleanLock(self,key):
+        """
+        Generic function to remove a PYTHON.LOCK file left behind by a job
+        that exited with an error. Since the lock holds the PID of the
+        orchestrator, it would otherwise block the job from being added again.
+        """
+        try:
+            jobData = statusMod.statusMeta()
+            jobData.jobID = key[1]
+            jobData.dbPath = key[0]
+            db = dbMod.Database(jobData)
+            db.connect(jobData)
+            db.jobStatus(jobData)
+            db.disconnect(jobData)
+            lockPath = str(jobData.jobDir) + "/PYTHON.LOCK"
+            if os.path.isfile(lockPath):
+                pidObj = pd.read_csv(lockPath)
+                if int(pidObj.PID[0]) == os.getpid():
+                    os.remove(lockPath)
+        except:
+            print "ORCHESTRATOR: Unable to check LOCK file for job ID: " + str(key[1])
+
+    def stopAll(self):
+        """
+        Generic function to ask all jobs to stop, and wait for them to do so.
+        """
+        self.lock.acquire()
+        try:
+            threads = []
+            for key in self.jobs.keys():
+                if self.jobs[key]['thread'].isAlive():
+                    self.jobs[key]['thread'].stopEvent.set()
+                    self.jobs[key]['status'] = 'STOPPING'
+                    threads.append(self.jobs[key]['thread'])
+        finally:
+            self.lock.release()
+        for thread in threads:
+            while thread.isAlive():
+                thread.join(1.0)
+
+    def command(self,line):
+        """
+        Generic function to carry out one command received over the socket.
+        """
+        parser = argparse.ArgumentParser(prog='orchestrator')
+        parser.add_argument('cmd',type=str,choices=['add','remove','list','shutdown'])
+        parser.add_argument('args',type=str,nargs='*')
+        parser.add_argument('--optDbPath',type=str,nargs='?')
+        try:
+            cmdArgs = parser.parse_args(line.split())
+        except SystemExit:
+            return "ERROR: Invalid command: " + line
+
+        try:
+            if cmdArgs.cmd == 'add' and len(cmdArgs.args) == 2:
+                return self.add(cmdArgs.args[0],cmdArgs.args[1],cmdArgs.optDbPath)
+            if cmdArgs.cmd == 'remove' and len(cmdArgs.args) == 1:
+                return self.remove(cmdArgs.args[0],cmdArgs.optDbPath)
+            if cmdArgs.cmd == 'list':
+                return self.listJobs()
+            if cmdArgs.cmd == 'shutdown':
+                self.shutdown.set()
+                return "SHUTTING DOWN"
+        except ValueError:
+            pass
+        return "ERROR: Invalid command: " + line
+
+class commandHandler(SocketServer.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline().strip()
+        self.wfile.write(self.server.orch.command(line) + "\n")
+
+def main(argv):
+    # Parse arguments.
+    parser = argparse.ArgumentParser(description='Orchestrator to run many workflow jobs ' + \
+             'from a single process.')
+    parser.add_argument('cmd',type=str,choices=['start','add','remove','list','shutdown'],
+                        help='Start the orchestrator, or send it a command.')
+    parser.add_argument('args',type=str,nargs='*',
+                        help='Arguments to the command: add <phase> <jobID>, remove <jobID>.')
+    parser.add_argument('--optDbPath',type=str,nargs='?',
+                        help='Optional alternative path to SQLite DB file.')
+    parser.add_argument('--sockPath',type=str,nargs='?',
+                        help='Optional alternative path to the orchestrator socket.')
+
+    args = parser.parse_args(argv)
+
+    if args.sockPath is not None:
+        sockPath = args.sockPath
+    else:
+        sockPath = topDir + "ORCHESTRATOR.SOCK"
+
+    if args.cmd != 'start':
+        line = " ".join([args.cmd] + args.args)
+        if args.optDbPath is not None:
+            line = line + " --optDbPath " + os.path.realpath(args.optDbPath)
+        try:
+            sendCommand(sockPath,line)
+        except:
+            print "ERROR: Unable to reach orchestrator at: " + sockPath
+            sys.exit(1)
+        sys.exit(0)
+
+    # Make sure another orchestrator is not already listening on this socket.
+    if os.path.exists(sockPath):
+        try:
+            sendCommand(sockPath,"list")
+            print "ERROR: An orchestrator is already running on: " + sockPath
+            sys.exit(1)
+        except socket.error:
+            os.remove(sockPath)
+
+    try:
+        server = SocketServer.UnixStreamServer(sockPath,commandHandler)
+    except:
+        print "ERROR: Unable to create orchestrator socket: " + sockPath
+        sys.exit(1)
+    os.chmod(sockPath,0600)
+    server.orch = orchestrator()
+
+    serverThread = threading.Thread(target=server.serve_forever)
+    serverThread.daemon = True
+    serverThread.start()
+    print "ORCHESTRATOR LISTENING ON: " + sockPath
+
+    try:
+        while not server.orch.shutdown.is_set():
+            server.orch.shutdown.wait(1.0)
+    except KeyboardInterrupt:
+        pass
+
+    print "ORCHESTRATOR: STOPPING ALL JOBS"
+    server.orch.stopAll()
+    server.shutdown()
+    server.server_close()
+    os.remove(sockPath)
+
+def sendCommand(sockPath,line):
+    """
+    Generic function to send one command to a running orchestrator and print
+    the response.
+    """
+    sock = socket.socket(socket.AF_UNIX,socket.SOCK_STREAM)
+    try:
+        sock.connect(sockPath)
+        sock.sendall(line + "\n")
+        response = ''
+        while True:
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            response = response + chunk
+    finally:
+        sock.close()
+    print response.strip()
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -11,7 +11,6 @@
 import sys
 import argparse
 import os
-import time
 import pwd
 import numpy as np
 import datetime
@@ -32,6 +31,7 @@ warnings.filterwarnings("ignore")
 import statusMod
 import dbMod
 import errMod
+import telemMod
 import configMod
 import sensitivityMod
 import pandas as pd
@@ -45,7 +45,7 @@ def main(argv):
     parser.add_argument('--optDbPath',type=str,nargs='?',
                         help='Optional alternative path to SQLite DB file.')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # If the SQLite file does not exist, throw an error.
     if args.optDbPath is not None:
@@ -159,6 +159,17 @@ def main(argv):
     # Assign the SQL command from the config file into the jobData structure
     jobData.gSQL = staticData.gSQL
     
+    # Assign the scheduler snapshot lifetime from the config file.
+    jobData.schedCacheTTL = staticData.schedCacheTTL
+    jobData.maxSubmitRate = staticData.maxSubmitRate
+    jobData.maxJobsInFlight = staticData.maxJobsInFlight
+    jobData.idleWait = staticData.idleWait
+    jobData.streamCollect = staticData.streamCollect
+    jobData.autoSize = staticData.autoSize
+    jobData.cellsPerCore = staticData.cellsPerCore
+    jobData.wallTimeModel = staticData.wallTimeModel
+    jobData.sensMaxRuns = staticData.sensMaxRuns
+    
     # Check gages in directory to match what's in the database
     try:
         jobData.checkGages2(db)
@@ -291,7 +302,7 @@ def main(argv):
     pbsPostId = np.empty([len(jobData.gages)],np.int64)
     pbsPostId[:] = -9999
     
-    # Pull all the status values into the keySlot array. 
+    # Ensure each basin has a valid domainID before pulling status values.
     for basin in range(0,len(jobData.gages)):
         domainID = jobData.gageIDs[basin]
             
@@ -299,14 +310,11 @@ def main(argv):
             jobData.errMsg = "ERROR: Unable to locate domainID for gage: " + str(jobData.gages[basin])
             errMod.errOut(jobData)
             
-        # We are going to pull all values for one basin, then place them into the array.
-        # This is faster then looping over each iteration at a time. 
-        statusData = db.sensIterationStatus(jobData,domainID,str(jobData.gages[basin]))
-        statusData = [list(item) for item in statusData]
-        for iteration in range(0,int(jobData.nSensIter)):
-            for iteration2 in range(0,int(jobData.nSensIter)):
-                if statusData[iteration2][0] == iteration+1:
-                    keySlot[basin,iteration] = float(statusData[iteration2][1])
+    # Pull all the status values into the keySlot array with a single query.
+    try:
+        keySlot[:,:] = db.sensStatusMatrix(jobData)
+    except:
+        errMod.errOut(jobData)
             
     if len(np.where(keySlot != 0.0)[0]) == 0:
         # We need to either check to see if pre-processing has taken place, or
@@ -314,6 +322,19 @@ def main(argv):
         preProcStatus = False
         
     while not completeStatus:
+        # When ran through the orchestrator, the job may be asked to stop.
+        if statusMod.stopRequested():
+            print "STOP REQUESTED FOR JOB ID: " + str(jobData.jobID)
+            break
+            
+        # Mark the beginning of a new sweep through the basins. One snapshot of the
+        # scheduler is shared by all job status checks made during the sweep.
+        statusMod.markSchedSweep()
+        keySlotPrev = keySlot.copy()
+        
+        # Number of sensitivity model runs in flight across all basins.
+        jobFlight = sensitivityMod.runsInFlight(keySlot)
+        
         # Walk through each basin undergoing sensitivity analysis. 
         for basin in range(0,len(jobData.gages)):
             print "GAGE: " + jobData.gages[basin]
@@ -324,10 +345,6 @@ def main(argv):
             # analysis.
             postProcStatus = False
             
-            # Calculate the number of "batches" we are going to run
-            nBatches = int(jobData.nSensIter/jobData.nSensBatch)
-            entryValueBatch = float(jobData.nSensBatch)
-            
             # If we have a pre-processing complete file, set our pre-proc status to True. 
             # Also, log parameter values generated if the log file hasn't been created. 
             preProcComplete = jobData.jobDir + "/" + jobData.gages[basin] + "/RUN.SENSITIVITY/preProc.COMPLETE"
@@ -356,37 +373,34 @@ def main(argv):
             else:
                 # The goal here is to only operate on a fixed number of model runs at a time.
                 # If you have a large parameter sample size, it's possible to have hundreds,
-                # if not thousands of model permuatations. This worflow allows for 
-                # only batches of model runs to be ran at a time as to not bog down the system. 
-                for batchIter in range(0,nBatches):
-                    time.sleep(30)
-                    batchCheck = keySlot[basin,(batchIter*jobData.nSensBatch):((batchIter+1)*jobData.nSensBatch)]
-                    if batchIter == 0:
-                        batchCheckPrev = entryValueBatch
-                    else:
-                        batchCheckPrev = keySlot[basin,((batchIter-1)*jobData.nSensBatch):(batchIter*jobData.nSensBatch)]
-                        batchCheckPrev = batchCheckPrev.sum()
-                    if batchCheck.sum() != entryValueBatch and batchCheckPrev == entryValueBatch:
-                        for iterTmp in range(0,jobData.nSensBatch):
-                            iteration = batchIter*jobData.nSensBatch + iterTmp
-                            keyCheck1 = keySlot[basin,iteration]
-                            if keyCheck1 < 1:
-                                # This model iteration has not completed. 
-                                try:
-                                    sensitivityMod.runModel(jobData,staticData,db,jobData.gageIDs[basin],jobData.gages[basin],keySlot,basin,iteration,pbsJobId,pbsCollectId)
-                                except:
-                                    errMod.errOut(jobData)
-                                
-                                if keySlot[basin,iteration] == 0.0 and keyCheck1 == 0.5:
-                                    # Put some spacing between launching model simulations to slow down que geting 
-                                    # overloaded.
-                                    time.sleep(3)
-                                    
-                                # Update the temporary status array as it will be checked for this batch of model runs.
-                                batchCheck[iterTmp] = keySlot[basin,iteration]
+                # if not thousands of model permuatations. Model runs are started through a 
+                # sliding window, keeping up to nSensBatch runs of this basin in flight, and
+                # up to sensMaxRuns runs across all basins if set. A new run is started as
+                # soon as any run in flight completes, instead of waiting on a full batch.
+                nFlight = sensitivityMod.runsInFlight(keySlot[basin,:])
+                for iteration in range(0,jobData.nSensIter):
+                    keyCheck1 = keySlot[basin,iteration]
+                    if keyCheck1 >= 1:
+                        continue
+                    if keyCheck1 == 0.0:
+                        # This model iteration has not started. Hold it back if the window is full.
+                        if nFlight >= jobData.nSensBatch:
+                            continue
+                        if int(jobData.sensMaxRuns) > 0 and jobFlight >= int(jobData.sensMaxRuns):
+                            continue
+                    try:
+                        sensitivityMod.runModel(jobData,staticData,db,jobData.gageIDs[basin],jobData.gages[basin],keySlot,basin,iteration,pbsJobId,pbsCollectId)
+                    except:
+                        errMod.errOut(jobData)
+                        
+                    # Update the number of runs in flight for the status change of this iteration.
+                    flightTmp = sensitivityMod.runsInFlight(keySlot[basin,iteration:iteration+1]) - \
+                                sensitivityMod.runsInFlight(np.array([keyCheck1]))
+                    nFlight = nFlight + flightTmp
+                    jobFlight = jobFlight + flightTmp
                                 
             # Run post-processing ONLY when all model simulations are finished.
-            if not postProcStatus and preProcStatus and len(np.where(batchCheck != 1.0)[0]) == 0:
+            if not postProcStatus and preProcStatus and len(np.where(keySlot[basin,:] != 1.0)[0]) == 0:
                 print "READY FOR POST PROCESSING"
                 try:
                     sensitivityMod.postProc(postProcStatus,jobData,staticData,db,jobData.gageIDs[basin],jobData.gages[basin],pbsPostId,basin)
@@ -458,6 +472,21 @@ def main(argv):
         except:
             jobData.errMsg = "ERROR: Unable to update workflow LOCK file: " + lockPath
             errMod.errOut(jobData)
+
+        # Enter the telemetry of jobs submitted, started, or finished during
+        # this sweep into the database.
+        try:
+            telemMod.ingestTelemetry(jobData,db)
+        except:
+            errMod.errOut(jobData)
+
+        # If nothing changed during this sweep, wait on the scheduler instead
+        # of immediately sweeping through the basins again.
+        if not completeStatus and (keySlot == keySlotPrev).all():
+            try:
+                statusMod.waitSchedEvent(jobData,[jobData.jobRunType,jobData.analysisRunType])
+            except:
+                errMod.errOut(jobData)
             
     # Remove LOCK file
     os.remove(lockPath)
@@ -33,6 +33,7 @@ warnings.filterwarnings("ignore")
 import statusMod
 import dbMod
 import errMod
+import telemMod
 import spinupMod
 import configMod
 
@@ -45,7 +46,7 @@ def main(argv):
     parser.add_argument('--optDbPath',type=str,nargs='?',
                         help='Optional alternative path to SQLite DB file.')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # If the SQLite file does not exist, throw an error.
     if args.optDbPath is not None:
@@ -107,6 +108,12 @@ def main(argv):
     
     # Assign the SQL command from the config file into the jobData structure
     jobData.gSQL = staticData.gSQL
+    
+    # Assign the scheduler snapshot lifetime from the config file.
+    jobData.schedCacheTTL = staticData.schedCacheTTL
+    jobData.maxSubmitRate = staticData.maxSubmitRate
+    jobData.maxJobsInFlight = staticData.maxJobsInFlight
+    jobData.idleWait = staticData.idleWait
         
     # Check gages in directory to match what's in the database
     try:
@@ -254,8 +261,13 @@ def main(argv):
     # -1.0 - Model has failed twice. A LOCK file has been created.
     # Once all array elements are 1.0, then completeStatus goes to True, an entry into
     # the database occurs, and the program will complete.
-    keySlot = np.empty(len(jobData.gages))
-    keySlot[:] = 0.0
+    # The array is backed by a file in the job directory, so the status of each 
+    # basin carries over when the workflow is restarted. A basin left between a
+    # failure (-0.25) and it's restart is checked again as a running model.
+    try:
+        keySlot = statusMod.openKeySlot(jobData,"SPINUP",[len(jobData.gages)],{-0.25:0.5})
+    except:
+        errMod.errOut(jobData)
     entryValue = float(len(jobData.gages))
     
     # Create an array to hold systme job ID values. This will only be used for
@@ -266,6 +278,16 @@ def main(argv):
     pbsJobId[:] = -9999
 
     while not completeStatus:
+        # When ran through the orchestrator, the job may be asked to stop.
+        if statusMod.stopRequested():
+            print "STOP REQUESTED FOR JOB ID: " + str(jobData.jobID)
+            break
+            
+        # Mark the beginning of a new sweep through the basins. One snapshot of the
+        # scheduler is shared by all job status checks made during the sweep.
+        statusMod.markSchedSweep()
+        keySlotPrev = keySlot.copy()
+        
         # Walk through spinup directory for each basin. Determine the status of
         # the model runs by the files available. If restarting, modify the 
         # namelist files appropriately. Then, restart the model. Once all
@@ -318,6 +340,9 @@ def main(argv):
             errMod.sendMsg(jobData)
             completeStatus = True
             
+        # Flush status transitions made during this sweep to disk.
+        keySlot.flush()
+        
         # Open the Python LOCK file. Write a blank line to the file and close it.
         # This action will simply modify the file modification time while only adding
         # a blank line.
@@ -328,6 +353,21 @@ def main(argv):
         except:
             jobData.errMsg = "ERROR: Unable to update workflow LOCK file: " + pyLockPath
             errMod.errOut(jobData)
+
+        # Enter the telemetry of jobs submitted, started, or finished during
+        # this sweep into the database.
+        try:
+            telemMod.ingestTelemetry(jobData,db)
+        except:
+            errMod.errOut(jobData)
+
+        # If nothing changed during this sweep, wait on the scheduler instead
+        # of immediately sweeping through the basins again.
+        if not completeStatus and (keySlot == keySlotPrev).all():
+            try:
+                statusMod.waitSchedEvent(jobData,[jobData.jobRunType,jobData.analysisRunType])
+            except:
+                errMod.errOut(jobData)
             
     # Remove LOCK file
     os.remove(pyLockPath)
@@ -137,20 +137,16 @@ def main(argv):
     iterArray = np.empty([int(jobData.nIter)],np.int)
     completeArray = np.empty([int(jobData.nIter)],np.float)
 
+    # Pull the status of all basins/iterations with a single query.
+    try:
+        statusAll = db.calibStatusMatrix(jobData)
+    except:
+        errMod.errOut(jobData)
+    iterArray[:] = np.arange(1,int(jobData.nIter)+1)
+
     meanSum = 0.0
     for basin in range(0,len(jobData.gages)):
-        iterArray[:] = 0
-        completeArray[:] = 0.0
-        keyStatus = 0.0
-        keyStatusPrev = 0.0
-        domainID = jobData.gageIDs[basin]
-        iterComplete = 1 
-        statusData = db.iterationStatus(jobData,domainID,str(jobData.gages[basin]))
-        for iteration in range(0,int(jobData.nIter)):
-            keyStatus = float(statusData[iteration][1])
-            iterationTmp = int(statusData[iteration][0])
-	    iterArray[iteration] = iterationTmp
-            completeArray[iteration] = keyStatus
+        completeArray[:] = statusAll[basin,:]
 
 	indComplete = np.where(completeArray == 1)
 	indCheck1 = np.where(completeArray != 1.0)
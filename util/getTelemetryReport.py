@@ -0,0 +1,226 @@
+# This is a utility program for the user to summarize how long the jobs
+# of a calibration job have taken, from the job telemetry recorded in the
+# database. For each phase of the workflow and type of job, the throughput,
+# percentiles of the time spent waiting in the queue, and percentiles of the
+# time spent running are reported. Jobs that ran (or have been running) for
+# much longer than the typical job of the same type are reported as
+# stragglers, along with the basins with the slowest model runs. The user
+# has the option to either print to the screen, or send the output to the
+# job contact information.
+
+# Logan Karsten
+# National Center for Atmospheric Research
+# Research Applications Laboratory
+# 303-497-2693
+# karsten@ucar.edu
+
+import argparse
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+import warnings
+warnings.filterwarnings("ignore")
+
+# Set the Python path to include package specific functions.
+prPath = os.path.realpath(__file__)
+pathSplit = prPath.split('/')
+libPath = '/'
+for j in range(1,len(pathSplit)-2):
+    libPath = libPath + pathSplit[j] + '/'
+libPath = libPath + 'lib/Python'
+sys.path.insert(0,libPath)
+
+import statusMod
+import dbMod
+import errMod
+import configMod
+
+# Percentiles reported for the queue wait and run times.
+pctReport = [50,90,99]
+
+def main(argv):
+    # Parse arguments. User must input a job ID and DB file.
+    parser = argparse.ArgumentParser(description='Utility program to report the ' + \
+                                     'runtime telemetry of a calibration job.')
+    parser.add_argument('jobID',metavar='jobID',type=str,nargs='+',
+                        help='Job ID specific to calibration spinup.')
+    parser.add_argument('contactFlag',metavar='ctFlag',type=int,nargs='+',
+                        help='1 = send to job contact, 0 = print to screen.')
+    parser.add_argument('inDB',metavar='inDB',type=str,nargs='+',
+                        help='Required path to sqllite3 DB file.')
+    parser.add_argument('--email',nargs='?',help='Optional email to pipe output to.')
+    parser.add_argument('--straggler',type=float,nargs='?',default=2.0,
+                        help='Multiple of the median run time of a job type beyond ' + \
+                        'which a job is reported as a straggler.')
+    parser.add_argument('--nBasins',type=int,nargs='?',default=10,
+                        help='Number of the slowest basins to report.')
+
+    args = parser.parse_args()
+
+    # If the sqllite DB file does not exist, throw an error to the user.
+    if not os.path.isfile(args.inDB[0]):
+        print "ERROR: Unable to locate DB file: " + args.inDB[0]
+        sys.exit(1)
+
+    # Initialize object to hold status and job information
+    jobData = statusMod.statusMeta()
+    jobData.jobID = int(args.jobID[0])
+    jobData.dbPath = args.inDB[0]
+
+    # Establish database connection.
+    db = dbMod.Database(jobData)
+    try:
+        db.connect(jobData)
+    except:
+        print jobData.errMsg
+        sys.exit(1)
+
+    # Extract job data from database
+    try:
+        db.jobStatus(jobData)
+    except:
+        print jobData.errMsg
+        sys.exit(1)
+
+    # Pull extensive meta-data describing the job from the config file.
+    configPath = str(jobData.jobDir) + "/setup.config"
+    if not os.path.isfile(configPath):
+        print "ERROR: Configuration file: " + configPath + " not found."
+        sys.exit(1)
+    try:
+        staticData = configMod.readConfig(configPath)
+    except:
+        print "ERROR: Failure to read configuration file: " + configPath
+        sys.exit(1)
+
+    # Assign the SQL command from the config file into the jobData structure
+    jobData.gSQL = staticData.gSQL
+
+    # Check gages in directory to match what's in the database
+    try:
+        jobData.checkGages2(db)
+    except:
+        errMod.errOut(jobData)
+
+    # If an optional email was passed to the program, update the job object to
+    # reflect this for information dissemination.
+    if args.email:
+        jobData.slackObj = None
+        jobData.email = str(args.email)
+
+    try:
+        tblData = db.telemetryTable(jobData)
+    except:
+        errMod.errOut(jobData)
+
+    if len(tblData) == 0:
+        print "NO JOB TELEMETRY FOUND FOR JOB ID: " + str(jobData.jobID)
+        sys.exit(0)
+
+    gageNames = dict(zip([int(gageID) for gageID in jobData.gageIDs],jobData.gages))
+    timeNow = int(time.time())
+
+    # A job that has not finished is only still running if it has not been
+    # submitted again since.
+    tblData['latest'] = ~tblData.duplicated(['script','task'],keep='last')
+    tblData['wait'] = tblData.startTime - tblData.submitTime
+    tblData['runtime'] = tblData.endTime - tblData.startTime
+    running = tblData.endTime.isnull() & tblData.startTime.notnull() & tblData.latest
+    tblData.loc[running,'runtime'] = timeNow - tblData.startTime[running]
+
+    msgOut = "JOB TELEMETRY FOR JOB ID: " + str(jobData.jobID) + "\n\n"
+    medians = {}
+    for (phase,jobType),grpTmp in tblData.groupby(['phase','jobType']):
+        done = grpTmp[grpTmp.endTime.notnull()]
+        nFail = int((done.exitCode != 0).sum())
+        nRun = int(running[grpTmp.index].sum())
+        nQueue = int((grpTmp.startTime.isnull() & grpTmp.endTime.isnull() & grpTmp.latest).sum())
+        msgOut = msgOut + phase + " " + jobType + ": SUBMITTED: " + str(int(grpTmp.submitTime.notnull().sum())) + \
+                 " FINISHED: " + str(len(done)) + " FAILED: " + str(nFail) + \
+                 " RUNNING: " + str(nRun) + " QUEUED: " + str(nQueue) + "\n"
+        if len(done) > 0:
+            spanTmp = float(done.endTime.max() - grpTmp[['submitTime','startTime']].min().min())
+            msgOut = msgOut + "    THROUGHPUT: " + "%.2f" % (len(done)*3600.0/max(spanTmp,1.0)) + " JOBS/HOUR\n"
+        msgOut = msgOut + pctString("QUEUE WAIT",grpTmp.wait.dropna().values)
+        msgOut = msgOut + pctString("RUN TIME",done.runtime.dropna().values)
+        if done.runtime.notnull().sum() > 0:
+            medians[(phase,jobType)] = float(np.median(done.runtime.dropna().values))
+
+    # Jobs running for much longer than the median of their type.
+    msgOut = msgOut + "\nSTRAGGLERS (OVER " + str(args.straggler) + " X THE MEDIAN RUN TIME):\n"
+    nStraggle = 0
+    for rowNum in tblData.index[tblData.runtime.notnull()]:
+        rowTmp = tblData.loc[rowNum]
+        keyTmp = (rowTmp.phase,rowTmp.jobType)
+        if keyTmp not in medians or medians[keyTmp] <= 0.0:
+            continue
+        if rowTmp.runtime <= args.straggler*medians[keyTmp]:
+            continue
+        if running[rowNum]:
+            stateTmp = "RUNNING"
+        else:
+            stateTmp = "EXIT " + str(int(rowTmp.exitCode))
+        msgOut = msgOut + "    " + rowTmp.phase + " " + rowTmp.jobType + " BASIN: " + \
+                 basinName(gageNames,rowTmp.domainID) + " ITERATION: " + iterName(rowTmp.iteration) + \
+                 " TASK: " + str(int(rowTmp.task)) + " RUN TIME: " + formatSeconds(rowTmp.runtime) + \
+                 " (" + "%.1f" % (rowTmp.runtime/medians[keyTmp]) + " X) " + stateTmp + "\n"
+        nStraggle = nStraggle + 1
+    if nStraggle == 0:
+        msgOut = msgOut + "    NONE\n"
+
+    # Basins with the slowest model runs.
+    msgOut = msgOut + "\nSLOWEST BASINS BY MEDIAN MODEL RUN TIME:\n"
+    modTmp = tblData[(tblData.jobType == 'MODEL') & tblData.endTime.notnull() & (tblData.exitCode == 0)]
+    basinTmp = modTmp.groupby('domainID').runtime.median().sort_values(ascending=False)
+    for domainID in basinTmp.index[0:args.nBasins]:
+        msgOut = msgOut + "    BASIN: " + basinName(gageNames,domainID) + " MEDIAN: " + \
+                 formatSeconds(basinTmp[domainID]) + " RUNS: " + \
+                 str(int((modTmp.domainID == domainID).sum())) + "\n"
+
+    jobData.genMsg = msgOut
+    if int(args.contactFlag[0]) == 0:
+        print jobData.genMsg
+    else:
+        errMod.sendMsg(jobData)
+
+def pctString(label,values):
+    """
+    Generic function to return a line reporting the percentiles of a set
+    of times in seconds.
+    """
+    if len(values) == 0:
+        return "    " + label + ": NONE\n"
+    pctTmp = np.percentile(values,pctReport)
+    return "    " + label + ": " + " ".join(["P" + str(pctReport[i]) + "=" + formatSeconds(pctTmp[i]) \
+                                            for i in range(0,len(pctReport))]) + \
+           " MAX=" + formatSeconds(np.max(values)) + "\n"
+
+def formatSeconds(secTmp):
+    """
+    Generic function to convert a number of seconds into a HH:MM:SS string.
+    """
+    secTmp = int(round(max(secTmp,0)))
+    return "%02d:%02d:%02d" % (secTmp/3600,(secTmp%3600)/60,secTmp%60)
+
+def basinName(gageNames,domainID):
+    """
+    Generic function to return the gage name of a basin for the report.
+    """
+    if pd.isnull(domainID):
+        return "-"
+    return str(gageNames.get(int(domainID),int(domainID)))
+
+def iterName(iteration):
+    """
+    Generic function to return the iteration of a job for the report,
+    counting from 1 as the calibration report does.
+    """
+    if pd.isnull(iteration) or int(iteration) < 0:
+        return "-"
+    return str(int(iteration) + 1)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])